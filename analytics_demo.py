@@ -1,6 +1,9 @@
 # analytics demo - shows different clinic statistics
 # trying to make it look good for showing to people
 
+import argparse
+
+from database.profiling import add_profile_arguments, start_profiling, finish_profiling
 from services.analytics_service import AnalyticsService
 
 
@@ -143,7 +146,8 @@ def demo_doctors():
     print("\nPerformance:")
     for doc in performance:
         print(f"  {doc['name']:30s} | {doc['specialty']:20s} | "
-              f"{doc['total_appointments']:3d} total | {doc['completed']:3d} done | {doc['completion_rate']:5.1f}%")
+              f"{doc['total_appointments']:3d} total | {doc['completed']:3d} done | {doc['completion_rate']:5.1f}% | "
+              f"{doc['revenue']:12,.2f} RON | avg {doc['average_ticket']:9,.2f} RON")
 
 
 def main():
@@ -193,4 +197,12 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="CliniTrack analytics dashboard")
+    add_profile_arguments(parser)
+    args = parser.parse_args()
+
+    start_profiling(args)
+    try:
+        main()
+    finally:
+        finish_profiling(args)
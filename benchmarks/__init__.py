@@ -0,0 +1,3 @@
+"""
+Benchmarks package - performance checks, run with python -m benchmarks.<name>
+"""
@@ -0,0 +1,44 @@
+# AnalyticsService backend='sqlite' (GROUP BY over the rollups) versus
+# backend='numpy' (columnar counting over the base tables) - numpy is expected
+# to lose, it pays for loading the rows; the point is that both agree
+# run from the project root: python -m benchmarks.bench_analytics_backends [appointments]
+
+import sys
+
+from benchmarks.common import build_synthetic_db, remove_temp_db, time_per_op
+from database.connection import close_all_pools
+from services.analytics_service import AnalyticsService
+
+DEFAULT_APPOINTMENTS = 300_000
+REPEAT = 3
+
+ANALYSES = ['get_patient_demographics', 'get_appointment_trends', 'get_peak_hours_analysis',
+            'get_revenue_analysis']
+
+
+def main():
+    appointments = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_APPOINTMENTS
+
+    print("\nANALYTICS BACKEND BENCHMARK")
+    print("=" * 60)
+    db_path = build_synthetic_db(doctors=20, patients=appointments // 10, appointments=appointments)
+    try:
+        services = {backend: AnalyticsService(db_path, cache=False, backend=backend)
+                    for backend in ('sqlite', 'numpy')}
+        print(f"{appointments:,} appointments\n")
+        print(f"  {'analysis':28s} {'sqlite ms':>10s} {'numpy ms':>10s}  same result")
+        print("  " + "-" * 62)
+        for name in ANALYSES:
+            results = {backend: getattr(service, name)() for backend, service in services.items()}
+            # compare the key order too, the GUI shows the dicts as they come
+            same = repr(results['sqlite']) == repr(results['numpy'])
+            times = {backend: time_per_op(lambda i: getattr(service, name)(), REPEAT) / 1000
+                     for backend, service in services.items()}
+            print(f"  {name:28s} {times['sqlite']:10.1f} {times['numpy']:10.1f}  {'yes' if same else 'NO'}")
+    finally:
+        close_all_pools()
+        remove_temp_db(db_path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+# dashboard cost for the whole history versus filtered windows - with the
+# filters pushed into SQL the cost should follow the size of the window
+# run from the project root: python -m benchmarks.bench_analytics_filters
+
+from datetime import date
+
+from benchmarks.common import build_synthetic_db, remove_temp_db, time_per_op, print_row
+from database.connection import close_all_pools
+from services.analytics_filters import last_days, this_quarter
+from services.analytics_service import AnalyticsService
+
+APPOINTMENTS = 300_000
+REPEAT = 5
+# the synthetic data covers 2023-2024
+TODAY = date(2024, 12, 31)
+
+
+def main():
+    db_path = build_synthetic_db(doctors=20, patients=30_000, appointments=APPOINTMENTS)
+    analytics = AnalyticsService(db_path, cache=False)
+
+    start_30, end_30 = last_days(30, TODAY)
+    start_q, end_q = this_quarter(TODAY)
+    views = [
+        ("whole history", {}),
+        ("last 30 days", {'start_date': start_30, 'end_date': end_30}),
+        ("this quarter", {'start_date': start_q, 'end_date': end_q}),
+        ("this quarter, 2 doctors", {'start_date': start_q, 'end_date': end_q, 'doctor_ids': [1, 2]}),
+        ("last 30 days, cancelled", {'start_date': start_30, 'end_date': end_30, 'status': 'Cancelled'}),
+        ("whole history, 2 doctors", {'doctor_ids': [1, 2]}),
+    ]
+
+    print("\nFILTERED ANALYTICS BENCHMARK")
+    print("=" * 60)
+    print(f"{APPOINTMENTS:,} appointments over two years, full dashboard per view\n")
+    try:
+        for label, filters in views:
+            print_row(label, time_per_op(lambda i: analytics.get_dashboard_summary(**filters), REPEAT) / 1000, "ms")
+    finally:
+        close_all_pools()
+        remove_temp_db(db_path)
+
+
+if __name__ == "__main__":
+    main()
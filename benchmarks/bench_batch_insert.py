@@ -0,0 +1,78 @@
+# rows/sec for the per-row create() path versus create_many()
+# create() commits every row (one fsync each), create_many() commits once
+# run from the project root: python -m benchmarks.bench_batch_insert
+
+import time
+
+from benchmarks.common import build_synthetic_db, remove_temp_db
+from database.connection import close_all_pools
+from repositories import PatientRepository, AppointmentRepository, PaymentRepository
+
+ROWS = 2000
+CHUNK_SIZES = [100, 500, 2000]
+
+
+def patient_rows(count):
+    return [{'name': f"Import Patient {i}", 'birthdate': "1990-05-17", 'first_visit': "2025-01-10",
+             'gender': 'F', 'city': 'Cluj'} for i in range(count)]
+
+
+def appointment_rows(count):
+    return [{'patient_id': 1 + i % 100, 'doctor_id': 1 + i % 10, 'date': "2025-03-14",
+             'start_time': "10:00", 'end_time': "10:30", 'status': 'Completed',
+             'procedure_name': 'Cleaning', 'procedure_category': 'Hygiene'} for i in range(count)]
+
+
+def payment_rows(count):
+    return [{'appointment_id': 1 + i % 1000, 'amount': 250.0, 'method': 'Card'} for i in range(count)]
+
+
+def rows_per_sec(func, rows):
+    start = time.perf_counter()
+    func(rows)
+    return len(rows) / (time.perf_counter() - start)
+
+
+def per_row(repo):
+    def insert(rows):
+        for data in rows:
+            repo.create(data)
+    return insert
+
+
+def batched(repo, chunk_size):
+    def insert(rows):
+        repo.create_many(rows, chunk_size=chunk_size)
+    return insert
+
+
+def main():
+    db_path = build_synthetic_db(doctors=10, patients=100, appointments=1000)
+    cases = [
+        ("patients", PatientRepository(db_path), patient_rows),
+        ("appointments", AppointmentRepository(db_path), appointment_rows),
+        ("payments", PaymentRepository(db_path), payment_rows),
+    ]
+
+    print("\nBATCH INSERT BENCHMARK")
+    print("=" * 60)
+    print(f"{ROWS} rows per run, rows/sec (higher is better)\n")
+    header = f"{'table':14s} {'create()':>10s}"
+    for chunk_size in CHUNK_SIZES:
+        header += f" {'many/' + str(chunk_size):>11s}"
+    print(header)
+    print("-" * 60)
+
+    try:
+        for table, repo, make_rows in cases:
+            line = f"{table:14s} {rows_per_sec(per_row(repo), make_rows(ROWS)):10,.0f}"
+            for chunk_size in CHUNK_SIZES:
+                line += f" {rows_per_sec(batched(repo, chunk_size), make_rows(ROWS)):11,.0f}"
+            print(line)
+    finally:
+        close_all_pools()
+        remove_temp_db(db_path)
+
+
+if __name__ == "__main__":
+    main()
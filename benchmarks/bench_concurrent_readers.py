@@ -0,0 +1,154 @@
+# analytics readers and reception-desk writers in separate processes on the
+# same database file - what a writer does to the readers with the old
+# rollback journal and with the WAL profile (database/connection.py)
+# readers run AnalyticsService queries (no cache) back to back, writers
+# book 20 appointments per transaction every few ms
+# python's sqlite3 waits up to 5s for a lock by default, so with the old
+# settings a blocked reader shows up as a slow read rather than an error
+# run from the project root: python -m benchmarks.bench_concurrent_readers [seconds]
+
+import multiprocessing
+import random
+import sqlite3
+import sys
+import time
+
+from benchmarks.common import build_synthetic_db, remove_temp_db
+from database.connection import ROLLBACK_PRAGMAS, configure_pool, close_all_pools
+from repositories import AppointmentRepository
+from services.analytics_service import AnalyticsService
+
+PATIENTS = 5000
+APPOINTMENTS = 100_000
+READERS = 4
+WRITERS = 2
+DEFAULT_SECONDS = 5
+BOOKINGS_PER_COMMIT = 20
+WRITER_PAUSE = 0.005
+
+# (label, writer pragmas, reader pragmas, writers) - None is the default profile
+MODES = [
+    ("WAL, readers only", None, None, 0),
+    ("rollback journal (old settings)", ROLLBACK_PRAGMAS, {'foreign_keys': 'ON'}, WRITERS),
+    ("WAL profile (new)", None, None, WRITERS),
+]
+
+
+def reader(db_path, pragmas, seconds, ready, go, results):
+    configure_pool(db_path, max_size=1, pragmas=pragmas, migrate=False, read_only=True)
+    service = AnalyticsService(db_path, cache=False)
+    queries = [service.get_patient_demographics, service.get_peak_hours_analysis,
+               service.get_doctor_performance]
+    latencies = []
+    errors = 0
+
+    ready.release()
+    go.wait()
+    end = time.perf_counter() + seconds
+    i = 0
+    while time.perf_counter() < end:
+        start = time.perf_counter()
+        try:
+            queries[i % len(queries)]()
+            latencies.append((time.perf_counter() - start) * 1000)
+        except sqlite3.OperationalError:
+            errors += 1
+        i += 1
+
+    close_all_pools()
+    results.put(('reader', latencies, errors))
+
+
+def writer(db_path, pragmas, seconds, ready, go, results, seed):
+    configure_pool(db_path, max_size=1, pragmas=pragmas, migrate=False)
+    repo = AppointmentRepository(db_path)
+    rng = random.Random(seed)
+    commits = 0
+    errors = 0
+
+    ready.release()
+    go.wait()
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        rows = [{'patient_id': rng.randint(1, PATIENTS), 'doctor_id': rng.randint(1, 10),
+                 'date': f"2024-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+                 'start_time': "10:00", 'end_time': "10:30", 'status': 'Completed',
+                 'procedure_name': "Checkup", 'procedure_category': "Diagnostic"}
+                for _ in range(BOOKINGS_PER_COMMIT)]
+        try:
+            repo.create_many(rows)
+            commits += 1
+        except sqlite3.OperationalError:
+            errors += 1
+        time.sleep(WRITER_PAUSE)
+
+    close_all_pools()
+    results.put(('writer', commits, errors))
+
+
+def percentile(values, fraction):
+    if not values:
+        return float('nan')
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def run(db_path, writer_pragmas, reader_pragmas, writers, seconds):
+    # the journal mode is stored in the file, set it before anybody connects
+    journal_mode = (writer_pragmas or {}).get('journal_mode', 'WAL')
+    conn = sqlite3.connect(db_path)
+    conn.execute(f"PRAGMA journal_mode = {journal_mode}")
+    conn.close()
+
+    context = multiprocessing.get_context("spawn")
+    ready = context.Semaphore(0)
+    go = context.Event()
+    results = context.Queue()
+    processes = [context.Process(target=reader, args=(db_path, reader_pragmas, seconds, ready, go, results))
+                 for _ in range(READERS)]
+    processes += [context.Process(target=writer, args=(db_path, writer_pragmas, seconds, ready, go, results, i))
+                  for i in range(writers)]
+    for process in processes:
+        process.start()
+    for _ in processes:
+        ready.acquire()
+    go.set()
+
+    latencies, read_errors, commits, write_errors = [], 0, 0, 0
+    for _ in processes:
+        role, value, errors = results.get()
+        if role == 'reader':
+            latencies += value
+            read_errors += errors
+        else:
+            commits += value
+            write_errors += errors
+    for process in processes:
+        process.join()
+
+    return latencies, read_errors, commits, write_errors
+
+
+def main():
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_SECONDS
+
+    print("\nCONCURRENT READERS BENCHMARK")
+    print("=" * 60)
+    db_path = build_synthetic_db(patients=PATIENTS, appointments=APPOINTMENTS)
+    try:
+        print(f"  {READERS} reader processes, up to {WRITERS} writer processes, {seconds:g}s per run\n")
+        print(f"  {'':34s} {'reads/s':>8s} {'p50 ms':>7s} {'p99 ms':>7s} {'max ms':>7s} "
+              f"{'read err':>8s} {'commits':>8s} {'write err':>9s}")
+        print("  " + "-" * 96)
+        for label, writer_pragmas, reader_pragmas, writers in MODES:
+            latencies, read_errors, commits, write_errors = run(db_path, writer_pragmas, reader_pragmas,
+                                                                writers, seconds)
+            print(f"  {label:34s} {len(latencies) / seconds:8.0f} {percentile(latencies, 0.5):7.1f} "
+                  f"{percentile(latencies, 0.99):7.1f} {max(latencies, default=float('nan')):7.1f} "
+                  f"{read_errors:8d} {commits:8d} {write_errors:9d}")
+    finally:
+        remove_temp_db(db_path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+# compares the old connect-per-call pattern with the pooled connections
+# run from the project root: python -m benchmarks.bench_connection_pool
+
+import sqlite3
+
+from benchmarks.common import temp_db_copy, remove_temp_db, time_per_op, print_row
+from database.connection import get_pool, close_all_pools
+from repositories.patient_repository import PatientRepository
+
+REPEAT = 5000
+
+
+def main():
+    db_path = temp_db_copy()
+    try:
+        conn = sqlite3.connect(db_path)
+        patient_ids = [row[0] for row in conn.execute("SELECT patient_id FROM patients")]
+        conn.close()
+
+        def pick(i):
+            return patient_ids[i % len(patient_ids)]
+
+        def connect_per_call(i):
+            # what every repository method used to do
+            conn = sqlite3.connect(db_path)
+            conn.execute("PRAGMA foreign_keys = ON")
+            conn.execute("SELECT * FROM patients WHERE patient_id = ?", (pick(i),)).fetchone()
+            conn.close()
+
+        repo = PatientRepository(db_path)
+
+        def pooled_read(i):
+            repo.read(pick(i))
+
+        print("\nCONNECTION POOL BENCHMARK")
+        print("=" * 60)
+        print(f"Patient lookups by id, {REPEAT} calls each\n")
+
+        before = time_per_op(connect_per_call, REPEAT)
+        after = time_per_op(pooled_read, REPEAT)
+
+        print_row("connect per call (old)", before, "us/op")
+        print_row("pooled repository read (new)", after, "us/op")
+        print_row("speedup", before / after, "x")
+        print(f"\nPool after run: {get_pool(db_path).stats()}")
+    finally:
+        close_all_pools()
+        remove_temp_db(db_path)
+
+
+if __name__ == "__main__":
+    main()
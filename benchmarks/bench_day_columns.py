@@ -0,0 +1,85 @@
+# TEXT dates and times versus the integer epoch_day / start_minute columns
+# (database/day_columns.py) for the filtered analytics shapes: the same
+# question asked both ways, each through an index made for it
+# run from the project root: python -m benchmarks.bench_day_columns
+
+import sqlite3
+import time
+
+from benchmarks.common import build_synthetic_db, remove_temp_db
+from database.day_columns import WEEKDAY_SQL
+from database.lookups import code_sql
+from database.rollups import HOUR_SQL
+from models.dates import to_epoch_day
+
+PATIENTS = 20_000
+APPOINTMENTS = 500_000
+REPEAT = 20
+START, END = '2023-03-01', '2024-08-31'
+
+NO_SHOW = code_sql('appointment_statuses', 'No-Show')
+
+# (label, TEXT query, integer query) - params are (start, end) as text or day numbers
+QUERIES = [
+    ("peak hours, no-shows in a window",
+     f"""SELECT {HOUR_SQL.format('start_time')} AS hour, CAST(strftime('%w', date) AS INTEGER) AS weekday,
+                COUNT(*)
+         FROM appointments WHERE start_time IS NOT NULL AND status_id = {NO_SHOW} AND date >= ? AND date <= ?
+         GROUP BY hour, weekday""",
+     f"""SELECT start_minute / 60 AS hour, {WEEKDAY_SQL.format('epoch_day')} AS weekday, COUNT(*)
+         FROM appointments WHERE start_minute IS NOT NULL AND status_id = {NO_SHOW}
+           AND epoch_day >= ? AND epoch_day <= ?
+         GROUP BY hour, weekday"""),
+    ("two doctors by status in a window",
+     """SELECT doctor_id, status_id, COUNT(*) FROM appointments
+        WHERE doctor_id IN (1, 2) AND date >= ? AND date <= ? GROUP BY doctor_id, status_id""",
+     """SELECT doctor_id, status_id, COUNT(*) FROM appointments
+        WHERE doctor_id IN (1, 2) AND epoch_day >= ? AND epoch_day <= ? GROUP BY doctor_id, status_id"""),
+    ("patients seen in a window",
+     "SELECT COUNT(DISTINCT patient_id) FROM appointments WHERE date >= ? AND date <= ?",
+     "SELECT COUNT(DISTINCT patient_id) FROM appointments WHERE epoch_day >= ? AND epoch_day <= ?"),
+]
+
+# the TEXT indexes migration 8 replaced, so both sides get an index
+TEXT_INDEXES = [
+    "CREATE INDEX bench_doctor_date ON appointments(doctor_id, date, status_id, category_id, patient_id)",
+    "CREATE INDEX bench_status_date_time ON appointments(status_id, date, start_time)",
+    "CREATE INDEX bench_date_status_category_patient ON appointments(date, status_id, category_id, patient_id)",
+]
+
+
+def timed_ms(conn, sql, params):
+    conn.execute(sql, params).fetchall()  # warm the page cache
+    start = time.perf_counter()
+    for _ in range(REPEAT):
+        conn.execute(sql, params).fetchall()
+    return (time.perf_counter() - start) / REPEAT * 1000
+
+
+def main():
+    print("\nDAY COLUMNS BENCHMARK")
+    print("=" * 60)
+    db_path = build_synthetic_db(patients=PATIENTS, appointments=APPOINTMENTS)
+    try:
+        conn = sqlite3.connect(db_path)
+        for sql in TEXT_INDEXES:
+            conn.execute(sql)
+        conn.execute("ANALYZE")
+
+        text_params = (START, END)
+        day_params = (to_epoch_day(START), to_epoch_day(END))
+        print(f"  {APPOINTMENTS:,} appointments, {START} .. {END}\n")
+        print(f"  {'':40s} {'TEXT ms':>9s} {'integer ms':>11s}")
+        print("  " + "-" * 62)
+        for label, text_sql, day_sql in QUERIES:
+            if conn.execute(text_sql, text_params).fetchall() != conn.execute(day_sql, day_params).fetchall():
+                raise AssertionError(f"{label}: the two queries disagree")
+            print(f"  {label:40s} {timed_ms(conn, text_sql, text_params):9.1f} "
+                  f"{timed_ms(conn, day_sql, day_params):11.1f}")
+        conn.close()
+    finally:
+        remove_temp_db(db_path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+# shows that doctor performance runs a fixed number of queries no matter
+# how many doctors there are (the old version ran one query per doctor)
+# run from the project root: python -m benchmarks.bench_doctor_performance
+
+import time
+
+from benchmarks.common import build_synthetic_db, remove_temp_db, QueryCounter
+from database.connection import configure_pool, close_all_pools
+from services.analytics_service import AnalyticsService
+
+DOCTOR_COUNTS = [10, 50, 150]
+APPOINTMENTS_PER_DOCTOR = 400
+
+
+def old_doctor_performance(conn):
+    # the previous N+1 implementation, kept here for comparison
+    cursor = conn.cursor()
+    cursor.execute("SELECT doctor_id, doctor_name, speciality FROM doctors WHERE is_active = 1")
+    performance = []
+    for doctor_id, doctor_name, specialty in cursor.fetchall():
+        cursor.execute("SELECT status FROM appointment_details WHERE doctor_id = ?", (doctor_id,))
+        statuses = [row[0] for row in cursor.fetchall()]
+        performance.append((doctor_name, specialty, len(statuses),
+                            statuses.count('Completed'), statuses.count('Cancelled')))
+    return performance
+
+
+def measure(func):
+    start = time.perf_counter()
+    func()
+    return (time.perf_counter() - start) * 1000
+
+
+def main():
+    print("\nDOCTOR PERFORMANCE BENCHMARK")
+    print("=" * 60)
+    print(f"{'doctors':>8} {'appts':>8} | {'old queries':>11} {'old ms':>8} | {'new queries':>11} {'new ms':>8}")
+    print("-" * 60)
+
+    for doctors in DOCTOR_COUNTS:
+        db_path = build_synthetic_db(doctors=doctors, patients=2000,
+                                     appointments=doctors * APPOINTMENTS_PER_DOCTOR)
+        try:
+            # AnalyticsService reads through the read-only pool - one
+            # connection in it so every statement goes through the counter,
+            # the old version runs on the same connection
+            pool = configure_pool(db_path, max_size=1, read_only=True)
+            analytics = AnalyticsService(db_path, cache=False)
+
+            with pool.connection() as conn:
+                counter = QueryCounter()
+                conn.set_trace_callback(counter)
+
+                old_ms = measure(lambda: old_doctor_performance(conn))
+                old_queries = counter.count
+
+                counter.count = 0
+                new_ms = measure(analytics.get_doctor_performance)
+                new_queries = counter.count
+
+                conn.set_trace_callback(None)
+
+            print(f"{doctors:8d} {doctors * APPOINTMENTS_PER_DOCTOR:8d} | "
+                  f"{old_queries:11d} {old_ms:8.1f} | {new_queries:11d} {new_ms:8.1f}")
+        finally:
+            close_all_pools()
+            remove_temp_db(db_path)
+
+    print("\n(the new query also computes revenue and average ticket per doctor)")
+
+
+if __name__ == "__main__":
+    main()
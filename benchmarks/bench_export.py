@@ -0,0 +1,74 @@
+# the nightly export the old way (SELECT * into a list, then write the file)
+# versus ExportService streaming it chunk by chunk: peak memory and rows/s,
+# for CSV, JSON Lines and gzipped CSV
+# run from the project root: python -m benchmarks.bench_export
+
+import csv
+import os
+import sqlite3
+import time
+import tracemalloc
+
+from benchmarks.common import build_synthetic_db, remove_temp_db, print_row
+from database.connection import close_all_pools
+from services.export_service import ExportService
+
+SIZES = [100_000, 500_000]
+
+
+def measure(func):
+    # (peak MB allocated by python, seconds) - timed without tracemalloc,
+    # which slows every allocation down
+    start = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()
+    func()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak / 1024 / 1024, elapsed
+
+
+def old_export(db_path, path):
+    conn = sqlite3.connect(db_path)
+    cursor = conn.execute("SELECT * FROM appointment_details ORDER BY id")
+    columns = [column[0] for column in cursor.description]
+    rows = cursor.fetchall()
+    conn.close()
+    with open(path, 'w', encoding='utf-8', newline='') as file:
+        writer = csv.writer(file)
+        writer.writerow(columns)
+        writer.writerows(rows)
+
+
+def main():
+    print("\nEXPORT BENCHMARK")
+    print("=" * 60)
+
+    for size in SIZES:
+        db_path = build_synthetic_db(patients=size // 5, appointments=size)
+        folder = os.path.dirname(db_path)
+        service = ExportService(db_path)
+        try:
+            service.iter_table('doctors').close()  # open the pool outside the timings
+
+            print(f"\n{size:,} appointments")
+            peak, seconds = measure(lambda: old_export(db_path, os.path.join(folder, "old.csv")))
+            print_row("SELECT * + fetchall, peak memory", peak, "MB")
+            print_row("SELECT * + fetchall, rows/s", size / seconds, "rows/s")
+
+            for label, name in (("stream CSV", "appointments.csv"), ("stream JSON Lines", "appointments.jsonl"),
+                                ("stream CSV gzip", "appointments.csv.gz")):
+                fmt = 'jsonl' if '.jsonl' in name else 'csv'
+                path = os.path.join(folder, name)
+                peak, seconds = measure(lambda: service.export_table('appointments', path, fmt))
+                print_row(f"{label}, peak memory", peak, "MB")
+                print_row(f"{label}, rows/s", size / seconds, "rows/s")
+                print_row(f"{label}, file size", os.path.getsize(path) / 2 ** 20, "MB")
+        finally:
+            close_all_pools()
+            remove_temp_db(db_path)
+
+
+if __name__ == "__main__":
+    main()
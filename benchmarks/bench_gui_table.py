@@ -0,0 +1,64 @@
+# what the GUI tables wait for: the whole patient list (the old Show All)
+# versus one block of the virtual table (gui_table.py) - first screen, a
+# jump to the middle, and sorted by other columns
+# Treeview drawing isn't timed (needs a display); the old table also had to
+# insert every one of those rows, the virtual one redraws ~30 items
+# run from the project root: python -m benchmarks.bench_gui_table [patients]
+
+import sys
+import time
+
+from benchmarks.common import build_synthetic_db, remove_temp_db
+from database.connection import configure_pool, close_all_pools
+from gui_table import BLOCK_SIZE, RepositorySource
+from models.patient import patient_ages
+from repositories import PatientRepository
+
+DEFAULT_PATIENTS = 100_000
+REPEAT = 5
+
+
+def patient_rows(patients):
+    # same rows as CliniTrackApp.patient_rows
+    ages = patient_ages(patients)
+    return [(patient.patient_id, patient.patient_name, age, patient.gender, patient.city,
+             patient.phone or "N/A", patient.insurance or "None")
+            for patient, age in zip(patients, ages)]
+
+
+def average_ms(func):
+    func()  # warm up the page cache
+    start = time.perf_counter()
+    for _ in range(REPEAT):
+        func()
+    return (time.perf_counter() - start) / REPEAT * 1000
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_PATIENTS
+
+    print("\nGUI TABLE BENCHMARK")
+    print("=" * 60)
+    db_path = build_synthetic_db(patients=count, appointments=count)
+    try:
+        configure_pool(db_path, max_size=1)
+        repo = PatientRepository(db_path)
+        source = RepositorySource(repo, patient_rows)
+        middle = count // 2
+
+        print(f"  {count:,} patients, {BLOCK_SIZE} rows per block\n")
+        print(f"  {'':44s} {'ms':>8s}")
+        print("  " + "-" * 53)
+        print(f"  {'whole list (get_all + rows)':44s} {average_ms(lambda: patient_rows(repo.get_all())):8.1f}")
+        print(f"  {'first screen (count + block 0)':44s} "
+              f"{average_ms(lambda: (source.count(), source.rows('patient_id', False, 0, BLOCK_SIZE))):8.1f}")
+        for sort_key in ('patient_id', 'patient_name', '-patient_birthdate'):
+            ms = average_ms(lambda: source.rows(sort_key, False, middle, BLOCK_SIZE))
+            print(f"  {'block in the middle, by ' + sort_key:44s} {ms:8.1f}")
+    finally:
+        close_all_pools()
+        remove_temp_db(db_path)
+
+
+if __name__ == "__main__":
+    main()
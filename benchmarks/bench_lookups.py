@@ -0,0 +1,140 @@
+# status / source / procedure / method as TEXT in every row versus integer
+# codes into lookup tables (database/lookups.py): file size after VACUUM and
+# the GROUP BYs the analytics run over appointments and payments
+# run from the project root: python -m benchmarks.bench_lookups
+
+import os
+import shutil
+import sqlite3
+import time
+
+from benchmarks.common import build_synthetic_db, remove_temp_db
+from database.day_columns import add_day_columns
+from database.lookups import code_sql
+from database.migrations import BASE_TABLES
+
+PATIENTS = 20_000
+APPOINTMENTS = 500_000
+REPEAT = 5
+
+COMPLETED = code_sql('appointment_statuses', 'Completed')
+
+# (label, TEXT query, code query) - both return names, in the same order
+QUERIES = [
+    ("month x status x category",
+     """SELECT NULLIF(substr(date, 1, 7), '') AS month, status, procedure_category, COUNT(*)
+        FROM appointments GROUP BY month, status, procedure_category
+        ORDER BY month, status, procedure_category""",
+     """SELECT g.month, s.name AS status, c.name AS category, g.n
+        FROM (SELECT NULLIF(substr(date, 1, 7), '') AS month, status_id, category_id, COUNT(*) AS n
+              FROM appointments GROUP BY month, status_id, category_id) g
+        LEFT JOIN appointment_statuses s ON s.id = g.status_id
+        LEFT JOIN procedure_categories c ON c.id = g.category_id
+        ORDER BY g.month, status, category"""),
+    ("revenue by method x procedure",
+     """SELECT p.method, a.procedure_name, ROUND(SUM(p.amount), 2), COUNT(*)
+        FROM payments p JOIN appointments a ON a.id = p.appointment_id
+        GROUP BY p.method, a.procedure_name ORDER BY p.method, a.procedure_name""",
+     """SELECT m.name AS method, n.name AS procedure_name, g.amount, g.n
+        FROM (SELECT p.method_id, a.procedure_id, ROUND(SUM(p.amount), 2) AS amount, COUNT(*) AS n
+              FROM payments p JOIN appointments a ON a.id = p.appointment_id
+              GROUP BY p.method_id, a.procedure_id) g
+        LEFT JOIN payment_methods m ON m.id = g.method_id
+        LEFT JOIN procedure_names n ON n.id = g.procedure_id
+        ORDER BY method, procedure_name"""),
+    ("completed per doctor",
+     """SELECT doctor_id, COUNT(*), SUM(CASE WHEN status = 'Completed' THEN 1 ELSE 0 END)
+        FROM appointments GROUP BY doctor_id""",
+     f"""SELECT doctor_id, COUNT(*), SUM(CASE WHEN status_id = {COMPLETED} THEN 1 ELSE 0 END)
+         FROM appointments GROUP BY doctor_id"""),
+]
+
+# the indexes migration 8 left, on the TEXT columns
+TEXT_INDEXES = [
+    "CREATE INDEX idx_appointments_patient_date_status ON appointments(patient_id, date, status)",
+    "CREATE INDEX idx_appointments_doctor_status ON appointments(doctor_id, status)",
+    "CREATE INDEX idx_appointments_doctor_day "
+    "ON appointments(doctor_id, epoch_day, status, procedure_category, patient_id)",
+    "CREATE INDEX idx_appointments_day_status_category_patient "
+    "ON appointments(epoch_day, status, procedure_category, patient_id)",
+    "CREATE INDEX idx_appointments_status_day_minute ON appointments(status, epoch_day, start_minute)",
+    "CREATE INDEX idx_payments_appointment_status ON payments(appointment_id, amount, status)",
+    "CREATE INDEX idx_payments_paid_at ON payments(paid_at)",
+    "CREATE INDEX idx_payments_paid_day ON payments(paid_day, amount)",
+]
+
+
+def text_copy(db_path):
+    # a copy of the database with appointments and payments laid out the
+    # way they were before migration 9 - TEXT columns, filled from the views
+    path = os.path.join(os.path.dirname(db_path), "text.db")
+    shutil.copyfile(db_path, path)
+    conn = sqlite3.connect(path)
+    conn.execute("ALTER TABLE payments RENAME TO payments_coded")
+    conn.execute("ALTER TABLE appointments RENAME TO appointments_coded")
+    for sql in BASE_TABLES:
+        if 'appointments (' in sql or 'payments (' in sql:
+            conn.execute(sql)
+    add_day_columns(conn)
+    columns = [row[1] for row in conn.execute("PRAGMA table_info(appointments)")]
+    conn.execute(f"INSERT INTO appointments ({', '.join(columns)}) "
+                 f"SELECT {', '.join(columns)} FROM appointment_details ORDER BY id")
+    columns = [row[1] for row in conn.execute("PRAGMA table_info(payments)")]
+    conn.execute(f"INSERT INTO payments ({', '.join(columns)}) "
+                 f"SELECT {', '.join(columns)} FROM payment_details ORDER BY id")
+    conn.execute("DROP VIEW appointment_details")
+    conn.execute("DROP VIEW payment_details")
+    conn.execute("DROP TABLE payments_coded")
+    conn.execute("DROP TABLE appointments_coded")
+    for sql in TEXT_INDEXES:
+        conn.execute(sql)
+    conn.commit()
+    conn.execute("ANALYZE")
+    conn.close()
+    return path
+
+
+def vacuumed_mb(path):
+    conn = sqlite3.connect(path)
+    conn.execute("VACUUM")
+    conn.close()
+    return os.path.getsize(path) / 2 ** 20
+
+
+def timed_ms(conn, sql):
+    # best of REPEAT runs - the mean moved by 20-30% between runs here
+    conn.execute(sql).fetchall()  # warm the page cache
+    best = None
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        conn.execute(sql).fetchall()
+        ms = (time.perf_counter() - start) * 1000
+        best = ms if best is None else min(best, ms)
+    return best
+
+
+def main():
+    print("\nLOOKUP TABLES BENCHMARK")
+    print("=" * 60)
+    db_path = build_synthetic_db(patients=PATIENTS, appointments=APPOINTMENTS)
+    try:
+        text_path = text_copy(db_path)
+        print(f"  {APPOINTMENTS:,} appointments\n")
+        print(f"  file size after VACUUM: {vacuumed_mb(text_path):.1f} MB with TEXT columns, "
+              f"{vacuumed_mb(db_path):.1f} MB with codes\n")
+
+        text_conn, code_conn = sqlite3.connect(text_path), sqlite3.connect(db_path)
+        print(f"  {'':34s} {'TEXT ms':>9s} {'codes ms':>9s}")
+        print("  " + "-" * 54)
+        for label, text_sql, coded_sql in QUERIES:
+            if text_conn.execute(text_sql).fetchall() != code_conn.execute(coded_sql).fetchall():
+                raise AssertionError(f"{label}: the two queries disagree")
+            print(f"  {label:34s} {timed_ms(text_conn, text_sql):9.1f} {timed_ms(code_conn, coded_sql):9.1f}")
+        text_conn.close()
+        code_conn.close()
+    finally:
+        remove_temp_db(db_path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+# memory per model object: the old __dict__ classes versus the slotted ones,
+# plus how fast the repositories build them (Model(*row))
+# run from the project root: python -m benchmarks.bench_models
+
+import time
+import tracemalloc
+
+from benchmarks.common import print_row
+from models import Patient, Appointment
+
+COUNT = 100_000
+
+PATIENT_ROW = (1, "Ion Popescu", "1985-04-12", "2023-02-01", "M", "București",
+               "Str. Lipscani 10", "0722 123 456", "ion.popescu@example.ro", "CASMB")
+# the columns AppointmentRepository selects, in constructor order
+APPOINTMENT_ROW = (1, 7, 3, "2025-03-14", "10:00", "10:30", "Completed", "Detartraj",
+                   "Phone", "Hygiene", "2025-03-01 09:00:00", None)
+
+
+class DictPatient:
+    # the model as it was before __slots__, for comparison
+    def __init__(self, patient_id, patient_name, patient_birthdate, first_visit_at,
+                 gender, city, address=None, phone=None, email=None, insurance=None):
+        self.patient_id = patient_id
+        self.patient_name = patient_name
+        self.patient_birthdate = patient_birthdate
+        self.first_visit_at = first_visit_at
+        self.gender = gender
+        self.city = city
+        self.address = address
+        self.phone = phone
+        self.email = email
+        self.insurance = insurance
+
+
+class DictAppointment:
+    def __init__(self, appointment_id, patient_id, doctor_id, date, start_time, end_time,
+                 status, procedure_name, source=None, procedure_category=None,
+                 created_at=None, notes=None):
+        self.appointment_id = appointment_id
+        self.patient_id = patient_id
+        self.doctor_id = doctor_id
+        self.date = date
+        self.start_time = start_time
+        self.end_time = end_time
+        self.status = status
+        self.procedure_name = procedure_name
+        self.source = source
+        self.procedure_category = procedure_category
+        self.created_at = created_at
+        self.notes = notes
+
+
+def bytes_per_object(build):
+    # the rows are shared, so this counts only the objects themselves
+    tracemalloc.start()
+    objects = build()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return size / len(objects)
+
+
+def build_seconds(build):
+    start = time.perf_counter()
+    build()
+    return time.perf_counter() - start
+
+
+def main():
+    print("\nMODEL MEMORY BENCHMARK")
+    print("=" * 60)
+    print(f"{COUNT:,} objects of each\n")
+
+    cases = [
+        ("Patient, __dict__", lambda: [DictPatient(*PATIENT_ROW) for _ in range(COUNT)]),
+        ("Patient, __slots__", lambda: [Patient(*PATIENT_ROW) for _ in range(COUNT)]),
+        ("Appointment, __dict__", lambda: [DictAppointment(*APPOINTMENT_ROW) for _ in range(COUNT)]),
+        ("Appointment, __slots__", lambda: [Appointment(*APPOINTMENT_ROW) for _ in range(COUNT)]),
+    ]
+    for label, build in cases:
+        print_row(label, bytes_per_object(build), "bytes/object")
+    print()
+    for label, build in cases:
+        print_row(label, COUNT / build_seconds(build), "objects/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+# rendering the age column for 100k patients: strptime on every get_age()
+# call (the old model) versus the cached parsing and patient_ages()
+# run from the project root: python -m benchmarks.bench_patient_ages
+
+import random
+import time
+from datetime import date
+
+from benchmarks.common import print_row
+from models import Patient, patient_ages
+
+COUNT = 100_000
+
+
+def old_get_age(patient):
+    # Patient.get_age() as it was - import + strptime + now() per call
+    from datetime import datetime
+    birthdate = datetime.strptime(patient.patient_birthdate, '%Y-%m-%d')
+    today = datetime.now()
+    age = today.year - birthdate.year
+    if (today.month, today.day) < (birthdate.month, birthdate.day):
+        age -= 1
+    return age
+
+
+def make_patients(count, seed=42):
+    rng = random.Random(seed)
+    patients = []
+    for i in range(count):
+        birthdate = f"{rng.randint(1940, 2018)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}"
+        patients.append(Patient(i, f"Patient {i}", birthdate, "2024-01-01", rng.choice('MF'), "Cluj"))
+    return patients
+
+
+def render_seconds(ages_of):
+    # builds the row values the GUI inserts, with the ages from ages_of(patients)
+    patients = make_patients(COUNT)
+    start = time.perf_counter()
+    ages = ages_of(patients)
+    rows = [(p.patient_id, p.patient_name, age, p.gender, p.city) for p, age in zip(patients, ages)]
+    elapsed = time.perf_counter() - start
+    assert len(rows) == COUNT
+    return elapsed
+
+
+def main():
+    print("\nPATIENT AGE RENDERING BENCHMARK")
+    print("=" * 60)
+    print(f"{COUNT:,} patients, fresh objects for every case\n")
+
+    today = date.today()
+    cases = [
+        ("strptime per call (old get_age)", lambda ps: [old_get_age(p) for p in ps]),
+        ("get_age() per patient", lambda ps: [p.get_age() for p in ps]),
+        ("get_age(today) per patient", lambda ps: [p.get_age(today) for p in ps]),
+        ("patient_ages(patients)", patient_ages),
+    ]
+    for label, ages_of in cases:
+        print_row(label, render_seconds(ages_of) * 1000, "ms")
+
+    patients = make_patients(1000)
+    assert [old_get_age(p) for p in patients] == patient_ages(patients)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+# patient details: the five queries the screens used to run per patient
+# versus PatientAnalyticsService - one query per patient, or one per 500
+# patients with get_patients_metrics(). every path gets a connection per
+# screen like the app does, the best of REPEAT runs counts
+# run from the project root: python -m benchmarks.bench_patient_metrics
+
+import random
+import time
+
+from benchmarks.common import build_synthetic_db, remove_temp_db
+from database.connection import configure_pool, close_all_pools, pooled_connection
+from database.lookups import code_sql
+from services.patient_analytics_service import PatientAnalyticsService
+
+PATIENTS = 20_000
+APPOINTMENTS = 200_000
+SAMPLE = 1000
+REPEAT = 5
+
+
+def old_details(conn, patient_id):
+    # what main.patient_analytics / view_patient_details did before
+    cursor = conn.cursor()
+    cursor.execute("SELECT * FROM patients WHERE patient_id = ?", (patient_id,))
+    patient = cursor.fetchone()
+    cursor.execute("SELECT COUNT(*) FROM appointments WHERE patient_id = ?", (patient_id,))
+    total = cursor.fetchone()[0]
+    cursor.execute(f"SELECT COUNT(*) FROM appointments WHERE patient_id = ? "
+                   f"AND status_id = {code_sql('appointment_statuses', 'Completed')}", (patient_id,))
+    completed = cursor.fetchone()[0]
+    cursor.execute("SELECT date, procedure_name FROM appointment_details WHERE patient_id = ? "
+                   "ORDER BY date DESC LIMIT 1", (patient_id,))
+    last = cursor.fetchone()
+    cursor.execute("""
+        SELECT SUM(p.amount)
+        FROM payments p
+        JOIN appointments a ON p.appointment_id = a.id
+        WHERE a.patient_id = ?
+    """, (patient_id,))
+    spent = cursor.fetchone()[0]
+    return patient, total, completed, last, spent
+
+
+def timed_ms(func):
+    best = None
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        func()
+        ms = (time.perf_counter() - start) * 1000
+        best = ms if best is None else min(best, ms)
+    return best
+
+
+def main():
+    print("\nPATIENT METRICS BENCHMARK")
+    print("=" * 60)
+    db_path = build_synthetic_db(patients=PATIENTS, appointments=APPOINTMENTS)
+    try:
+        configure_pool(db_path, max_size=1)
+        service = PatientAnalyticsService(db_path)
+        ids = random.Random(3).sample(range(1, PATIENTS + 1), SAMPLE)
+
+        def old():
+            for patient_id in ids:
+                with pooled_connection(db_path) as conn:
+                    old_details(conn, patient_id)
+
+        def one_by_one():
+            for patient_id in ids:
+                service.get_patient_metrics(patient_id)
+
+        old()  # warm up the page cache
+        print(f"  {SAMPLE:,} patients out of {PATIENTS:,} ({APPOINTMENTS:,} appointments)\n")
+        print(f"  {'':40s} {'total ms':>9s} {'per patient':>12s}")
+        print("  " + "-" * 63)
+        for label, func in (("5 queries per patient (old screens)", old),
+                            ("get_patient_metrics, 1 query each", one_by_one),
+                            ("get_patients_metrics, batch", lambda: service.get_patients_metrics(ids))):
+            ms = timed_ms(func)
+            print(f"  {label:40s} {ms:9.1f} {ms / SAMPLE * 1000:9.1f} us")
+    finally:
+        close_all_pools()
+        remove_temp_db(db_path)
+
+
+if __name__ == "__main__":
+    main()
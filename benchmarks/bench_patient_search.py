@@ -0,0 +1,97 @@
+# patient search latency: the old LIKE '%term%' scan versus the FTS5 index
+# run from the project root: python -m benchmarks.bench_patient_search [patients]
+
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+
+from benchmarks.common import remove_temp_db
+from database.connection import configure_pool, close_all_pools
+from database.migrations import migrate
+from repositories import PatientRepository
+from repositories.patient_repository import SEARCH_LIMIT
+
+DEFAULT_PATIENTS = 1_000_000
+REPEAT = 20
+
+FIRST_NAMES = ['Ion', 'Maria', 'Ștefan', 'Ioana', 'Andrei', 'Elena', 'Mihai', 'Ana', 'Gheorghe', 'Cristina',
+               'Vasile', 'Mădălina', 'Alexandru', 'Irina', 'Florin', 'Bianca', 'Costel', 'Roxana']
+LAST_NAMES = ['Popescu', 'Ionescu', 'Țurcanu', 'Dumitrescu', 'Stănescu', 'Georgescu', 'Munteanu',
+              'Constantinescu', 'Şerban', 'Bălan', 'Ţăranu', 'Nistor', 'Lazăr', 'Moldovan', 'Vlădescu']
+CITIES = ['București', 'Cluj-Napoca', 'Iași', 'Timișoara', 'Constanța', 'Brașov', 'Ploiești']
+
+# (what the user types, old LIKE pattern)
+QUERIES = [
+    ("popescu", "%popescu%"),
+    ("stef turc", "%stef%turc%"),
+    ("ţăranu", "%ţăranu%"),
+    ("0722", "%0722%"),
+    ("constantinescu bianca", "%bianca constantinescu%"),
+    ("ion iasi", "%ion%"),
+]
+
+
+def build_patients_db(count, seed=7):
+    rng = random.Random(seed)
+    folder = tempfile.mkdtemp(prefix="clinitrack_bench_")
+    path = os.path.join(folder, "dentalclinic.db")
+    conn = sqlite3.connect(path)
+    migrate(conn)
+
+    def rows():
+        for patient_id in range(1, count + 1):
+            first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+            phone = f"07{rng.randint(20, 99)}.{rng.randint(100, 999)}.{rng.randint(100, 999)}"
+            yield (patient_id, f"{first} {last}", "1980-01-01", "2024-01-01", rng.choice('MF'),
+                   rng.choice(CITIES), phone, f"{first.lower()}.{patient_id}@example.ro")
+
+    start = time.perf_counter()
+    conn.executemany("INSERT INTO patients (patient_id, patient_name, patient_birthdate, first_visit_at, "
+                     "gender, city, phone, email) VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows())
+    conn.commit()
+    conn.close()
+    print(f"  built {count:,} patients (search index kept by triggers) in {time.perf_counter() - start:.1f}s")
+    return path
+
+
+def average_ms(func):
+    func()  # warm up the page cache
+    start = time.perf_counter()
+    for _ in range(REPEAT):
+        func()
+    return (time.perf_counter() - start) / REPEAT * 1000
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_PATIENTS
+
+    print("\nPATIENT SEARCH BENCHMARK")
+    print("=" * 60)
+    db_path = build_patients_db(count)
+    try:
+        configure_pool(db_path, max_size=1)
+        repo = PatientRepository(db_path)
+        conn = sqlite3.connect(db_path)
+
+        print(f"\n  {'query':24s} {'LIKE ms':>9s} {'FTS ms':>8s} {'hits':>6s}")
+        print("  " + "-" * 50)
+        for text, pattern in QUERIES:
+            like_ms = average_ms(lambda: conn.execute(
+                "SELECT * FROM patients WHERE patient_name LIKE ? OR phone LIKE ? ORDER BY patient_name "
+                "LIMIT 100", (pattern, pattern)).fetchall())
+            # the GUI's search - the first SEARCH_LIMIT matches, like the LIKE query
+            fts_ms = average_ms(lambda: repo.search(text, limit=SEARCH_LIMIT))
+            print(f"  {text:24s} {like_ms:9.1f} {fts_ms:8.2f} {len(repo.search(text, limit=SEARCH_LIMIT)):6d}")
+
+        conn.close()
+        print("\n(LIKE only matches exact diacritics - 'ţăranu' misses 'Țăranu', FTS finds both)")
+    finally:
+        close_all_pools()
+        remove_temp_db(db_path)
+
+
+if __name__ == "__main__":
+    main()
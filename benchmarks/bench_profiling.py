@@ -0,0 +1,54 @@
+# what database/profiling.py costs: the same repository calls with no
+# wrapper at all, with the wrapper but profiling off (how the app normally
+# runs) and with profiling on
+# run from the project root: python -m benchmarks.bench_profiling
+
+import random
+import time
+
+from benchmarks.common import build_synthetic_db, remove_temp_db
+from database.connection import configure_pool, close_all_pools
+from database.profiling import PROFILER
+from repositories import PatientRepository
+
+PATIENTS = 20_000
+CALLS = 20_000
+
+
+def timed_us(func, ids):
+    func(ids[0])  # opens the connection
+    start = time.perf_counter()
+    for patient_id in ids:
+        func(patient_id)
+    return (time.perf_counter() - start) / len(ids) * 1_000_000
+
+
+def main():
+    print("\nPROFILING OVERHEAD BENCHMARK")
+    print("=" * 60)
+    db_path = build_synthetic_db(patients=PATIENTS, appointments=PATIENTS)
+    try:
+        configure_pool(db_path, max_size=1)
+        repo = PatientRepository(db_path)
+        ids = [random.Random(5).randint(1, PATIENTS) for _ in range(CALLS)]
+        unwrapped = PatientRepository.read.__wrapped__
+
+        print(f"  {CALLS:,} x PatientRepository.read()\n")
+        print(f"  {'':32s} {'us per call':>12s}")
+        print("  " + "-" * 45)
+        print(f"  {'no wrapper':32s} {timed_us(lambda i: unwrapped(repo, i), ids):12.1f}")
+        print(f"  {'profiling off':32s} {timed_us(repo.read, ids):12.1f}")
+
+        # only connections opened while it's on are profiled
+        close_all_pools()
+        PROFILER.enable(capacity=CALLS * 2)
+        print(f"  {'profiling on':32s} {timed_us(repo.read, ids):12.1f}")
+        PROFILER.disable()
+        print(f"\n  {len(PROFILER.records()):,} records in the buffer")
+    finally:
+        close_all_pools()
+        remove_temp_db(db_path)
+
+
+if __name__ == "__main__":
+    main()
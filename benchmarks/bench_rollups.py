@@ -0,0 +1,117 @@
+# compares the dashboard aggregations over the full appointment history with
+# the same numbers read from the daily rollups, and shows what the rollup
+# triggers cost on every insert
+# run from the project root: python -m benchmarks.bench_rollups
+
+import sqlite3
+import time
+
+from benchmarks.common import build_synthetic_db, remove_temp_db, time_per_op, print_row
+from database.connection import configure_pool, close_all_pools
+from database.lookups import NameCodes, code_sql
+from database.rollups import create_rollup_triggers, drop_rollup_triggers
+from services.analytics_service import AnalyticsService
+
+APPOINTMENT_COUNTS = [10_000, 100_000, 300_000]
+INSERTS = 2000
+
+COMPLETED = code_sql('appointment_statuses', 'Completed')
+
+# the aggregations the dashboard ran before the rollups existed
+# (on the lookup codes the tables have now)
+FULL_SCAN_QUERIES = [
+    """SELECT substr(date, 1, 7) AS month, status_id, category_id, COUNT(*)
+       FROM appointments GROUP BY month, status_id, category_id ORDER BY month""",
+    f"""SELECT CAST(substr(start_time, 1, instr(start_time, ':') - 1) AS INTEGER) AS hour,
+              CAST(strftime('%w', date) AS INTEGER) AS weekday, COUNT(*)
+       FROM appointments WHERE status_id = {COMPLETED} GROUP BY hour, weekday""",
+    """SELECT substr(a.date, 1, 7) AS month, p.method_id, a.procedure_id, SUM(p.amount), COUNT(*)
+       FROM payments p JOIN appointments a ON p.appointment_id = a.id
+       GROUP BY month, p.method_id, a.procedure_id""",
+    f"""SELECT doctor_id, COUNT(*), SUM(CASE WHEN status_id = {COMPLETED} THEN 1 ELSE 0 END)
+       FROM appointments GROUP BY doctor_id""",
+    """SELECT a.doctor_id, SUM(p.amount), COUNT(*)
+       FROM payments p JOIN appointments a ON a.id = p.appointment_id GROUP BY a.doctor_id""",
+]
+
+
+def full_scan_ms(db_path):
+    conn = sqlite3.connect(db_path)
+    try:
+        start = time.perf_counter()
+        for sql in FULL_SCAN_QUERIES:
+            conn.execute(sql).fetchall()
+        return (time.perf_counter() - start) * 1000
+    finally:
+        conn.close()
+
+
+def rollup_ms(db_path):
+    configure_pool(db_path, max_size=1)
+    analytics = AnalyticsService(db_path, cache=False)
+    start = time.perf_counter()
+    analytics.get_appointment_trends()
+    analytics.get_peak_hours_analysis()
+    analytics.get_revenue_analysis()
+    analytics.get_doctor_performance()
+    elapsed = (time.perf_counter() - start) * 1000
+    close_all_pools()
+    return elapsed
+
+
+def insert_cost(db_path, with_triggers):
+    # microseconds per appointment + payment insert, committed every row
+    conn = sqlite3.connect(db_path)
+    try:
+        if not with_triggers:
+            drop_rollup_triggers(conn)
+        next_id = conn.execute("SELECT MAX(id) FROM appointments").fetchone()[0] + 1
+        codes = NameCodes(conn)
+        appointment_codes = (codes.code('appointment_statuses', 'Completed'), codes.code('procedure_names', 'Crown'),
+                             codes.code('procedure_categories', 'Prosthetics'))
+        card = codes.code('payment_methods', 'Card')
+        conn.commit()
+
+        def insert(i):
+            conn.execute("INSERT INTO appointments (id, patient_id, doctor_id, date, start_time, status_id, "
+                         "procedure_id, category_id) VALUES (?, 1, 1, '2025-06-01', '10:00', ?, ?, ?)",
+                         (next_id + i,) + appointment_codes)
+            conn.execute("INSERT INTO payments (appointment_id, amount, method_id) VALUES (?, 500, ?)",
+                         (next_id + i, card))
+            conn.commit()
+
+        return time_per_op(insert, INSERTS)
+    finally:
+        if not with_triggers:
+            create_rollup_triggers(conn)
+            conn.commit()
+        conn.close()
+
+
+def main():
+    print("\nDAILY ROLLUPS BENCHMARK")
+    print("=" * 60)
+    print(f"{'appts':>8} | {'full scan ms':>12} | {'rollups ms':>10}")
+    print("-" * 60)
+
+    last_path = None
+    for appointments in APPOINTMENT_COUNTS:
+        db_path = build_synthetic_db(doctors=20, patients=5000, appointments=appointments)
+        full_ms = full_scan_ms(db_path)
+        rolled_ms = rollup_ms(db_path)
+        print(f"{appointments:8d} | {full_ms:12.1f} | {rolled_ms:10.1f}")
+
+        if last_path:
+            remove_temp_db(last_path)
+        last_path = db_path
+
+    print("\nWrite cost (appointment + payment insert, one commit each)")
+    print_row("without rollup triggers", insert_cost(last_path, with_triggers=False), "us/insert")
+    print_row("with rollup triggers", insert_cost(last_path, with_triggers=True), "us/insert")
+    remove_temp_db(last_path)
+
+    print("\n(rollups only grow with the number of days, not appointments)")
+
+
+if __name__ == "__main__":
+    main()
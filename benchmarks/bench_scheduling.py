@@ -0,0 +1,104 @@
+# slot lookups: a query on appointments for every question (what finding a
+# free slot meant before) versus SchedulingService's in-memory day index
+# run from the project root: python -m benchmarks.bench_scheduling
+
+import random
+import time
+from datetime import date, datetime, timedelta
+
+from benchmarks.common import build_synthetic_db, remove_temp_db
+from database.connection import configure_pool, close_all_pools, pooled_connection
+from database.lookups import code_sql
+from models.dates import parse_minutes, to_epoch_day
+from repositories.appointment_repository import OVERLAPPING_SQL
+from services.scheduling_service import CLOSING, OPENING, SchedulingService
+from services.slot_index import format_minutes
+
+PATIENTS = 20_000
+APPOINTMENTS = 200_000
+CHECKS = 5000
+# build_synthetic_db books 2023-01-01 .. 2024-12-31
+FIRST_DAY = date(2023, 1, 1)
+DAYS = 731
+
+
+def sql_free_slots(conn, doctor_id, day, duration):
+    # the doctor's bookings for the day, then the gaps between them in Python
+    rows = conn.execute(f"SELECT start_time, end_time FROM appointments WHERE doctor_id = ? AND date = ? "
+                        f"AND status_id != {code_sql('appointment_statuses', 'Cancelled')} ORDER BY start_time",
+                        (doctor_id, day)).fetchall()
+    cursor, closing, gaps = parse_minutes(OPENING), parse_minutes(CLOSING), []
+    for start_time, end_time in rows:
+        start, end = parse_minutes(start_time), parse_minutes(end_time)
+        if end <= start:
+            continue
+        if start - cursor >= duration:
+            gaps.append((format_minutes(cursor), format_minutes(start)))
+        cursor = max(cursor, end)
+    if closing - cursor >= duration:
+        gaps.append((format_minutes(cursor), format_minutes(closing)))
+    return gaps
+
+
+def timed_us(func, count):
+    start = time.perf_counter()
+    for i in range(count):
+        func(i)
+    return (time.perf_counter() - start) / count * 1_000_000
+
+
+def main():
+    print("\nSCHEDULING BENCHMARK")
+    print("=" * 60)
+    db_path = build_synthetic_db(patients=PATIENTS, appointments=APPOINTMENTS)
+    try:
+        configure_pool(db_path, max_size=1)
+        service = SchedulingService(db_path)
+        rng = random.Random(9)
+        checks = []
+        for _ in range(CHECKS):
+            start = rng.randrange(8 * 60, 19 * 60, 15)
+            checks.append((rng.randint(1, 10), (FIRST_DAY + timedelta(days=rng.randrange(DAYS))).isoformat(),
+                           format_minutes(start), format_minutes(start + 30)))
+
+        start = time.perf_counter()
+        service.warm(FIRST_DAY, FIRST_DAY + timedelta(days=DAYS - 1))
+        warm_ms = (time.perf_counter() - start) * 1000
+
+        with pooled_connection(db_path) as conn:
+            def sql_conflicts(i):
+                doctor_id, day, start_time, end_time = checks[i]
+                conn.execute(OVERLAPPING_SQL, (doctor_id, to_epoch_day(day), parse_minutes(end_time),
+                                               parse_minutes(start_time), -1)).fetchall()
+
+            def sql_slots(i):
+                doctor_id, day = checks[i][:2]
+                sql_free_slots(conn, doctor_id, day, 30)
+
+            results = [
+                ("conflict check, query", timed_us(sql_conflicts, CHECKS)),
+                ("conflict check, index", timed_us(lambda i: service.conflicts(*checks[i]), CHECKS)),
+                ("free slots for a day, query", timed_us(sql_slots, CHECKS)),
+                ("free slots for a day, index", timed_us(lambda i: service.free_slots(*checks[i][:2]), CHECKS)),
+            ]
+            specialities = [row[0] for row in conn.execute(
+                "SELECT DISTINCT speciality FROM doctors WHERE is_active = 1 ORDER BY speciality")]
+
+        after = datetime(2023, 6, 1, 9, 0)
+        results.append(("next available for a speciality, index",
+                        timed_us(lambda i: service.next_available(specialities[i % len(specialities)], 45,
+                                                                  after + timedelta(days=i % 300)), 1000)))
+
+        print(f"  {APPOINTMENTS:,} appointments, 10 doctors, {DAYS} days\n")
+        print(f"  warm() for every doctor and day: {warm_ms:.0f} ms\n")
+        print(f"  {'':42s} {'us per call':>12s}")
+        print("  " + "-" * 55)
+        for label, us in results:
+            print(f"  {label:42s} {us:12.1f}")
+    finally:
+        close_all_pools()
+        remove_temp_db(db_path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+# get_all() versus iter_all()/page(): peak memory and time until the first
+# page is ready, for a growing patients table
+# run from the project root: python -m benchmarks.bench_streaming
+
+import time
+import tracemalloc
+
+from benchmarks.common import build_synthetic_db, remove_temp_db, print_row
+from database.connection import close_all_pools
+from repositories import PatientRepository
+
+SIZES = [10_000, 100_000, 300_000]
+PAGE_SIZE = 200
+
+
+def measure(func):
+    # (peak MB allocated by python, seconds)
+    tracemalloc.start()
+    start = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak / 1024 / 1024, elapsed
+
+
+def consume(iterator):
+    count = 0
+    for _ in iterator:
+        count += 1
+    return count
+
+
+def main():
+    print("\nSTREAMING PATIENT LISTING BENCHMARK")
+    print("=" * 60)
+
+    for size in SIZES:
+        db_path = build_synthetic_db(doctors=10, patients=size, appointments=0)
+        repo = PatientRepository(db_path)
+        try:
+            repo.page(None, 1)  # open the pool / run migrations outside the timings
+
+            print(f"\n{size:,} patients")
+            peak, seconds = measure(repo.get_all)
+            print_row("get_all() peak memory", peak, "MB")
+            print_row("get_all() until first row", seconds * 1000, "ms")
+
+            peak, seconds = measure(lambda: consume(repo.iter_all()))
+            print_row("iter_all() peak memory (whole table)", peak, "MB")
+
+            peak, seconds = measure(lambda: repo.page(None, PAGE_SIZE))
+            print_row(f"page(None, {PAGE_SIZE}) until first page", seconds * 1000, "ms")
+            last_id = size - PAGE_SIZE
+            peak, seconds = measure(lambda: repo.page(last_id, PAGE_SIZE))
+            print_row(f"page(after {last_id:,}) - last page", seconds * 1000, "ms")
+        finally:
+            close_all_pools()
+            remove_temp_db(db_path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+# checkout flow (book an appointment + record its payment) with two separate
+# commits versus one UnitOfWork commit
+# run from the project root: python -m benchmarks.bench_unit_of_work
+
+from benchmarks.common import build_synthetic_db, remove_temp_db, time_per_op, print_row
+from database.connection import close_all_pools
+from database.unit_of_work import UnitOfWork
+from repositories import AppointmentRepository, PaymentRepository
+
+CHECKOUTS = 500
+
+APPOINTMENT = {'patient_id': 1, 'doctor_id': 1, 'date': "2025-03-14", 'start_time': "10:00",
+               'end_time': "10:30", 'status': 'Completed', 'procedure_name': 'Cleaning',
+               'procedure_category': 'Hygiene'}
+
+
+def main():
+    db_path = build_synthetic_db(doctors=10, patients=100, appointments=1000)
+    appointments = AppointmentRepository(db_path)
+    payments = PaymentRepository(db_path)
+
+    def separate(i):
+        appointment_id = appointments.create(APPOINTMENT)
+        payments.create({'appointment_id': appointment_id, 'amount': 250.0, 'method': 'Card'})
+
+    def unit_of_work(i):
+        with UnitOfWork(db_path):
+            appointment_id = appointments.create(APPOINTMENT)
+            payments.create({'appointment_id': appointment_id, 'amount': 250.0, 'method': 'Card'})
+
+    print("\nUNIT OF WORK BENCHMARK")
+    print("=" * 60)
+    print(f"{CHECKOUTS} checkouts (appointment + payment)\n")
+    try:
+        print_row("two commits (separate creates)", time_per_op(separate, CHECKOUTS), "us/checkout")
+        print_row("one commit (UnitOfWork)", time_per_op(unit_of_work, CHECKOUTS), "us/checkout")
+    finally:
+        close_all_pools()
+        remove_temp_db(db_path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+# shared helpers for the benchmark scripts
+# benchmarks never touch the real clinic database - they work on a temp copy
+
+import os
+import shutil
+import tempfile
+import time
+
+SOURCE_DB = "database/dentalclinic.db"
+
+
+def temp_db_copy(source=SOURCE_DB):
+    # copies the clinic database into a temp folder and returns the new path
+    folder = tempfile.mkdtemp(prefix="clinitrack_bench_")
+    path = os.path.join(folder, "dentalclinic.db")
+    shutil.copyfile(source, path)
+    return path
+
+
+def remove_temp_db(path):
+    # deletes the temp folder created by temp_db_copy
+    shutil.rmtree(os.path.dirname(path), ignore_errors=True)
+
+
+def time_per_op(func, repeat):
+    # runs func `repeat` times and returns the average time per call in microseconds
+    start = time.perf_counter()
+    for i in range(repeat):
+        func(i)
+    elapsed = time.perf_counter() - start
+    return elapsed / repeat * 1_000_000
+
+
+def print_row(label, value, unit):
+    print(f"  {label:40s} {value:12,.1f} {unit}")
+
+
+STATUSES = ['Completed', 'Completed', 'Completed', 'Cancelled', 'No-Show', 'Confirmed']
+CATEGORIES = ['Diagnostic', 'Hygiene', 'Treatment', 'Endodontics', 'Surgery', 'Prosthetics']
+METHODS = ['Cash', 'Card', 'Bank Transfer', 'Insurance']
+
+
+def build_synthetic_db(doctors=10, patients=200, appointments=1000, seed=42):
+    # creates a temp database with the current schema and random (but repeatable) rows
+    # no Faker needed - the names don't matter for timing
+    import random
+    import sqlite3
+    from datetime import date, timedelta
+
+    from database.day_columns import backfill_day_columns, create_day_column_triggers, drop_day_column_triggers
+    from database.lookups import NameCodes
+    from database.migrations import migrate
+    from database.rollups import create_rollup_triggers, drop_rollup_triggers, rebuild_rollups
+
+    rng = random.Random(seed)
+    folder = tempfile.mkdtemp(prefix="clinitrack_bench_")
+    path = os.path.join(folder, "dentalclinic.db")
+
+    conn = sqlite3.connect(path)
+    migrate(conn)
+    # bulk load without the rollup and day column triggers, both are filled in at the end
+    drop_rollup_triggers(conn)
+    drop_day_column_triggers(conn)
+    # status, category etc. go in as lookup codes
+    codes = NameCodes(conn)
+
+    conn.executemany(
+        "INSERT INTO doctors (doctor_id, doctor_name, speciality, room, is_active) VALUES (?, ?, ?, ?, 1)",
+        [(i, f"Dr. Bench {i}", rng.choice(CATEGORIES), f"Cabinet {i}") for i in range(1, doctors + 1)])
+
+    conn.executemany(
+        "INSERT INTO patients (patient_id, patient_name, patient_birthdate, first_visit_at, gender, city) "
+        "VALUES (?, ?, ?, ?, ?, 'Bucharest')",
+        [(i, f"Patient {i}", f"{rng.randint(1940, 2018)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+          "2024-01-01", rng.choice('MF')) for i in range(1, patients + 1)])
+
+    start = date(2023, 1, 1)
+    appointment_rows = []
+    payment_rows = []
+    for i in range(1, appointments + 1):
+        day = start + timedelta(days=rng.randint(0, 730))
+        hour = rng.randint(8, 18)
+        status = rng.choice(STATUSES)
+        category = rng.choice(CATEGORIES)
+        appointment_rows.append((i, rng.randint(1, patients), rng.randint(1, doctors), day.isoformat(),
+                                 f"{hour:02d}:00", f"{hour:02d}:45", codes.code('appointment_statuses', status),
+                                 codes.code('appointment_sources', 'Phone'),
+                                 codes.code('procedure_names', f"{category} procedure"),
+                                 codes.code('procedure_categories', category), f"{day.isoformat()} 09:00:00"))
+        if status == 'Completed':
+            payment_rows.append((i, round(rng.uniform(100, 3000), 2),
+                                 codes.code('payment_methods', rng.choice(METHODS)),
+                                 codes.code('payment_statuses', 'Completed'), f"{day.isoformat()} 12:00:00"))
+
+    conn.executemany(
+        "INSERT INTO appointments (id, patient_id, doctor_id, date, start_time, end_time, status_id, source_id, "
+        "procedure_id, category_id, created_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        appointment_rows)
+    conn.executemany(
+        "INSERT INTO payments (appointment_id, amount, method_id, status_id, paid_at) VALUES (?, ?, ?, ?, ?)",
+        payment_rows)
+    create_rollup_triggers(conn)
+    rebuild_rollups(conn)
+    create_day_column_triggers(conn)
+    backfill_day_columns(conn)
+    conn.commit()
+    conn.execute("ANALYZE")
+    conn.close()
+
+    return path
+
+
+class QueryCounter:
+    # counts the statements sqlite runs on one connection
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, statement):
+        self.count += 1
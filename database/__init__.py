@@ -2,9 +2,32 @@
 Database package - Database connection and utilities
 """
 
-from .connection import get_connection, get_cursor_and_connection
+from .connection import (
+    get_connection,
+    get_cursor_and_connection,
+    ConnectionPool,
+    PoolExhaustedError,
+    get_pool,
+    configure_pool,
+    close_all_pools,
+    pooled_connection,
+    read_only_connection,
+    checkpoint,
+    read_snapshot
+)
+from .unit_of_work import UnitOfWork
 
 __all__ = [
     'get_connection',
-    'get_cursor_and_connection'
+    'get_cursor_and_connection',
+    'ConnectionPool',
+    'PoolExhaustedError',
+    'get_pool',
+    'configure_pool',
+    'close_all_pools',
+    'pooled_connection',
+    'read_only_connection',
+    'checkpoint',
+    'read_snapshot',
+    'UnitOfWork'
 ]
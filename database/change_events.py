@@ -0,0 +1,49 @@
+# tiny publish/subscribe hook for "some rows changed"
+# repositories call notify_change() after they commit a write, anything that
+# keeps derived data around (caches, indexes) subscribes and drops what's stale
+#
+# listeners are called as listener(db_path, table, operation)
+
+import threading
+import weakref
+
+from database.connection import DB_PATH
+
+_listeners = []
+_lock = threading.Lock()
+
+
+def _ref(listener):
+    # bound methods are held weakly so subscribing doesn't keep the object alive
+    if hasattr(listener, '__self__') and hasattr(listener, '__func__'):
+        return weakref.WeakMethod(listener)
+    return lambda: listener
+
+
+def subscribe(listener):
+    with _lock:
+        _listeners.append(_ref(listener))
+
+
+def unsubscribe(listener):
+    with _lock:
+        _listeners[:] = [ref for ref in _listeners if ref() not in (None, listener)]
+
+
+def notify_change(db_path, table, operation):
+    # operation is 'insert', 'update' or 'delete'
+    path = db_path or DB_PATH
+
+    with _lock:
+        listeners = []
+        alive = []
+        for ref in _listeners:
+            listener = ref()
+            if listener is not None:
+                listeners.append(listener)
+                alive.append(ref)
+        _listeners[:] = alive
+
+    # call outside the lock so a listener can (un)subscribe
+    for listener in listeners:
+        listener(path, table, operation)
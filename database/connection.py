@@ -1,16 +1,328 @@
+import os
 import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from urllib.parse import quote
+
+from database.profiling import connection_factory
 
 DB_PATH = "database/dentalclinic.db"
 
+# pragmas applied to every new connection (name -> value), in this order
+# WAL lets the analytics screens keep reading while a reception desk writes:
+# readers see the last commit and never wait for the writer, writers only
+# wait for each other (busy_timeout instead of "database is locked")
+DEFAULT_PRAGMAS = {
+    'foreign_keys': 'ON',           # ACTIVEZ FOREIGN KEYS
+    'busy_timeout': 5000,           # ms to wait for a lock before giving up
+    'journal_mode': 'WAL',          # stored in the file, only the first connection changes it
+    'synchronous': 'NORMAL',        # in WAL a commit survives a crash, a power cut may lose the last few
+    'cache_size': -16000,           # page cache per connection, in KB (negative = KB, not pages)
+    'mmap_size': 268435456,         # read pages through a 256 MB memory map instead of read()
+    'temp_store': 'MEMORY',         # temp b-trees for GROUP BY / ORDER BY stay in RAM
+    'wal_autocheckpoint': 1000,     # see the checkpoint policy below
+    'journal_size_limit': 67108864,
+}
+
+# read-only connections (AnalyticsService) - same tuning minus the settings
+# only a writer can change
+READ_ONLY_PRAGMAS = {name: value for name, value in DEFAULT_PRAGMAS.items()
+                     if name not in ('journal_mode', 'wal_autocheckpoint', 'journal_size_limit')}
+
+# the old settings - rollback journal, no busy timeout (for comparisons)
+ROLLBACK_PRAGMAS = {
+    'foreign_keys': 'ON',
+    'journal_mode': 'DELETE',
+}
+
+# checkpoint policy - how the WAL file gets written back into the database:
+#   - wal_autocheckpoint: the commit that takes the WAL past 1000 pages (~4 MB)
+#     copies it back (PASSIVE - it never waits for readers, it just stops
+#     at the oldest page a reader still needs and carries on next time)
+#   - journal_size_limit: after a checkpoint the WAL file is cut back to
+#     64 MB, so one bulk load doesn't leave a huge file behind
+#   - closing a pool (app exit) runs a TRUNCATE checkpoint, the WAL is empty
+#     while the app isn't running
+#   - checkpoint() for a job that just wrote a lot while the app stays open
+
+DEFAULT_POOL_SIZE = 5
+DEFAULT_POOL_TIMEOUT = 10.0
+
+
+class PoolExhaustedError(Exception):
+    # raised when no connection frees up before the checkout timeout
+    pass
+
+
+def _open_connection(db_path, pragmas, read_only=False):
+    # opens a raw sqlite connection and applies the pragmas
+    # check_same_thread is off because pooled connections move between threads,
+    # the pool makes sure only one thread uses a connection at a time
+    # with profiling on (database/profiling.py) it's a ProfiledConnection
+    if read_only:
+        # mode=ro - any write fails with "attempt to write a readonly database"
+        uri = f"file:{quote(os.path.abspath(db_path))}?mode=ro"
+        conn = sqlite3.connect(uri, uri=True, check_same_thread=False, factory=connection_factory())
+    else:
+        conn = sqlite3.connect(db_path, check_same_thread=False, factory=connection_factory())
+    for name, value in pragmas.items():
+        conn.execute(f"PRAGMA {name} = {value}")
+    return conn
+
+
+class ConnectionPool:
+    # keeps a bounded set of open connections to one database file and
+    # hands them out with connection(). a thread that already holds a
+    # connection gets the same one back, so a repository method called from
+    # inside another one doesn't need a second connection
+    # a read_only pool hands out connections that can't write (analytics)
+
+    def __init__(self, db_path=DB_PATH, max_size=DEFAULT_POOL_SIZE, pragmas=None,
+                 timeout=DEFAULT_POOL_TIMEOUT, migrate=True, read_only=False):
+        if max_size < 1:
+            raise ValueError("max_size must be at least 1")
+
+        self.db_path = db_path
+        self.max_size = max_size
+        self.read_only = read_only
+        if pragmas is None:
+            pragmas = READ_ONLY_PRAGMAS if read_only else DEFAULT_PRAGMAS
+        self.pragmas = dict(pragmas)
+        self.timeout = timeout
+        # bring the schema up to date the first time we connect
+        self.migrate = migrate
+        self._schema_ready = not migrate
+        self._schema_lock = threading.Lock()
+
+        self._idle = []
+        self._opened = 0
+        self._closed = False
+        self._cond = threading.Condition()
+        self._local = threading.local()
+
+    def acquire(self):
+        # check out a connection - reuses an idle one, opens a new one while
+        # under max_size, otherwise waits for somebody to release
+        deadline = time.monotonic() + self.timeout
+
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise PoolExhaustedError(f"pool for {self.db_path} is closed")
+                if self._idle:
+                    return self._idle.pop()
+                if self._opened < self.max_size:
+                    self._opened += 1
+                    break
+
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise PoolExhaustedError(
+                        f"no free connection to {self.db_path} after {self.timeout}s "
+                        f"({self.max_size} in use)")
+                self._cond.wait(remaining)
+
+        # open outside the lock so other threads can keep checking in/out
+        try:
+            if self.read_only and not self._schema_ready:
+                # a read-only connection can't migrate (or create the file),
+                # the writer pool does it before the first one is opened
+                self._ensure_schema(None)
+            conn = _open_connection(self.db_path, self.pragmas, self.read_only)
+            if not self._schema_ready:
+                self._ensure_schema(conn)
+            return conn
+        except Exception:
+            with self._cond:
+                self._opened -= 1
+                self._cond.notify()
+            raise
+
+    def _ensure_schema(self, conn):
+        # runs pending migrations once per pool
+        from database.migrations import migrate
+
+        with self._schema_lock:
+            if not self._schema_ready:
+                if conn is None:
+                    with get_pool(self.db_path).connection():
+                        pass
+                else:
+                    migrate(conn)
+                self._schema_ready = True
+
+    def release(self, conn):
+        # give a connection back - anything left uncommitted is rolled back
+        # so the next user doesn't inherit somebody else's transaction
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+        except sqlite3.Error:
+            self._discard(conn)
+            return
+
+        with self._cond:
+            if self._closed:
+                self._opened -= 1
+                conn.close()
+            else:
+                self._idle.append(conn)
+            self._cond.notify()
+
+    def _discard(self, conn):
+        # drop a broken connection and free its slot
+        try:
+            conn.close()
+        except sqlite3.Error:
+            pass
+        with self._cond:
+            self._opened -= 1
+            self._cond.notify()
+
+    @contextmanager
+    def connection(self):
+        # with pool.connection() as conn: ...
+        held = getattr(self._local, 'conn', None)
+        if held is not None:
+            # nested checkout on the same thread - share the outer connection
+            self._local.depth += 1
+            try:
+                yield held
+            finally:
+                self._local.depth -= 1
+            return
+
+        conn = self.acquire()
+        self._local.conn = conn
+        self._local.depth = 1
+        try:
+            yield conn
+        finally:
+            self._local.conn = None
+            self._local.depth = 0
+            self.release(conn)
+
+    def close(self):
+        # close idle connections now, busy ones when they come back
+        with self._cond:
+            self._closed = True
+            idle = self._idle
+            self._idle = []
+            self._opened -= len(idle)
+            self._cond.notify_all()
+
+        if idle and not self.read_only:
+            # empty the WAL while nobody in this process is using it
+            try:
+                idle[0].execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            except sqlite3.Error:
+                pass
+        for conn in idle:
+            conn.close()
+
+    def stats(self):
+        # small snapshot for debugging / benchmarks
+        with self._cond:
+            return {
+                'db_path': self.db_path,
+                'read_only': self.read_only,
+                'max_size': self.max_size,
+                'open': self._opened,
+                'idle': len(self._idle),
+                'in_use': self._opened - len(self._idle),
+            }
+
+
+# one pool per database file, plus a read-only one if anything asks for it
+# keyed by (path, read_only)
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(db_path=None, read_only=False):
+    # returns the shared pool for a database file, creating it on first use
+    key = (db_path or DB_PATH, read_only)
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = ConnectionPool(key[0], read_only=read_only)
+            _pools[key] = pool
+        return pool
+
+
+def configure_pool(db_path=None, max_size=DEFAULT_POOL_SIZE, pragmas=None,
+                   timeout=DEFAULT_POOL_TIMEOUT, migrate=True, read_only=False):
+    # (re)creates the pool for a database file with custom settings
+    # the old pool, if any, is closed
+    key = (db_path or DB_PATH, read_only)
+    pool = ConnectionPool(key[0], max_size=max_size, pragmas=pragmas, timeout=timeout,
+                          migrate=migrate, read_only=read_only)
+    with _pools_lock:
+        old = _pools.get(key)
+        _pools[key] = pool
+    if old is not None:
+        old.close()
+    return pool
+
+
+def close_all_pools():
+    # closes every pool - call on application exit
+    # read-only pools first, the writer closing last checkpoints the WAL
+    with _pools_lock:
+        pools = sorted(_pools.values(), key=lambda pool: not pool.read_only)
+        _pools.clear()
+    for pool in pools:
+        pool.close()
+
+
+def pooled_connection(db_path=None):
+    """Check out a connection from the shared pool (use with `with`)"""
+    return get_pool(db_path).connection()
+
+
+def read_only_connection(db_path=None):
+    # like pooled_connection() but from the read-only pool - for code that
+    # only reads and shouldn't hold up (or be able to hurt) the writers
+    return get_pool(db_path, read_only=True).connection()
+
+
+def checkpoint(db_path=None, mode="PASSIVE"):
+    # copies the WAL back into the database now (see the checkpoint policy
+    # at the top). PASSIVE never waits, TRUNCATE waits for readers and then
+    # empties the WAL file. returns (busy, pages in the WAL, pages copied)
+    if mode not in ("PASSIVE", "FULL", "RESTART", "TRUNCATE"):
+        raise ValueError(f"unknown checkpoint mode {mode!r}")
+    with pooled_connection(db_path) as conn:
+        return tuple(conn.execute(f"PRAGMA wal_checkpoint({mode})").fetchone())
+
+
+@contextmanager
+def read_snapshot(conn):
+    # runs the SELECTs inside the block in one read transaction so they all
+    # see the same data. if a transaction is already open that one is used
+    if conn.in_transaction:
+        yield conn
+        return
+
+    conn.execute("BEGIN")
+    try:
+        yield conn
+    finally:
+        # nothing was written, just end the transaction
+        if conn.in_transaction:
+            conn.rollback()
+
+
 #Conexiune baza de date
 def get_connection():
-    conn = sqlite3.connect(DB_PATH)
-    conn.execute("PRAGMA foreign_keys = ON") #ACTIVEZ FORIEGN KEYS
-    return conn
+    # standalone connection that the caller has to close
+    # prefer pooled_connection() - this one is kept for one-off scripts
+    return _open_connection(DB_PATH, DEFAULT_PRAGMAS)
 
 
 def get_cursor_and_connection():
-    """Get cursor and connection (most used)"""
+    """Get cursor and connection (standalone, caller closes it)"""
     conn = get_connection()
     cursor = conn.cursor()
-    return cursor, conn
\ No newline at end of file
+    return cursor, conn
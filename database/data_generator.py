@@ -1,8 +1,27 @@
+# generates a realistic (fake) Bucharest dental clinic database
+#
+# usage (from the project root):
+#   python -m database.data_generator                         # 120 patients, 400 appointments
+#   python -m database.data_generator --patients 200000 --appointments 2000000 \
+#          --seed 42 --db /tmp/load_test.db                   # load-test database
+#
+# the same --seed and --today always give the same database. rows are streamed
+# to sqlite with executemany in chunks, so millions of rows don't need much memory
+
+import argparse
+import os
+import random
 import sqlite3
+import time as timer
+from datetime import date, timedelta
+from itertools import accumulate
+
 from faker import Faker
-import random
-from datetime import datetime, timedelta, time
-import os
+
+from database.migrations import migrate
+from database.day_columns import backfill_day_columns, create_day_column_triggers, drop_day_column_triggers
+from database.lookups import NameCodes, code_sql, load_names
+from database.rollups import create_rollup_triggers, drop_rollup_triggers, rebuild_rollups
 
 # Configure for Romania
 fake = Faker('ro_RO')
@@ -10,11 +29,68 @@ fake = Faker('ro_RO')
 # Database path configuration
 PATH_DB = "database/dentalclinic.db"
 
+DEFAULT_CHUNK_SIZE = 5000
+
+# how many different first/last names to take from Faker - names are combined
+# from these pools, calling Faker for every row is too slow for millions of rows
+NAME_POOL_SIZE = 400
+
+# which procedure categories each specialty does
+SPECIALTY_CATEGORIES = {
+    "General Dentistry": ['Diagnostic', 'Hygiene', 'Treatment'],
+    "Orthodontics": ['Orthodontics'],
+    "Endodontics": ['Endodontics'],
+    "Oral Surgery": ['Surgery'],
+    "Implantology": ['Implantology'],
+    "Prosthodontics": ['Prosthetics'],
+    "Aesthetic Dentistry": ['Aesthetics'],
+    "Periodontics": ['Periodontics'],
+}
+# specialties not listed above do the general procedures
+DEFAULT_CATEGORIES = ['Diagnostic', 'Hygiene', 'Treatment']
+
+# Working hours: 8:00 - 19:00, appointments every 30 minutes, no slot at 12:00 (lunch)
+APPOINTMENT_SLOTS = [(hour, minute) for hour in range(8, 19) for minute in (0, 30)
+                     if (hour, minute) != (12, 0)]
+
+# weighted choices used per appointment, cumulative weights computed once
+DATE_CHOICES = ['recent', 'past_year', 'future']
+DATE_CUM_WEIGHTS = list(accumulate([70, 20, 10]))  # 70% last 6 months, 20% last year, 10% future
+SOURCES = ['Phone', 'Online', 'Walk-in', 'Referral', 'Return Patient']
+SOURCE_CUM_WEIGHTS = list(accumulate([35, 30, 10, 15, 10]))
+FUTURE_STATUSES, FUTURE_CUM_WEIGHTS = ['Confirmed', 'Pending'], list(accumulate([80, 20]))
+PAST_STATUSES, PAST_CUM_WEIGHTS = ['Completed', 'Cancelled', 'No-Show'], list(accumulate([85, 10, 5]))
+RECENT_STATUSES, RECENT_CUM_WEIGHTS = ['Completed', 'Cancelled', 'Confirmed'], list(accumulate([70, 15, 15]))
+
+NOTES_OPTIONS = [
+    "Patient arrived on time",
+    "Slight delay due to traffic",
+    "Emergency appointment",
+    "Follow-up required in 2 weeks",
+    "Patient requested specific doctor",
+    "Insurance pre-authorization needed",
+    "Referred by Dr. Marinescu"
+]
+
+
+def ascii_name(name):
+    # lowercase name without romanian diacritics, for email addresses
+    return (name.lower().replace('ă', 'a').replace('î', 'i').replace('ș', 's')
+            .replace('ț', 't').replace('â', 'a'))
+
 
 class BucharestDentalClinicGenerator:
-    def __init__(self):
-        self.conn = sqlite3.connect(PATH_DB)
+    def __init__(self, db_path=PATH_DB, seed=None, today=None, chunk_size=DEFAULT_CHUNK_SIZE):
+        self.db_path = db_path
+        self.conn = sqlite3.connect(db_path)
         self.cursor = self.conn.cursor()
+        self.chunk_size = chunk_size
+
+        # everything random goes through self.random (and Faker, seeded the same),
+        # so the same seed and the same "today" give the same data
+        self.random = random.Random(seed)
+        fake.seed_instance(seed)
+        self.today = today or date.today()
 
         # Realistic Bucharest data
         self.SECTORS = [
@@ -84,15 +160,41 @@ class BucharestDentalClinicGenerator:
         # Phone prefixes for Bucharest
         self.PHONE_PREFIXES = ['021', '031', '0722', '0723', '0724', '0725', '0726', '0727', '0728', '0729']
 
+        # precomputed lookups - the generator used to ask the database for the
+        # doctor's specialty on every appointment and the price on every payment
+        self.procedures_by_category = {}
+        for proc in self.PROCEDURES:
+            self.procedures_by_category.setdefault(proc[1], []).append(proc)
+        self.procedures_by_specialty = {}
+        for name, specialty, education, experience in self.DOCTORS:
+            self.procedures_by_specialty[specialty] = self.procedures_for(specialty)
+        self.price_table = {proc[0]: (proc[3], proc[4]) for proc in self.PROCEDURES}
+
+        self.first_names = None
+        self.last_names = None
+
+    def procedures_for(self, specialty):
+        # procedures a doctor with this specialty does
+        categories = SPECIALTY_CATEGORIES.get(specialty, DEFAULT_CATEGORIES)
+        procedures = [proc for category in categories for proc in self.procedures_by_category.get(category, [])]
+        # If no specific procedures, fall back to general ones
+        if not procedures:
+            procedures = [proc for category in DEFAULT_CATEGORIES
+                          for proc in self.procedures_by_category.get(category, [])]
+        return procedures
+
+    def random_name(self):
+        # Generate realistic Romanian name from the Faker name pools
+        if self.first_names is None:
+            self.first_names = [fake.first_name() for _ in range(NAME_POOL_SIZE)]
+            self.last_names = [fake.last_name() for _ in range(NAME_POOL_SIZE)]
+        return f"{self.random.choice(self.first_names)} {self.random.choice(self.last_names)}"
+
     def generate_realistic_phone(self):
         # generates a fake but realistic looking Romanian phone number
-        prefix = random.choice(self.PHONE_PREFIXES)
-        if prefix.startswith('02') or prefix.startswith('03'):
-            # landline format
-            return f"{prefix}.{random.randint(100, 999)}.{random.randint(100, 999)}"
-        else:
-            # mobile format
-            return f"{prefix}.{random.randint(100, 999)}.{random.randint(100, 999)}"
+        # (landlines and mobiles use the same format)
+        prefix = self.random.choice(self.PHONE_PREFIXES)
+        return f"{prefix}.{self.random.randint(100, 999)}.{self.random.randint(100, 999)}"
 
     def generate_realistic_address(self):
         # generates a fake but realistic Bucharest address
@@ -103,13 +205,34 @@ class BucharestDentalClinicGenerator:
             'Republicii', 'Libertății', 'Unirii', 'Victoriei', 'Pacii', 'Florilor'
         ]
 
-        street_type = random.choice(street_types)
-        street_name = random.choice(street_names)
-        number = random.randint(1, 200)
-        sector = random.choice(self.SECTORS)
+        street_type = self.random.choice(street_types)
+        street_name = self.random.choice(street_names)
+        number = self.random.randint(1, 200)
+        sector = self.random.choice(self.SECTORS)
 
         return f"{street_type} {street_name} {number}, {sector}, Bucharest"
 
+    def insert_rows(self, label, sql, rows):
+        # streams rows into sqlite with executemany, chunk_size rows at a time,
+        # and prints the throughput
+        start = timer.perf_counter()
+        total = 0
+        chunk = []
+        for row in rows:
+            chunk.append(row)
+            if len(chunk) >= self.chunk_size:
+                self.cursor.executemany(sql, chunk)
+                total += len(chunk)
+                chunk = []
+        if chunk:
+            self.cursor.executemany(sql, chunk)
+            total += len(chunk)
+
+        elapsed = timer.perf_counter() - start
+        rate = total / elapsed if elapsed > 0 else 0
+        print(f"   {label}: {total:,} rows in {elapsed:.2f}s ({rate:,.0f} rows/s)")
+        return total
+
     def clear_existing_data(self):
         # deletes all existing data from tables before regenerating
         tables = ['payments', 'appointments', 'procedures', 'doctors', 'patients']
@@ -119,292 +242,280 @@ class BucharestDentalClinicGenerator:
 
     def generate_patients(self, count=120):
         # creates fake patient records with realistic Romanian names and data
-        print(f"Generating {count} realistic patients...")
-
-        for _ in range(count):
-            # Generate realistic Romanian name
-            name = fake.name()
-
-            # Age distribution: more adults than children/elderly
-            age_weights = [5, 15, 25, 30, 20, 5]  # 0-10, 11-25, 26-40, 41-55, 56-70, 71+
-            age_group = random.choices(range(6), weights=age_weights)[0]
-
-            if age_group == 0:
-                age = random.randint(5, 10)
-            elif age_group == 1:
-                age = random.randint(11, 25)
-            elif age_group == 2:
-                age = random.randint(26, 40)
-            elif age_group == 3:
-                age = random.randint(41, 55)
-            elif age_group == 4:
-                age = random.randint(56, 70)
-            else:
-                age = random.randint(71, 85)
-
-            birthdate = datetime.now() - timedelta(days=age * 365 + random.randint(0, 365))
-
-            # First visit - usually within last 2-3 years for existing patients
-            first_visit = fake.date_between(start_date='-3y', end_date='today')
-
-            gender = random.choice(['M', 'F'])
-
-            # Address and contact
-            address = self.generate_realistic_address()
-            phone = self.generate_realistic_phone()
-
-            # Email (60% have email, more for younger patients)
-            email = None
-            if age < 50 and random.random() < 0.8:
-                email_name = name.lower().replace(' ', '.').replace('ă', 'a').replace('î', 'i').replace('ș',
-                                                                                                        's').replace(
-                    'ț', 't').replace('â', 'a')
-                email = f"{email_name}@{random.choice(['gmail.com', 'yahoo.com', 'hotmail.com'])}"
-            elif age >= 50 and random.random() < 0.4:
-                email_name = name.lower().replace(' ', '.').replace('ă', 'a').replace('î', 'i').replace('ș',
-                                                                                                        's').replace(
-                    'ț', 't').replace('â', 'a')
-                email = f"{email_name}@{random.choice(['gmail.com', 'yahoo.com'])}"
-
-            # Insurance
-            insurance = random.choices(
-                self.INSURANCE,
-                weights=[30, 15, 15, 15, 10, 10, 5]  # CNAS most common
-            )[0]
-
-            self.cursor.execute('''
-                INSERT INTO patients (patient_name, patient_birthdate, first_visit_at, gender, 
-                                    address, phone, email, insurance, city)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (name, birthdate.strftime('%Y-%m-%d'), first_visit.strftime('%Y-%m-%d'),
-                  gender, address, phone, email, insurance, 'Bucharest'))
+        # patient ids are 1..count (the tables were cleared before)
+        print(f"Generating {count:,} realistic patients...")
+        rng = self.random
+
+        # Age distribution: more adults than children/elderly
+        age_ranges = [(5, 10), (11, 25), (26, 40), (41, 55), (56, 70), (71, 85)]
+        age_weights = [5, 15, 25, 30, 20, 5]
+        insurance_weights = [30, 15, 15, 15, 10, 10, 5]  # CNAS most common
+
+        def rows():
+            for patient_id in range(1, count + 1):
+                name = self.random_name()
+
+                low, high = rng.choices(age_ranges, weights=age_weights)[0]
+                age = rng.randint(low, high)
+                birthdate = self.today - timedelta(days=age * 365 + rng.randint(0, 365))
+
+                # First visit - usually within last 2-3 years for existing patients
+                first_visit = self.today - timedelta(days=rng.randint(0, 3 * 365))
+
+                gender = rng.choice(['M', 'F'])
+
+                # Address and contact
+                address = self.generate_realistic_address()
+                phone = self.generate_realistic_phone()
+
+                # Email (60% have email, more for younger patients)
+                email = None
+                if age < 50 and rng.random() < 0.8:
+                    email_name = ascii_name(name).replace(' ', '.')
+                    email = f"{email_name}@{rng.choice(['gmail.com', 'yahoo.com', 'hotmail.com'])}"
+                elif age >= 50 and rng.random() < 0.4:
+                    email_name = ascii_name(name).replace(' ', '.')
+                    email = f"{email_name}@{rng.choice(['gmail.com', 'yahoo.com'])}"
+
+                # Insurance
+                insurance = rng.choices(self.INSURANCE, weights=insurance_weights)[0]
+
+                yield (patient_id, name, birthdate.isoformat(), first_visit.isoformat(),
+                       gender, address, phone, email, insurance, 'Bucharest')
+
+        return self.insert_rows('patients', '''
+            INSERT INTO patients (patient_id, patient_name, patient_birthdate, first_visit_at, gender,
+                                  address, phone, email, insurance, city)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', rows())
 
     def generate_doctors(self):
         # creates doctor records from the predefined list
         print("Generating realistic doctors...")
+        rng = self.random
 
-        for i, (name, specialty, education, experience) in enumerate(self.DOCTORS, 1):
-            # Work schedule - most doctors work 5 days, some work 6
-            work_days = random.choice([5, 6])
+        def rows():
+            for i, (name, specialty, education, experience) in enumerate(self.DOCTORS, 1):
+                # Work schedule - most doctors work 5 days, some work 6
+                work_days = rng.choice([5, 6])
 
-            # Room assignment
-            room = f"Cabinet {i}"
+                # Room assignment
+                room = f"Cabinet {i}"
 
-            # Active status - 95% are active
-            is_active = 1 if random.random() < 0.95 else 0
+                # Active status - 95% are active
+                is_active = 1 if rng.random() < 0.95 else 0
 
-            # Phone and email
-            phone = self.generate_realistic_phone()
-            email_name = name.lower().replace('dr. ', '').replace(' ', '.').replace('ă', 'a').replace('î', 'i').replace(
-                'ș', 's').replace('ț', 't').replace('â', 'a')
-            email = f"{email_name}@dentalclinic.ro"
+                # Phone and email
+                phone = self.generate_realistic_phone()
+                email_name = ascii_name(name).replace('dr. ', '').replace(' ', '.')
+                email = f"{email_name}@dentalclinic.ro"
 
-            self.cursor.execute('''
-                INSERT INTO doctors (doctor_id, doctor_name, speciality, room, is_active,
-                                   education, experience_years, work_days, phone, email)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (i, name, specialty, room, is_active, education, experience,
-                  work_days, phone, email))
+                yield (i, name, specialty, room, is_active, education, experience,
+                       work_days, phone, email)
+
+        return self.insert_rows('doctors', '''
+            INSERT INTO doctors (doctor_id, doctor_name, speciality, room, is_active,
+                               education, experience_years, work_days, phone, email)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', rows())
 
     def generate_procedures(self):
         # creates procedure records with pricing info
         print("Generating procedures...")
 
-        for i, (name, category, duration, price_min, price_max) in enumerate(self.PROCEDURES, 1):
-            self.cursor.execute('''
-                INSERT INTO procedures (id, name, category, duration_minutes, price_min, price_max)
-                VALUES (?, ?, ?, ?, ?, ?)
-            ''', (i, name, category, duration, price_min, price_max))
+        rows = ((i, name, category, duration, price_min, price_max)
+                for i, (name, category, duration, price_min, price_max) in enumerate(self.PROCEDURES, 1))
+
+        return self.insert_rows('procedures', '''
+            INSERT INTO procedures (id, name, category, duration_minutes, price_min, price_max)
+            VALUES (?, ?, ?, ?, ?, ?)
+        ''', rows)
 
     def generate_appointments(self, count=400):
         # creates appointment records linking patients to doctors with procedures
-        print(f"Generating {count} realistic appointments...")
-
-        # Get patient and doctor counts
-        self.cursor.execute("SELECT COUNT(*) FROM patients")
-        patient_count = self.cursor.fetchone()[0]
-
-        self.cursor.execute("SELECT COUNT(*) FROM doctors WHERE is_active = 1")
-        doctor_count = self.cursor.fetchone()[0]
-
-        for i in range(count):
-            patient_id = random.randint(1, patient_count)
-            doctor_id = random.randint(1, doctor_count)
-
-            # Generate appointment date - 70% in last 6 months, 20% in last year, 10% future
-            date_choice = random.choices(['recent', 'past_year', 'future'], weights=[70, 20, 10])[0]
-
-            if date_choice == 'recent':
-                appointment_date = fake.date_between(start_date='-6m', end_date='today')
-            elif date_choice == 'past_year':
-                appointment_date = fake.date_between(start_date='-1y', end_date='-6m')
-            else:
-                appointment_date = fake.date_between(start_date='today', end_date='+3m')
-
-            # Working hours: 8:00 - 19:00, appointments every 30 minutes
-            working_hours = [(8, 0), (8, 30), (9, 0), (9, 30), (10, 0), (10, 30), (11, 0), (11, 30),
-                             (12, 0), (12, 30), (13, 0), (13, 30), (14, 0), (14, 30), (15, 0), (15, 30),
-                             (16, 0), (16, 30), (17, 0), (17, 30), (18, 0), (18, 30)]
-
-            # Avoid lunch break (12:00-13:00)
-            available_slots = [slot for slot in working_hours if not (slot[0] == 12 and slot[1] == 0)]
-
-            start_hour, start_minute = random.choice(available_slots)
-            start_time = f"{start_hour:02d}:{start_minute:02d}"
-
-            # Choose procedure based on doctor specialty
-            self.cursor.execute("SELECT speciality FROM doctors WHERE doctor_id = ?", (doctor_id,))
-            doctor_specialty = self.cursor.fetchone()[0]
-
-            # Filter procedures by specialty
-            relevant_procedures = []
-            for proc in self.PROCEDURES:
-                if doctor_specialty == "General Dentistry":
-                    if proc[1] in ['Diagnostic', 'Hygiene', 'Treatment']:
-                        relevant_procedures.append(proc)
-                elif doctor_specialty == "Orthodontics" and proc[1] == 'Orthodontics':
-                    relevant_procedures.append(proc)
-                elif doctor_specialty == "Endodontics" and proc[1] == 'Endodontics':
-                    relevant_procedures.append(proc)
-                elif doctor_specialty == "Oral Surgery" and proc[1] == 'Surgery':
-                    relevant_procedures.append(proc)
-                elif doctor_specialty == "Implantology" and proc[1] == 'Implantology':
-                    relevant_procedures.append(proc)
-                elif doctor_specialty == "Prosthodontics" and proc[1] == 'Prosthetics':
-                    relevant_procedures.append(proc)
-                elif doctor_specialty == "Aesthetic Dentistry" and proc[1] == 'Aesthetics':
-                    relevant_procedures.append(proc)
-                elif doctor_specialty == "Periodontics" and proc[1] == 'Periodontics':
-                    relevant_procedures.append(proc)
-
-            # If no specific procedures, fall back to general ones
-            if not relevant_procedures:
-                relevant_procedures = [proc for proc in self.PROCEDURES if
-                                       proc[1] in ['Diagnostic', 'Hygiene', 'Treatment']]
-
-            procedure = random.choice(relevant_procedures)
-            procedure_name = procedure[0]
-            procedure_category = procedure[1]
-            duration = procedure[2]
-
-            # Calculate end time
-            end_datetime = datetime.combine(appointment_date, time(start_hour, start_minute)) + timedelta(
-                minutes=duration)
-            end_time = end_datetime.strftime('%H:%M')
-
-            # Status distribution based on date
-            if appointment_date > datetime.now().date():
-                # Future appointments
-                status = random.choices(['Confirmed', 'Pending'], weights=[80, 20])[0]
-            elif appointment_date < datetime.now().date() - timedelta(days=7):
-                # Past appointments
-                status = random.choices(['Completed', 'Cancelled', 'No-Show'], weights=[85, 10, 5])[0]
-            else:
-                # Recent appointments
-                status = random.choices(['Completed', 'Cancelled', 'Confirmed'], weights=[70, 15, 15])[0]
-
-            # Appointment source
-            source = random.choices(
-                ['Phone', 'Online', 'Walk-in', 'Referral', 'Return Patient'],
-                weights=[35, 30, 10, 15, 10]
-            )[0]
-
-            # Creation date (before appointment date)
-            days_before = random.randint(1, 45)
-            created_at = (appointment_date - timedelta(days=days_before)).strftime('%Y-%m-%d %H:%M:%S')
-
-            # Notes for some appointments
-            notes = None
-            if random.random() < 0.3:  # 30% have notes
-                notes_options = [
-                    "Patient arrived on time",
-                    "Slight delay due to traffic",
-                    "Emergency appointment",
-                    "Follow-up required in 2 weeks",
-                    "Patient requested specific doctor",
-                    "Insurance pre-authorization needed",
-                    "Referred by Dr. Marinescu"
-                ]
-                notes = random.choice(notes_options)
-
-            self.cursor.execute('''
-                INSERT INTO appointments (id, patient_id, doctor_id, date, start_time, end_time,
-                                        status, source, procedure_name, procedure_category, 
-                                        created_at, notes)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (i + 1, patient_id, doctor_id, appointment_date.strftime('%Y-%m-%d'),
-                  start_time, end_time, status, source, procedure_name, procedure_category,
-                  created_at, notes))
+        print(f"Generating {count:,} realistic appointments...")
+        rng = self.random
+
+        # patients and active doctors are looked up once, not per appointment
+        self.cursor.execute("SELECT MAX(patient_id) FROM patients")
+        patient_count = self.cursor.fetchone()[0] or 0
+
+        self.cursor.execute("SELECT doctor_id, speciality FROM doctors WHERE is_active = 1 ORDER BY doctor_id")
+        doctors = [(doctor_id, self.procedures_by_specialty.get(specialty) or self.procedures_for(specialty))
+                   for doctor_id, specialty in self.cursor.fetchall()]
+
+        if not patient_count or not doctors:
+            print("   no patients or active doctors - skipping appointments")
+            return 0
+
+        self.cursor.execute("SELECT COALESCE(MAX(id), 0) FROM appointments")
+        first_id = self.cursor.fetchone()[0] + 1
+
+        def rows():
+            for appointment_id in range(first_id, first_id + count):
+                patient_id = rng.randint(1, patient_count)
+                doctor_id, procedures = rng.choice(doctors)
+
+                # Generate appointment date - 70% in last 6 months, 20% in last year, 10% future
+                date_choice = rng.choices(DATE_CHOICES, cum_weights=DATE_CUM_WEIGHTS)[0]
+
+                if date_choice == 'recent':
+                    appointment_date = self.today - timedelta(days=rng.randint(0, 182))
+                elif date_choice == 'past_year':
+                    appointment_date = self.today - timedelta(days=rng.randint(182, 365))
+                else:
+                    appointment_date = self.today + timedelta(days=rng.randint(0, 91))
+
+                start_hour, start_minute = rng.choice(APPOINTMENT_SLOTS)
+                start_time = f"{start_hour:02d}:{start_minute:02d}"
+
+                # Choose procedure based on doctor specialty
+                procedure_name, procedure_category, duration = rng.choice(procedures)[:3]
+
+                # Calculate end time (minutes since midnight, procedures end the same day)
+                end_minutes = start_hour * 60 + start_minute + duration
+                end_time = f"{end_minutes // 60:02d}:{end_minutes % 60:02d}"
+
+                # Status distribution based on date
+                if appointment_date > self.today:
+                    # Future appointments
+                    status = rng.choices(FUTURE_STATUSES, cum_weights=FUTURE_CUM_WEIGHTS)[0]
+                elif appointment_date < self.today - timedelta(days=7):
+                    # Past appointments
+                    status = rng.choices(PAST_STATUSES, cum_weights=PAST_CUM_WEIGHTS)[0]
+                else:
+                    # Recent appointments
+                    status = rng.choices(RECENT_STATUSES, cum_weights=RECENT_CUM_WEIGHTS)[0]
+
+                # Appointment source
+                source = rng.choices(SOURCES, cum_weights=SOURCE_CUM_WEIGHTS)[0]
+
+                # Creation date (before appointment date)
+                days_before = rng.randint(1, 45)
+                created_at = f"{(appointment_date - timedelta(days=days_before)).isoformat()} 00:00:00"
+
+                # Notes for some appointments
+                notes = None
+                if rng.random() < 0.3:  # 30% have notes
+                    notes = rng.choice(NOTES_OPTIONS)
+
+                # status, source and the procedure are stored as lookup codes
+                yield (appointment_id, patient_id, doctor_id, appointment_date.isoformat(),
+                       start_time, end_time, codes.code('appointment_statuses', status),
+                       codes.code('appointment_sources', source), codes.code('procedure_names', procedure_name),
+                       codes.code('procedure_categories', procedure_category), created_at, notes)
+
+        codes = NameCodes(self.conn)
+        return self.insert_rows('appointments', '''
+            INSERT INTO appointments (id, patient_id, doctor_id, date, start_time, end_time,
+                                    status_id, source_id, procedure_id, category_id,
+                                    created_at, notes)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', rows())
 
     def generate_payments(self):
         # generates payment records for completed appointments
         print("Generating realistic payments...")
-
-        # Get completed appointments
-        self.cursor.execute("""
-            SELECT id, procedure_name, date, patient_id 
-            FROM appointments 
-            WHERE status = 'Completed'
+        rng = self.random
+
+        # completed appointments are read with their own cursor while the
+        # payments are inserted, so they never all sit in memory
+        completed_appointments = self.conn.execute(f"""
+            SELECT id, procedure_id, date
+            FROM appointments
+            WHERE status_id = {code_sql('appointment_statuses', 'Completed')}
+            ORDER BY id
         """)
-        completed_appointments = self.cursor.fetchall()
-
-        for appointment_id, proc_name, appointment_date, patient_id in completed_appointments:
-            # Get procedure price range
-            self.cursor.execute("SELECT price_min, price_max FROM procedures WHERE name = ?", (proc_name,))
-            price_range = self.cursor.fetchone()
-
-            if price_range:
-                # Generate realistic price within range
-                price_min, price_max = price_range
-                # Price usually closer to minimum for most patients
-                if random.random() < 0.7:
-                    amount = random.uniform(price_min, price_min + (price_max - price_min) * 0.6)
+        procedure_names = load_names(self.conn, 'procedure_names')
+        codes = NameCodes(self.conn)
+
+        def rows():
+            for appointment_id, procedure_id, appointment_date in completed_appointments:
+                price_range = self.price_table.get(procedure_names.get(procedure_id))
+
+                if price_range:
+                    # Generate realistic price within range
+                    price_min, price_max = price_range
+                    # Price usually closer to minimum for most patients
+                    if rng.random() < 0.7:
+                        amount = rng.uniform(price_min, price_min + (price_max - price_min) * 0.6)
+                    else:
+                        amount = rng.uniform(price_min, price_max)
+                    amount = round(amount, 2)
                 else:
-                    amount = random.uniform(price_min, price_max)
-                amount = round(amount, 2)
-            else:
-                amount = random.uniform(150, 500)
-
-            # Payment method distribution
-            method = random.choices(
-                ['Cash', 'Card', 'Bank Transfer', 'Insurance', 'Installments'],
-                weights=[25, 45, 20, 8, 2]
-            )[0]
-
-            # Payment date - usually on appointment date or within a few days
-            payment_delay = random.choices([0, 1, 2, 3, 7, 14, 30], weights=[60, 15, 10, 8, 4, 2, 1])[0]
-            payment_date = datetime.strptime(appointment_date, '%Y-%m-%d') + timedelta(days=payment_delay)
-            paid_at = payment_date.strftime('%Y-%m-%d %H:%M:%S')
-
-            # Payment status
-            status = 'Completed' if payment_delay <= 7 else random.choices(['Completed', 'Pending'], weights=[90, 10])[
-                0]
-
-            self.cursor.execute('''
-                INSERT INTO payments (appointment_id, amount, method, paid_at, status)
-                VALUES (?, ?, ?, ?, ?)
-            ''', (appointment_id, amount, method, paid_at, status))
-
-    def generate_all_data(self):
-        # generates all fake data for the clinic database
-        print("Generating realistic data for Bucharest Dental Clinic...")
-        print("=" * 60)
+                    amount = rng.uniform(150, 500)
 
-        # clear any existing data first
-        self.clear_existing_data()
+                # Payment method distribution
+                method = rng.choices(
+                    ['Cash', 'Card', 'Bank Transfer', 'Insurance', 'Installments'],
+                    weights=[25, 45, 20, 8, 2]
+                )[0]
 
-        # generate data in the right order to avoid foreign key issues
-        self.generate_patients(120)
-        self.generate_doctors()
-        self.generate_procedures()
-        self.generate_appointments(400)
-        self.generate_payments()
+                # Payment date - usually on appointment date or within a few days
+                payment_delay = rng.choices([0, 1, 2, 3, 7, 14, 30], weights=[60, 15, 10, 8, 4, 2, 1])[0]
+                payment_date = date.fromisoformat(appointment_date) + timedelta(days=payment_delay)
+                paid_at = f"{payment_date.isoformat()} 00:00:00"
 
-        # save everything to database
+                # Payment status
+                status = 'Completed' if payment_delay <= 7 else rng.choices(['Completed', 'Pending'], weights=[90, 10])[
+                    0]
+
+                yield (appointment_id, amount, codes.code('payment_methods', method), paid_at,
+                       codes.code('payment_statuses', status))
+
+        return self.insert_rows('payments', '''
+            INSERT INTO payments (appointment_id, amount, method_id, paid_at, status_id)
+            VALUES (?, ?, ?, ?, ?)
+        ''', rows())
+
+    def generate_all_data(self, patients=120, appointments=400):
+        # generates all fake data for the clinic database
+        print("Generating realistic data for Bucharest Dental Clinic...")
+        print("=" * 60)
+        start = timer.perf_counter()
+
+        # make sure the tables exist and are up to date
+        migrate(self.conn)
+
+        # everything below is one transaction - an error leaves the old data
+        self.conn.execute("BEGIN")
+        try:
+            # the rollup triggers would update the rollups once per row,
+            # they are dropped for the load and the rollups rebuilt at the end
+            # (same for the integer day/minute columns)
+            drop_rollup_triggers(self.conn)
+            drop_day_column_triggers(self.conn)
+
+            # clear any existing data first
+            self.clear_existing_data()
+
+            # generate data in the right order to avoid foreign key issues
+            total_rows = self.generate_patients(patients)
+            total_rows += self.generate_doctors()
+            total_rows += self.generate_procedures()
+            total_rows += self.generate_appointments(appointments)
+            total_rows += self.generate_payments()
+
+            print("Rebuilding analytics rollups...")
+            create_rollup_triggers(self.conn)
+            rebuild_rollups(self.conn)
+            create_day_column_triggers(self.conn)
+            backfill_day_columns(self.conn)
+
+            # save everything to database
+            self.conn.commit()
+        except Exception:
+            self.conn.rollback()
+            raise
+
+        # fresh statistics for the query planner
+        self.conn.execute("ANALYZE")
         self.conn.commit()
+        elapsed = timer.perf_counter() - start
 
         print("=" * 60)
         print("Data generation completed successfully!")
+        print(f"{total_rows:,} rows in {elapsed:.1f}s ({total_rows / elapsed:,.0f} rows/s overall)")
         print("\nGenerated data summary:")
 
         # show how many records were created for each table
@@ -412,9 +523,9 @@ class BucharestDentalClinicGenerator:
         for table in tables:
             self.cursor.execute(f"SELECT COUNT(*) FROM {table}")
             count = self.cursor.fetchone()[0]
-            print(f"   {table.capitalize()}: {count} records")
+            print(f"   {table.capitalize()}: {count:,} records")
 
-        print(f"\nDatabase saved to: {PATH_DB}")
+        print(f"\nDatabase saved to: {self.db_path}")
         print("Ready to run the application")
 
     def close(self):
@@ -422,13 +533,35 @@ class BucharestDentalClinicGenerator:
         self.conn.close()
 
 
-if __name__ == "__main__":
+def main():
+    parser = argparse.ArgumentParser(description="Generate a realistic (fake) clinic database")
+    parser.add_argument("--db", default=PATH_DB, help="database file (default: %(default)s)")
+    parser.add_argument("--patients", type=int, default=120, help="number of patients (default: %(default)s)")
+    parser.add_argument("--appointments", type=int, default=400,
+                        help="number of appointments (default: %(default)s)")
+    parser.add_argument("--seed", type=int, default=None, help="random seed for repeatable data")
+    parser.add_argument("--today", type=date.fromisoformat, default=None,
+                        help="reference date YYYY-MM-DD (default: today) - fix it to repeat a run exactly")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE,
+                        help="rows per executemany call (default: %(default)s)")
+    args = parser.parse_args()
+
+    if args.chunk_size < 1:
+        parser.error("--chunk-size must be at least 1")
+
     # Ensure database directory exists
-    os.makedirs("database", exist_ok=True)
+    folder = os.path.dirname(args.db)
+    if folder:
+        os.makedirs(folder, exist_ok=True)
 
     # Generate realistic data
-    generator = BucharestDentalClinicGenerator()
+    generator = BucharestDentalClinicGenerator(args.db, seed=args.seed, today=args.today,
+                                               chunk_size=args.chunk_size)
     try:
-        generator.generate_all_data()
+        generator.generate_all_data(patients=args.patients, appointments=args.appointments)
     finally:
-        generator.close()
\ No newline at end of file
+        generator.close()
+
+
+if __name__ == "__main__":
+    main()
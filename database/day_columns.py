@@ -0,0 +1,189 @@
+# integer day and minute columns next to the TEXT dates and times
+# appointments.date / start_time / end_time and payments.paid_at stay as they
+# are (everything that shows or exports them still reads the text), and
+# triggers keep an integer copy of each:
+#
+#   epoch_day       days since 1970-01-01 (date)
+#   start_minute    minutes since midnight (start_time)
+#   end_minute      minutes since midnight (end_time)
+#   created_day     days since 1970-01-01 (created_at)
+#   paid_day        days since 1970-01-01 (paid_at)
+#
+# filters, GROUP BYs and indexes use the integers - comparing two integers is
+# cheaper than comparing two strings, the index keys are smaller and nobody
+# has to parse 'YYYY-MM-DD' in Python to know the weekday. values that aren't
+# a real date / 'HH:MM' time become NULL, like the date() checks elsewhere.
+#
+# usage (from the project root):
+#   python -m database.day_columns --backfill   recompute every row
+#   python -m database.day_columns --check      compare with the TEXT columns
+
+import argparse
+import sqlite3
+import sys
+import time
+
+from database.connection import DB_PATH
+
+# rows per UPDATE when backfilling
+BACKFILL_BATCH = 5000
+
+# 'YYYY-MM-DD...' text -> days since 1970-01-01, NULL if it isn't a real date
+# (2440587.5 is the julian day of 1970-01-01 00:00)
+EPOCH_DAY_SQL = ("(CASE WHEN date(substr({0}, 1, 10)) = substr({0}, 1, 10) "
+                 "THEN CAST(julianday(substr({0}, 1, 10)) - 2440587.5 AS INTEGER) END)")
+
+# 'HH:MM' / 'H:MM' -> minutes since midnight, NULL for anything else
+MINUTE_SQL = ("(CASE WHEN {0} GLOB '[0-9]:[0-5][0-9]' OR {0} GLOB '[0-2][0-9]:[0-5][0-9]' "
+              "THEN CAST(substr({0}, 1, instr({0}, ':') - 1) AS INTEGER) * 60 "
+              "+ CAST(substr({0}, instr({0}, ':') + 1) AS INTEGER) END)")
+
+# weekday of a day number, 0 = Sunday like strftime('%w') - 1970-01-01 was a
+# Thursday (4). the % 7 + 11 keeps days before 1970 positive
+WEEKDAY_SQL = "(({0} % 7 + 11) % 7)"
+
+# table -> [(integer column, expression over the TEXT column, TEXT column)]
+DAY_COLUMNS = {
+    'appointments': [
+        ('epoch_day', EPOCH_DAY_SQL, 'date'),
+        ('start_minute', MINUTE_SQL, 'start_time'),
+        ('end_minute', MINUTE_SQL, 'end_time'),
+        ('created_day', EPOCH_DAY_SQL, 'created_at'),
+    ],
+    'payments': [
+        ('paid_day', EPOCH_DAY_SQL, 'paid_at'),
+    ],
+}
+
+PRIMARY_KEYS = {'appointments': 'id', 'payments': 'id'}
+
+
+def _assignments(table, row=None):
+    # "epoch_day = <expr>, start_minute = <expr>, ..." for one table
+    # row is 'NEW' inside a trigger, None for the table's own columns
+    prefix = f"{row}." if row else ""
+    return ", ".join(f"{column} = {sql.format(prefix + source)}" for column, sql, source in DAY_COLUMNS[table])
+
+
+def _triggers():
+    # name -> CREATE TRIGGER. SQLite can't change NEW in a BEFORE trigger, so
+    # the row is updated right after it's written. the UPDATE only sets the
+    # integer columns, which no other trigger listens to
+    triggers = {}
+    for table, columns in DAY_COLUMNS.items():
+        key = PRIMARY_KEYS[table]
+        sources = ", ".join(source for _, _, source in columns)
+        triggers[f'trg_day_columns_{table}_insert'] = f'''
+            CREATE TRIGGER IF NOT EXISTS trg_day_columns_{table}_insert
+            AFTER INSERT ON {table}
+            BEGIN
+                UPDATE {table} SET {_assignments(table, 'NEW')} WHERE {key} = NEW.{key};
+            END
+        '''
+        triggers[f'trg_day_columns_{table}_update'] = f'''
+            CREATE TRIGGER IF NOT EXISTS trg_day_columns_{table}_update
+            AFTER UPDATE OF {sources} ON {table}
+            BEGIN
+                UPDATE {table} SET {_assignments(table, 'NEW')} WHERE {key} = NEW.{key};
+            END
+        '''
+    return triggers
+
+
+DAY_COLUMN_TRIGGERS = _triggers()
+
+
+def add_day_columns(conn):
+    # adds the integer columns (NULL until backfilled), skips the ones that exist
+    for table, columns in DAY_COLUMNS.items():
+        existing = {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+        for name, _, _ in columns:
+            if name not in existing:
+                conn.execute(f"ALTER TABLE {table} ADD COLUMN {name} INTEGER")
+
+
+def create_day_column_triggers(conn):
+    for sql in DAY_COLUMN_TRIGGERS.values():
+        conn.execute(sql)
+
+
+def drop_day_column_triggers(conn):
+    # for bulk loads: drop the triggers, load, then create_day_column_triggers()
+    # and backfill_day_columns() - like drop_rollup_triggers()
+    for name in DAY_COLUMN_TRIGGERS:
+        conn.execute(f"DROP TRIGGER IF EXISTS {name}")
+
+
+def backfill_day_columns(conn, batch_size=BACKFILL_BATCH, commit=False):
+    # recomputes the integer columns of every row, batch_size rows per UPDATE
+    # (by primary key range). with commit=True each batch is committed and
+    # the next one starts a new BEGIN IMMEDIATE - a big table then doesn't
+    # hold the write lock for the whole backfill, other processes get a turn
+    # between batches. every batch can be run again, so stopping halfway is
+    # fine. only the --backfill command does that - inside a migration the
+    # caller's transaction has to stay one transaction
+    # returns the number of rows updated
+    updated = 0
+    for table in DAY_COLUMNS:
+        key = PRIMARY_KEYS[table]
+        low, high = conn.execute(f"SELECT MIN({key}), MAX({key}) FROM {table}").fetchone()
+        if low is None:
+            continue
+        sql = f"UPDATE {table} SET {_assignments(table)} WHERE {key} >= ? AND {key} < ?"
+        for start in range(low, high + 1, batch_size):
+            updated += conn.execute(sql, (start, start + batch_size)).rowcount
+            if commit:
+                conn.commit()
+                conn.execute("BEGIN IMMEDIATE")
+    return updated
+
+
+def check_day_columns(conn):
+    # returns (table, column, rows that don't match their TEXT column)
+    # for every integer column that is out of step
+    mismatched = []
+    for table, columns in DAY_COLUMNS.items():
+        for column, sql, source in columns:
+            count = conn.execute(f"SELECT COUNT(*) FROM {table} "
+                                 f"WHERE {column} IS NOT {sql.format(source)}").fetchone()[0]
+            if count:
+                mismatched.append((table, column, count))
+    return mismatched
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Maintain the integer day/minute columns")
+    parser.add_argument("--db", default=DB_PATH, help="database file (default: %(default)s)")
+    parser.add_argument("--backfill", action="store_true", help="recompute the columns for every row")
+    parser.add_argument("--check", action="store_true", help="verify the columns against the TEXT ones")
+    parser.add_argument("--batch-size", type=int, default=BACKFILL_BATCH,
+                        help="rows per batch when backfilling (default: %(default)s)")
+    args = parser.parse_args()
+
+    from database.migrations import migrate
+
+    conn = sqlite3.connect(args.db)
+    try:
+        migrate(conn)
+
+        if args.backfill:
+            start = time.perf_counter()
+            conn.execute("BEGIN IMMEDIATE")
+            updated = backfill_day_columns(conn, args.batch_size, commit=True)
+            conn.commit()
+            print(f"Backfilled {updated} rows in {time.perf_counter() - start:.2f}s")
+
+        if args.check or not args.backfill:
+            mismatched = check_day_columns(conn)
+            if mismatched:
+                for table, column, count in mismatched:
+                    print(f"   {table}.{column}: {count} rows out of date")
+                print("Day columns out of date (run with --backfill)")
+                sys.exit(1)
+            print("Day columns match the TEXT columns")
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
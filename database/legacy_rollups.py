@@ -0,0 +1,265 @@
+# the daily rollups as migration 3 created them - keyed by the status,
+# category, method and procedure strings, before migration 9 replaced those
+# with lookup codes. frozen on purpose: migration 3 has to build the same
+# tables and triggers on every database it runs on, and migration 9 drops
+# and recreates them from database/rollups.py (the live version, with the
+# --check / --rebuild commands)
+#
+# NULL keys are stored as '' because NULLs never collide in a primary key
+
+ROLLUP_TABLES = [
+    # appointments per day by status and category (monthly trends)
+    '''
+    CREATE TABLE IF NOT EXISTS rollup_appointments_daily (
+        day TEXT NOT NULL,
+        status TEXT NOT NULL,
+        category TEXT NOT NULL,
+        appointment_count INTEGER NOT NULL,
+        PRIMARY KEY (day, status, category)
+    ) WITHOUT ROWID
+    ''',
+    # completed appointments per day by start hour (peak hours)
+    '''
+    CREATE TABLE IF NOT EXISTS rollup_completed_hours_daily (
+        day TEXT NOT NULL,
+        hour INTEGER NOT NULL,
+        appointment_count INTEGER NOT NULL,
+        PRIMARY KEY (day, hour)
+    ) WITHOUT ROWID
+    ''',
+    # appointments per day per doctor by status (doctor performance)
+    '''
+    CREATE TABLE IF NOT EXISTS rollup_doctor_daily (
+        day TEXT NOT NULL,
+        doctor_id INTEGER NOT NULL,
+        status TEXT NOT NULL,
+        appointment_count INTEGER NOT NULL,
+        PRIMARY KEY (day, doctor_id, status)
+    ) WITHOUT ROWID
+    ''',
+    # payments per appointment day by method and procedure (revenue)
+    '''
+    CREATE TABLE IF NOT EXISTS rollup_revenue_daily (
+        day TEXT NOT NULL,
+        method TEXT NOT NULL,
+        procedure_name TEXT NOT NULL,
+        amount REAL NOT NULL,
+        payment_count INTEGER NOT NULL,
+        PRIMARY KEY (day, method, procedure_name)
+    ) WITHOUT ROWID
+    ''',
+    # payments per appointment day by doctor (doctor performance)
+    # kept apart from the revenue rollup - doctor x method x procedure per day
+    # would be almost as many rows as payments
+    '''
+    CREATE TABLE IF NOT EXISTS rollup_doctor_revenue_daily (
+        day TEXT NOT NULL,
+        doctor_id INTEGER NOT NULL,
+        amount REAL NOT NULL,
+        payment_count INTEGER NOT NULL,
+        PRIMARY KEY (day, doctor_id)
+    ) WITHOUT ROWID
+    ''',
+]
+
+ROLLUP_TABLE_NAMES = ['rollup_appointments_daily', 'rollup_completed_hours_daily',
+                      'rollup_doctor_daily', 'rollup_revenue_daily', 'rollup_doctor_revenue_daily']
+
+# hour of a "HH:MM" start time
+HOUR_SQL = "CAST(substr({0}, 1, instr({0}, ':') - 1) AS INTEGER)"
+
+
+def _add_appointment(row):
+    # statements that count one appointment (row is NEW or OLD) into the rollups
+    return f'''
+        INSERT INTO rollup_appointments_daily (day, status, category, appointment_count)
+        VALUES (COALESCE({row}.date, ''), COALESCE({row}.status, ''), COALESCE({row}.procedure_category, ''), 1)
+        ON CONFLICT (day, status, category) DO UPDATE SET appointment_count = appointment_count + 1;
+
+        INSERT INTO rollup_doctor_daily (day, doctor_id, status, appointment_count)
+        VALUES (COALESCE({row}.date, ''), {row}.doctor_id, COALESCE({row}.status, ''), 1)
+        ON CONFLICT (day, doctor_id, status) DO UPDATE SET appointment_count = appointment_count + 1;
+
+        INSERT INTO rollup_completed_hours_daily (day, hour, appointment_count)
+        SELECT COALESCE({row}.date, ''), {HOUR_SQL.format(row + '.start_time')}, 1
+        WHERE {row}.status = 'Completed' AND {row}.start_time IS NOT NULL
+        ON CONFLICT (day, hour) DO UPDATE SET appointment_count = appointment_count + 1;
+    '''
+
+
+def _remove_appointment(row):
+    # statements that take one appointment back out of the rollups
+    return f'''
+        UPDATE rollup_appointments_daily SET appointment_count = appointment_count - 1
+        WHERE day = COALESCE({row}.date, '') AND status = COALESCE({row}.status, '')
+          AND category = COALESCE({row}.procedure_category, '');
+
+        UPDATE rollup_doctor_daily SET appointment_count = appointment_count - 1
+        WHERE day = COALESCE({row}.date, '') AND doctor_id = {row}.doctor_id
+          AND status = COALESCE({row}.status, '');
+
+        UPDATE rollup_completed_hours_daily SET appointment_count = appointment_count - 1
+        WHERE {row}.status = 'Completed' AND {row}.start_time IS NOT NULL
+          AND day = COALESCE({row}.date, '') AND hour = {HOUR_SQL.format(row + '.start_time')};
+
+        DELETE FROM rollup_appointments_daily WHERE appointment_count <= 0 AND day = COALESCE({row}.date, '');
+        DELETE FROM rollup_doctor_daily WHERE appointment_count <= 0 AND day = COALESCE({row}.date, '');
+        DELETE FROM rollup_completed_hours_daily WHERE appointment_count <= 0 AND day = COALESCE({row}.date, '');
+    '''
+
+
+def _add_payment(row, sign, appointment_filter):
+    # adds (sign=1) or subtracts (sign=-1) one payment into the revenue rollups,
+    # keyed by the appointment it belongs to
+    return f'''
+        INSERT INTO rollup_revenue_daily (day, method, procedure_name, amount, payment_count)
+        SELECT COALESCE(a.date, ''), COALESCE({row}.method, ''), COALESCE(a.procedure_name, ''),
+               {sign} * COALESCE({row}.amount, 0), {sign}
+        FROM appointments a
+        WHERE {appointment_filter}
+        ON CONFLICT (day, method, procedure_name) DO UPDATE
+        SET amount = amount + excluded.amount, payment_count = payment_count + excluded.payment_count;
+
+        INSERT INTO rollup_doctor_revenue_daily (day, doctor_id, amount, payment_count)
+        SELECT COALESCE(a.date, ''), a.doctor_id, {sign} * COALESCE({row}.amount, 0), {sign}
+        FROM appointments a
+        WHERE {appointment_filter}
+        ON CONFLICT (day, doctor_id) DO UPDATE
+        SET amount = amount + excluded.amount, payment_count = payment_count + excluded.payment_count;
+    '''
+
+
+def _move_appointment_payments(old_or_new, sign):
+    # adds/subtracts every payment of one appointment, using the OLD or NEW
+    # appointment values for the rollup key
+    return f'''
+        INSERT INTO rollup_revenue_daily (day, method, procedure_name, amount, payment_count)
+        SELECT COALESCE({old_or_new}.date, ''), COALESCE(p.method, ''), COALESCE({old_or_new}.procedure_name, ''),
+               {sign} * SUM(COALESCE(p.amount, 0)), {sign} * COUNT(*)
+        FROM payments p
+        WHERE p.appointment_id = {old_or_new}.id
+        GROUP BY p.method
+        ON CONFLICT (day, method, procedure_name) DO UPDATE
+        SET amount = amount + excluded.amount, payment_count = payment_count + excluded.payment_count;
+
+        INSERT INTO rollup_doctor_revenue_daily (day, doctor_id, amount, payment_count)
+        SELECT COALESCE({old_or_new}.date, ''), {old_or_new}.doctor_id,
+               {sign} * SUM(COALESCE(p.amount, 0)), {sign} * COUNT(*)
+        FROM payments p
+        WHERE p.appointment_id = {old_or_new}.id
+        GROUP BY p.appointment_id
+        ON CONFLICT (day, doctor_id) DO UPDATE
+        SET amount = amount + excluded.amount, payment_count = payment_count + excluded.payment_count;
+    '''
+
+
+def _clean_empty_revenue(day):
+    # drops revenue rows that went back to zero payments on that day
+    return f'''
+        DELETE FROM rollup_revenue_daily WHERE payment_count <= 0 AND day = {day};
+        DELETE FROM rollup_doctor_revenue_daily WHERE payment_count <= 0 AND day = {day};
+    '''
+
+
+PAYMENT_DAY = "(SELECT COALESCE(date, '') FROM appointments WHERE id = {0}.appointment_id)"
+
+ROLLUP_TRIGGERS = {
+    'trg_rollup_appointments_insert': f'''
+        CREATE TRIGGER IF NOT EXISTS trg_rollup_appointments_insert
+        AFTER INSERT ON appointments
+        BEGIN
+            {_add_appointment('NEW')}
+        END
+    ''',
+    'trg_rollup_appointments_delete': f'''
+        CREATE TRIGGER IF NOT EXISTS trg_rollup_appointments_delete
+        AFTER DELETE ON appointments
+        BEGIN
+            {_remove_appointment('OLD')}
+            {_move_appointment_payments('OLD', -1)}
+            {_clean_empty_revenue("COALESCE(OLD.date, '')")}
+        END
+    ''',
+    'trg_rollup_appointments_update': f'''
+        CREATE TRIGGER IF NOT EXISTS trg_rollup_appointments_update
+        AFTER UPDATE OF date, status, procedure_category, doctor_id, start_time, procedure_name, id
+        ON appointments
+        BEGIN
+            {_remove_appointment('OLD')}
+            {_add_appointment('NEW')}
+            {_move_appointment_payments('OLD', -1)}
+            {_move_appointment_payments('NEW', 1)}
+            {_clean_empty_revenue("COALESCE(OLD.date, '')")}
+        END
+    ''',
+    'trg_rollup_payments_insert': f'''
+        CREATE TRIGGER IF NOT EXISTS trg_rollup_payments_insert
+        AFTER INSERT ON payments
+        BEGIN
+            {_add_payment('NEW', 1, 'a.id = NEW.appointment_id')}
+        END
+    ''',
+    'trg_rollup_payments_delete': f'''
+        CREATE TRIGGER IF NOT EXISTS trg_rollup_payments_delete
+        AFTER DELETE ON payments
+        BEGIN
+            {_add_payment('OLD', -1, 'a.id = OLD.appointment_id')}
+            {_clean_empty_revenue(PAYMENT_DAY.format('OLD'))}
+        END
+    ''',
+    'trg_rollup_payments_update': f'''
+        CREATE TRIGGER IF NOT EXISTS trg_rollup_payments_update
+        AFTER UPDATE OF amount, method, appointment_id ON payments
+        BEGIN
+            {_add_payment('OLD', -1, 'a.id = OLD.appointment_id')}
+            {_add_payment('NEW', 1, 'a.id = NEW.appointment_id')}
+            {_clean_empty_revenue(PAYMENT_DAY.format('OLD'))}
+        END
+    ''',
+}
+
+# how each rollup is computed from the base tables (used by rebuild and check)
+ROLLUP_SOURCES = {
+    'rollup_appointments_daily': '''
+        SELECT COALESCE(date, ''), COALESCE(status, ''), COALESCE(procedure_category, ''), COUNT(*)
+        FROM appointments
+        GROUP BY 1, 2, 3
+    ''',
+    'rollup_completed_hours_daily': f'''
+        SELECT COALESCE(date, ''), {HOUR_SQL.format('start_time')}, COUNT(*)
+        FROM appointments
+        WHERE status = 'Completed' AND start_time IS NOT NULL
+        GROUP BY 1, 2
+    ''',
+    'rollup_doctor_daily': '''
+        SELECT COALESCE(date, ''), doctor_id, COALESCE(status, ''), COUNT(*)
+        FROM appointments
+        GROUP BY 1, 2, 3
+    ''',
+    'rollup_revenue_daily': '''
+        SELECT COALESCE(a.date, ''), COALESCE(p.method, ''), COALESCE(a.procedure_name, ''),
+               SUM(COALESCE(p.amount, 0)), COUNT(*)
+        FROM payments p
+        JOIN appointments a ON a.id = p.appointment_id
+        GROUP BY 1, 2, 3
+    ''',
+    'rollup_doctor_revenue_daily': '''
+        SELECT COALESCE(a.date, ''), a.doctor_id, SUM(COALESCE(p.amount, 0)), COUNT(*)
+        FROM payments p
+        JOIN appointments a ON a.id = p.appointment_id
+        GROUP BY 1, 2
+    ''',
+}
+
+
+def create_rollup_triggers(conn):
+    for sql in ROLLUP_TRIGGERS.values():
+        conn.execute(sql)
+
+
+def rebuild_rollups(conn):
+    # recomputes every rollup table from the base tables
+    # runs inside the migration's transaction
+    for table in ROLLUP_TABLE_NAMES:
+        conn.execute(f"DELETE FROM {table}")
+        conn.execute(f"INSERT INTO {table} {ROLLUP_SOURCES[table]}")
@@ -0,0 +1,212 @@
+# lookup (dimension) tables for the repeated strings in appointments and
+# payments. the tables store an integer code, the name lives once in a small
+# lookup table:
+#
+#   appointments.status_id     -> appointment_statuses
+#   appointments.source_id     -> appointment_sources
+#   appointments.procedure_id  -> procedure_names
+#   appointments.category_id   -> procedure_categories
+#   payments.method_id         -> payment_methods
+#   payments.status_id         -> payment_statuses
+#
+# every lookup table is (id INTEGER PRIMARY KEY, name TEXT UNIQUE) and only
+# grows - a name that isn't there yet is added the first time it's written.
+# the appointment_details / payment_details views put the names back, with
+# the columns the tables used to have, so the repositories (and anybody with
+# the sqlite shell) still read and write strings.
+#
+# in SQL, compare codes with code_sql('appointment_statuses', 'Completed')
+# (a constant subquery, SQLite runs it once) instead of joining the names
+
+# table -> {name column in the views: (code column, lookup table)}
+CODED_COLUMNS = {
+    'appointments': {
+        'status': ('status_id', 'appointment_statuses'),
+        'source': ('source_id', 'appointment_sources'),
+        'procedure_name': ('procedure_id', 'procedure_names'),
+        'procedure_category': ('category_id', 'procedure_categories'),
+    },
+    'payments': {
+        'method': ('method_id', 'payment_methods'),
+        'status': ('status_id', 'payment_statuses'),
+    },
+}
+
+LOOKUP_TABLES = [lookup for columns in CODED_COLUMNS.values() for _, lookup in columns.values()]
+
+LOOKUP_TABLE_SQL = [f"CREATE TABLE IF NOT EXISTS {lookup} (id INTEGER PRIMARY KEY, name TEXT NOT NULL UNIQUE)"
+                    for lookup in LOOKUP_TABLES]
+
+# the tables with codes instead of strings, same column order otherwise
+APPOINTMENTS_TABLE = '''
+    CREATE TABLE appointments (
+        id INTEGER PRIMARY KEY,
+        patient_id INTEGER NOT NULL,
+        doctor_id INTEGER NOT NULL,
+        date TEXT,
+        start_time TEXT,
+        end_time TEXT,
+        status_id INTEGER REFERENCES appointment_statuses(id),
+        source_id INTEGER REFERENCES appointment_sources(id),
+        procedure_id INTEGER REFERENCES procedure_names(id),
+        category_id INTEGER REFERENCES procedure_categories(id),
+        created_at TEXT,
+        notes TEXT,
+        epoch_day INTEGER,
+        start_minute INTEGER,
+        end_minute INTEGER,
+        created_day INTEGER,
+        FOREIGN KEY (patient_id) REFERENCES patients(patient_id),
+        FOREIGN KEY (doctor_id) REFERENCES doctors(doctor_id)
+    )
+'''
+
+PAYMENTS_TABLE = '''
+    CREATE TABLE payments (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        appointment_id INTEGER NOT NULL,
+        amount REAL,
+        method_id INTEGER REFERENCES payment_methods(id),
+        paid_at TEXT,
+        status_id INTEGER REFERENCES payment_statuses(id),
+        paid_day INTEGER,
+        FOREIGN KEY (appointment_id) REFERENCES appointments(id)
+    )
+'''
+
+# columns the old tables and the new ones have in common
+SHARED_COLUMNS = {
+    'appointments': ['id', 'patient_id', 'doctor_id', 'date', 'start_time', 'end_time', 'created_at', 'notes',
+                     'epoch_day', 'start_minute', 'end_minute', 'created_day'],
+    'payments': ['id', 'appointment_id', 'amount', 'paid_at', 'paid_day'],
+}
+
+# the indexes of migrations 2-8 again, on the code columns
+CODED_INDEXES = [
+    "CREATE INDEX IF NOT EXISTS idx_appointments_patient_date_status "
+    "ON appointments(patient_id, date, status_id)",
+    "CREATE INDEX IF NOT EXISTS idx_appointments_doctor_status ON appointments(doctor_id, status_id)",
+    "CREATE INDEX IF NOT EXISTS idx_appointments_doctor_day "
+    "ON appointments(doctor_id, epoch_day, status_id, category_id, patient_id)",
+    "CREATE INDEX IF NOT EXISTS idx_appointments_day_status_category_patient "
+    "ON appointments(epoch_day, status_id, category_id, patient_id)",
+    "CREATE INDEX IF NOT EXISTS idx_appointments_status_day_minute "
+    "ON appointments(status_id, epoch_day, start_minute)",
+    "CREATE INDEX IF NOT EXISTS idx_payments_appointment_status ON payments(appointment_id, amount, status_id)",
+    "CREATE INDEX IF NOT EXISTS idx_payments_paid_at ON payments(paid_at)",
+    "CREATE INDEX IF NOT EXISTS idx_payments_paid_day ON payments(paid_day, amount)",
+]
+
+# the old table layout, names instead of codes - what the repositories read
+DETAIL_VIEWS = [
+    '''
+    CREATE VIEW IF NOT EXISTS appointment_details AS
+    SELECT a.id, a.patient_id, a.doctor_id, a.date, a.start_time, a.end_time,
+           appointment_statuses.name AS status, appointment_sources.name AS source,
+           procedure_names.name AS procedure_name, procedure_categories.name AS procedure_category,
+           a.created_at, a.notes, a.epoch_day, a.start_minute, a.end_minute, a.created_day
+    FROM appointments a
+    LEFT JOIN appointment_statuses ON appointment_statuses.id = a.status_id
+    LEFT JOIN appointment_sources ON appointment_sources.id = a.source_id
+    LEFT JOIN procedure_names ON procedure_names.id = a.procedure_id
+    LEFT JOIN procedure_categories ON procedure_categories.id = a.category_id
+    ''',
+    '''
+    CREATE VIEW IF NOT EXISTS payment_details AS
+    SELECT p.id, p.appointment_id, p.amount, payment_methods.name AS method, p.paid_at,
+           payment_statuses.name AS status, p.paid_day
+    FROM payments p
+    LEFT JOIN payment_methods ON payment_methods.id = p.method_id
+    LEFT JOIN payment_statuses ON payment_statuses.id = p.status_id
+    ''',
+]
+
+
+def code_sql(lookup, name):
+    # SQL for the code of a fixed name, e.g. status_id = code_sql('appointment_statuses', 'Completed')
+    # NULL if nobody has written that name yet, which matches nothing
+    return f"(SELECT id FROM {lookup} WHERE name = '{name}')"
+
+
+def codes_sql(lookup, count):
+    # SQL for the codes of `count` names passed as parameters: status_id IN codes_sql(..., 2)
+    return f"(SELECT id FROM {lookup} WHERE name IN ({', '.join('?' * count)}))"
+
+
+def load_names(conn, lookup):
+    # {code: name} for one lookup table - they're tiny
+    return dict(conn.execute(f"SELECT id, name FROM {lookup}"))
+
+
+class NameCodes:
+    # name -> code for the writes of one transaction, adding names that
+    # aren't in their lookup table yet (the caller's transaction holds the
+    # write lock, nobody adds the same name in between). don't keep one
+    # across transactions: a rollback takes the new codes back and the same
+    # id can be handed out for another name
+    def __init__(self, conn):
+        self.conn = conn
+        self.codes = {}
+
+    def code(self, lookup, name):
+        if name is None:
+            return None
+        key = (lookup, name)
+        code = self.codes.get(key)
+        if code is None:
+            row = self.conn.execute(f"SELECT id FROM {lookup} WHERE name = ?", (name,)).fetchone()
+            if row is None:
+                code = self.conn.execute(f"INSERT INTO {lookup} (name) VALUES (?)", (name,)).lastrowid
+            else:
+                code = row[0]
+            self.codes[key] = code
+        return code
+
+    def column(self, table, name, value):
+        # (column, value) to write for one field of `table` - coded fields
+        # become their code column, everything else is written as it is
+        coded = CODED_COLUMNS[table].get(name)
+        if coded is None:
+            return name, value
+        column, lookup = coded
+        return column, self.code(lookup, value)
+
+
+def rewrite_with_codes(conn):
+    # migration 9: fills the lookup tables from the strings in appointments
+    # and payments and rebuilds both tables with codes. SQLite can't change
+    # a column's type in place, so the old tables are renamed, the new ones
+    # created and filled, and the old ones dropped. renaming also points the
+    # payments foreign key at appointments_old, so nothing refers to a table
+    # that's about to go. one transaction - in between, half the rows would
+    # be missing. triggers and indexes are dropped with the old tables, the
+    # migration creates them again
+    for table, columns in CODED_COLUMNS.items():
+        for name, (_, lookup) in columns.items():
+            conn.execute(f"INSERT OR IGNORE INTO {lookup} (name) "
+                         f"SELECT DISTINCT {name} FROM {table} WHERE {name} IS NOT NULL ORDER BY {name}")
+
+    conn.execute("ALTER TABLE payments RENAME TO payments_old")
+    conn.execute("ALTER TABLE appointments RENAME TO appointments_old")
+    conn.execute(APPOINTMENTS_TABLE)
+    conn.execute(PAYMENTS_TABLE)
+
+    for table in ('appointments', 'payments'):
+        columns = list(SHARED_COLUMNS[table])
+        values = [f"o.{column}" for column in columns]
+        joins = []
+        for i, (name, (code_column, lookup)) in enumerate(CODED_COLUMNS[table].items()):
+            columns.append(code_column)
+            values.append(f"l{i}.id")
+            joins.append(f"LEFT JOIN {lookup} l{i} ON l{i}.name = o.{name}")
+        conn.execute(f"INSERT INTO {table} ({', '.join(columns)}) "
+                     f"SELECT {', '.join(values)} FROM {table}_old o {' '.join(joins)} ORDER BY o.id")
+
+    # payments ids are AUTOINCREMENT - keep counting from where the old table was
+    conn.execute("INSERT INTO sqlite_sequence (name, seq) SELECT 'payments', 0 "
+                 "WHERE NOT EXISTS (SELECT 1 FROM sqlite_sequence WHERE name = 'payments')")
+    conn.execute("UPDATE sqlite_sequence SET seq = MAX(seq, COALESCE("
+                 "(SELECT seq FROM sqlite_sequence WHERE name = 'payments_old'), 0)) WHERE name = 'payments'")
+
+    conn.execute("DROP TABLE payments_old")
+    conn.execute("DROP TABLE appointments_old")
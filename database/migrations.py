@@ -0,0 +1,358 @@
+# versioned schema migrations for the clinic database
+# every migration has a version number, a description and a list of steps.
+# a step is either a SQL string or a function that takes the connection.
+# applied versions are recorded in the schema_version table, so running
+# migrate() again only applies what is new.
+#
+# usage: python -m database.migrations [--status] [--vacuum] [--db PATH]
+
+import argparse
+import os
+import sqlite3
+
+from database.connection import DB_PATH
+from database.day_columns import (add_day_columns, backfill_day_columns, create_day_column_triggers,
+                                  drop_day_column_triggers)
+from database.lookups import CODED_INDEXES, DETAIL_VIEWS, LOOKUP_TABLE_SQL, rewrite_with_codes
+from database import rollups
+from database.legacy_rollups import ROLLUP_TABLES, create_rollup_triggers, rebuild_rollups
+from database.search_index import create_patient_search_index
+
+
+# ----- migration 1: base tables -----
+
+BASE_TABLES = [
+    '''
+    CREATE TABLE IF NOT EXISTS patients(
+        patient_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        patient_name TEXT NOT NULL,
+        patient_birthdate TEXT NOT NULL,
+        first_visit_at TEXT NOT NULL,
+        gender TEXT NOT NULL,
+        city TEXT NOT NULL,
+        address TEXT,
+        phone TEXT,
+        email TEXT,
+        insurance TEXT
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS doctors(
+        doctor_id INTEGER PRIMARY KEY,
+        doctor_name TEXT NOT NULL,
+        speciality TEXT NOT NULL,
+        room TEXT NOT NULL,
+        is_active BOOLEAN NOT NULL,
+        education TEXT,
+        experience_years INTEGER,
+        work_days INTEGER,
+        phone TEXT,
+        email TEXT
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS procedures (
+        id INTEGER PRIMARY KEY,
+        name TEXT NOT NULL,
+        category TEXT,
+        duration_minutes INTEGER,
+        price_min REAL,
+        price_max REAL
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS appointments (
+        id INTEGER PRIMARY KEY,
+        patient_id INTEGER NOT NULL,
+        doctor_id INTEGER NOT NULL,
+        date TEXT,
+        start_time TEXT,
+        end_time TEXT,
+        status TEXT,
+        source TEXT,
+        procedure_name TEXT,
+        procedure_category TEXT,
+        created_at TEXT,
+        notes TEXT,
+        FOREIGN KEY (patient_id) REFERENCES patients(patient_id),
+        FOREIGN KEY (doctor_id) REFERENCES doctors(doctor_id)
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS payments (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        appointment_id INTEGER NOT NULL,
+        amount REAL,
+        method TEXT,
+        paid_at TEXT,
+        status TEXT DEFAULT 'Completed',
+        FOREIGN KEY (appointment_id) REFERENCES appointments(id)
+    )
+    ''',
+]
+
+# columns that older databases were created without
+LEGACY_COLUMNS = {
+    'patients': [('address', 'TEXT'), ('phone', 'TEXT'), ('email', 'TEXT'), ('insurance', 'TEXT')],
+    'doctors': [('education', 'TEXT'), ('experience_years', 'INTEGER'), ('work_days', 'INTEGER'),
+                ('phone', 'TEXT'), ('email', 'TEXT')],
+    'appointments': [('notes', 'TEXT')],
+    'payments': [('status', "TEXT DEFAULT 'Completed'")],
+}
+
+
+def add_legacy_columns(conn):
+    # databases made before the contact/notes/status columns existed
+    # get them added, existing rows are left as NULL (or the default)
+    for table, columns in LEGACY_COLUMNS.items():
+        existing = {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+        for name, column_type in columns:
+            if name not in existing:
+                conn.execute(f"ALTER TABLE {table} ADD COLUMN {name} {column_type}")
+
+
+# ----- migration 2: indexes for the hot query shapes -----
+
+HOT_COLUMN_INDEXES = [
+    # per-patient history: counts, last visit (main.patient_analytics, patient details)
+    "CREATE INDEX IF NOT EXISTS idx_appointments_patient_date ON appointments(patient_id, date)",
+    # per-doctor status counts (doctor performance)
+    "CREATE INDEX IF NOT EXISTS idx_appointments_doctor_status ON appointments(doctor_id, status)",
+    # monthly trends + newest-first listings, covers date/status/category
+    "CREATE INDEX IF NOT EXISTS idx_appointments_date_status_category "
+    "ON appointments(date, status, procedure_category)",
+    # peak hours only looks at completed appointments
+    "CREATE INDEX IF NOT EXISTS idx_appointments_status_date_time "
+    "ON appointments(status, date, start_time)",
+    # payments joined to appointments, covers SUM(amount)
+    "CREATE INDEX IF NOT EXISTS idx_payments_appointment ON payments(appointment_id, amount)",
+    # newest payments first
+    "CREATE INDEX IF NOT EXISTS idx_payments_paid_at ON payments(paid_at)",
+    # give the query planner statistics for the new indexes
+    "ANALYZE",
+]
+
+
+# ----- migration 3: daily rollups for the dashboard -----
+# tables + triggers live in database/legacy_rollups.py, the backfill is a full rebuild
+
+DAILY_ROLLUPS = ROLLUP_TABLES + [create_rollup_triggers, rebuild_rollups]
+
+
+# ----- migration 5: indexes for filtered analytics -----
+# AnalyticsService filters (date window, doctor_ids, status, category) that
+# the rollups can't answer read appointments directly. patient_id at the end
+# makes "patients seen in the window" (filtered demographics) index-only
+
+FILTERED_ANALYTICS_INDEXES = [
+    # a set of doctors over a date window
+    "CREATE INDEX IF NOT EXISTS idx_appointments_doctor_date "
+    "ON appointments(doctor_id, date, status, procedure_category, patient_id)",
+    # replaces idx_appointments_date_status_category, same prefix + patient_id
+    "CREATE INDEX IF NOT EXISTS idx_appointments_date_status_category_patient "
+    "ON appointments(date, status, procedure_category, patient_id)",
+    "DROP INDEX IF EXISTS idx_appointments_date_status_category",
+    "ANALYZE",
+]
+
+
+# ----- migration 6: indexes for sorting the GUI patient table -----
+# the virtual table (gui_table.py) shows one block of the sorted patient list
+# at a time. without an index every block sorts the whole table; with one the
+# block is read in index order (the rowid at the end of the index is the tie
+# breaker sorted_page adds). name and age (birthdate) are the sorts people use
+
+PATIENT_SORT_INDEXES = [
+    "CREATE INDEX IF NOT EXISTS idx_patients_name ON patients(patient_name)",
+    "CREATE INDEX IF NOT EXISTS idx_patients_birthdate ON patients(patient_birthdate)",
+    "ANALYZE",
+]
+
+
+# ----- migration 7: covering indexes for per-patient metrics -----
+# PatientAnalyticsService counts a patient's appointments by status and sums
+# their payments by status. with status in the indexes that reads no table
+# rows; both replace an index with the same leading columns
+
+PATIENT_METRICS_INDEXES = [
+    "CREATE INDEX IF NOT EXISTS idx_appointments_patient_date_status "
+    "ON appointments(patient_id, date, status)",
+    "DROP INDEX IF EXISTS idx_appointments_patient_date",
+    "CREATE INDEX IF NOT EXISTS idx_payments_appointment_status ON payments(appointment_id, amount, status)",
+    "DROP INDEX IF EXISTS idx_payments_appointment",
+    "ANALYZE",
+]
+
+
+# ----- migration 8: integer day and minute columns -----
+# epoch_day / start_minute / end_minute etc. next to the TEXT columns, kept in
+# step by triggers (database/day_columns.py). the backfill runs inside the
+# migration's transaction like every other step, so a failure leaves the
+# database at version 7. (python -m database.day_columns --backfill commits
+# per batch instead, for re-running it on a database that's in use)
+# the date indexes are replaced by the same indexes on epoch_day
+
+DAY_COLUMN_MIGRATION = [
+    add_day_columns,
+    create_day_column_triggers,
+    backfill_day_columns,
+    "CREATE INDEX IF NOT EXISTS idx_appointments_doctor_day "
+    "ON appointments(doctor_id, epoch_day, status, procedure_category, patient_id)",
+    "DROP INDEX IF EXISTS idx_appointments_doctor_date",
+    "CREATE INDEX IF NOT EXISTS idx_appointments_day_status_category_patient "
+    "ON appointments(epoch_day, status, procedure_category, patient_id)",
+    "DROP INDEX IF EXISTS idx_appointments_date_status_category_patient",
+    "CREATE INDEX IF NOT EXISTS idx_appointments_status_day_minute "
+    "ON appointments(status, epoch_day, start_minute)",
+    "DROP INDEX IF EXISTS idx_appointments_status_date_time",
+    # payments taken in a date range, covers SUM(amount)
+    "CREATE INDEX IF NOT EXISTS idx_payments_paid_day ON payments(paid_day, amount)",
+    "ANALYZE",
+]
+
+
+# ----- migration 9: lookup tables for the repeated strings -----
+# status, source, procedure name/category and payment method/status become
+# integer codes into small lookup tables (database/lookups.py). appointments
+# and payments are rebuilt with the code columns, then everything that read
+# the strings is created again on top: indexes, triggers, the rollups (the
+# text-keyed ones of migration 3 are dropped, database/rollups.py keys them
+# by code) and the *_details views with the names. the old pages stay in
+# the file as free pages until `python -m database.migrations --vacuum`
+
+LOOKUP_MIGRATION = (
+    [rollups.drop_rollup_triggers, drop_day_column_triggers]
+    + LOOKUP_TABLE_SQL
+    + [rewrite_with_codes]
+    + CODED_INDEXES
+    + [create_day_column_triggers]
+    + [f"DROP TABLE IF EXISTS {table}" for table in rollups.ROLLUP_TABLE_NAMES]
+    + rollups.ROLLUP_TABLES
+    + [rollups.create_rollup_triggers, rollups.rebuild_rollups]
+    + DETAIL_VIEWS
+    + ["ANALYZE"]
+)
+
+
+# ----- migration 10: checked start hours in the completed-hours rollup -----
+# the rollup took the hour from whatever came before ':', so a start time
+# like '9h30' counted as hour 0 while the appointments path (start_minute)
+# left it out. HOUR_SQL now uses the start_minute check - the triggers are
+# created again with it and the rollups recomputed
+
+HOUR_ROLLUP_MIGRATION = [rollups.drop_rollup_triggers, rollups.create_rollup_triggers, rollups.rebuild_rollups]
+
+
+MIGRATIONS = [
+    (1, "base tables", BASE_TABLES + [add_legacy_columns]),
+    (2, "indexes for appointments and payments hot columns", HOT_COLUMN_INDEXES),
+    (3, "daily rollup tables for appointments and revenue", DAILY_ROLLUPS),
+    # FTS5 index over patient name/phone/email/city, see database/search_index.py
+    (4, "full-text search index for patients", [create_patient_search_index]),
+    (5, "indexes for filtered analytics", FILTERED_ANALYTICS_INDEXES),
+    (6, "indexes for sorting the patient table", PATIENT_SORT_INDEXES),
+    (7, "covering indexes for patient metrics", PATIENT_METRICS_INDEXES),
+    (8, "integer day and minute columns", DAY_COLUMN_MIGRATION),
+    (9, "lookup tables and integer codes", LOOKUP_MIGRATION),
+    (10, "checked start hours in the completed-hours rollup", HOUR_ROLLUP_MIGRATION),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+def ensure_version_table(conn):
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INTEGER PRIMARY KEY,
+            description TEXT NOT NULL,
+            applied_at TEXT NOT NULL
+        )
+    ''')
+    conn.commit()
+
+
+def get_schema_version(conn):
+    # highest applied migration, 0 for a fresh database
+    ensure_version_table(conn)
+    row = conn.execute("SELECT MAX(version) FROM schema_version").fetchone()
+    return row[0] or 0
+
+
+def migrate(conn, target=None, verbose=False):
+    # applies every migration above the current version (up to target)
+    # each migration runs in its own transaction, returns the versions applied
+    current = get_schema_version(conn)
+    target = LATEST_VERSION if target is None else target
+    applied = []
+
+    for version, description, steps in MIGRATIONS:
+        if version <= current or version > target:
+            continue
+
+        # IMMEDIATE takes the write lock up front, then we re-check the version
+        # in case another process migrated while we were waiting for it
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            done = conn.execute("SELECT 1 FROM schema_version WHERE version = ?", (version,)).fetchone()
+            if done:
+                conn.commit()
+                continue
+
+            if verbose:
+                print(f"Applying migration {version}: {description}")
+
+            for step in steps:
+                if callable(step):
+                    step(conn)
+                else:
+                    conn.execute(step)
+            conn.execute("INSERT INTO schema_version (version, description, applied_at) "
+                         "VALUES (?, ?, datetime('now'))", (version, description))
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+
+        applied.append(version)
+
+    return applied
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Apply CliniTrack schema migrations")
+    parser.add_argument("--db", default=DB_PATH, help="database file (default: %(default)s)")
+    parser.add_argument("--status", action="store_true", help="only show the current version")
+    parser.add_argument("--vacuum", action="store_true",
+                        help="rewrite the file afterwards to give back the space of dropped data")
+    args = parser.parse_args()
+
+    conn = sqlite3.connect(args.db)
+    try:
+        if args.status:
+            version = get_schema_version(conn)
+            rows = conn.execute("SELECT version, description, applied_at FROM schema_version "
+                                "ORDER BY version").fetchall()
+            for applied_version, description, applied_at in rows:
+                print(f"  {applied_version:3d}  {applied_at}  {description}")
+            print(f"Schema version: {version} (latest: {LATEST_VERSION})")
+            return
+
+        applied = migrate(conn, verbose=True)
+        if applied:
+            print(f"Database migrated to version {get_schema_version(conn)}")
+        else:
+            print(f"Database already at version {get_schema_version(conn)}")
+
+        if args.vacuum:
+            # VACUUM copies the whole database, so it's not part of migrate()
+            size = os.path.getsize(args.db)
+            conn.execute("VACUUM")
+            # in WAL mode the rewritten pages are in the -wal file until a checkpoint
+            conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            print(f"Vacuumed: {size / 2 ** 20:.1f} MB -> {os.path.getsize(args.db) / 2 ** 20:.1f} MB")
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
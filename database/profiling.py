@@ -0,0 +1,390 @@
+# opt-in profiling for queries and repository/service calls
+# off by default and then it costs one attribute check per method call.
+# when enabled:
+#   - connections opened from then on are ProfiledConnection, every query
+#     is recorded with its text, the shape of its parameters, rows returned,
+#     execute and fetch time
+#   - methods of classes marked with @profile_methods (the repositories and
+#     the analytics services) are recorded with wall time, time spent in
+#     their own queries and the rest - the Python work around them
+#   - queries slower than slow_ms are printed to stderr as they happen
+# records go into a ring buffer (the newest `capacity` are kept) and can be
+# exported as JSON or as folded stacks for flame graph tools
+# (flamegraph.pl, speedscope, inferno)
+#
+# from the command line: python main.py --profile  (also gui_app.py and
+# analytics_demo.py) - a summary is printed and both files written on exit
+
+import functools
+import inspect
+import json
+import sqlite3
+import sys
+import threading
+import time
+from collections import deque
+
+DEFAULT_CAPACITY = 10000
+DEFAULT_SLOW_MS = 100.0
+DEFAULT_OUTPUT = "clinitrack_profile"
+
+# characters of SQL kept in flame graph frame names
+FRAME_SQL_LENGTH = 80
+
+
+def params_shape(params):
+    # "(int, str, int*3)" - the types, not the values (those can be patient data)
+    if params is None:
+        return "()"
+    if isinstance(params, dict):
+        return "{" + ", ".join(f"{name}: {type(value).__name__}" for name, value in params.items()) + "}"
+
+    groups = []
+    for value in params:
+        name = type(value).__name__
+        if groups and groups[-1][0] == name:
+            groups[-1][1] += 1
+        else:
+            groups.append([name, 1])
+    return "(" + ", ".join(name if count == 1 else f"{name}*{count}" for name, count in groups) + ")"
+
+
+def normalize_sql(sql):
+    return " ".join(sql.split())
+
+
+class Profiler:
+    def __init__(self):
+        self.enabled = False
+        self.slow_ms = DEFAULT_SLOW_MS
+        self.slow_log = None    # file for the slow query lines, None = stderr
+        self.recorded = 0       # records ever made, the buffer keeps the newest
+        self._records = deque(maxlen=DEFAULT_CAPACITY)
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._origin = time.perf_counter()
+
+    def enable(self, capacity=DEFAULT_CAPACITY, slow_ms=DEFAULT_SLOW_MS, slow_log=None):
+        # only connections opened after this are profiled - enable before
+        # the app touches the database
+        with self._lock:
+            if capacity != self._records.maxlen:
+                self._records = deque(self._records, maxlen=capacity)
+        self.slow_ms = slow_ms
+        self.slow_log = slow_log
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+
+    def clear(self):
+        with self._lock:
+            self._records.clear()
+            self.recorded = 0
+
+    def records(self):
+        # plain-dict copies of the buffer, oldest first
+        with self._lock:
+            records = list(self._records)
+        return [{key: value for key, value in record.items() if not key.startswith('_')}
+                for record in records]
+
+    # recording
+
+    def _stack(self):
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def _add(self, record):
+        with self._lock:
+            self._records.append(record)
+            self.recorded += 1
+
+    def start_call(self, name):
+        stack = self._stack()
+        record = {
+            'kind': 'call', 'name': name, 'thread': threading.current_thread().name,
+            'start': time.perf_counter() - self._origin, 'stack': [call['name'] for call in stack],
+            'wall_ms': 0.0, 'sql_ms': 0.0, 'python_ms': 0.0, 'queries': 0,
+            '_child_ms': 0.0, '_entered': None,
+        }
+        self._add(record)
+        return record
+
+    def enter(self, record):
+        # the call is running (again) on this thread - queries and calls
+        # from here on are its children
+        record['_entered'] = time.perf_counter()
+        self._stack().append(record)
+
+    def leave(self, record):
+        elapsed = (time.perf_counter() - record['_entered']) * 1000
+        stack = self._stack()
+        if stack and stack[-1] is record:
+            stack.pop()
+        if stack:
+            stack[-1]['_child_ms'] += elapsed
+        record['wall_ms'] += elapsed
+        record['python_ms'] = record['wall_ms'] - record['sql_ms'] - record['_child_ms']
+
+    def start_query(self, sql, shape):
+        stack = self._stack()
+        parent = stack[-1] if stack else None
+        record = {
+            'kind': 'query', 'sql': normalize_sql(sql), 'params': shape,
+            'thread': threading.current_thread().name, 'start': time.perf_counter() - self._origin,
+            'stack': [call['name'] for call in stack],
+            'rows': 0, 'execute_ms': 0.0, 'fetch_ms': 0.0, 'wall_ms': 0.0,
+            '_parent': parent, '_slow_logged': False,
+        }
+        if parent is not None:
+            parent['queries'] += 1
+        self._add(record)
+        return record
+
+    def query_time(self, record, seconds, rows=0, fetch=False):
+        # execute (fetch=False) or fetch time for a query, plus rows it returned
+        ms = seconds * 1000
+        record['fetch_ms' if fetch else 'execute_ms'] += ms
+        record['wall_ms'] += ms
+        record['rows'] += rows
+        parent = record['_parent']
+        if parent is not None:
+            parent['sql_ms'] += ms
+        if record['wall_ms'] >= self.slow_ms and not record['_slow_logged']:
+            record['_slow_logged'] = True
+            print(f"[slow query {record['wall_ms']:.1f} ms] {record['sql'][:300]} "
+                  f"params={record['params']} rows={record['rows']}",
+                  file=self.slow_log or sys.stderr)
+
+    # exports
+
+    def export_json(self, path):
+        with open(path, "w") as f:
+            json.dump({'slow_ms': self.slow_ms, 'recorded': self.recorded, 'records': self.records()},
+                      f, indent=1)
+
+    def folded_stacks(self):
+        # one "outer;inner;frame microseconds" line per distinct stack, the
+        # value is self time - a call's Python time, a query's whole time
+        totals = {}
+        for record in self.records():
+            if record['kind'] == 'query':
+                frame = "SQL " + record['sql'][:FRAME_SQL_LENGTH]
+                self_ms = record['wall_ms']
+            else:
+                frame = record['name']
+                self_ms = record['python_ms']
+            key = ";".join(name.replace(";", ",") for name in record['stack'] + [frame])
+            totals[key] = totals.get(key, 0.0) + self_ms
+
+        return [f"{stack} {round(ms * 1000)}" for stack, ms in sorted(totals.items()) if ms > 0]
+
+    def export_folded(self, path):
+        with open(path, "w") as f:
+            for line in self.folded_stacks():
+                f.write(line + "\n")
+
+    def summary(self, top=10):
+        # (queries, calls) - the `top` slowest in total, grouped by SQL text / method name
+        queries = {}
+        calls = {}
+        for record in self.records():
+            if record['kind'] == 'query':
+                entry = queries.setdefault(record['sql'], {'count': 0, 'total_ms': 0.0, 'max_ms': 0.0, 'rows': 0})
+                entry['rows'] += record['rows']
+            else:
+                entry = calls.setdefault(record['name'], {'count': 0, 'total_ms': 0.0, 'max_ms': 0.0,
+                                                          'python_ms': 0.0})
+                entry['python_ms'] += record['python_ms']
+            entry['count'] += 1
+            entry['total_ms'] += record['wall_ms']
+            entry['max_ms'] = max(entry['max_ms'], record['wall_ms'])
+
+        def slowest(groups):
+            return sorted(groups.items(), key=lambda item: item[1]['total_ms'], reverse=True)[:top]
+
+        return slowest(queries), slowest(calls)
+
+    def print_summary(self, top=10, file=None):
+        file = file or sys.stdout
+        queries, calls = self.summary(top)
+        kept = len(self._records)
+        print(f"\nPROFILE - {kept:,} records" + (f" (newest of {self.recorded:,})" if self.recorded > kept else ""),
+              file=file)
+
+        print(f"\n  {'calls':50s} {'count':>6s} {'total ms':>9s} {'max ms':>8s} {'python ms':>10s}", file=file)
+        for name, entry in calls:
+            print(f"  {name[:50]:50s} {entry['count']:6d} {entry['total_ms']:9.1f} {entry['max_ms']:8.1f} "
+                  f"{entry['python_ms']:10.1f}", file=file)
+
+        print(f"\n  {'queries':50s} {'count':>6s} {'total ms':>9s} {'max ms':>8s} {'rows':>10s}", file=file)
+        for sql, entry in queries:
+            print(f"  {sql[:50]:50s} {entry['count']:6d} {entry['total_ms']:9.1f} {entry['max_ms']:8.1f} "
+                  f"{entry['rows']:10,d}", file=file)
+
+
+# the one profiler the app uses
+PROFILER = Profiler()
+
+
+class ProfiledCursor(sqlite3.Cursor):
+    # records every execute and the rows fetched after it
+    _record = None
+
+    def execute(self, sql, parameters=()):
+        self._record = PROFILER.start_query(sql, params_shape(parameters))
+        start = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            PROFILER.query_time(self._record, time.perf_counter() - start)
+
+    def executemany(self, sql, seq_of_parameters):
+        # the parameters can be a generator, they're counted as they go by
+        counted = _CountingIterator(seq_of_parameters)
+        self._record = PROFILER.start_query(sql, "many")
+        start = time.perf_counter()
+        try:
+            return super().executemany(sql, counted)
+        finally:
+            self._record['params'] = f"{counted.count} x {counted.shape}"
+            PROFILER.query_time(self._record, time.perf_counter() - start)
+
+    def fetchone(self):
+        start = time.perf_counter()
+        row = super().fetchone()
+        self._fetched(start, 0 if row is None else 1)
+        return row
+
+    def fetchmany(self, size=None):
+        start = time.perf_counter()
+        rows = super().fetchmany(self.arraysize if size is None else size)
+        self._fetched(start, len(rows))
+        return rows
+
+    def fetchall(self):
+        start = time.perf_counter()
+        rows = super().fetchall()
+        self._fetched(start, len(rows))
+        return rows
+
+    def __next__(self):
+        start = time.perf_counter()
+        try:
+            row = super().__next__()
+        except StopIteration:
+            self._fetched(start, 0)
+            raise
+        self._fetched(start, 1)
+        return row
+
+    def _fetched(self, start, rows):
+        if self._record is not None:
+            PROFILER.query_time(self._record, time.perf_counter() - start, rows, fetch=True)
+
+
+class _CountingIterator:
+    def __init__(self, items):
+        self._items = iter(items)
+        self.count = 0
+        self.shape = "()"
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        item = next(self._items)
+        if self.count == 0:
+            self.shape = params_shape(item)
+        self.count += 1
+        return item
+
+
+class ProfiledConnection(sqlite3.Connection):
+    # connection factory used by database.connection while profiling is on
+    # Connection.execute() makes a plain cursor in C, so it goes through cursor() here
+    def cursor(self, factory=ProfiledCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+
+def connection_factory():
+    # what sqlite3.connect() should build right now
+    return ProfiledConnection if PROFILER.enabled else sqlite3.Connection
+
+
+def profiled(name):
+    # decorator recording each call of a function as `name`
+    # a returned generator (iter_all) is recorded while it is consumed
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not PROFILER.enabled:
+                return func(*args, **kwargs)
+
+            record = PROFILER.start_call(name)
+            PROFILER.enter(record)
+            try:
+                result = func(*args, **kwargs)
+            finally:
+                PROFILER.leave(record)
+
+            if inspect.isgenerator(result):
+                return _profiled_iteration(record, result)
+            return result
+        return wrapper
+    return decorator
+
+
+def _profiled_iteration(record, iterator):
+    # the time spent producing each item counts towards the call
+    while True:
+        PROFILER.enter(record)
+        try:
+            item = next(iterator)
+        except StopIteration:
+            return
+        finally:
+            PROFILER.leave(record)
+        yield item
+
+
+def profile_methods(cls):
+    # class decorator - every public method is profiled() as Class.method
+    for name, value in list(vars(cls).items()):
+        if not name.startswith('_') and inspect.isfunction(value):
+            setattr(cls, name, profiled(f"{cls.__name__}.{name}")(value))
+    return cls
+
+
+# command line switch shared by main.py, gui_app.py and analytics_demo.py
+
+def add_profile_arguments(parser):
+    parser.add_argument("--profile", action="store_true",
+                        help="record queries and repository/analytics calls, report on exit")
+    parser.add_argument("--profile-out", default=DEFAULT_OUTPUT, metavar="PREFIX",
+                        help="write PREFIX.json and PREFIX.folded on exit (default: %(default)s)")
+    parser.add_argument("--slow-ms", type=float, default=DEFAULT_SLOW_MS,
+                        help="print queries slower than this while running (default: %(default)s)")
+
+
+def start_profiling(args):
+    if args.profile:
+        PROFILER.enable(slow_ms=args.slow_ms)
+
+
+def finish_profiling(args):
+    if not args.profile:
+        return
+    PROFILER.print_summary()
+    PROFILER.export_json(args.profile_out + ".json")
+    PROFILER.export_folded(args.profile_out + ".folded")
+    print(f"\nProfile written to {args.profile_out}.json and {args.profile_out}.folded")
@@ -0,0 +1,323 @@
+# dumps EXPLAIN QUERY PLAN for every query the application ships
+# so index regressions show up before they show up on the front desk.
+#
+# usage (from the project root):
+#   python -m database.query_plan                     print all plans
+#   python -m database.query_plan --check             fail on unexpected full table scans
+#   python -m database.query_plan --save plans.json   store plans as a baseline
+#   python -m database.query_plan --compare plans.json  fail if a plan changed
+#
+# when you add or change a query in the app, add/update it here too
+
+import argparse
+import json
+import sqlite3
+import sys
+
+from database.connection import DB_PATH
+from database.lookups import LOOKUP_TABLES
+from database.migrations import migrate
+from services.patient_analytics_service import metrics_sql, patient_metrics_sql
+from services.export_service import table_query
+from repositories.appointment_repository import BOOKED_SLOTS_SQL, OVERLAPPING_SQL
+
+# name -> (sql, sample params, full scan allowed?)
+# full scans are fine for whole-history aggregations, not for lookups
+SHIPPED_QUERIES = {
+    # repositories
+    'patients.read': (
+        "SELECT * FROM patients WHERE patient_id = ?", (1,), False),
+    'patients.get_all': (
+        "SELECT * FROM patients ORDER BY patient_id", (), True),
+    # full-text search - an FTS5 MATCH shows as VIRTUAL TABLE INDEX 0:M...
+    'patients.search': (
+        "SELECT rowid FROM patients_fts WHERE patients_fts MATCH ? LIMIT ?",
+        ('{patient_name} : "ion"*', 500), False),
+    'patients.search_fetch': (
+        "SELECT * FROM patients WHERE patient_id IN (?, ?, ?)", (1, 2, 3), False),
+    # keyset pages (repositories/paging.py) - appointments and payments are
+    # read through their *_details views (database/lookups.py)
+    'patients.page': (
+        "SELECT * FROM patients WHERE patient_id > ? ORDER BY patient_id LIMIT ?", (100, 500), False),
+    'appointments.page': (
+        "SELECT * FROM appointment_details WHERE id > ? ORDER BY id LIMIT ?", (100, 500), False),
+    'appointments.page_for_patient': (
+        "SELECT * FROM appointment_details WHERE (patient_id = ?) AND id > ? ORDER BY id LIMIT ?",
+        (1, 100, 500), False),
+    'doctors.read': (
+        "SELECT * FROM doctors WHERE doctor_id = ?", (1,), False),
+    'appointments.read': (
+        "SELECT * FROM appointment_details WHERE id = ?", (1,), False),
+    'payments.read': (
+        "SELECT * FROM payment_details WHERE id = ?", (1,), False),
+    'payments.total_range': (
+        "SELECT COALESCE(SUM(amount), 0) FROM payments WHERE paid_day >= ? AND paid_day <= ?",
+        (20089, 20178), False),
+
+    # services/analytics_service.py
+    'analytics.demographics': (
+        """SELECT CASE WHEN date(patient_birthdate) = patient_birthdate
+                       THEN substr(patient_birthdate, 1, 4) END AS birth_year,
+                  gender, COUNT(*)
+           FROM patients
+           GROUP BY birth_year, gender""", (), True),
+    # the rollups have a few rows per day, scanning them is the point
+    'analytics.appointment_trends': (
+"""SELECT g.month, NULLIF(s.name, '') AS status, c.name AS category, g.appointment_count
+           FROM (SELECT NULLIF(substr(day, 1, 7), '') AS month, status_id, category_id,
+                        SUM(appointment_count) AS appointment_count
+                 FROM rollup_appointments_daily
+                 GROUP BY month, status_id, category_id) g
+           LEFT JOIN appointment_statuses s ON s.id = g.status_id
+           LEFT JOIN procedure_categories c ON c.id = g.category_id
+           ORDER BY g.month, status, category""", (), True),
+    'analytics.peak_hours': (
+        """SELECT hour, CAST(strftime('%w', day) AS INTEGER) AS weekday,
+                  SUM(appointment_count)
+           FROM rollup_completed_hours_daily
+           GROUP BY hour, weekday""", (), True),
+    'analytics.revenue': (
+"""SELECT g.month, NULLIF(m.name, '') AS method, NULLIF(n.name, '') AS procedure_name,
+                  g.amount, g.payment_count
+           FROM (SELECT NULLIF(substr(day, 1, 7), '') AS month, method_id, procedure_id,
+                        SUM(amount) AS amount, SUM(payment_count) AS payment_count
+                 FROM rollup_revenue_daily
+                 GROUP BY month, method_id, procedure_id) g
+           LEFT JOIN payment_methods m ON m.id = g.method_id
+           LEFT JOIN procedure_names n ON n.id = g.procedure_id
+           ORDER BY g.month, method, procedure_name""", (), True),
+    'analytics.doctor_performance': (
+        """SELECT d.doctor_name, d.speciality,
+                  COALESCE(c.total, 0), COALESCE(c.completed, 0), COALESCE(c.cancelled, 0),
+                  COALESCE(r.revenue, 0), COALESCE(r.payment_count, 0)
+           FROM doctors d
+           LEFT JOIN (SELECT doctor_id, SUM(appointment_count) AS total,
+                             SUM(CASE WHEN status_id = (SELECT id FROM appointment_statuses
+                                                        WHERE name = 'Completed')
+                                      THEN appointment_count ELSE 0 END) AS completed,
+                             SUM(CASE WHEN status_id = (SELECT id FROM appointment_statuses
+                                                        WHERE name = 'Cancelled')
+                                      THEN appointment_count ELSE 0 END) AS cancelled
+                      FROM rollup_doctor_daily
+                      GROUP BY doctor_id) c ON c.doctor_id = d.doctor_id
+           LEFT JOIN (SELECT doctor_id, SUM(amount) AS revenue, SUM(payment_count) AS payment_count
+                      FROM rollup_doctor_revenue_daily
+                      GROUP BY doctor_id) r ON r.doctor_id = d.doctor_id
+           WHERE d.is_active = 1
+           ORDER BY d.doctor_id""", (), True),
+
+    # filtered analytics (services/analytics_filters.py) - a date window is a
+    # range on the rollup primary key, doctor/status/category filters read
+    # appointments through an index
+    'analytics.appointment_trends_window': (
+"""SELECT g.month, NULLIF(s.name, '') AS status, c.name AS category, g.appointment_count
+           FROM (SELECT NULLIF(substr(day, 1, 7), '') AS month, status_id, category_id,
+                        SUM(appointment_count) AS appointment_count
+                 FROM rollup_appointments_daily WHERE day >= ? AND day <= ?
+                 GROUP BY month, status_id, category_id) g
+           LEFT JOIN appointment_statuses s ON s.id = g.status_id
+           LEFT JOIN procedure_categories c ON c.id = g.category_id
+           ORDER BY g.month, status, category""", ('2025-01-01', '2025-03-31'), False),
+    'analytics.appointment_trends_doctors': (
+"""SELECT g.month, NULLIF(s.name, '') AS status, c.name AS category, g.appointment_count
+           FROM (SELECT NULLIF(substr(date, 1, 7), '') AS month, status_id, category_id,
+                        COUNT(*) AS appointment_count
+                 FROM appointments WHERE epoch_day >= ? AND epoch_day <= ? AND doctor_id IN (?, ?)
+                 GROUP BY month, status_id, category_id) g
+           LEFT JOIN appointment_statuses s ON s.id = g.status_id
+           LEFT JOIN procedure_categories c ON c.id = g.category_id
+           ORDER BY g.month, status, category""", (20089, 20178, 1, 2), False),
+    'analytics.peak_hours_window': (
+        """SELECT hour, CAST(strftime('%w', day) AS INTEGER) AS weekday,
+                  SUM(appointment_count)
+           FROM rollup_completed_hours_daily WHERE day >= ? AND day <= ?
+           GROUP BY hour, weekday""", ('2025-01-01', '2025-03-31'), False),
+    'analytics.peak_hours_status': (
+        """SELECT start_minute / 60 AS hour, ((epoch_day % 7 + 11) % 7) AS weekday, COUNT(*)
+           FROM appointments
+           WHERE start_minute IS NOT NULL AND epoch_day >= ? AND epoch_day <= ?
+             AND status_id IN (SELECT id FROM appointment_statuses WHERE name IN (?))
+           GROUP BY hour, weekday""", (20089, 20178, 'No-Show'), False),
+    'analytics.revenue_window': (
+"""SELECT g.month, NULLIF(m.name, '') AS method, NULLIF(n.name, '') AS procedure_name,
+                  g.amount, g.payment_count
+           FROM (SELECT NULLIF(substr(day, 1, 7), '') AS month, method_id, procedure_id,
+                        SUM(amount) AS amount, SUM(payment_count) AS payment_count
+                 FROM rollup_revenue_daily WHERE day >= ? AND day <= ?
+                 GROUP BY month, method_id, procedure_id) g
+           LEFT JOIN payment_methods m ON m.id = g.method_id
+           LEFT JOIN procedure_names n ON n.id = g.procedure_id
+           ORDER BY g.month, method, procedure_name""", ('2025-01-01', '2025-03-31'), False),
+    'analytics.revenue_doctors': (
+"""SELECT g.month, NULLIF(m.name, '') AS method, NULLIF(n.name, '') AS procedure_name,
+                  g.amount, g.payment_count
+           FROM (SELECT NULLIF(substr(a.date, 1, 7), '') AS month, p.method_id, a.procedure_id,
+                        SUM(COALESCE(p.amount, 0)) AS amount, COUNT(*) AS payment_count
+                 FROM appointments a
+                 JOIN payments p ON p.appointment_id = a.id
+                 WHERE a.epoch_day >= ? AND a.epoch_day <= ? AND a.doctor_id IN (?, ?)
+                 GROUP BY month, p.method_id, a.procedure_id) g
+           LEFT JOIN payment_methods m ON m.id = g.method_id
+           LEFT JOIN procedure_names n ON n.id = g.procedure_id
+           ORDER BY g.month, method, procedure_name""", (20089, 20178, 1, 2), False),
+    'analytics.doctor_performance_status': (
+        """SELECT doctor_id, COUNT(*) AS total
+           FROM appointments
+           WHERE epoch_day >= ? AND epoch_day <= ?
+             AND status_id IN (SELECT id FROM appointment_statuses WHERE name IN (?))
+           GROUP BY doctor_id""", (20089, 20178, 'Completed'), False),
+    'analytics.demographics_window': (
+        """SELECT CASE WHEN date(patient_birthdate) = patient_birthdate
+                       THEN substr(patient_birthdate, 1, 4) END AS birth_year,
+                  gender, COUNT(*)
+           FROM patients
+           WHERE patient_id IN (SELECT patient_id FROM appointments WHERE epoch_day >= ? AND epoch_day <= ?)
+           GROUP BY birth_year, gender""", (20089, 20178), False),
+
+    # main.patient_analytics / CliniTrackApp.view_patient_details, one query
+    # for everything (services/patient_analytics_service.py builds the SQL)
+    'patient.metrics': (
+        patient_metrics_sql(), ('2025-06-30', 1), False),
+    'patient.metrics_batch': (
+        metrics_sql(3), ('2025-06-30', 1, 2, 3), False),
+
+    # services/scheduling_service.py - loading doctors' days into the slot
+    # index, and the double-booking check inside book()/reschedule()
+    # (AppointmentRepository.booked_slots / overlapping)
+    'scheduling.days': (
+        BOOKED_SLOTS_SQL.format(doctors="?, ?"), (1, 2, 20089, 20148), False),
+    'scheduling.conflicts': (
+        OVERLAPPING_SQL, (1, 20103, 630, 600, -1), False),
+
+    # gui_app.py listings
+    'gui.doctors': (
+        "SELECT doctor_id, doctor_name, speciality, room, experience_years, is_active FROM doctors",
+        (), True),
+    # virtual tables (gui_table.py) - one screen of a sorted table at a time
+    # (repositories/paging.py sorted_page). the default orders, patient name
+    # and age walk an index and stop after the page; other columns sort the
+    # whole table
+    'gui.patients_table': (
+        "SELECT * FROM patients ORDER BY patient_id ASC LIMIT ? OFFSET ?", (100, 5000), True),
+    'gui.patients_table_by_name': (
+        "SELECT * FROM patients ORDER BY patient_name ASC, patient_id ASC LIMIT ? OFFSET ?",
+        (100, 5000), False),
+    'gui.patients_table_by_age': (
+        "SELECT * FROM patients ORDER BY patient_birthdate DESC, patient_id DESC LIMIT ? OFFSET ?",
+        (100, 5000), False),
+    'gui.patient_appointments': (
+        """SELECT * FROM appointment_details WHERE patient_id = ?
+           ORDER BY epoch_day DESC, id DESC LIMIT ? OFFSET ?""", (1, 100, 0), False),
+    'gui.patient_appointments_count': (
+        "SELECT COUNT(*) FROM appointments WHERE patient_id = ?", (1,), False),
+    'gui.appointments_table': (
+        "SELECT * FROM appointment_details ORDER BY epoch_day DESC, id DESC LIMIT ? OFFSET ?", (100, 5000), False),
+    'gui.payments_table': (
+        "SELECT * FROM payment_details ORDER BY paid_at DESC, id DESC LIMIT ? OFFSET ?", (100, 5000), False),
+    'gui.table_count': (
+        "SELECT COUNT(*) FROM appointments", (), True),
+
+    # services/export_service.py - whole tables stream in key order, a date
+    # range uses the integer day columns
+    'export.appointments': (
+        *table_query('appointments'), True),
+    'export.appointments_range': (
+        *table_query('appointments', '2025-01-01', '2025-01-31'), False),
+    'export.payments_range': (
+        *table_query('payments', '2025-01-01', '2025-01-31'), False),
+}
+
+# tables that are small enough that scanning them never matters
+SMALL_TABLES = {'doctors', 'procedures', 'schema_version'} | set(LOOKUP_TABLES)
+
+
+def explain(conn, sql, params=()):
+    # returns the plan as a list of lines, indented like the sqlite shell does
+    rows = conn.execute("EXPLAIN QUERY PLAN " + sql, params).fetchall()
+    depth = {0: 0}
+    lines = []
+    for node_id, parent_id, _, detail in rows:
+        level = depth.get(parent_id, 0) + 1
+        depth[node_id] = level
+        lines.append("  " * (level - 1) + detail)
+    return lines
+
+
+def full_scans(plan_lines):
+    # tables read without any index ("SCAN x" but not "SCAN x USING ... INDEX")
+    # an FTS5 table with a MATCH shows as "SCAN x VIRTUAL TABLE INDEX 0:M...",
+    # scanning a CTE/subquery the plan MATERIALIZEs only reads its result
+    tables = []
+    materialized = {line.split()[1] for line in plan_lines
+                    if line.strip().startswith(("MATERIALIZE ", "CO-ROUTINE "))}
+    for line in plan_lines:
+        detail = line.strip()
+        if " VIRTUAL TABLE INDEX " in detail and ":M" in detail:
+            continue
+        if detail.startswith("SCAN ") and " USING " not in detail:
+            table = detail.split()[1]
+            if table not in SMALL_TABLES and table not in materialized:
+                tables.append(table)
+    return tables
+
+
+def collect_plans(conn):
+    plans = {}
+    for name, (sql, params, _) in SHIPPED_QUERIES.items():
+        plans[name] = explain(conn, sql, params)
+    return plans
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Show query plans for the shipped queries")
+    parser.add_argument("--db", default=DB_PATH, help="database file (default: %(default)s)")
+    parser.add_argument("--check", action="store_true",
+                        help="exit with an error if a lookup query does a full table scan")
+    parser.add_argument("--save", metavar="FILE", help="write the plans to a JSON baseline")
+    parser.add_argument("--compare", metavar="FILE", help="compare the plans with a JSON baseline")
+    args = parser.parse_args()
+
+    conn = sqlite3.connect(args.db)
+    try:
+        migrate(conn)
+        plans = collect_plans(conn)
+    finally:
+        conn.close()
+
+    problems = []
+
+    for name, plan in plans.items():
+        print(f"\n{name}")
+        for line in plan:
+            print(f"    {line}")
+
+        allow_scan = SHIPPED_QUERIES[name][2]
+        scanned = full_scans(plan)
+        if args.check and scanned and not allow_scan:
+            problems.append(f"{name}: full scan of {', '.join(scanned)}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        for name, plan in plans.items():
+            if name not in baseline:
+                problems.append(f"{name}: not in baseline")
+            elif baseline[name] != plan:
+                problems.append(f"{name}: plan changed\n      was: {baseline[name]}\n      now: {plan}")
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(plans, f, indent=2)
+        print(f"\nPlans saved to {args.save}")
+
+    if problems:
+        print("\nPLAN PROBLEMS:")
+        for problem in problems:
+            print(f"  - {problem}")
+        sys.exit(1)
+
+    print(f"\n{len(plans)} queries checked")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,343 @@
+# per-day rollup tables for the analytics dashboard
+# SQLite triggers keep them up to date on every insert/update/delete of
+# appointments and payments, so the dashboard reads a few rows per day
+# instead of every appointment. rebuild_rollups() recomputes them from scratch.
+#
+# usage (from the project root):
+#   python -m database.rollups --rebuild     recompute all rollups
+#   python -m database.rollups --check       compare rollups with the base tables
+#
+# status, category, method and procedure are keyed by their lookup code
+# (database/lookups.py). NULL keys are stored as '' (day) or 0 (codes)
+# because NULLs never collide in a primary key
+
+import argparse
+import sqlite3
+import sys
+import time
+
+from database.connection import DB_PATH
+from database.day_columns import MINUTE_SQL
+from database.lookups import code_sql
+
+ROLLUP_TABLES = [
+    # appointments per day by status and category (monthly trends)
+    '''
+    CREATE TABLE IF NOT EXISTS rollup_appointments_daily (
+        day TEXT NOT NULL,
+        status_id INTEGER NOT NULL,
+        category_id INTEGER NOT NULL,
+        appointment_count INTEGER NOT NULL,
+        PRIMARY KEY (day, status_id, category_id)
+    ) WITHOUT ROWID
+    ''',
+    # completed appointments per day by start hour (peak hours)
+    '''
+    CREATE TABLE IF NOT EXISTS rollup_completed_hours_daily (
+        day TEXT NOT NULL,
+        hour INTEGER NOT NULL,
+        appointment_count INTEGER NOT NULL,
+        PRIMARY KEY (day, hour)
+    ) WITHOUT ROWID
+    ''',
+    # appointments per day per doctor by status (doctor performance)
+    '''
+    CREATE TABLE IF NOT EXISTS rollup_doctor_daily (
+        day TEXT NOT NULL,
+        doctor_id INTEGER NOT NULL,
+        status_id INTEGER NOT NULL,
+        appointment_count INTEGER NOT NULL,
+        PRIMARY KEY (day, doctor_id, status_id)
+    ) WITHOUT ROWID
+    ''',
+    # payments per appointment day by method and procedure (revenue)
+    '''
+    CREATE TABLE IF NOT EXISTS rollup_revenue_daily (
+        day TEXT NOT NULL,
+        method_id INTEGER NOT NULL,
+        procedure_id INTEGER NOT NULL,
+        amount REAL NOT NULL,
+        payment_count INTEGER NOT NULL,
+        PRIMARY KEY (day, method_id, procedure_id)
+    ) WITHOUT ROWID
+    ''',
+    # payments per appointment day by doctor (doctor performance)
+    # kept apart from the revenue rollup - doctor x method x procedure per day
+    # would be almost as many rows as payments
+    '''
+    CREATE TABLE IF NOT EXISTS rollup_doctor_revenue_daily (
+        day TEXT NOT NULL,
+        doctor_id INTEGER NOT NULL,
+        amount REAL NOT NULL,
+        payment_count INTEGER NOT NULL,
+        PRIMARY KEY (day, doctor_id)
+    ) WITHOUT ROWID
+    ''',
+]
+
+ROLLUP_TABLE_NAMES = ['rollup_appointments_daily', 'rollup_completed_hours_daily',
+                      'rollup_doctor_daily', 'rollup_revenue_daily', 'rollup_doctor_revenue_daily']
+
+# hour of a "HH:MM" start time - start_minute / 60 over the same check as the
+# start_minute column, so a time like '9h30' is NULL (and not counted) here
+# too instead of hour 0
+HOUR_SQL = "(" + MINUTE_SQL + " / 60)"
+
+# the code of the 'Completed' status, for the completed-hours rollup
+COMPLETED = code_sql('appointment_statuses', 'Completed')
+
+
+def _add_appointment(row):
+    # statements that count one appointment (row is NEW or OLD) into the rollups
+    return f'''
+        INSERT INTO rollup_appointments_daily (day, status_id, category_id, appointment_count)
+        VALUES (COALESCE({row}.date, ''), COALESCE({row}.status_id, 0), COALESCE({row}.category_id, 0), 1)
+        ON CONFLICT (day, status_id, category_id) DO UPDATE SET appointment_count = appointment_count + 1;
+
+        INSERT INTO rollup_doctor_daily (day, doctor_id, status_id, appointment_count)
+        VALUES (COALESCE({row}.date, ''), {row}.doctor_id, COALESCE({row}.status_id, 0), 1)
+        ON CONFLICT (day, doctor_id, status_id) DO UPDATE SET appointment_count = appointment_count + 1;
+
+        INSERT INTO rollup_completed_hours_daily (day, hour, appointment_count)
+        SELECT COALESCE({row}.date, ''), {HOUR_SQL.format(row + '.start_time')}, 1
+        WHERE {row}.status_id = {COMPLETED} AND {HOUR_SQL.format(row + '.start_time')} IS NOT NULL
+        ON CONFLICT (day, hour) DO UPDATE SET appointment_count = appointment_count + 1;
+    '''
+
+
+def _remove_appointment(row):
+    # statements that take one appointment back out of the rollups
+    return f'''
+        UPDATE rollup_appointments_daily SET appointment_count = appointment_count - 1
+        WHERE day = COALESCE({row}.date, '') AND status_id = COALESCE({row}.status_id, 0)
+          AND category_id = COALESCE({row}.category_id, 0);
+
+        UPDATE rollup_doctor_daily SET appointment_count = appointment_count - 1
+        WHERE day = COALESCE({row}.date, '') AND doctor_id = {row}.doctor_id
+          AND status_id = COALESCE({row}.status_id, 0);
+
+        UPDATE rollup_completed_hours_daily SET appointment_count = appointment_count - 1
+        WHERE {row}.status_id = {COMPLETED}
+          AND day = COALESCE({row}.date, '') AND hour = {HOUR_SQL.format(row + '.start_time')};
+
+        DELETE FROM rollup_appointments_daily WHERE appointment_count <= 0 AND day = COALESCE({row}.date, '');
+        DELETE FROM rollup_doctor_daily WHERE appointment_count <= 0 AND day = COALESCE({row}.date, '');
+        DELETE FROM rollup_completed_hours_daily WHERE appointment_count <= 0 AND day = COALESCE({row}.date, '');
+    '''
+
+
+def _add_payment(row, sign, appointment_filter):
+    # adds (sign=1) or subtracts (sign=-1) one payment into the revenue rollups,
+    # keyed by the appointment it belongs to
+    return f'''
+        INSERT INTO rollup_revenue_daily (day, method_id, procedure_id, amount, payment_count)
+        SELECT COALESCE(a.date, ''), COALESCE({row}.method_id, 0), COALESCE(a.procedure_id, 0),
+               {sign} * COALESCE({row}.amount, 0), {sign}
+        FROM appointments a
+        WHERE {appointment_filter}
+        ON CONFLICT (day, method_id, procedure_id) DO UPDATE
+        SET amount = amount + excluded.amount, payment_count = payment_count + excluded.payment_count;
+
+        INSERT INTO rollup_doctor_revenue_daily (day, doctor_id, amount, payment_count)
+        SELECT COALESCE(a.date, ''), a.doctor_id, {sign} * COALESCE({row}.amount, 0), {sign}
+        FROM appointments a
+        WHERE {appointment_filter}
+        ON CONFLICT (day, doctor_id) DO UPDATE
+        SET amount = amount + excluded.amount, payment_count = payment_count + excluded.payment_count;
+    '''
+
+
+def _move_appointment_payments(old_or_new, sign):
+    # adds/subtracts every payment of one appointment, using the OLD or NEW
+    # appointment values for the rollup key
+    return f'''
+        INSERT INTO rollup_revenue_daily (day, method_id, procedure_id, amount, payment_count)
+        SELECT COALESCE({old_or_new}.date, ''), COALESCE(p.method_id, 0), COALESCE({old_or_new}.procedure_id, 0),
+               {sign} * SUM(COALESCE(p.amount, 0)), {sign} * COUNT(*)
+        FROM payments p
+        WHERE p.appointment_id = {old_or_new}.id
+        GROUP BY p.method_id
+        ON CONFLICT (day, method_id, procedure_id) DO UPDATE
+        SET amount = amount + excluded.amount, payment_count = payment_count + excluded.payment_count;
+
+        INSERT INTO rollup_doctor_revenue_daily (day, doctor_id, amount, payment_count)
+        SELECT COALESCE({old_or_new}.date, ''), {old_or_new}.doctor_id,
+               {sign} * SUM(COALESCE(p.amount, 0)), {sign} * COUNT(*)
+        FROM payments p
+        WHERE p.appointment_id = {old_or_new}.id
+        GROUP BY p.appointment_id
+        ON CONFLICT (day, doctor_id) DO UPDATE
+        SET amount = amount + excluded.amount, payment_count = payment_count + excluded.payment_count;
+    '''
+
+
+def _clean_empty_revenue(day):
+    # drops revenue rows that went back to zero payments on that day
+    return f'''
+        DELETE FROM rollup_revenue_daily WHERE payment_count <= 0 AND day = {day};
+        DELETE FROM rollup_doctor_revenue_daily WHERE payment_count <= 0 AND day = {day};
+    '''
+
+
+PAYMENT_DAY = "(SELECT COALESCE(date, '') FROM appointments WHERE id = {0}.appointment_id)"
+
+ROLLUP_TRIGGERS = {
+    'trg_rollup_appointments_insert': f'''
+        CREATE TRIGGER IF NOT EXISTS trg_rollup_appointments_insert
+        AFTER INSERT ON appointments
+        BEGIN
+            {_add_appointment('NEW')}
+        END
+    ''',
+    'trg_rollup_appointments_delete': f'''
+        CREATE TRIGGER IF NOT EXISTS trg_rollup_appointments_delete
+        AFTER DELETE ON appointments
+        BEGIN
+            {_remove_appointment('OLD')}
+            {_move_appointment_payments('OLD', -1)}
+            {_clean_empty_revenue("COALESCE(OLD.date, '')")}
+        END
+    ''',
+    'trg_rollup_appointments_update': f'''
+        CREATE TRIGGER IF NOT EXISTS trg_rollup_appointments_update
+        AFTER UPDATE OF date, status_id, category_id, doctor_id, start_time, procedure_id, id
+        ON appointments
+        BEGIN
+            {_remove_appointment('OLD')}
+            {_add_appointment('NEW')}
+            {_move_appointment_payments('OLD', -1)}
+            {_move_appointment_payments('NEW', 1)}
+            {_clean_empty_revenue("COALESCE(OLD.date, '')")}
+        END
+    ''',
+    'trg_rollup_payments_insert': f'''
+        CREATE TRIGGER IF NOT EXISTS trg_rollup_payments_insert
+        AFTER INSERT ON payments
+        BEGIN
+            {_add_payment('NEW', 1, 'a.id = NEW.appointment_id')}
+        END
+    ''',
+    'trg_rollup_payments_delete': f'''
+        CREATE TRIGGER IF NOT EXISTS trg_rollup_payments_delete
+        AFTER DELETE ON payments
+        BEGIN
+            {_add_payment('OLD', -1, 'a.id = OLD.appointment_id')}
+            {_clean_empty_revenue(PAYMENT_DAY.format('OLD'))}
+        END
+    ''',
+    'trg_rollup_payments_update': f'''
+        CREATE TRIGGER IF NOT EXISTS trg_rollup_payments_update
+        AFTER UPDATE OF amount, method_id, appointment_id ON payments
+        BEGIN
+            {_add_payment('OLD', -1, 'a.id = OLD.appointment_id')}
+            {_add_payment('NEW', 1, 'a.id = NEW.appointment_id')}
+            {_clean_empty_revenue(PAYMENT_DAY.format('OLD'))}
+        END
+    ''',
+}
+
+# how each rollup is computed from the base tables (used by rebuild and check)
+ROLLUP_SOURCES = {
+    'rollup_appointments_daily': '''
+        SELECT COALESCE(date, ''), COALESCE(status_id, 0), COALESCE(category_id, 0), COUNT(*)
+        FROM appointments
+        GROUP BY 1, 2, 3
+    ''',
+    'rollup_completed_hours_daily': f'''
+        SELECT COALESCE(date, ''), {HOUR_SQL.format('start_time')}, COUNT(*)
+        FROM appointments
+        WHERE status_id = {COMPLETED} AND {HOUR_SQL.format('start_time')} IS NOT NULL
+        GROUP BY 1, 2
+    ''',
+    'rollup_doctor_daily': '''
+        SELECT COALESCE(date, ''), doctor_id, COALESCE(status_id, 0), COUNT(*)
+        FROM appointments
+        GROUP BY 1, 2, 3
+    ''',
+    'rollup_revenue_daily': '''
+        SELECT COALESCE(a.date, ''), COALESCE(p.method_id, 0), COALESCE(a.procedure_id, 0),
+               SUM(COALESCE(p.amount, 0)), COUNT(*)
+        FROM payments p
+        JOIN appointments a ON a.id = p.appointment_id
+        GROUP BY 1, 2, 3
+    ''',
+    'rollup_doctor_revenue_daily': '''
+        SELECT COALESCE(a.date, ''), a.doctor_id, SUM(COALESCE(p.amount, 0)), COUNT(*)
+        FROM payments p
+        JOIN appointments a ON a.id = p.appointment_id
+        GROUP BY 1, 2
+    ''',
+}
+
+
+def create_rollup_triggers(conn):
+    for sql in ROLLUP_TRIGGERS.values():
+        conn.execute(sql)
+
+
+def drop_rollup_triggers(conn):
+    # for bulk loads: drop the triggers, load, then create_rollup_triggers()
+    # and rebuild_rollups() - much faster than maintaining rollups row by row
+    for name in ROLLUP_TRIGGERS:
+        conn.execute(f"DROP TRIGGER IF EXISTS {name}")
+
+
+def rebuild_rollups(conn):
+    # recomputes every rollup table from the base tables
+    # runs inside the caller's transaction (the migration) or its own
+    for table in ROLLUP_TABLE_NAMES:
+        conn.execute(f"DELETE FROM {table}")
+        conn.execute(f"INSERT INTO {table} {ROLLUP_SOURCES[table]}")
+
+
+def check_rollups(conn):
+    # returns the names of rollup tables that don't match the base tables
+    mismatched = []
+    for table in ROLLUP_TABLE_NAMES:
+        stored = conn.execute(f"SELECT * FROM {table}").fetchall()
+        expected = conn.execute(ROLLUP_SOURCES[table]).fetchall()
+        if _normalize(stored) != _normalize(expected):
+            mismatched.append(table)
+    return mismatched
+
+
+def _normalize(rows):
+    # amounts are summed incrementally, so compare them rounded
+    return sorted(tuple(round(v, 2) if isinstance(v, float) else v for v in row) for row in rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Maintain the daily analytics rollups")
+    parser.add_argument("--db", default=DB_PATH, help="database file (default: %(default)s)")
+    parser.add_argument("--rebuild", action="store_true", help="recompute all rollup tables")
+    parser.add_argument("--check", action="store_true", help="verify rollups against the base tables")
+    args = parser.parse_args()
+
+    from database.migrations import migrate
+
+    conn = sqlite3.connect(args.db)
+    try:
+        migrate(conn)
+
+        if args.rebuild:
+            start = time.perf_counter()
+            with conn:
+                rebuild_rollups(conn)
+            print(f"Rollups rebuilt in {time.perf_counter() - start:.2f}s")
+
+        if args.check or not args.rebuild:
+            mismatched = check_rollups(conn)
+            if mismatched:
+                print(f"Rollups out of date: {', '.join(mismatched)} (run with --rebuild)")
+                sys.exit(1)
+            print("Rollups match the base tables")
+
+        for table in ROLLUP_TABLE_NAMES:
+            count = conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+            print(f"   {table}: {count} rows")
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+# full-text search index for patients (SQLite FTS5)
+# indexes name, phone, email and city. the unicode61 tokenizer with
+# remove_diacritics 2 makes "stefanescu" find "Ștefănescu" (and the old
+# cedilla forms ş/ţ), prefix indexes keep "pop" -> "Popescu" fast.
+# triggers keep the index in sync with the patients table.
+
+import re
+import sqlite3
+
+PATIENT_SEARCH_COLUMNS = ['patient_name', 'phone', 'email', 'city']
+
+PATIENT_SEARCH_TABLE = '''
+    CREATE VIRTUAL TABLE IF NOT EXISTS patients_fts USING fts5(
+        patient_name, phone, email, city,
+        content='patients', content_rowid='patient_id',
+        tokenize='unicode61 remove_diacritics 2',
+        prefix='2 3'
+    )
+'''
+
+PATIENT_SEARCH_TRIGGERS = [
+    '''
+    CREATE TRIGGER IF NOT EXISTS trg_patients_fts_insert AFTER INSERT ON patients
+    BEGIN
+        INSERT INTO patients_fts (rowid, patient_name, phone, email, city)
+        VALUES (NEW.patient_id, NEW.patient_name, NEW.phone, NEW.email, NEW.city);
+    END
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS trg_patients_fts_delete AFTER DELETE ON patients
+    BEGIN
+        INSERT INTO patients_fts (patients_fts, rowid, patient_name, phone, email, city)
+        VALUES ('delete', OLD.patient_id, OLD.patient_name, OLD.phone, OLD.email, OLD.city);
+    END
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS trg_patients_fts_update
+    AFTER UPDATE OF patient_id, patient_name, phone, email, city ON patients
+    BEGIN
+        INSERT INTO patients_fts (patients_fts, rowid, patient_name, phone, email, city)
+        VALUES ('delete', OLD.patient_id, OLD.patient_name, OLD.phone, OLD.email, OLD.city);
+        INSERT INTO patients_fts (rowid, patient_name, phone, email, city)
+        VALUES (NEW.patient_id, NEW.patient_name, NEW.phone, NEW.email, NEW.city);
+    END
+    ''',
+]
+
+
+def create_patient_search_index(conn):
+    # migration step - creates the index, its triggers and fills it
+    # sqlite builds without FTS5 skip it, search falls back to LIKE
+    try:
+        conn.execute(PATIENT_SEARCH_TABLE)
+    except sqlite3.OperationalError as e:
+        if 'fts5' in str(e):
+            return
+        raise
+
+    for sql in PATIENT_SEARCH_TRIGGERS:
+        conn.execute(sql)
+    rebuild_patient_search_index(conn)
+
+
+def rebuild_patient_search_index(conn):
+    # re-reads every patient into the index
+    conn.execute("INSERT INTO patients_fts (patients_fts) VALUES ('rebuild')")
+
+
+def has_search_index(conn):
+    # False on databases where FTS5 wasn't available for the migration
+    row = conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'patients_fts'").fetchone()
+    return row is not None
+
+
+def search_terms(text):
+    # words of the search text (letters/digits), punctuation is dropped
+    return re.findall(r'[^\W_]+', text)
+
+
+def fts_query(text, columns=None):
+    # turns what the user typed into an FTS5 query: every word must match
+    # the start of a word ("pop ion" -> "pop"* "ion"*), optionally only in
+    # the given columns. words are quoted so input can't break the syntax
+    terms = []
+    for word in search_terms(text):
+        term = '"' + word.replace('"', '""') + '"*'
+        if columns:
+            term = '{' + ' '.join(columns) + '} : ' + term
+        terms.append(term)
+    return ' '.join(terms)
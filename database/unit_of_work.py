@@ -0,0 +1,114 @@
+# unit of work - several repository writes in one transaction
+#
+#   with UnitOfWork() as uow:
+#       appointment_id = AppointmentRepository().create(...)
+#       PaymentRepository().create({'appointment_id': appointment_id, ...})
+#
+# the pool hands the same connection to everything on this thread, so the
+# repositories write through the unit's connection. they don't commit while
+# a unit is open - the outermost unit commits once when the block ends, or
+# rolls everything back if it raises. a UnitOfWork opened inside another one
+# becomes a savepoint: if it fails only its own writes are undone.
+# change notifications (cache invalidation) are sent after the final commit.
+# a unit opened while the connection is already in a transaction it didn't
+# start (a caller's own BEGIN) is a savepoint too - the caller commits or
+# rolls back, the unit only undoes its own writes
+#
+# the connection belongs to the thread that opened the unit - repositories
+# used from other threads get their own connection and commit on their own
+
+import itertools
+import threading
+
+from database.change_events import notify_change
+from database.connection import get_pool
+
+_local = threading.local()
+_savepoint_ids = itertools.count(1)
+
+
+def _open_units(conn):
+    # stack of units currently open on this connection (this thread only)
+    units = getattr(_local, 'units', None)
+    if units is None:
+        units = _local.units = {}
+    return units.setdefault(id(conn), [])
+
+
+class UnitOfWork:
+
+    def __init__(self, db_path=None):
+        self.db_path = db_path
+        self.connection = None
+        self.savepoint = None
+        self.changes = set()
+        self._checkout = None
+        self._parent = None
+        self.owns_transaction = False
+
+    def __enter__(self):
+        self._checkout = get_pool(self.db_path).connection()
+        conn = self._checkout.__enter__()
+        units = _open_units(conn)
+
+        try:
+            if units or conn.in_transaction:
+                # nested, or inside somebody else's transaction - whoever
+                # opened it commits, this unit is a savepoint in it
+                self._parent = units[-1] if units else None
+                self.savepoint = f"uow_{next(_savepoint_ids)}"
+                conn.execute(f"SAVEPOINT {self.savepoint}")
+            else:
+                # IMMEDIATE takes the write lock now, so a read followed by a
+                # write can't fail halfway with "database is locked"
+                conn.execute("BEGIN IMMEDIATE")
+                self.owns_transaction = True
+        except Exception:
+            self._checkout.__exit__(None, None, None)
+            raise
+
+        units.append(self)
+        self.connection = conn
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        conn = self.connection
+        units = _open_units(conn)
+        units.pop()
+        if not units:
+            del _local.units[id(conn)]
+
+        try:
+            if self.savepoint is not None:
+                if exc_type is None:
+                    conn.execute(f"RELEASE SAVEPOINT {self.savepoint}")
+                    if self._parent is not None:
+                        self._parent.changes.update(self.changes)
+                    else:
+                        # the caller's transaction - there's no commit to wait
+                        # for here, and a cache dropped for a write that gets
+                        # rolled back later only costs a recompute
+                        self._notify()
+                else:
+                    conn.execute(f"ROLLBACK TO SAVEPOINT {self.savepoint}")
+                    conn.execute(f"RELEASE SAVEPOINT {self.savepoint}")
+            elif exc_type is None:
+                conn.commit()
+                self._notify()
+            else:
+                conn.rollback()
+        finally:
+            self.connection = None
+            self._checkout.__exit__(None, None, None)
+        return False
+
+    def _notify(self):
+        for table, operation in sorted(self.changes):
+            notify_change(self.db_path, table, operation)
+
+    def record_change(self, table, operation):
+        # remembers a write so listeners hear about it once it is committed
+        self.changes.add((table, operation))
+
+    def cursor(self):
+        return self.connection.cursor()
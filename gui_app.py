@@ -1,8 +1,45 @@
+import argparse
 import tkinter as tk
 from tkinter import ttk, messagebox, simpledialog
-from repositories.patient_repository import PatientRepository
+from repositories.patient_repository import SEARCH_LIMIT, PatientRepository
+from repositories.appointment_repository import AppointmentRepository
+from repositories.payment_repository import PaymentRepository
+from models.patient import patient_ages
 from services.analytics_service import AnalyticsService
-import sqlite3
+from services.patient_analytics_service import PatientAnalyticsService
+from database.connection import pooled_connection, close_all_pools
+from database.profiling import add_profile_arguments, start_profiling, finish_profiling
+from gui_tasks import TaskRunner
+from gui_table import VirtualTable, RepositorySource, ListSource
+
+# (column, heading, width, sort key) for the virtual tables (gui_table.py)
+# '-patient_birthdate': a higher age is an earlier birthdate
+PATIENT_COLUMNS = [
+    ("ID", "ID", 50, "patient_id"),
+    ("Name", "Name", 180, "patient_name"),
+    ("Age", "Age", 50, "-patient_birthdate"),
+    ("Gender", "Gender", 70, "gender"),
+    ("City", "City", 120, "city"),
+    ("Phone", "Phone", 120, "phone"),
+    ("Insurance", "Insurance", 100, "insurance"),
+]
+APPOINTMENT_COLUMNS = [
+    ("ID", "ID", 50, "id"),
+    ("Patient ID", "Patient ID", 80, "patient_id"),
+    ("Doctor ID", "Doctor ID", 80, "doctor_id"),
+    ("Date", "Date", 100, "epoch_day"),
+    ("Time", "Time", 80, "start_time"),
+    ("Procedure", "Procedure", 200, "procedure_name"),
+    ("Status", "Status", 100, "status"),
+]
+PAYMENT_COLUMNS = [
+    ("ID", "ID", 50, "id"),
+    ("Appt ID", "Appointment ID", 100, "appointment_id"),
+    ("Amount", "Amount (RON)", 120, "amount"),
+    ("Method", "Payment Method", 120, "method"),
+    ("Date", "Date", 120, "paid_at"),
+    ("Status", "Status", 100, "status"),
+]
 
 
 class CliniTrackApp:
@@ -16,7 +53,13 @@ class CliniTrackApp:
 
         # setup repositories
         self.patient_repo = PatientRepository()
+        self.appointment_repo = AppointmentRepository()
+        self.payment_repo = PaymentRepository()
         self.analytics = AnalyticsService()
+        self.patient_analytics = PatientAnalyticsService()
+
+        # lists and statistics load on worker threads (gui_tasks.py)
+        self.tasks = TaskRunner(root, on_busy=self.show_busy)
 
         # create the main UI
         self.create_widgets()
@@ -40,6 +83,31 @@ class CliniTrackApp:
         self.create_payments_tab()
         self.create_stats_tab()
 
+        # status bar - spins while something loads in the background
+        status_bar = tk.Frame(self.root)
+        status_bar.pack(fill=tk.X, side=tk.BOTTOM, before=self.notebook, padx=10, pady=(0, 5))
+
+        self.busy_bar = ttk.Progressbar(status_bar, mode="indeterminate", length=120)
+        self.busy_bar.pack(side=tk.RIGHT)
+
+        self.busy_label = tk.Label(status_bar, text="", font=("Arial", 9), fg="gray")
+        self.busy_label.pack(side=tk.RIGHT, padx=5)
+
+    def show_busy(self, count):
+        # called by the task runner when the number of running loads changes
+        if count:
+            self.busy_label.config(text="Loading...")
+            self.busy_bar.start(15)
+        else:
+            self.busy_label.config(text="")
+            self.busy_bar.stop()
+
+    def show_error(self, error):
+        messagebox.showerror("Database Error", f"Could not load data:\n{error}")
+
+    def clear_tree(self, tree):
+        tree.delete(*tree.get_children())
+
     def create_patients_tab(self):
         # tab for managing patients
         patients_frame = ttk.Frame(self.notebook)
@@ -65,7 +133,7 @@ class CliniTrackApp:
         search_panel = tk.Frame(patients_frame)
         search_panel.pack(pady=5, padx=10, fill=tk.X)
 
-        tk.Label(search_panel, text="Search by Name:", font=("Arial", 10)).pack(side=tk.LEFT, padx=5)
+        tk.Label(search_panel, text="Search (name, phone, email, city):", font=("Arial", 10)).pack(side=tk.LEFT, padx=5)
 
         self.patient_search_entry = tk.Entry(search_panel, font=("Arial", 10), width=30)
         self.patient_search_entry.pack(side=tk.LEFT, padx=5)
@@ -76,35 +144,12 @@ class CliniTrackApp:
         tk.Button(search_panel, text="Show All", command=self.show_all_patients,
                  bg="#2ecc71", fg="white", font=("Arial", 10)).pack(side=tk.LEFT, padx=5)
 
-        # patients list
-        tree_frame = tk.Frame(patients_frame)
-        tree_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
-
-        scrollbar = ttk.Scrollbar(tree_frame)
-        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
 
-        self.patient_tree = ttk.Treeview(tree_frame, yscrollcommand=scrollbar.set,
-                                        columns=("ID", "Name", "Age", "Gender", "City", "Phone", "Insurance"),
-                                        show="headings")
-
-        self.patient_tree.heading("ID", text="ID")
-        self.patient_tree.heading("Name", text="Name")
-        self.patient_tree.heading("Age", text="Age")
-        self.patient_tree.heading("Gender", text="Gender")
-        self.patient_tree.heading("City", text="City")
-        self.patient_tree.heading("Phone", text="Phone")
-        self.patient_tree.heading("Insurance", text="Insurance")
-
-        self.patient_tree.column("ID", width=50)
-        self.patient_tree.column("Name", width=180)
-        self.patient_tree.column("Age", width=50)
-        self.patient_tree.column("Gender", width=70)
-        self.patient_tree.column("City", width=120)
-        self.patient_tree.column("Phone", width=120)
-        self.patient_tree.column("Insurance", width=100)
-
-        self.patient_tree.pack(fill=tk.BOTH, expand=True)
-        scrollbar.config(command=self.patient_tree.yview)
+        # patients list - only the rows on screen are loaded
+        self.patient_table = VirtualTable(patients_frame, self.tasks, 'patients', PATIENT_COLUMNS,
+                                          on_error=self.show_error)
+        self.patient_table.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+        self.showing_all_patients = False
 
         self.patient_result_label = tk.Label(patients_frame, text="Click Show All to view patients",
                                             font=("Arial", 9), fg="gray")
@@ -168,34 +213,9 @@ class CliniTrackApp:
                  bg="#2ecc71", fg="white", font=("Arial", 10)).pack(side=tk.LEFT, padx=5)
 
         # appointments list
-        tree_frame = tk.Frame(appointments_frame)
-        tree_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
-
-        scrollbar = ttk.Scrollbar(tree_frame)
-        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
-
-        self.appt_tree = ttk.Treeview(tree_frame, yscrollcommand=scrollbar.set,
-                                     columns=("ID", "Patient ID", "Doctor ID", "Date", "Time", "Procedure", "Status"),
-                                     show="headings")
-
-        self.appt_tree.heading("ID", text="ID")
-        self.appt_tree.heading("Patient ID", text="Patient ID")
-        self.appt_tree.heading("Doctor ID", text="Doctor ID")
-        self.appt_tree.heading("Date", text="Date")
-        self.appt_tree.heading("Time", text="Time")
-        self.appt_tree.heading("Procedure", text="Procedure")
-        self.appt_tree.heading("Status", text="Status")
-
-        self.appt_tree.column("ID", width=50)
-        self.appt_tree.column("Patient ID", width=80)
-        self.appt_tree.column("Doctor ID", width=80)
-        self.appt_tree.column("Date", width=100)
-        self.appt_tree.column("Time", width=80)
-        self.appt_tree.column("Procedure", width=200)
-        self.appt_tree.column("Status", width=100)
-
-        self.appt_tree.pack(fill=tk.BOTH, expand=True)
-        scrollbar.config(command=self.appt_tree.yview)
+        self.appt_table = VirtualTable(appointments_frame, self.tasks, 'appointments', APPOINTMENT_COLUMNS,
+                                       on_error=self.show_error)
+        self.appt_table.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
 
         self.appt_result_label = tk.Label(appointments_frame, text="Enter patient ID or click Show All",
                                          font=("Arial", 9), fg="gray")
@@ -211,32 +231,9 @@ class CliniTrackApp:
                  bg="#27ae60", fg="white", font=("Arial", 10)).pack(pady=10)
 
         # payments list
-        tree_frame = tk.Frame(payments_frame)
-        tree_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
-
-        scrollbar = ttk.Scrollbar(tree_frame)
-        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
-
-        self.payment_tree = ttk.Treeview(tree_frame, yscrollcommand=scrollbar.set,
-                                        columns=("ID", "Appt ID", "Amount", "Method", "Date", "Status"),
-                                        show="headings")
-
-        self.payment_tree.heading("ID", text="ID")
-        self.payment_tree.heading("Appt ID", text="Appointment ID")
-        self.payment_tree.heading("Amount", text="Amount (RON)")
-        self.payment_tree.heading("Method", text="Payment Method")
-        self.payment_tree.heading("Date", text="Date")
-        self.payment_tree.heading("Status", text="Status")
-
-        self.payment_tree.column("ID", width=50)
-        self.payment_tree.column("Appt ID", width=100)
-        self.payment_tree.column("Amount", width=120)
-        self.payment_tree.column("Method", width=120)
-        self.payment_tree.column("Date", width=120)
-        self.payment_tree.column("Status", width=100)
-
-        self.payment_tree.pack(fill=tk.BOTH, expand=True)
-        scrollbar.config(command=self.payment_tree.yview)
+        self.payment_table = VirtualTable(payments_frame, self.tasks, 'payments', PAYMENT_COLUMNS,
+                                          on_error=self.show_error)
+        self.payment_table.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
 
         self.payment_result_label = tk.Label(payments_frame, text="",
                                             font=("Arial", 9), fg="gray")
@@ -323,13 +320,12 @@ class CliniTrackApp:
 
     def update_patient(self):
         # updates selected patient information
-        selected = self.patient_tree.selection()
-        if not selected:
+        row = self.patient_table.selected_row()
+        if not row:
             messagebox.showwarning("No Selection", "Please select a patient to update")
             return
 
-        item = self.patient_tree.item(selected[0])
-        patient_id = item['values'][0]
+        patient_id = row[0]
 
         # get patient data
         patient = self.patient_repo.read(patient_id)
@@ -385,7 +381,7 @@ class CliniTrackApp:
                 self.patient_repo.update(patient_id, updates)
                 messagebox.showinfo("Success", "Patient updated successfully")
                 dialog.destroy()
-                self.show_all_patients()
+                self.reload_patients()
             except Exception as e:
                 messagebox.showerror("Error", f"Failed to update patient: {str(e)}")
 
@@ -394,14 +390,13 @@ class CliniTrackApp:
 
     def delete_patient(self):
         # deletes selected patient
-        selected = self.patient_tree.selection()
-        if not selected:
+        row = self.patient_table.selected_row()
+        if not row:
             messagebox.showwarning("No Selection", "Please select a patient to delete")
             return
 
-        item = self.patient_tree.item(selected[0])
-        patient_id = item['values'][0]
-        patient_name = item['values'][1]
+        patient_id = row[0]
+        patient_name = row[1]
 
         confirm = messagebox.askyesno("Confirm Delete",
                                       f"Are you sure you want to delete patient '{patient_name}'?")
@@ -410,56 +405,35 @@ class CliniTrackApp:
             try:
                 self.patient_repo.delete(patient_id)
                 messagebox.showinfo("Success", "Patient deleted successfully")
-                self.show_all_patients()
+                self.reload_patients()
             except Exception as e:
                 messagebox.showerror("Error", f"Failed to delete patient: {str(e)}")
 
     def view_patient_details(self):
         # shows detailed analytics for selected patient
-        selected = self.patient_tree.selection()
-        if not selected:
+        row = self.patient_table.selected_row()
+        if not row:
             messagebox.showwarning("No Selection", "Please select a patient to view details")
             return
 
-        item = self.patient_tree.item(selected[0])
-        patient_id = item['values'][0]
+        patient_id = row[0]
 
-        # get patient data
-        patient = self.patient_repo.read(patient_id)
-        if not patient:
+        # patient and all the numbers in one query, on a worker thread
+        self.tasks.submit('patient_details',
+                          lambda task: self.patient_analytics.get_patient_metrics(patient_id),
+                          self.show_patient_details, self.show_error)
+
+    def show_patient_details(self, metrics):
+        if not metrics:
             messagebox.showerror("Error", "Patient not found")
             return
 
-        # get appointment and payment data
-        conn = sqlite3.connect("database/dentalclinic.db")
-        cursor = conn.cursor()
-
-        cursor.execute("SELECT COUNT(*) FROM appointments WHERE patient_id = ?", (patient_id,))
-        total_appts = cursor.fetchone()[0]
-
-        cursor.execute("SELECT COUNT(*) FROM appointments WHERE patient_id = ? AND status = 'Completed'", (patient_id,))
-        completed = cursor.fetchone()[0]
-
-        cursor.execute("""
-            SELECT SUM(p.amount)
-            FROM payments p
-            JOIN appointments a ON p.appointment_id = a.id
-            WHERE a.patient_id = ?
-        """, (patient_id,))
-        total_spent = cursor.fetchone()[0] or 0
-
-        cursor.execute("""
-            SELECT date, procedure_name FROM appointments
-            WHERE patient_id = ? ORDER BY date DESC LIMIT 1
-        """, (patient_id,))
-        last_appt = cursor.fetchone()
-
-        conn.close()
+        patient = metrics['patient']
 
         # show details dialog
         dialog = tk.Toplevel(self.root)
         dialog.title(f"Patient Details - {patient.patient_name}")
-        dialog.geometry("500x400")
+        dialog.geometry("500x450")
 
         text = tk.Text(dialog, font=("Courier", 10), wrap=tk.WORD)
         text.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
@@ -478,94 +452,99 @@ class CliniTrackApp:
         text.insert(tk.END, f"First Visit: {patient.first_visit_at}\n\n")
 
         text.insert(tk.END, "--- Appointment History ---\n")
-        text.insert(tk.END, f"Total Appointments: {total_appts}\n")
-        text.insert(tk.END, f"Completed: {completed}\n")
-        text.insert(tk.END, f"Cancelled/Other: {total_appts - completed}\n\n")
-
-        if last_appt:
-            text.insert(tk.END, f"Last Visit: {last_appt[0]} ({last_appt[1]})\n\n")
+        text.insert(tk.END, f"Total Appointments: {metrics['total_appointments']}\n")
+        text.insert(tk.END, f"Completed: {metrics['completed']}\n")
+        text.insert(tk.END, f"Cancelled/Other: {metrics['cancelled_other']}\n\n")
+
+        if metrics['last_appointment']:
+            last_date, last_procedure = metrics['last_appointment']
+            text.insert(tk.END, f"Last Visit: {last_date} ({last_procedure})\n")
+        if metrics['days_since_last_visit'] is not None:
+            text.insert(tk.END, f"Days Since Last Completed Visit: {metrics['days_since_last_visit']}\n")
+        if metrics['visits_per_year'] is not None:
+            text.insert(tk.END, f"Visits Per Year: {metrics['visits_per_year']:.1f}\n")
+        if metrics['average_days_between_visits'] is not None:
+            text.insert(tk.END, f"Average Days Between Visits: {metrics['average_days_between_visits']:.0f}\n")
+        text.insert(tk.END, "\n")
 
         text.insert(tk.END, "--- Financial Summary ---\n")
-        text.insert(tk.END, f"Total Spent: {total_spent:,.2f} RON\n")
-        if completed > 0:
-            avg = total_spent / completed
-            text.insert(tk.END, f"Average Per Visit: {avg:,.2f} RON\n")
+        text.insert(tk.END, f"Total Spent: {metrics['total_spent']:,.2f} RON\n")
+        text.insert(tk.END, f"Lifetime Value (completed payments): {metrics['lifetime_value']:,.2f} RON\n")
+        if metrics['average_per_visit'] is not None:
+            text.insert(tk.END, f"Average Per Visit: {metrics['average_per_visit']:,.2f} RON\n")
 
         text.config(state=tk.DISABLED)
 
     def search_patients(self):
-        # search for patients by name
+        # search for patients by name, phone, email or city (full-text index)
         name = self.patient_search_entry.get().strip()
 
         if not name:
-            messagebox.showwarning("Input Required", "Please enter a name to search")
+            messagebox.showwarning("Input Required", "Please enter a name, phone, email or city to search")
             return
 
-        # clear existing results
-        for item in self.patient_tree.get_children():
-            self.patient_tree.delete(item)
-
-        # search in database
-        patients = self.patient_repo.search_by_name(name)
-
-        # show results
-        if patients:
-            for patient in patients:
-                age = patient.get_age()
-                phone = patient.phone if patient.phone else "N/A"
-                insurance = patient.insurance if patient.insurance else "None"
-
-                self.patient_tree.insert("", tk.END, values=(
-                    patient.patient_id,
-                    patient.patient_name,
-                    age,
-                    patient.gender,
-                    patient.city,
-                    phone,
-                    insurance
-                ))
-
-            self.patient_result_label.config(text=f"Found {len(patients)} patient(s)")
+        self.showing_all_patients = False
+        self.patient_table.clear()
+        self.patient_result_label.config(text=f"Searching for '{name}'...")
+
+        # search in database (worker thread), rows built there too
+        # the first SEARCH_LIMIT matches, best first - show_search_results says when there are more
+        self.tasks.submit('patients',
+                          lambda task: self.patient_rows(self.patient_repo.search(name, limit=SEARCH_LIMIT)),
+                          self.show_search_results, self.show_error)
+
+    def show_search_results(self, rows):
+        # search results stay in relevance order until a heading is clicked
+        sort_keys = [column[3] for column in PATIENT_COLUMNS]
+        self.patient_table.set_source(ListSource(rows, sort_keys))
+
+        if len(rows) >= SEARCH_LIMIT:
+            self.patient_result_label.config(
+                text=f"Showing the first {len(rows)} matches - type more of the name to narrow the search")
+        elif rows:
+            self.patient_result_label.config(text=f"Found {len(rows)} patient(s)")
         else:
             self.patient_result_label.config(text="No patients found")
 
     def show_all_patients(self):
-        # show all patients in database
-        for item in self.patient_tree.get_children():
-            self.patient_tree.delete(item)
-
-        patients = self.patient_repo.get_all()
-
-        if patients:
-            for patient in patients:
-                age = patient.get_age()
-                phone = patient.phone if patient.phone else "N/A"
-                insurance = patient.insurance if patient.insurance else "None"
-
-                self.patient_tree.insert("", tk.END, values=(
-                    patient.patient_id,
-                    patient.patient_name,
-                    age,
-                    patient.gender,
-                    patient.city,
-                    phone,
-                    insurance
-                ))
-
-            self.patient_result_label.config(text=f"Showing all {len(patients)} patients")
+        # show all patients in database - the table fetches the rows on screen
+        self.showing_all_patients = True
+        self.patient_result_label.config(text="Loading patients...")
+        self.patient_table.set_source(RepositorySource(self.patient_repo, self.patient_rows), 'patient_id',
+                                      on_count=self.show_patient_count)
+
+    def show_patient_count(self, total):
+        if total:
+            self.patient_result_label.config(text=f"{total:,} patients - click a heading to sort")
         else:
             self.patient_result_label.config(text="No patients in database")
 
+    def reload_patients(self):
+        # after an edit - keeps the scroll position when the full list is showing
+        if self.showing_all_patients:
+            self.patient_table.refresh()
+        else:
+            self.show_all_patients()
+
+    def patient_rows(self, patients):
+        # table rows for a list of patients (runs on a worker thread)
+        ages = patient_ages(patients)
+        return [(patient.patient_id, patient.patient_name, age, patient.gender, patient.city,
+                 patient.phone or "N/A", patient.insurance or "None")
+                for patient, age in zip(patients, ages)]
+
     def load_doctors(self):
         # loads and displays all doctors
-        for item in self.doctor_tree.get_children():
-            self.doctor_tree.delete(item)
+        def fetch_doctors(task):
+            with pooled_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute("SELECT doctor_id, doctor_name, speciality, room, experience_years, is_active FROM doctors")
+                return cursor.fetchall()
 
-        conn = sqlite3.connect("database/dentalclinic.db")
-        cursor = conn.cursor()
-        cursor.execute("SELECT doctor_id, doctor_name, speciality, room, experience_years, is_active FROM doctors")
-        doctors = cursor.fetchall()
-        conn.close()
+        self.tasks.submit('doctors', fetch_doctors, self.show_doctors, self.show_error)
+
+    def show_doctors(self, doctors):
+        self.clear_tree(self.doctor_tree)
 
         for doctor in doctors:
             status = "Active" if doctor[5] else "Inactive"
@@ -581,74 +560,67 @@ class CliniTrackApp:
             messagebox.showwarning("Input Required", "Please enter a patient ID")
             return
 
-        for item in self.appt_tree.get_children():
-            self.appt_tree.delete(item)
-
-        conn = sqlite3.connect("database/dentalclinic.db")
-        cursor = conn.cursor()
-        cursor.execute("""
-            SELECT id, patient_id, doctor_id, date, start_time, procedure_name, status
-            FROM appointments WHERE patient_id = ? ORDER BY date DESC
-        """, (patient_id,))
-        appointments = cursor.fetchall()
-        conn.close()
-
-        if appointments:
-            for appt in appointments:
-                self.appt_tree.insert("", tk.END, values=appt)
-            self.appt_result_label.config(text=f"Found {len(appointments)} appointment(s) for patient {patient_id}")
-        else:
-            self.appt_result_label.config(text=f"No appointments found for patient {patient_id}")
+        self.appt_result_label.config(text=f"Loading appointments for patient {patient_id}...")
+
+        def show_count(total):
+            if total:
+                self.appt_result_label.config(text=f"Found {total:,} appointment(s) for patient {patient_id}")
+            else:
+                self.appt_result_label.config(text=f"No appointments found for patient {patient_id}")
+
+        source = RepositorySource(self.appointment_repo, self.appointment_rows, patient_id=patient_id)
+        self.appt_table.set_source(source, 'epoch_day', descending=True, on_count=show_count)
 
     def show_all_appointments(self):
-        # shows all appointments in the system
-        for item in self.appt_tree.get_children():
-            self.appt_tree.delete(item)
-
-        conn = sqlite3.connect("database/dentalclinic.db")
-        cursor = conn.cursor()
-        cursor.execute("""
-            SELECT id, patient_id, doctor_id, date, start_time, procedure_name, status
-            FROM appointments ORDER BY date DESC LIMIT 200
-        """)
-        appointments = cursor.fetchall()
-        conn.close()
-
-        if appointments:
-            for appt in appointments:
-                self.appt_tree.insert("", tk.END, values=appt)
-            self.appt_result_label.config(text=f"Showing {len(appointments)} most recent appointments")
-        else:
-            self.appt_result_label.config(text="No appointments found")
+        # shows all appointments in the system, newest first
+        self.appt_result_label.config(text="Loading appointments...")
+
+        def show_count(total):
+            if total:
+                self.appt_result_label.config(text=f"{total:,} appointments - click a heading to sort")
+            else:
+                self.appt_result_label.config(text="No appointments found")
+
+        source = RepositorySource(self.appointment_repo, self.appointment_rows)
+        self.appt_table.set_source(source, 'epoch_day', descending=True, on_count=show_count)
+
+    def appointment_rows(self, appointments):
+        return [(appt.appointment_id, appt.patient_id, appt.doctor_id, appt.date, appt.start_time,
+                 appt.procedure_name, appt.status) for appt in appointments]
 
     def load_payments(self):
-        # loads and displays all payments
-        for item in self.payment_tree.get_children():
-            self.payment_tree.delete(item)
-
-        conn = sqlite3.connect("database/dentalclinic.db")
-        cursor = conn.cursor()
-        cursor.execute("""
-            SELECT id, appointment_id, amount, method, paid_at, status
-            FROM payments ORDER BY paid_at DESC LIMIT 200
-        """)
-        payments = cursor.fetchall()
-        conn.close()
-
-        total = 0
-        for payment in payments:
-            self.payment_tree.insert("", tk.END, values=payment)
-            total += payment[2]
-
-        self.payment_result_label.config(text=f"Showing {len(payments)} payments - Total: {total:,.2f} RON")
+        # loads and displays all payments, newest first
+        self.payment_result_label.config(text="Loading payments...")
+
+        source = RepositorySource(self.payment_repo, self.payment_rows)
+        self.payment_table.set_source(source, 'paid_at', descending=True)
+
+        # count and total over every payment, not just the ones on screen
+        self.tasks.submit('payment_totals',
+                          lambda task: (self.payment_repo.count(), self.payment_repo.total_amount()),
+                          self.show_payment_totals, self.show_error)
+
+    def show_payment_totals(self, result):
+        count, total = result
+        self.payment_result_label.config(text=f"{count:,} payments - Total: {total:,.2f} RON")
+
+    def payment_rows(self, payments):
+        return [(payment.payment_id, payment.appointment_id, payment.amount, payment.method,
+                 payment.paid_at, payment.status) for payment in payments]
 
     def load_statistics(self):
         # load and display comprehensive statistics
+        # the queries run on a worker, the text is filled in on the Tk thread
         self.stats_text.delete(1.0, tk.END)
         self.stats_text.insert(tk.END, "Loading statistics...\n\n")
 
-        summary = self.analytics.get_dashboard_summary()
+        def compute(task):
+            return self.analytics.get_dashboard_summary(), self.analytics.cache_stats()
 
+        self.tasks.submit('statistics', compute, self.show_statistics, self.show_error)
+
+    def show_statistics(self, result):
+        summary, stats = result
         self.stats_text.delete(1.0, tk.END)
 
         # patient demographics
@@ -708,14 +680,36 @@ class CliniTrackApp:
                 self.stats_text.insert(tk.END, f"{doc['name']} ({doc['specialty']})\n")
                 self.stats_text.insert(tk.END, f"  Total Appointments: {doc['total_appointments']}\n")
                 self.stats_text.insert(tk.END, f"  Completed: {doc['completed']}\n")
-                self.stats_text.insert(tk.END, f"  Completion Rate: {doc['completion_rate']}%\n\n")
+                self.stats_text.insert(tk.END, f"  Completion Rate: {doc['completion_rate']}%\n")
+                self.stats_text.insert(tk.END, f"  Revenue: {doc['revenue']:,.2f} RON\n")
+                self.stats_text.insert(tk.END, f"  Average Ticket: {doc['average_ticket']:,.2f} RON\n\n")
+
+        # cache counters, handy to check the dashboard cache is doing its job
+        if stats:
+            self.stats_text.insert(tk.END, f"(cache: {stats['hits']} hits, {stats['misses']} misses, "
+                                           f"hit rate {stats['hit_rate'] * 100:.0f}%)\n")
 
 
 def main():
     # entry point for the GUI application
+    parser = argparse.ArgumentParser(description="CliniTrack GUI")
+    add_profile_arguments(parser)
+    args = parser.parse_args()
+    start_profiling(args)
+
     root = tk.Tk()
     app = CliniTrackApp(root)
+
+    def on_close():
+        # stop delivering background results before the widgets go away
+        app.tasks.shutdown()
+        root.destroy()
+
+    root.protocol("WM_DELETE_WINDOW", on_close)
     root.mainloop()
+    app.tasks.shutdown()
+    close_all_pools()
+    finish_profiling(args)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,364 @@
+# virtual-scrolling table for the GUI
+# a ttk.Treeview with 100k items takes minutes to fill, so this one only
+# holds the rows that fit on screen (a few dozen items, whatever the table
+# size) and scrolling changes what those items show. rows come from a source
+# one block at a time, fetched on the task runner (gui_tasks.py) so a slow
+# page never freezes the window, and the last few blocks stay cached.
+# clicking a column heading sorts by it - in the database, not in Python.
+#
+# a source has two methods, both called on a worker thread:
+#   count()                                     -> number of rows
+#   rows(sort_key, descending, offset, limit)   -> list of value tuples
+
+import tkinter as tk
+from collections import OrderedDict
+from tkinter import ttk
+
+BLOCK_SIZE = 100    # rows per fetch
+MAX_BLOCKS = 20     # blocks kept in memory
+WHEEL_ROWS = 3      # rows per mouse wheel step
+PLACEHOLDER = "..."
+
+# until the first row is drawn and can be measured
+ROW_HEIGHT = 20
+HEADING_HEIGHT = 25
+
+
+class RepositorySource:
+    # rows from a repository's sorted_page() / count()
+    # to_rows turns a list of models into display tuples (it runs on the
+    # worker too), filters go to both calls (patient_id=7 for appointments).
+    # a sort key starting with '-' sorts the other way round - the Age column
+    # sorts by '-patient_birthdate'
+    def __init__(self, repo, to_rows, **filters):
+        self.repo = repo
+        self.to_rows = to_rows
+        self.filters = filters
+
+    def count(self):
+        return self.repo.count(**self.filters)
+
+    def rows(self, sort_key, descending, offset, limit):
+        if sort_key.startswith('-'):
+            sort_key, descending = sort_key[1:], not descending
+        return self.to_rows(self.repo.sorted_page(sort_key, descending, offset, limit, **self.filters))
+
+
+class ListSource:
+    # rows that are already in memory (search results), sorted in Python
+    # sort_keys are the table's sort keys in column order, to find the column
+    # a key belongs to. sort_key None keeps the original order
+    def __init__(self, rows, sort_keys):
+        self._rows = list(rows)
+        self._sort_keys = list(sort_keys)
+        self._sorted = (None, False, self._rows)
+
+    def count(self):
+        return len(self._rows)
+
+    def rows(self, sort_key, descending, offset, limit):
+        if self._sorted[:2] != (sort_key, descending):
+            i = self._sort_keys.index(sort_key)
+            # None first like NULL in SQLite
+            ordered = sorted(self._rows, key=lambda row: (row[i] is not None, row[i]), reverse=descending)
+            self._sorted = (sort_key, descending, ordered)
+        return self._sorted[2][offset:offset + limit]
+
+
+class VirtualTable(tk.Frame):
+    def __init__(self, master, tasks, channel, columns, on_error=None, block_size=BLOCK_SIZE):
+        # columns: list of (name, heading, width, sort_key), sort_key None
+        # for a column that can't be sorted. loads run on `channel` of the
+        # task runner, so a newer load cancels the older one
+        super().__init__(master)
+        self.tasks = tasks
+        self.channel = channel
+        self.columns = columns
+        self.on_error = on_error
+        self.block_size = block_size
+
+        self.source = None
+        self.on_count = None
+        self.total = 0
+        self.top = 0            # index of the row at the top of the screen
+        self.visible = 1        # rows that fit on screen
+        self.sort_key = None
+        self.descending = False
+
+        self._blocks = OrderedDict()    # block number -> rows, oldest first
+        self._generation = 0            # bumped when the data changes, old loads are ignored
+        self._counted = False
+        self._pending = None            # (what was asked for, Task) of the load in flight
+        self._items = []                # the Treeview items, reused on every scroll
+        self._selected = None           # row index of the selected row
+        self._row_height = ROW_HEIGHT
+        self._heading_height = HEADING_HEIGHT
+        self._measured = False
+        self._placeholder = (PLACEHOLDER,) + ("",) * (len(columns) - 1)
+
+        scrollbar = ttk.Scrollbar(self, orient=tk.VERTICAL, command=self._on_scrollbar)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.scrollbar = scrollbar
+
+        self.tree = ttk.Treeview(self, columns=[column[0] for column in columns],
+                                 show="headings", selectmode="browse")
+        self.tree.pack(fill=tk.BOTH, expand=True)
+
+        for name, heading, width, sort_key in columns:
+            if sort_key:
+                self.tree.heading(name, text=heading, command=lambda key=sort_key: self.sort_by(key))
+            else:
+                self.tree.heading(name, text=heading)
+            self.tree.column(name, width=width)
+
+        self.tree.bind("<Configure>", lambda event: self._measure())
+        self.tree.bind("<<TreeviewSelect>>", self._on_select)
+        for sequence in ("<MouseWheel>", "<Button-4>", "<Button-5>"):
+            self.tree.bind(sequence, self._on_wheel)
+        for sequence in ("<Up>", "<Down>", "<Prior>", "<Next>", "<Home>", "<End>"):
+            self.tree.bind(sequence, self._on_key)
+
+        self._update_scrollbar()
+
+    # public API
+
+    def set_source(self, source, sort_key=None, descending=False, on_count=None):
+        # shows a new set of rows from the top, on_count(total) is called
+        # once the row count is known
+        self.source = source
+        self.on_count = on_count
+        self.sort_key = sort_key
+        self.descending = descending
+        self.total = 0
+        self.top = 0
+        self._selected = None
+        self._reset(counted=False)
+        self._update_headings()
+        self._show()
+
+    def refresh(self):
+        # reloads the current source (after an edit), keeping the position
+        if self.source is not None:
+            self._reset(counted=False)
+            self._show()
+
+    def clear(self):
+        self.source = None
+        self.total = 0
+        self.top = 0
+        self._selected = None
+        self._reset(counted=True)
+        self._show()
+
+    def sort_by(self, sort_key):
+        # heading click - sorts by that column, a second click reverses
+        if self.source is None:
+            return
+        if sort_key == self.sort_key:
+            self.descending = not self.descending
+        else:
+            self.sort_key = sort_key
+            self.descending = False
+        self.top = 0
+        self._selected = None
+        self._reset(counted=self._counted)
+        self._update_headings()
+        self._show()
+
+    def selected_row(self):
+        # values of the selected row, None if nothing (or a row still loading) is selected
+        if self._selected is None:
+            return None
+        return self.row_at(self._selected)
+
+    def row_at(self, index):
+        block = self._blocks.get(index // self.block_size)
+        if block is None:
+            return None
+        offset = index % self.block_size
+        return block[offset] if offset < len(block) else None
+
+    def scroll_to(self, top):
+        top = max(0, min(top, self.total - self.visible))
+        if top != self.top:
+            self.top = top
+            self._show()
+
+    def select_index(self, index):
+        # selects a row and scrolls it into view
+        self._selected = index
+        if index < self.top:
+            self.top = index
+        elif index >= self.top + self.visible:
+            self.top = index - self.visible + 1
+        self._show()
+
+    # loading
+
+    def _reset(self, counted):
+        self._generation += 1
+        self._blocks.clear()
+        self._counted = counted
+        self._pending = None
+
+    def _show(self):
+        self._render()
+        self._load()
+
+    def _blocks_on_screen(self):
+        if self._counted and self.total == 0:
+            return []
+        first = self.top // self.block_size
+        last = (self.top + self.visible - 1) // self.block_size
+        if self._counted:
+            last = min(last, (self.total - 1) // self.block_size)
+        return list(range(first, last + 1))
+
+    def _load(self):
+        # fetches the row count (first time) and the blocks the screen needs
+        if self.source is None:
+            return
+        needed = [block for block in self._blocks_on_screen() if block not in self._blocks]
+        count = not self._counted
+        if not needed and not count:
+            return
+
+        request = (self._generation, count, tuple(needed))
+        if self._pending is not None and self._pending[0] == request and not self._pending[1].cancelled:
+            return  # already on its way
+
+        source, sort_key, descending = self.source, self.sort_key, self.descending
+        generation, size = self._generation, self.block_size
+
+        def fetch(task):
+            total = source.count() if count else None
+            blocks = {}
+            for block in needed:
+                task.check()
+                blocks[block] = source.rows(sort_key, descending, block * size, size)
+            return generation, total, blocks
+
+        task = self.tasks.submit(self.channel, fetch, self._loaded, self._load_failed)
+        self._pending = (request, task) if task is not None else None
+
+    def _loaded(self, result):
+        generation, total, blocks = result
+        if generation != self._generation:
+            return
+        self._pending = None
+
+        if total is not None:
+            self._counted = True
+            self.total = total
+            self.top = max(0, min(self.top, total - self.visible))
+            if self._selected is not None and self._selected >= total:
+                self._selected = None
+            if self.on_count is not None:
+                self.on_count(total)
+
+        for block, rows in blocks.items():
+            self._blocks[block] = rows
+            self._blocks.move_to_end(block)
+        while len(self._blocks) > MAX_BLOCKS:
+            self._blocks.popitem(last=False)
+
+        # the screen may have moved on while this was loading
+        self._show()
+
+    def _load_failed(self, error):
+        self._pending = None
+        if self.on_error is not None:
+            self.on_error(error)
+
+    # drawing
+
+    def _render(self):
+        # points the reused Treeview items at the rows from self.top down
+        shown = max(0, min(self.visible, self.total - self.top))
+        while len(self._items) < shown:
+            self._items.append(self.tree.insert("", tk.END, values=self._placeholder))
+        while len(self._items) > shown:
+            self.tree.delete(self._items.pop())
+
+        selected = ()
+        for position, item in enumerate(self._items):
+            index = self.top + position
+            row = self.row_at(index)
+            self.tree.item(item, values=row if row is not None else self._placeholder)
+            if index == self._selected:
+                selected = (item,)
+
+        if self.tree.selection() != selected:
+            self.tree.selection_set(selected)
+        # the Treeview never scrolls by itself, all the items fit
+        self.tree.yview_moveto(0)
+        self._update_scrollbar()
+
+        if self._items and not self._measured:
+            self.after_idle(self._measure)
+
+    def _update_scrollbar(self):
+        if self.total <= 0:
+            self.scrollbar.set(0, 1)
+        else:
+            self.scrollbar.set(self.top / self.total, min(1.0, (self.top + self.visible) / self.total))
+
+    def _measure(self):
+        # how many rows fit - from the first item's position once there is one
+        if self._items:
+            box = self.tree.bbox(self._items[0])
+            if box:
+                self._heading_height = box[1]
+                self._row_height = max(1, box[3])
+                self._measured = True
+
+        height = self.tree.winfo_height()
+        visible = max(1, (height - self._heading_height) // self._row_height)
+        if visible != self.visible:
+            self.visible = visible
+            self.top = max(0, min(self.top, self.total - visible))
+            self._show()
+
+    def _update_headings(self):
+        for name, heading, width, sort_key in self.columns:
+            if sort_key and sort_key == self.sort_key:
+                heading += " ▼" if self.descending else " ▲"
+            self.tree.heading(name, text=heading)
+
+    # events
+
+    def _on_scrollbar(self, action, amount, unit=None):
+        if action == "moveto":
+            self.scroll_to(int(float(amount) * self.total))
+        elif action == "scroll":
+            step = self.visible if unit == "pages" else 1
+            self.scroll_to(self.top + int(amount) * step)
+
+    def _on_wheel(self, event):
+        if event.num == 4 or event.delta > 0:
+            self.scroll_to(self.top - WHEEL_ROWS)
+        else:
+            self.scroll_to(self.top + WHEEL_ROWS)
+        return "break"
+
+    def _on_key(self, event):
+        # arrow/page keys move the selection through the whole table,
+        # not just the rows on screen
+        if self.total == 0:
+            return "break"
+        if event.keysym == "Home":
+            index = 0
+        elif event.keysym == "End":
+            index = self.total - 1
+        elif self._selected is None:
+            index = self.top
+        else:
+            step = {"Up": -1, "Down": 1, "Prior": -self.visible, "Next": self.visible}[event.keysym]
+            index = self._selected + step
+        self.select_index(max(0, min(index, self.total - 1)))
+        return "break"
+
+    def _on_select(self, event):
+        selection = self.tree.selection()
+        if selection and selection[0] in self._items:
+            self._selected = self.top + self._items.index(selection[0])
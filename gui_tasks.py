@@ -0,0 +1,167 @@
+# background loading for the tkinter GUI
+# queries run on a small thread pool so the window keeps redrawing. tkinter
+# must only be touched from the main thread, so workers never call it: they
+# put their result on a queue and the Tk thread picks it up with root.after.
+#
+# every task belongs to a channel ("patients", "payments", ...). starting a
+# new task on a channel makes the older one stale - it is cancelled if it
+# hasn't started yet, and its result is dropped when it finishes.
+
+import itertools
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+DEFAULT_WORKERS = 2
+POLL_MS = 30
+
+
+class TaskCancelled(Exception):
+    # raised by Task.check() inside a worker when the task went stale
+    pass
+
+
+class Task:
+    def __init__(self, task_id, channel):
+        self.task_id = task_id
+        self.channel = channel
+        self._cancelled = threading.Event()
+        self._runner = None
+
+    @property
+    def cancelled(self):
+        return self._cancelled.is_set()
+
+    def cancel(self):
+        self._cancelled.set()
+
+    def check(self):
+        # long-running work can call this between steps to stop early
+        if self.cancelled:
+            raise TaskCancelled()
+
+    def report(self, message):
+        # progress text for the UI, safe to call from the worker
+        if not self.cancelled:
+            self._runner._results.put((self, 'progress', message))
+
+
+class TaskRunner:
+    def __init__(self, root, max_workers=DEFAULT_WORKERS, on_busy=None):
+        # on_busy(count) is called on the Tk thread whenever the number of
+        # running tasks changes - the app uses it for its progress bar
+        self.root = root
+        self.on_busy = on_busy
+        self._executor = ThreadPoolExecutor(max_workers, thread_name_prefix="clinitrack-gui")
+        self._results = queue.SimpleQueue()
+        self._ids = itertools.count(1)
+        self._latest = {}    # channel -> newest Task
+        self._pending = {}   # task_id -> (task, future, callbacks)
+        self._polling = False
+        self._closed = False
+
+    def submit(self, channel, func, on_done, on_error=None, on_progress=None):
+        # runs func(task) on a worker, then on_done(result) on the Tk thread
+        # (on_error(exception) if it raised). returns the Task
+        if self._closed:
+            return None
+
+        stale = self._latest.get(channel)
+        if stale is not None:
+            self.cancel(stale)
+
+        task = Task(next(self._ids), channel)
+        task._runner = self
+        self._latest[channel] = task
+
+        future = self._executor.submit(self._run, task, func)
+        self._pending[task.task_id] = (task, future, (on_done, on_error, on_progress))
+        self._busy_changed()
+        self._schedule_poll()
+        return task
+
+    def cancel(self, task):
+        task.cancel()
+        entry = self._pending.get(task.task_id)
+        if entry is not None and entry[1].cancel():
+            # never started - nothing will come back for it
+            del self._pending[task.task_id]
+            self._busy_changed()
+
+    def cancel_all(self):
+        for task, _, _ in list(self._pending.values()):
+            self.cancel(task)
+
+    def busy(self):
+        return sum(1 for task, _, _ in self._pending.values() if not task.cancelled)
+
+    def shutdown(self):
+        # called when the window closes - running queries finish in the
+        # background, nothing is delivered any more
+        self._closed = True
+        self.cancel_all()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _run(self, task, func):
+        # worker thread
+        if task.cancelled:
+            self._results.put((task, 'cancelled', None))
+            return
+        try:
+            result = func(task)
+        except TaskCancelled:
+            self._results.put((task, 'cancelled', None))
+        except Exception as e:
+            self._results.put((task, 'error', e))
+        else:
+            self._results.put((task, 'done', result))
+
+    def _schedule_poll(self):
+        if not self._polling and not self._closed:
+            self._polling = True
+            self.root.after(POLL_MS, self._poll)
+
+    def _poll(self):
+        # Tk thread - hands finished results to their callbacks
+        self._polling = False
+        if self._closed:
+            return
+
+        while True:
+            try:
+                task, kind, value = self._results.get_nowait()
+            except queue.Empty:
+                break
+
+            entry = self._pending.get(task.task_id)
+            if entry is None:
+                continue
+            on_done, on_error, on_progress = entry[2]
+
+            if kind == 'progress':
+                if on_progress is not None and not task.cancelled:
+                    on_progress(value)
+                continue
+
+            del self._pending[task.task_id]
+            if self._latest.get(task.channel) is task:
+                del self._latest[task.channel]
+            self._busy_changed()
+
+            # stale results are dropped, the newer request will fill the view
+            if task.cancelled or kind == 'cancelled':
+                continue
+            if kind == 'error':
+                if on_error is not None:
+                    on_error(value)
+                else:
+                    self.root.report_callback_exception(type(value), value, value.__traceback__)
+            else:
+                on_done(value)
+
+        if self._pending:
+            self._schedule_poll()
+
+    def _busy_changed(self):
+        if self.on_busy is not None:
+            self.on_busy(self.busy())
@@ -1,7 +1,15 @@
+import argparse
+
 from repositories.patient_repository import PatientRepository
 from repositories.doctor_repository import DoctorRepository
 from repositories.appointment_repository import AppointmentRepository
 from repositories.payment_repository import PaymentRepository
+from services.patient_analytics_service import PatientAnalyticsService
+from database.connection import close_all_pools
+from database.profiling import add_profile_arguments, start_profiling, finish_profiling
+
+# patients listed before asking to continue
+PAGE_SIZE = 50
 
 
 def print_header(title):
@@ -139,17 +147,34 @@ def view_all_patients():
     print_header("ALL PATIENTS")
 
     repo = PatientRepository()
-    patients = repo.get_all()
+    analytics = PatientAnalyticsService()
+    # streamed page by page so big databases start printing right away
+    shown = 0
+    after_id = None
 
-    if not patients:
+    while True:
+        patients = repo.page(after_id, PAGE_SIZE)
+        if not patients:
+            break
+        if shown == 0:
+            print(f"\n{'ID':<5} {'Name':<25} {'City':<15} {'Gender':<8} {'Visits':>6}  {'Last visit':<10}")
+            print("-" * 76)
+        elif input(f"-- {shown} shown, Enter for more, q to stop -- ").strip().lower() == 'q':
+            break
+        # visits for the whole page in one query
+        metrics = analytics.get_patients_metrics([p.patient_id for p in patients])
+        for p in patients:
+            visits = metrics.get(p.patient_id, {})
+            print(f"{p.patient_id:<5} {p.patient_name:<25} {p.city:<15} {p.gender:<8} "  # FIXED: was p.name
+                  f"{visits.get('completed', 0):>6}  {visits.get('last_visit') or 'never':<10}")
+        shown += len(patients)
+        after_id = patients[-1].patient_id
+
+    if shown == 0:
         print("\nNo patients in database!")
     else:
-        print(f"\n{'ID':<5} {'Name':<25} {'City':<15} {'Gender':<8}")
-        print("-" * 60)
-        for p in patients:
-            print(f"{p.patient_id:<5} {p.patient_name:<25} {p.city:<15} {p.gender:<8}")  # FIXED: was p.name
-        print("-" * 60)
-        print(f"\nTotal patients: {len(patients)}")
+        print("-" * 76)
+        print(f"\nPatients shown: {shown}")
 
     input("\nPress Enter to continue...")
 
@@ -160,15 +185,16 @@ def patient_analytics():
 
     patient_id = int(input("Enter patient ID: "))
 
-    # get patient info
-    patient_repo = PatientRepository()
-    patient = patient_repo.read(patient_id)
+    # patient info and all the numbers in one query
+    metrics = PatientAnalyticsService().get_patient_metrics(patient_id)
 
-    if not patient:
+    if not metrics:
         print(f"\nPatient with ID {patient_id} not found!")
         input("\nPress Enter to continue...")
         return
 
+    patient = metrics['patient']
+
     # show basic patient info
     print(f"\nPatient: {patient.patient_name}")
     print(f"Age: {patient.get_age()} years")
@@ -176,50 +202,28 @@ def patient_analytics():
     print(f"City: {patient.city}")
     print(f"First visit: {patient.first_visit_at}")
 
-    # get appointments for this patient
-    # doing it simple - just count from database
-    import sqlite3
-    conn = sqlite3.connect("database/dentalclinic.db")
-    cursor = conn.cursor()
-
-    # count appointments
-    cursor.execute("SELECT COUNT(*) FROM appointments WHERE patient_id = ?", (patient_id,))
-    total_appointments = cursor.fetchone()[0]
-
-    # count completed
-    cursor.execute("SELECT COUNT(*) FROM appointments WHERE patient_id = ? AND status = 'Completed'", (patient_id,))
-    completed = cursor.fetchone()[0]
-
-    # get last appointment
-    cursor.execute("SELECT date, procedure_name FROM appointments WHERE patient_id = ? ORDER BY date DESC LIMIT 1", (patient_id,))
-    last_appt = cursor.fetchone()
-
-    # get total spent (payments for this patient)
-    cursor.execute("""
-        SELECT SUM(p.amount)
-        FROM payments p
-        JOIN appointments a ON p.appointment_id = a.id
-        WHERE a.patient_id = ?
-    """, (patient_id,))
-    total_spent = cursor.fetchone()[0]
-
-    conn.close()
-
     # show appointment stats
     print("\n--- Appointment History ---")
-    print(f"Total appointments: {total_appointments}")
-    print(f"Completed: {completed}")
-    print(f"Cancelled/Other: {total_appointments - completed}")
-
-    if last_appt:
-        print(f"Last visit: {last_appt[0]} ({last_appt[1]})")
+    print(f"Total appointments: {metrics['total_appointments']}")
+    print(f"Completed: {metrics['completed']}")
+    print(f"Cancelled/Other: {metrics['cancelled_other']}")
+
+    if metrics['last_appointment']:
+        last_date, last_procedure = metrics['last_appointment']
+        print(f"Last visit: {last_date} ({last_procedure})")
+    if metrics['days_since_last_visit'] is not None:
+        print(f"Days since last completed visit: {metrics['days_since_last_visit']}")
+    if metrics['visits_per_year'] is not None:
+        print(f"Visits per year: {metrics['visits_per_year']:.1f}")
+    if metrics['average_days_between_visits'] is not None:
+        print(f"Average days between visits: {metrics['average_days_between_visits']:.0f}")
 
     # show spending
-    if total_spent:
-        print(f"\nTotal spent: {total_spent:,.2f} RON")
-        if completed > 0:
-            avg_per_visit = total_spent / completed
-            print(f"Average per visit: {avg_per_visit:,.2f} RON")
+    if metrics['total_spent']:
+        print(f"\nTotal spent: {metrics['total_spent']:,.2f} RON")
+        print(f"Lifetime value (completed payments): {metrics['lifetime_value']:,.2f} RON")
+        if metrics['average_per_visit'] is not None:
+            print(f"Average per visit: {metrics['average_per_visit']:,.2f} RON")
 
     input("\nPress Enter to continue...")
 
@@ -294,4 +298,13 @@ def main_menu():
 
 
 if __name__ == "__main__":
-    main_menu()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="CliniTrack - dental clinic management")
+    add_profile_arguments(parser)
+    args = parser.parse_args()
+
+    start_profiling(args)
+    try:
+        main_menu()
+    finally:
+        close_all_pools()
+        finish_profiling(args)
\ No newline at end of file
@@ -2,7 +2,7 @@
 Models package - Domain entities
 """
 
-from .patient import Patient
+from .patient import Patient, patient_ages
 from .doctor import Doctor
 from .appointment import Appointment
 from .payment import Payment
@@ -10,6 +10,7 @@ from .procedure import Procedure
 
 __all__ = [
     'Patient',
+    'patient_ages',
     'Doctor',
     'Appointment',
     'Payment',
@@ -1,4 +1,14 @@
+from datetime import date
+
+from models.dates import parse_date, parse_minutes
+
+
 class Appointment:
+    # slotted like the other models, see models/patient.py
+    __slots__ = ('appointment_id', 'patient_id', 'doctor_id', 'date', 'start_time', 'end_time',
+                 'status', 'procedure_name', 'source', 'procedure_category', 'created_at', 'notes',
+                 '_day', '_duration')
+
     def __init__(self, appointment_id, patient_id, doctor_id, date, start_time, end_time,
                  status, procedure_name, source=None, procedure_category=None,
                  created_at=None, notes=None):
@@ -14,6 +24,8 @@ class Appointment:
         self.procedure_category = procedure_category
         self.created_at = created_at
         self.notes = notes
+        self._day = None  # (text, date), see day
+        self._duration = None  # (start, end, minutes), see get_duration_minutes()
 
     def __repr__(self):
         return f"Appointment(id={self.appointment_id}, date='{self.date}', status='{self.status}')"
@@ -22,16 +34,24 @@ class Appointment:
         # check if appointment is completed
         return self.status == 'Completed'
 
-    def is_future(self):
+    @property
+    def day(self):
+        # date as a date - parsed on first use, again only if it changes
+        cached = self._day
+        if cached is None or cached[0] != self.date:
+            cached = self._day = (self.date, parse_date(self.date))
+        return cached[1]
+
+    def is_future(self, today=None):
         # check if appointment is in the future
-        from datetime import datetime
-        appointment_date = datetime.strptime(self.date, '%Y-%m-%d').date()
-        return appointment_date > datetime.now().date()
+        return self.day > (today or date.today())
 
     def get_duration_minutes(self):
         # calculate appointment duration in minutes
-        from datetime import datetime
-        start = datetime.strptime(self.start_time, '%H:%M')
-        end = datetime.strptime(self.end_time, '%H:%M')
-        duration = (end - start).seconds // 60
-        return duration
\ No newline at end of file
+        # computed once, again only if the times change
+        cached = self._duration
+        if cached is None or cached[0] != self.start_time or cached[1] != self.end_time:
+            # an end before the start wraps past midnight, like the old timedelta.seconds did
+            minutes = (parse_minutes(self.end_time) - parse_minutes(self.start_time)) % (24 * 60)
+            cached = self._duration = (self.start_time, self.end_time, minutes)
+        return cached[2]
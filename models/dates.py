@@ -0,0 +1,47 @@
+# date/time parsing shared by the models
+# the same strings come back over and over (birthdates, appointment days,
+# the 30-minute slots), so each distinct string is parsed once
+
+from datetime import date, datetime, timedelta
+from functools import lru_cache
+
+# day 0 of the epoch_day columns (database/day_columns.py)
+EPOCH = date(1970, 1, 1)
+
+
+@lru_cache(maxsize=65536)
+def parse_date(text):
+    # 'YYYY-MM-DD' -> date
+    try:
+        return date.fromisoformat(text)
+    except ValueError:
+        # non-padded dates like '1985-4-7' that strptime used to accept
+        return datetime.strptime(text, '%Y-%m-%d').date()
+
+
+@lru_cache(maxsize=4096)
+def parse_minutes(text):
+    # 'HH:MM' -> minutes since midnight
+    parsed = datetime.strptime(text, '%H:%M')
+    return parsed.hour * 60 + parsed.minute
+
+
+def to_epoch_day(value):
+    # date or 'YYYY-MM-DD' -> days since 1970-01-01
+    if isinstance(value, str):
+        value = parse_date(value)
+    return (value - EPOCH).days
+
+
+def from_epoch_day(days):
+    # days since 1970-01-01 -> date
+    return EPOCH + timedelta(days=days)
+
+
+def age_on(birthdate, today):
+    # full years between two dates
+    age = today.year - birthdate.year
+    # adjust if birthday hasn't happened this year
+    if (today.month, today.day) < (birthdate.month, birthdate.day):
+        age -= 1
+    return age
@@ -1,4 +1,8 @@
 class Doctor:
+    # slotted like the other models, see models/patient.py
+    __slots__ = ('doctor_id', 'doctor_name', 'speciality', 'room', 'is_active',
+                 'education', 'experience_years', 'work_days', 'phone', 'email')
+
     def __init__(self, doctor_id, doctor_name, speciality, room, is_active,
                  education=None, experience_years=None, work_days=None, phone=None, email=None):
         self.doctor_id = doctor_id
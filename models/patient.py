@@ -1,4 +1,15 @@
+from datetime import date
+
+from models.dates import parse_date, age_on
+
+
 class Patient:
+    # __slots__ instead of a per-object __dict__ - listings build hundreds of
+    # thousands of these, slots make each one a bit smaller and quicker to build.
+    # the repositories call the constructor straight with the row's columns
+    __slots__ = ('patient_id', 'patient_name', 'patient_birthdate', 'first_visit_at',
+                 'gender', 'city', 'address', 'phone', 'email', 'insurance', '_birthdate')
+
     def __init__(self, patient_id, patient_name, patient_birthdate, first_visit_at,
                  gender, city, address=None, phone=None, email=None, insurance=None):
         self.patient_id = patient_id
@@ -11,21 +22,39 @@ class Patient:
         self.phone = phone
         self.email = email
         self.insurance = insurance
+        self._birthdate = None  # (text, date), see birthdate
 
     def __repr__(self):
         return f"Patient(id={self.patient_id}, name='{self.patient_name}', city='{self.city}')"
 
-    def get_age(self):
+    @property
+    def birthdate(self):
+        # patient_birthdate as a date - parsed on first use, again only if it changes
+        cached = self._birthdate
+        if cached is None or cached[0] != self.patient_birthdate:
+            cached = self._birthdate = (self.patient_birthdate, parse_date(self.patient_birthdate))
+        return cached[1]
+
+    def get_age(self, today=None):
         # calculates patient age from birthdate
-        from datetime import datetime
-        birthdate = datetime.strptime(self.patient_birthdate, '%Y-%m-%d')
-        today = datetime.now()
-        age = today.year - birthdate.year
-        # adjust if birthday hasn't happened this year
-        if (today.month, today.day) < (birthdate.month, birthdate.day):
-            age -= 1
-        return age
+        # pass `today` when computing many ages, or use patient_ages()
+        return age_on(self.birthdate, today or date.today())
 
     def has_insurance(self):
         # check if patient has insurance coverage
-        return self.insurance and self.insurance != 'None'
\ No newline at end of file
+        return self.insurance and self.insurance != 'None'
+
+
+def patient_ages(patients, today=None):
+    # ages for a whole list of patients against one "today"
+    # patients born on the same day share the calculation
+    today = today or date.today()
+    by_birthdate = {}
+    ages = []
+    for patient in patients:
+        text = patient.patient_birthdate
+        age = by_birthdate.get(text)
+        if age is None:
+            age = by_birthdate[text] = age_on(patient.birthdate, today)
+        ages.append(age)
+    return ages
@@ -1,4 +1,7 @@
 class Payment:
+    # slotted like the other models, see models/patient.py
+    __slots__ = ('payment_id', 'appointment_id', 'amount', 'method', 'paid_at', 'status')
+
     def __init__(self, payment_id, appointment_id, amount, method, paid_at, status='Completed'):
         self.payment_id = payment_id
         self.appointment_id = appointment_id
@@ -1,4 +1,7 @@
 class Procedure:
+    # slotted like the other models, see models/patient.py
+    __slots__ = ('procedure_id', 'name', 'category', 'duration_minutes', 'price_min', 'price_max')
+
     def __init__(self, procedure_id, name, category, duration_minutes, price_min, price_max):
         self.procedure_id = procedure_id
         self.name = name
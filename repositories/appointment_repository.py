@@ -1,66 +1,211 @@
 from repositories.repository_interface import RepositoryInterface
-from database.connection import get_cursor_and_connection
+from database.connection import pooled_connection
+from database.lookups import NameCodes
+from database.profiling import profile_methods
+from database.unit_of_work import UnitOfWork
+from repositories.batching import DEFAULT_CHUNK_SIZE, insert_many, write_many
+from repositories.paging import (DEFAULT_PAGE_SIZE, keyset_page, iter_keyset, sorted_page,
+                                 count_rows, check_sort_column)
 from models.appointment import Appointment
-
-
+from models.dates import to_epoch_day
+
+# statuses that don't keep their time slot - an appointment without a
+# status keeps it (NOT IN on a NULL would be NULL, which reads as free)
+FREE_STATUSES = ('Cancelled',)
+_BUSY = (f"COALESCE(status_id, -1) NOT IN (SELECT id FROM appointment_statuses "
+         f"WHERE name IN ({', '.join(repr(status) for status in FREE_STATUSES)}))")
+
+# status, source, procedure name and category are lookup codes in the table
+# (database/lookups.py) - reads go through the appointment_details view,
+# which has the names in the columns the table used to have
+DETAILS = 'appointment_details'
+# what reads select from it - Appointment's constructor arguments, in order
+FIELDS = ('id, patient_id, doctor_id, date, start_time, end_time, status, procedure_name, source, '
+          'procedure_category, created_at, notes')
+
+# a doctor's bookings over a range of days, on the integer day/minute columns
+# (database/day_columns.py). {doctors} is one ? per doctor id
+BOOKED_SLOTS_SQL = f"""
+    SELECT id, doctor_id, epoch_day, start_minute, end_minute FROM appointments
+    WHERE doctor_id IN ({{doctors}}) AND epoch_day >= ? AND epoch_day <= ?
+      AND {_BUSY} AND end_minute > start_minute
+"""
+
+# bookings overlapping [start, end) on one day, except one appointment
+OVERLAPPING_SQL = f"""
+    SELECT id FROM appointments
+    WHERE doctor_id = ? AND epoch_day = ? AND {_BUSY}
+      AND start_minute < ? AND end_minute > ? AND end_minute > start_minute AND id != ?
+    ORDER BY start_minute
+"""
+
+
+@profile_methods
 class AppointmentRepository(RepositoryInterface):
-    def __init__(self):
-        pass
+    # columns sorted_page() can order by (epoch_day sorts like date, on the integer index)
+    SORT_COLUMNS = ('id', 'patient_id', 'doctor_id', 'date', 'epoch_day', 'start_time', 'status',
+                    'procedure_name', 'procedure_category')
+
+    def __init__(self, db_path=None):
+        # db_path=None means the default clinic database
+        self.db_path = db_path
+
+    def _params(self, codes, data):
+        # the insert parameters after the ids, names turned into lookup codes
+        return (data['patient_id'], data['doctor_id'], data['date'], data['start_time'], data['end_time'],
+                codes.code('appointment_statuses', data.get('status', 'Confirmed')),
+                codes.code('appointment_sources', data.get('source', 'Online')),
+                codes.code('procedure_names', data['procedure_name']),
+                codes.code('procedure_categories', data['procedure_category']))
 
     def create(self, data):
-        cursor, conn = get_cursor_and_connection()
-
-        cursor.execute('''
-                       INSERT INTO appointments
-                       (patient_id, doctor_id, date, start_time, end_time, status,
-                        source, procedure_name, procedure_category, created_at)
-                       VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, datetime('now'))
-                       ''', (data['patient_id'], data['doctor_id'], data['date'],
-                             data['start_time'], data['end_time'], data.get('status', 'Confirmed'),
-                             data.get('source', 'Online'), data['procedure_name'],
-                             data['procedure_category']))
-
-        conn.commit()
-        return cursor.lastrowid
+        with UnitOfWork(self.db_path) as uow:
+            cursor = uow.cursor()
+
+            cursor.execute('''
+                           INSERT INTO appointments
+                           (patient_id, doctor_id, date, start_time, end_time, status_id,
+                            source_id, procedure_id, category_id, created_at)
+                           VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, datetime('now'))
+                           ''', self._params(NameCodes(uow.connection), data))
+
+            uow.record_change('appointments', 'insert')
+            return cursor.lastrowid
+
+    def create_many(self, rows, chunk_size=DEFAULT_CHUNK_SIZE):
+        # same fields and defaults as create(), one transaction for the whole batch
+        with UnitOfWork(self.db_path) as uow:
+            codes = NameCodes(uow.connection)
+            params = (self._params(codes, data) for data in rows)
+            ids = insert_many(uow.connection, '''
+                              INSERT INTO appointments
+                              (patient_id, doctor_id, date, start_time, end_time, status_id,
+                               source_id, procedure_id, category_id, created_at)
+                              VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, datetime('now'))
+                              ''', params, chunk_size)
+            if ids:
+                uow.record_change('appointments', 'insert')
+
+        return ids
+
+    def upsert_many(self, rows, chunk_size=DEFAULT_CHUNK_SIZE):
+        # rows need an 'id' (e.g. the booking partner's appointment id)
+        # existing appointments get updated, created_at is kept
+        with UnitOfWork(self.db_path) as uow:
+            codes = NameCodes(uow.connection)
+            params = ((data['id'],) + self._params(codes, data) for data in rows)
+            ids = write_many(uow.connection, '''
+                             INSERT INTO appointments
+                             (id, patient_id, doctor_id, date, start_time, end_time, status_id,
+                              source_id, procedure_id, category_id, created_at)
+                             VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, datetime('now'))
+                             ON CONFLICT (id) DO UPDATE SET
+                                 patient_id = excluded.patient_id,
+                                 doctor_id = excluded.doctor_id,
+                                 date = excluded.date,
+                                 start_time = excluded.start_time,
+                                 end_time = excluded.end_time,
+                                 status_id = excluded.status_id,
+                                 source_id = excluded.source_id,
+                                 procedure_id = excluded.procedure_id,
+                                 category_id = excluded.category_id
+                             ''', params, 0, chunk_size)
+            if ids:
+                uow.record_change('appointments', 'update')
+
+        return ids
 
     def read(self, appointment_id):
-        cursor, conn = get_cursor_and_connection()
+        with pooled_connection(self.db_path) as conn:
+            cursor = conn.cursor()
 
-        cursor.execute('''
-                       SELECT *
-                       FROM appointments
-                       WHERE id = ?
-                       ''', (appointment_id,))
+            cursor.execute(f'SELECT {FIELDS} FROM {DETAILS} WHERE id = ?', (appointment_id,))
 
-        row = cursor.fetchone()
+            row = cursor.fetchone()
 
         if row:
-            return Appointment(row[0], row[1], row[2], row[3], row[4], row[5], row[6], row[8])
+            return Appointment(*row)
 
         return None
 
+    def page(self, after_id=None, limit=DEFAULT_PAGE_SIZE, patient_id=None):
+        # next `limit` appointments by id, optionally only one patient's
+        if patient_id is None:
+            rows = keyset_page(self.db_path, DETAILS, 'id', after_id, limit, columns=FIELDS)
+        else:
+            rows = keyset_page(self.db_path, DETAILS, 'id', after_id, limit,
+                               'patient_id = ?', (patient_id,), FIELDS)
+        return [Appointment(*row) for row in rows]
+
+    def iter_all(self, batch_size=DEFAULT_PAGE_SIZE, patient_id=None):
+        return iter_keyset(lambda after_id, limit: self.page(after_id, limit, patient_id),
+                           lambda appointment: appointment.appointment_id, batch_size)
+
+    def sorted_page(self, order_by='id', descending=False, offset=0, limit=DEFAULT_PAGE_SIZE,
+                    patient_id=None):
+        # like page(), optionally only one patient's appointments
+        check_sort_column(order_by, self.SORT_COLUMNS)
+        if patient_id is None:
+            rows = sorted_page(self.db_path, DETAILS, 'id', order_by, descending, offset, limit,
+                               columns=FIELDS)
+        else:
+            rows = sorted_page(self.db_path, DETAILS, 'id', order_by, descending, offset, limit,
+                               'patient_id = ?', (patient_id,), FIELDS)
+        return [Appointment(*row) for row in rows]
+
+    def count(self, patient_id=None):
+        if patient_id is None:
+            return count_rows(self.db_path, 'appointments')
+        return count_rows(self.db_path, 'appointments', 'patient_id = ?', (patient_id,))
+
+    def booked_slots(self, doctor_ids, first_day, last_day):
+        # (id, doctor_id, epoch_day, start_minute, end_minute) for the doctors'
+        # appointments that hold a slot between two days (dates, 'YYYY-MM-DD'
+        # or day numbers). times that aren't valid or end before they start are left out
+        doctor_ids = list(doctor_ids)
+        if not doctor_ids:
+            return []
+        days = [day if isinstance(day, int) else to_epoch_day(day) for day in (first_day, last_day)]
+        sql = BOOKED_SLOTS_SQL.format(doctors=", ".join("?" * len(doctor_ids)))
+        with pooled_connection(self.db_path) as conn:
+            return conn.execute(sql, doctor_ids + days).fetchall()
+
+    def overlapping(self, doctor_id, day, start_minute, end_minute, exclude_id=None):
+        # ids of the doctor's appointments that overlap start-end on the day, by start time
+        if not isinstance(day, int):
+            day = to_epoch_day(day)
+        with pooled_connection(self.db_path) as conn:
+            rows = conn.execute(OVERLAPPING_SQL, (doctor_id, day, end_minute, start_minute,
+                                                  -1 if exclude_id is None else exclude_id)).fetchall()
+        return [row[0] for row in rows]
+
     def update(self, appointment_id, data):
-        cursor, conn = get_cursor_and_connection()
+        if not data:
+            return False
 
-        fields = []
-        values = []
+        with UnitOfWork(self.db_path) as uow:
+            # status, source etc. are written as their lookup code
+            codes = NameCodes(uow.connection)
+            fields = []
+            values = []
 
-        for key, value in data.items():
-            fields.append(f"{key} = ?")
-            values.append(value)
+            for key, value in data.items():
+                column, value = codes.column('appointments', key, value)
+                fields.append(f"{column} = ?")
+                values.append(value)
 
-        if not fields:
-            return False
+            values.append(appointment_id)
+            query = f"UPDATE appointments SET {', '.join(fields)} WHERE id = ?"
 
-        values.append(appointment_id)
-        query = f"UPDATE appointments SET {', '.join(fields)} WHERE id = ?"
-        cursor.execute(query, values)
-        conn.commit()
+            cursor = uow.cursor()
+            cursor.execute(query, values)
+            uow.record_change('appointments', 'update')
 
-        return cursor.rowcount > 0
+            return cursor.rowcount > 0
 
     def delete(self, appointment_id):
-        cursor, conn = get_cursor_and_connection()
-        cursor.execute('DELETE FROM appointments WHERE id = ?', (appointment_id,))
-        conn.commit()
-        return cursor.rowcount > 0
\ No newline at end of file
+        with UnitOfWork(self.db_path) as uow:
+            cursor = uow.cursor()
+            cursor.execute('DELETE FROM appointments WHERE id = ?', (appointment_id,))
+            uow.record_change('appointments', 'delete')
+            return cursor.rowcount > 0
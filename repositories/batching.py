@@ -0,0 +1,43 @@
+# helpers for the create_many / upsert_many repository methods
+# rows are written with executemany in chunks on the caller's connection.
+# the repositories run them inside a UnitOfWork, so the whole batch is one
+# transaction (one commit = one fsync instead of one per row)
+
+from itertools import islice
+
+DEFAULT_CHUNK_SIZE = 500
+
+
+def chunked(rows, chunk_size):
+    # yields lists of at most chunk_size items, works with generators too
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be at least 1")
+
+    iterator = iter(rows)
+    while True:
+        chunk = list(islice(iterator, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def insert_many(conn, sql, params, chunk_size=DEFAULT_CHUNK_SIZE):
+    # inserts rows that get their id from sqlite, returns the new ids in order
+    # while the transaction holds the write lock sqlite hands out rowids one
+    # after the other, so one executemany gets last_insert_rowid() - n + 1 .. last
+    ids = []
+    for chunk in chunked(params, chunk_size):
+        conn.executemany(sql, chunk)
+        last_id = conn.execute("SELECT last_insert_rowid()").fetchone()[0]
+        ids.extend(range(last_id - len(chunk) + 1, last_id + 1))
+    return ids
+
+
+def write_many(conn, sql, params, key_index, chunk_size=DEFAULT_CHUNK_SIZE):
+    # inserts/upserts rows that carry their own id (params[key_index]),
+    # returns those ids in order
+    ids = []
+    for chunk in chunked(params, chunk_size):
+        conn.executemany(sql, chunk)
+        ids.extend(row[key_index] for row in chunk)
+    return ids
@@ -1,44 +1,106 @@
 from repositories.repository_interface import RepositoryInterface
-from database.connection import get_cursor_and_connection
+from database.connection import pooled_connection
+from database.profiling import profile_methods
+from database.unit_of_work import UnitOfWork
+from repositories.batching import DEFAULT_CHUNK_SIZE, write_many
+from repositories.paging import (DEFAULT_PAGE_SIZE, keyset_page, iter_keyset, sorted_page,
+                                 count_rows, check_sort_column)
 from models.doctor import Doctor
 
 
+@profile_methods
 class DoctorRepository(RepositoryInterface):
-    def __init__(self):
-        pass
+    # columns sorted_page() can order by
+    SORT_COLUMNS = ('doctor_id', 'doctor_name', 'speciality', 'room', 'is_active', 'experience_years')
 
-    def create(self, data):
-        cursor, conn = get_cursor_and_connection()
-
-        cursor.execute('''
-                       INSERT INTO doctors
-                           (doctor_id, doctor_name, speciality, room, is_active)
-                       VALUES (?, ?, ?, ?, ?)
-                       ''', (data['doctor_id'], data['name'], data['speciality'],
-                             data['room'], data['is_active']))
+    def __init__(self, db_path=None):
+        # db_path=None means the default clinic database
+        self.db_path = db_path
 
-        conn.commit()
-        return data['doctor_id']
+    def create(self, data):
+        with UnitOfWork(self.db_path) as uow:
+            cursor = uow.cursor()
+
+            cursor.execute('''
+                           INSERT INTO doctors
+                               (doctor_id, doctor_name, speciality, room, is_active)
+                           VALUES (?, ?, ?, ?, ?)
+                           ''', (data['doctor_id'], data['name'], data['speciality'],
+                                 data['room'], data['is_active']))
+
+            uow.record_change('doctors', 'insert')
+            return data['doctor_id']
+
+    def create_many(self, rows, chunk_size=DEFAULT_CHUNK_SIZE):
+        # doctors come with their own doctor_id, like in create()
+        params = ((data['doctor_id'], data['name'], data['speciality'],
+                   data['room'], data['is_active']) for data in rows)
+
+        with UnitOfWork(self.db_path) as uow:
+            ids = write_many(uow.connection, '''
+                             INSERT INTO doctors
+                                 (doctor_id, doctor_name, speciality, room, is_active)
+                             VALUES (?, ?, ?, ?, ?)
+                             ''', params, 0, chunk_size)
+            if ids:
+                uow.record_change('doctors', 'insert')
+
+        return ids
+
+    def upsert_many(self, rows, chunk_size=DEFAULT_CHUNK_SIZE):
+        # existing doctors (same doctor_id) get updated, new ones inserted
+        params = ((data['doctor_id'], data['name'], data['speciality'],
+                   data['room'], data['is_active']) for data in rows)
+
+        with UnitOfWork(self.db_path) as uow:
+            ids = write_many(uow.connection, '''
+                             INSERT INTO doctors
+                                 (doctor_id, doctor_name, speciality, room, is_active)
+                             VALUES (?, ?, ?, ?, ?)
+                             ON CONFLICT (doctor_id) DO UPDATE SET
+                                 doctor_name = excluded.doctor_name,
+                                 speciality = excluded.speciality,
+                                 room = excluded.room,
+                                 is_active = excluded.is_active
+                             ''', params, 0, chunk_size)
+            if ids:
+                uow.record_change('doctors', 'update')
+
+        return ids
 
     def read(self, doctor_id):
-        cursor, conn = get_cursor_and_connection()
+        with pooled_connection(self.db_path) as conn:
+            cursor = conn.cursor()
 
-        cursor.execute('''
-                       SELECT *
-                       FROM doctors
-                       WHERE doctor_id = ?
-                       ''', (doctor_id,))
+            cursor.execute('''
+                           SELECT *
+                           FROM doctors
+                           WHERE doctor_id = ?
+                           ''', (doctor_id,))
 
-        row = cursor.fetchone()
+            row = cursor.fetchone()
 
         if row:
-            return Doctor(row[0], row[1], row[2], row[3], row[4])
+            return Doctor(*row)
 
         return None
 
-    def update(self, doctor_id, data):
-        cursor, conn = get_cursor_and_connection()
+    def page(self, after_id=None, limit=DEFAULT_PAGE_SIZE):
+        rows = keyset_page(self.db_path, 'doctors', 'doctor_id', after_id, limit)
+        return [Doctor(*row) for row in rows]
+
+    def iter_all(self, batch_size=DEFAULT_PAGE_SIZE):
+        return iter_keyset(self.page, lambda doctor: doctor.doctor_id, batch_size)
 
+    def sorted_page(self, order_by='doctor_id', descending=False, offset=0, limit=DEFAULT_PAGE_SIZE):
+        check_sort_column(order_by, self.SORT_COLUMNS)
+        rows = sorted_page(self.db_path, 'doctors', 'doctor_id', order_by, descending, offset, limit)
+        return [Doctor(*row) for row in rows]
+
+    def count(self):
+        return count_rows(self.db_path, 'doctors')
+
+    def update(self, doctor_id, data):
         fields = []
         values = []
 
@@ -51,13 +113,17 @@ class DoctorRepository(RepositoryInterface):
 
         values.append(doctor_id)
         query = f"UPDATE doctors SET {', '.join(fields)} WHERE doctor_id = ?"
-        cursor.execute(query, values)
-        conn.commit()
 
-        return cursor.rowcount > 0
+        with UnitOfWork(self.db_path) as uow:
+            cursor = uow.cursor()
+            cursor.execute(query, values)
+            uow.record_change('doctors', 'update')
+
+            return cursor.rowcount > 0
 
     def delete(self, doctor_id):
-        cursor, conn = get_cursor_and_connection()
-        cursor.execute('DELETE FROM doctors WHERE doctor_id = ?', (doctor_id,))
-        conn.commit()
-        return cursor.rowcount > 0
\ No newline at end of file
+        with UnitOfWork(self.db_path) as uow:
+            cursor = uow.cursor()
+            cursor.execute('DELETE FROM doctors WHERE doctor_id = ?', (doctor_id,))
+            uow.record_change('doctors', 'delete')
+            return cursor.rowcount > 0
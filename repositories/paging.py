@@ -0,0 +1,95 @@
+# keyset pagination for the page() / iter_all() repository methods
+# a page asks for "rows with an id after the last one I saw":
+#   WHERE id > ? ORDER BY id LIMIT ?
+# that walks the primary key, so page 10000 costs the same as page 1
+# (OFFSET would read and throw away every row before it)
+#
+# sorted_page() is the other kind: any sort column and an OFFSET, for the
+# GUI tables that show one screen of a sorted table at a time
+#
+# `columns` is the select list - the repositories pass their model's fields in
+# constructor order, so a row becomes a model with Model(*row)
+
+from database.connection import pooled_connection
+
+DEFAULT_PAGE_SIZE = 500
+
+
+def keyset_page(db_path, table, key, after_id=None, limit=DEFAULT_PAGE_SIZE, where=None, params=(),
+                columns='*'):
+    # raw rows of one page, after_id=None starts at the beginning
+    # where/params add an extra filter ("patient_id = ?", (7,))
+    if limit < 1:
+        raise ValueError("limit must be at least 1")
+
+    conditions = []
+    values = list(params)
+    if where:
+        conditions.append(f"({where})")
+    if after_id is not None:
+        conditions.append(f"{key} > ?")
+        values.append(after_id)
+
+    sql = f"SELECT {columns} FROM {table}"
+    if conditions:
+        sql += " WHERE " + " AND ".join(conditions)
+    sql += f" ORDER BY {key} LIMIT ?"
+    values.append(limit)
+
+    with pooled_connection(db_path) as conn:
+        return conn.execute(sql, values).fetchall()
+
+
+def iter_keyset(page, key, batch_size=DEFAULT_PAGE_SIZE):
+    # yields the items of page(after_id, batch_size) one page after another
+    # only one page is in memory and the connection goes back to the pool
+    # between pages, so a slow consumer doesn't hold it. rows written while
+    # iterating show up if their id is after the current position
+    if batch_size < 1:
+        raise ValueError("batch_size must be at least 1")
+
+    after_id = None
+    while True:
+        items = page(after_id, batch_size)
+        yield from items
+        if len(items) < batch_size:
+            return
+        after_id = key(items[-1])
+
+
+def sorted_page(db_path, table, key, order_by, descending=False, offset=0, limit=DEFAULT_PAGE_SIZE,
+                where=None, params=(), columns='*'):
+    # raw rows offset .. offset+limit in order_by order, ties broken by key
+    # this is for the GUI tables, which jump to any position and sort by any
+    # column - OFFSET reads the rows before it, so keep keyset_page for
+    # walking a whole table. order_by must come from the repository's
+    # SORT_COLUMNS, never from user input
+    if limit < 1:
+        raise ValueError("limit must be at least 1")
+    if offset < 0:
+        raise ValueError("offset can't be negative")
+
+    direction = "DESC" if descending else "ASC"
+    sql = f"SELECT {columns} FROM {table}"
+    if where:
+        sql += f" WHERE {where}"
+    sql += f" ORDER BY {order_by} {direction}"
+    if order_by != key:
+        sql += f", {key} {direction}"
+    sql += " LIMIT ? OFFSET ?"
+
+    with pooled_connection(db_path) as conn:
+        return conn.execute(sql, list(params) + [limit, offset]).fetchall()
+
+
+def count_rows(db_path, table, where=None, params=()):
+    sql = f"SELECT COUNT(*) FROM {table}"
+    if where:
+        sql += f" WHERE {where}"
+    with pooled_connection(db_path) as conn:
+        return conn.execute(sql, params).fetchone()[0]
+
+
+def check_sort_column(order_by, sort_columns):
+    if order_by not in sort_columns:
+        raise ValueError(f"can't sort by {order_by!r} (one of: {', '.join(sort_columns)})")
@@ -1,50 +1,100 @@
 from repositories.repository_interface import RepositoryInterface
-from database.connection import get_cursor_and_connection
+from database.connection import pooled_connection
+from database.profiling import profile_methods
+from database.search_index import PATIENT_SEARCH_COLUMNS, fts_query, has_search_index
+from database.unit_of_work import UnitOfWork
+from repositories.batching import DEFAULT_CHUNK_SIZE, insert_many, write_many
+from repositories.paging import (DEFAULT_PAGE_SIZE, keyset_page, iter_keyset, sorted_page,
+                                 count_rows, check_sort_column)
 from models.patient import Patient
 
+# how many results the GUI search asks for (the methods return every match
+# unless they're given a limit)
+SEARCH_LIMIT = 100
+# matches per ranking group that get sorted (see _search)
+SEARCH_WINDOW = 500
 
-class PatientRepository(RepositoryInterface):
-    def __init__(self):
-        pass
 
-    def create(self, data):
-        cursor, conn = get_cursor_and_connection()
+@profile_methods
+class PatientRepository(RepositoryInterface):
+    # columns sorted_page() can order by
+    SORT_COLUMNS = ('patient_id', 'patient_name', 'patient_birthdate', 'first_visit_at',
+                    'gender', 'city', 'phone', 'email', 'insurance')
 
-        cursor.execute('''
-                       INSERT INTO patients
-                           (patient_name, patient_birthdate, first_visit_at, gender, city)
-                       VALUES (?, ?, ?, ?, ?)
-                       ''', (data['name'], data['birthdate'], data['first_visit'],
-                             data['gender'], data['city']))
+    def __init__(self, db_path=None):
+        # db_path=None means the default clinic database
+        self.db_path = db_path
 
-        conn.commit()
-        return cursor.lastrowid
+    def create(self, data):
+        with UnitOfWork(self.db_path) as uow:
+            cursor = uow.cursor()
+
+            cursor.execute('''
+                           INSERT INTO patients
+                               (patient_name, patient_birthdate, first_visit_at, gender, city)
+                           VALUES (?, ?, ?, ?, ?)
+                           ''', (data['name'], data['birthdate'], data['first_visit'],
+                                 data['gender'], data['city']))
+
+            uow.record_change('patients', 'insert')
+            return cursor.lastrowid
+
+    def create_many(self, rows, chunk_size=DEFAULT_CHUNK_SIZE):
+        # same fields as create(), one transaction for the whole batch
+        params = ((data['name'], data['birthdate'], data['first_visit'],
+                   data['gender'], data['city']) for data in rows)
+
+        with UnitOfWork(self.db_path) as uow:
+            ids = insert_many(uow.connection, '''
+                              INSERT INTO patients
+                                  (patient_name, patient_birthdate, first_visit_at, gender, city)
+                              VALUES (?, ?, ?, ?, ?)
+                              ''', params, chunk_size)
+            if ids:
+                uow.record_change('patients', 'insert')
+
+        return ids
+
+    def upsert_many(self, rows, chunk_size=DEFAULT_CHUNK_SIZE):
+        # rows need a 'patient_id' - existing patients get updated, new ones inserted
+        params = ((data['patient_id'], data['name'], data['birthdate'], data['first_visit'],
+                   data['gender'], data['city']) for data in rows)
+
+        with UnitOfWork(self.db_path) as uow:
+            ids = write_many(uow.connection, '''
+                             INSERT INTO patients
+                                 (patient_id, patient_name, patient_birthdate, first_visit_at, gender, city)
+                             VALUES (?, ?, ?, ?, ?, ?)
+                             ON CONFLICT (patient_id) DO UPDATE SET
+                                 patient_name = excluded.patient_name,
+                                 patient_birthdate = excluded.patient_birthdate,
+                                 first_visit_at = excluded.first_visit_at,
+                                 gender = excluded.gender,
+                                 city = excluded.city
+                             ''', params, 0, chunk_size)
+            if ids:
+                uow.record_change('patients', 'update')
+
+        return ids
 
     def read(self, patient_id):
-        cursor, conn = get_cursor_and_connection()
+        with pooled_connection(self.db_path) as conn:
+            cursor = conn.cursor()
 
-        cursor.execute('''
-                       SELECT *
-                       FROM patients
-                       WHERE patient_id = ?
-                       ''', (patient_id,))
+            cursor.execute('''
+                           SELECT *
+                           FROM patients
+                           WHERE patient_id = ?
+                           ''', (patient_id,))
 
-        row = cursor.fetchone()
+            row = cursor.fetchone()
 
         if row:
-            # support different database column counts for backwards compatibility
-            if len(row) >= 10:
-                return Patient(row[0], row[1], row[2], row[3], row[4], row[5],
-                              row[6], row[7], row[8], row[9])
-            else:
-                return Patient(row[0], row[1], row[2], row[3], row[4], row[5],
-                              None, None, None, None)
+            return Patient(*row)
 
         return None
 
     def update(self, patient_id, data):
-        cursor, conn = get_cursor_and_connection()
-
         fields = []
         values = []
 
@@ -57,51 +107,99 @@ class PatientRepository(RepositoryInterface):
 
         values.append(patient_id)
         query = f"UPDATE patients SET {', '.join(fields)} WHERE patient_id = ?"
-        cursor.execute(query, values)
-        conn.commit()
 
-        return cursor.rowcount > 0
+        with UnitOfWork(self.db_path) as uow:
+            cursor = uow.cursor()
+            cursor.execute(query, values)
+            uow.record_change('patients', 'update')
+
+            return cursor.rowcount > 0
 
     def delete(self, patient_id):
-        cursor, conn = get_cursor_and_connection()
-        cursor.execute('DELETE FROM patients WHERE patient_id = ?', (patient_id,))
-        conn.commit()
-        return cursor.rowcount > 0
+        with UnitOfWork(self.db_path) as uow:
+            cursor = uow.cursor()
+            cursor.execute('DELETE FROM patients WHERE patient_id = ?', (patient_id,))
+            uow.record_change('patients', 'delete')
+            return cursor.rowcount > 0
 
     def get_all(self):
         # returns all patients from database
-        cursor, conn = get_cursor_and_connection()
-
-        cursor.execute('SELECT * FROM patients ORDER BY patient_id')
-        rows = cursor.fetchall()
-
-        patients = []
-        for row in rows:
-            if len(row) >= 10:
-                patients.append(Patient(row[0], row[1], row[2], row[3], row[4], row[5],
-                                      row[6], row[7], row[8], row[9]))
-            else:
-                patients.append(Patient(row[0], row[1], row[2], row[3], row[4], row[5],
-                                      None, None, None, None))
-
-        return patients
-
-    def search_by_name(self, name):
-        # search patients by name - just a simple text match
-        cursor, conn = get_cursor_and_connection()
-
-        # using LIKE to find partial matches
-        search_term = f"%{name}%"
-        cursor.execute('SELECT * FROM patients WHERE patient_name LIKE ? ORDER BY patient_name', (search_term,))
-        rows = cursor.fetchall()
-
-        patients = []
-        for row in rows:
-            if len(row) >= 10:
-                patients.append(Patient(row[0], row[1], row[2], row[3], row[4], row[5],
-                                      row[6], row[7], row[8], row[9]))
-            else:
-                patients.append(Patient(row[0], row[1], row[2], row[3], row[4], row[5],
-                                      None, None, None, None))
-
-        return patients
\ No newline at end of file
+        # loads everything in memory - use iter_all() or page() for big tables
+        with pooled_connection(self.db_path) as conn:
+            cursor = conn.cursor()
+            cursor.execute('SELECT * FROM patients ORDER BY patient_id')
+            rows = cursor.fetchall()
+
+        return [Patient(*row) for row in rows]
+
+    def page(self, after_id=None, limit=DEFAULT_PAGE_SIZE):
+        # next `limit` patients by id after after_id
+        rows = keyset_page(self.db_path, 'patients', 'patient_id', after_id, limit)
+        return [Patient(*row) for row in rows]
+
+    def iter_all(self, batch_size=DEFAULT_PAGE_SIZE):
+        # all patients by id, batch_size rows in memory at a time
+        return iter_keyset(self.page, lambda patient: patient.patient_id, batch_size)
+
+    def sorted_page(self, order_by='patient_id', descending=False, offset=0, limit=DEFAULT_PAGE_SIZE):
+        check_sort_column(order_by, self.SORT_COLUMNS)
+        rows = sorted_page(self.db_path, 'patients', 'patient_id', order_by, descending, offset, limit)
+        return [Patient(*row) for row in rows]
+
+    def count(self):
+        return count_rows(self.db_path, 'patients')
+
+    def search(self, text, limit=None):
+        # search patients by name, phone, email or city - best matches first
+        # limit=None returns every match
+        return self._search(text, PATIENT_SEARCH_COLUMNS, limit)
+
+    def search_by_name(self, name, limit=None):
+        # search patients by name - every word matches the start of a name
+        # ("ion pop" finds "Ion Popescu"), diacritics don't matter
+        return self._search(name, ['patient_name'], limit)
+
+    def _search(self, text, columns, limit):
+        # ranking: patients whose name matches every word come first, then the
+        # ones matching in phone/email/city, alphabetical within each group.
+        # (bm25 was tried - it reads every match of each word to score them,
+        # 20-400ms for a common surname at 1M patients.) only the first
+        # SEARCH_WINDOW matches of each group are ranked when there's a limit,
+        # so very common words return a sample and the user narrows the search down
+        tiers = [fts_query(text, ['patient_name'])]
+        if columns != ['patient_name']:
+            tiers.append(fts_query(text, None if columns == PATIENT_SEARCH_COLUMNS else columns))
+        if not tiers[0]:
+            return []
+
+        # LIMIT -1 is no limit
+        window = -1 if limit is None else max(limit, SEARCH_WINDOW)
+
+        with pooled_connection(self.db_path) as conn:
+            cursor = conn.cursor()
+
+            if not has_search_index(conn):
+                # sqlite without FTS5 - plain substring match, scans the table
+                conditions = ' OR '.join(f"{column} LIKE ?" for column in columns)
+                cursor.execute(f'SELECT * FROM patients WHERE {conditions} ORDER BY patient_name LIMIT ?',
+                               [f"%{text}%"] * len(columns) + [-1 if limit is None else limit])
+                return [Patient(*row) for row in cursor.fetchall()]
+
+            ranked = {}  # patient_id -> group
+            for tier, query in enumerate(tiers):
+                if limit is not None and len(ranked) >= limit:
+                    break
+                cursor.execute('SELECT rowid FROM patients_fts WHERE patients_fts MATCH ? LIMIT ?',
+                               (query, window))
+                for (patient_id,) in cursor.fetchall():
+                    ranked.setdefault(patient_id, tier)
+
+            if not ranked:
+                return []
+
+            placeholders = ', '.join('?' * len(ranked))
+            cursor.execute(f'SELECT * FROM patients WHERE patient_id IN ({placeholders})', list(ranked))
+            rows = cursor.fetchall()
+
+        rows.sort(key=lambda row: (ranked[row[0]], row[1]))
+        return [Patient(*row) for row in rows[:limit]]
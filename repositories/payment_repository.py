@@ -1,62 +1,156 @@
 from repositories.repository_interface import RepositoryInterface
-from database.connection import get_cursor_and_connection
+from database.connection import pooled_connection
+from database.lookups import NameCodes
+from database.profiling import profile_methods
+from database.unit_of_work import UnitOfWork
+from repositories.batching import DEFAULT_CHUNK_SIZE, insert_many, write_many
+from repositories.paging import (DEFAULT_PAGE_SIZE, keyset_page, iter_keyset, sorted_page,
+                                 count_rows, check_sort_column)
+from models.dates import to_epoch_day
 from models.payment import Payment
 
 
+# method and status are lookup codes in the table (database/lookups.py) -
+# reads go through the payment_details view, which has the names
+DETAILS = 'payment_details'
+# what reads select from it - Payment's constructor arguments, in order
+FIELDS = 'id, appointment_id, amount, method, paid_at, status'
+
+
+@profile_methods
 class PaymentRepository(RepositoryInterface):
-    def __init__(self):
-        pass
+    # columns sorted_page() can order by
+    SORT_COLUMNS = ('id', 'appointment_id', 'amount', 'method', 'paid_at', 'status')
 
-    def create(self, data):
-        cursor, conn = get_cursor_and_connection()
+    def __init__(self, db_path=None):
+        # db_path=None means the default clinic database
+        self.db_path = db_path
 
-        cursor.execute('''
-                       INSERT INTO payments
-                           (appointment_id, amount, method, paid_at)
-                       VALUES (?, ?, ?, datetime('now'))
-                       ''', (data['appointment_id'], data['amount'], data.get('method', 'Cash')))
+    def _params(self, codes, data):
+        # the insert parameters after the id, method and status as lookup codes
+        # (new payments are 'Completed', the default the text column had)
+        return (data['appointment_id'], data['amount'],
+                codes.code('payment_methods', data.get('method', 'Cash')),
+                codes.code('payment_statuses', 'Completed'))
 
-        conn.commit()
-        return cursor.lastrowid
+    def create(self, data):
+        with UnitOfWork(self.db_path) as uow:
+            cursor = uow.cursor()
+
+            cursor.execute('''
+                           INSERT INTO payments
+                               (appointment_id, amount, method_id, status_id, paid_at)
+                           VALUES (?, ?, ?, ?, datetime('now'))
+                           ''', self._params(NameCodes(uow.connection), data))
+
+            uow.record_change('payments', 'insert')
+            return cursor.lastrowid
+
+    def create_many(self, rows, chunk_size=DEFAULT_CHUNK_SIZE):
+        # same fields and defaults as create(), one transaction for the whole batch
+        with UnitOfWork(self.db_path) as uow:
+            codes = NameCodes(uow.connection)
+            params = (self._params(codes, data) for data in rows)
+            ids = insert_many(uow.connection, '''
+                              INSERT INTO payments
+                                  (appointment_id, amount, method_id, status_id, paid_at)
+                              VALUES (?, ?, ?, ?, datetime('now'))
+                              ''', params, chunk_size)
+            if ids:
+                uow.record_change('payments', 'insert')
+
+        return ids
+
+    def upsert_many(self, rows, chunk_size=DEFAULT_CHUNK_SIZE):
+        # rows need an 'id' - existing payments get updated, paid_at and status are kept
+        with UnitOfWork(self.db_path) as uow:
+            codes = NameCodes(uow.connection)
+            params = ((data['id'],) + self._params(codes, data) for data in rows)
+            ids = write_many(uow.connection, '''
+                             INSERT INTO payments
+                                 (id, appointment_id, amount, method_id, status_id, paid_at)
+                             VALUES (?, ?, ?, ?, ?, datetime('now'))
+                             ON CONFLICT (id) DO UPDATE SET
+                                 appointment_id = excluded.appointment_id,
+                                 amount = excluded.amount,
+                                 method_id = excluded.method_id
+                             ''', params, 0, chunk_size)
+            if ids:
+                uow.record_change('payments', 'update')
+
+        return ids
 
     def read(self, payment_id):
-        cursor, conn = get_cursor_and_connection()
+        with pooled_connection(self.db_path) as conn:
+            cursor = conn.cursor()
 
-        cursor.execute('''
-                       SELECT *
-                       FROM payments
-                       WHERE id = ?
-                       ''', (payment_id,))
+            cursor.execute(f'SELECT {FIELDS} FROM {DETAILS} WHERE id = ?', (payment_id,))
 
-        row = cursor.fetchone()
+            row = cursor.fetchone()
 
         if row:
-            return Payment(row[0], row[1], row[2], row[3], row[4])
+            return Payment(*row)
 
         return None
 
+    def page(self, after_id=None, limit=DEFAULT_PAGE_SIZE):
+        rows = keyset_page(self.db_path, DETAILS, 'id', after_id, limit, columns=FIELDS)
+        return [Payment(*row) for row in rows]
+
+    def iter_all(self, batch_size=DEFAULT_PAGE_SIZE):
+        return iter_keyset(self.page, lambda payment: payment.payment_id, batch_size)
+
+    def sorted_page(self, order_by='id', descending=False, offset=0, limit=DEFAULT_PAGE_SIZE):
+        check_sort_column(order_by, self.SORT_COLUMNS)
+        rows = sorted_page(self.db_path, DETAILS, 'id', order_by, descending, offset, limit, columns=FIELDS)
+        return [Payment(*row) for row in rows]
+
+    def count(self):
+        return count_rows(self.db_path, 'payments')
+
+    def total_amount(self, start_date=None, end_date=None):
+        # sum of all payments, for the GUI's payments tab - or of the ones
+        # paid between two days (inclusive, dates or 'YYYY-MM-DD'), on paid_day
+        conditions = []
+        params = []
+        if start_date is not None:
+            conditions.append('paid_day >= ?')
+            params.append(to_epoch_day(start_date))
+        if end_date is not None:
+            conditions.append('paid_day <= ?')
+            params.append(to_epoch_day(end_date))
+        where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+
+        with pooled_connection(self.db_path) as conn:
+            return conn.execute(f'SELECT COALESCE(SUM(amount), 0) FROM payments{where}', params).fetchone()[0]
+
     def update(self, payment_id, data):
-        cursor, conn = get_cursor_and_connection()
+        if not data:
+            return False
 
-        fields = []
-        values = []
+        with UnitOfWork(self.db_path) as uow:
+            # method and status are written as their lookup code
+            codes = NameCodes(uow.connection)
+            fields = []
+            values = []
 
-        for key, value in data.items():
-            fields.append(f"{key} = ?")
-            values.append(value)
+            for key, value in data.items():
+                column, value = codes.column('payments', key, value)
+                fields.append(f"{column} = ?")
+                values.append(value)
 
-        if not fields:
-            return False
+            values.append(payment_id)
+            query = f"UPDATE payments SET {', '.join(fields)} WHERE id = ?"
 
-        values.append(payment_id)
-        query = f"UPDATE payments SET {', '.join(fields)} WHERE id = ?"
-        cursor.execute(query, values)
-        conn.commit()
+            cursor = uow.cursor()
+            cursor.execute(query, values)
+            uow.record_change('payments', 'update')
 
-        return cursor.rowcount > 0
+            return cursor.rowcount > 0
 
     def delete(self, payment_id):
-        cursor, conn = get_cursor_and_connection()
-        cursor.execute('DELETE FROM payments WHERE id = ?', (payment_id,))
-        conn.commit()
-        return cursor.rowcount > 0
\ No newline at end of file
+        with UnitOfWork(self.db_path) as uow:
+            cursor = uow.cursor()
+            cursor.execute('DELETE FROM payments WHERE id = ?', (payment_id,))
+            uow.record_change('payments', 'delete')
+            return cursor.rowcount > 0
@@ -15,4 +15,37 @@ class RepositoryInterface(ABC):
 
     @abstractmethod
     def delete (self, entry_id):
-        pass
\ No newline at end of file
+        pass
+
+    # batch versions - one transaction for all rows, return the ids in order
+
+    @abstractmethod
+    def create_many(self, rows, chunk_size=500):
+        pass
+
+    @abstractmethod
+    def upsert_many(self, rows, chunk_size=500):
+        pass
+
+    # keyset pagination - page() returns up to limit entries with an id after
+    # after_id (None = from the start), iter_all() streams them page by page
+
+    @abstractmethod
+    def page(self, after_id=None, limit=500):
+        pass
+
+    @abstractmethod
+    def iter_all(self, batch_size=500):
+        pass
+
+    # sorted pages for the GUI tables - sorted_page() returns `limit` entries
+    # starting at `offset` in order_by order (one of the class's SORT_COLUMNS),
+    # count() how many there are in total
+
+    @abstractmethod
+    def sorted_page(self, order_by, descending=False, offset=0, limit=500):
+        pass
+
+    @abstractmethod
+    def count(self):
+        pass
@@ -3,7 +3,12 @@ Services package - Business logic layer
 """
 
 from .analytics_service import AnalyticsService
+from .patient_analytics_service import PatientAnalyticsService
+from .scheduling_service import SchedulingService, SlotUnavailableError
 
 __all__ = [
-    'AnalyticsService'
+    'AnalyticsService',
+    'PatientAnalyticsService',
+    'SchedulingService',
+    'SlotUnavailableError'
 ]
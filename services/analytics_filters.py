@@ -0,0 +1,150 @@
+# filters shared by the AnalyticsService methods
+# start_date/end_date (inclusive, 'YYYY-MM-DD' or date), doctor_ids, status
+# and category all filter appointments (payments by their appointment).
+# they become WHERE conditions on whichever table the query reads, so the
+# date range is an index range scan on the rollups or on appointments
+
+from datetime import date, datetime, timedelta
+
+from database.lookups import codes_sql
+from models.dates import parse_date, to_epoch_day
+
+# filter name -> column in the appointments table. 'epoch_day' is the integer
+# copy of date (database/day_columns.py) - when a query has it the date range
+# is compared as day numbers instead of 'YYYY-MM-DD' strings
+APPOINTMENT_COLUMNS = {'date': 'date', 'epoch_day': 'epoch_day', 'doctor_id': 'doctor_id',
+                       'status': 'status_id', 'category': 'category_id'}
+
+# status and category are stored as lookup codes (database/lookups.py), the
+# filter values are names - they're turned into codes by the lookup table
+FILTER_LOOKUPS = {'status': 'appointment_statuses', 'category': 'procedure_categories'}
+
+
+def as_date_text(value):
+    # date or 'YYYY-MM-DD' -> 'YYYY-MM-DD' (the format the tables store)
+    # parsed here once, so the rollups (TEXT day) and appointments (epoch_day)
+    # compare the same value - '2026-1-5' becomes '2026-01-05' and anything
+    # that isn't a date raises ValueError. None or '' means no bound
+    if value is None or value == '':
+        return None
+    if isinstance(value, datetime):
+        value = value.date()
+    if isinstance(value, date):
+        return value.isoformat()
+    try:
+        return parse_date(value.strip()).isoformat()
+    except (AttributeError, TypeError, ValueError):
+        raise ValueError(f"not a date: {value!r} (expected YYYY-MM-DD)") from None
+
+
+def as_tuple(value):
+    # one value or a list of them -> sorted tuple (hashable, for the result cache)
+    if value is None:
+        return ()
+    if isinstance(value, (str, int)):
+        return (value,)
+    return tuple(sorted(set(value)))
+
+
+class AnalyticsFilter:
+    def __init__(self, start_date=None, end_date=None, doctor_ids=None, status=None, category=None):
+        self.start_date = as_date_text(start_date)
+        self.end_date = as_date_text(end_date)
+        self.doctor_ids = as_tuple(doctor_ids)
+        self.statuses = as_tuple(status)
+        self.categories = as_tuple(category)
+
+    def __repr__(self):
+        return (f"AnalyticsFilter(start_date={self.start_date!r}, end_date={self.end_date!r}, "
+                f"doctor_ids={self.doctor_ids}, status={self.statuses}, category={self.categories})")
+
+    def is_empty(self):
+        return not self.active()
+
+    def active(self):
+        # names of the filters that are set
+        names = []
+        if self.start_date or self.end_date:
+            names.append('date')
+        if self.doctor_ids:
+            names.append('doctor_id')
+        if self.statuses:
+            names.append('status')
+        if self.categories:
+            names.append('category')
+        return names
+
+    def only(self, *names):
+        # True when no filter outside `names` is set - e.g. a rollup table
+        # that has day and status columns can serve only('date', 'status')
+        return all(name in names for name in self.active())
+
+    def without(self, *names):
+        # copy with the named filters cleared - for a filter the query already
+        # applies another way (the completed-hours rollup is status = 'Completed')
+        return AnalyticsFilter(
+            None if 'date' in names else self.start_date,
+            None if 'date' in names else self.end_date,
+            None if 'doctor_id' in names else self.doctor_ids,
+            None if 'status' in names else self.statuses,
+            None if 'category' in names else self.categories)
+
+    def conditions(self, columns):
+        # (list of SQL conditions, params) for the filters that are set
+        # columns maps filter name -> column expression in the query
+        # ({'date': 'day', 'status': 'status_id'} for a rollup table)
+        conditions = []
+        params = []
+
+        for name in self.active():
+            if name not in columns:
+                raise ValueError(f"this query can't filter by {name}")
+
+        if 'epoch_day' in columns:
+            date_column, as_param = columns['epoch_day'], to_epoch_day
+        else:
+            date_column, as_param = columns.get('date'), str
+        if self.start_date:
+            conditions.append(f"{date_column} >= ?")
+            params.append(as_param(self.start_date))
+        if self.end_date:
+            conditions.append(f"{date_column} <= ?")
+            params.append(as_param(self.end_date))
+
+        if self.doctor_ids:
+            conditions.append(f"{columns['doctor_id']} IN ({', '.join('?' * len(self.doctor_ids))})")
+            params.extend(self.doctor_ids)
+
+        for name, values in (('status', self.statuses), ('category', self.categories)):
+            if values:
+                conditions.append(f"{columns[name]} IN {codes_sql(FILTER_LOOKUPS[name], len(values))}")
+                params.extend(values)
+
+        return conditions, params
+
+    def where(self, columns, *extra):
+        # " WHERE ..." (or "" when nothing to filter) plus params,
+        # `extra` are fixed conditions the query always has
+        conditions, params = self.conditions(columns)
+        conditions = list(extra) + conditions
+        if not conditions:
+            return "", params
+        return " WHERE " + " AND ".join(conditions), params
+
+
+def last_days(days, today=None):
+    # (start_date, end_date) for the last `days` days, today included
+    today = today or date.today()
+    return (today - timedelta(days=days - 1)).isoformat(), today.isoformat()
+
+
+def this_quarter(today=None):
+    # (start_date, end_date) of the calendar quarter `today` is in
+    today = today or date.today()
+    first_month = (today.month - 1) // 3 * 3 + 1
+    start = date(today.year, first_month, 1)
+    if first_month == 10:
+        end = date(today.year, 12, 31)
+    else:
+        end = date(today.year, first_month + 3, 1) - timedelta(days=1)
+    return start.isoformat(), end.isoformat()
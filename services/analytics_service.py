@@ -1,230 +1,397 @@
-import sqlite3
+import copy
+import functools
+import os
 from datetime import datetime
 
-
+from database.change_events import subscribe
+from database.connection import get_pool, read_snapshot
+from database.day_columns import WEEKDAY_SQL
+from database.lookups import code_sql
+from database.profiling import profile_methods
+from services import numpy_backend
+from services.analytics_filters import AnalyticsFilter, APPOINTMENT_COLUMNS
+from services.result_cache import ResultCache
+
+# strftime('%w') numbering, 0 = Sunday
+WEEKDAY_NAMES = ['Sunday', 'Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday']
+WEEKDAY_ORDER = [1, 2, 3, 4, 5, 6, 0]
+
+ALL_TABLES = ('patients', 'doctors', 'appointments', 'payments')
+
+# codes of the statuses doctor performance counts separately
+COMPLETED = code_sql('appointment_statuses', 'Completed')
+CANCELLED = code_sql('appointment_statuses', 'Cancelled')
+
+# 'sqlite': GROUP BY in SQL, over the daily rollups where there is one
+# 'numpy': columnar counting over the base tables, see services/numpy_backend.py -
+# slower than 'sqlite', it's there to cross-check the rollups
+BACKENDS = ('sqlite', 'numpy')
+
+
+def _hashable(value):
+    # doctor_ids=[3, 1] and doctor_ids=[1, 3] are the same cache entry
+    if isinstance(value, (list, set, frozenset, tuple)):
+        return tuple(sorted(set(value)))
+    return value
+
+
+def cached_result(*tables):
+    # caches what the method returns, keyed by method name and arguments
+    # `tables` are the tables the result is computed from - a write to any of
+    # them (reported by the repositories) drops the cached result
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            if self.cache is None:
+                return method(self, *args, **kwargs)
+
+            key = (method.__name__, tuple(_hashable(arg) for arg in args),
+                   tuple(sorted((name, _hashable(value)) for name, value in kwargs.items())))
+            found, value = self.cache.get(key)
+            if not found:
+                generation = self.cache.generation
+                value = method(self, *args, **kwargs)
+                self.cache.put(key, value, tables, generation)
+
+            # callers get their own copy so they can't change the cached one
+            return copy.deepcopy(value)
+        return wrapper
+    return decorator
+
+
+@profile_methods
 class AnalyticsService:
     # handles analytics for the dental clinic
     # probably not the most efficient way but it works
 
-    def __init__(self, db_path="database/dentalclinic.db"):
+    def __init__(self, db_path="database/dentalclinic.db", cache=True, cache_ttl=300, cache_size=128,
+                 backend='sqlite'):
         self.db_path = db_path
 
-    def get_connection(self):
-        # get database connection
-        return sqlite3.connect(self.db_path)
+        # how demographics, trends, peak hours and revenue are counted -
+        # both backends return the same dicts (doctor performance is always sqlite)
+        if backend not in BACKENDS:
+            raise ValueError(f"unknown analytics backend {backend!r}, expected one of {BACKENDS}")
+        if backend == 'numpy':
+            numpy_backend.require_numpy()
+        self.backend = backend
+
+        # results are cached until a repository writes to a table they depend
+        # on, or until cache_ttl seconds pass (covers writes from other processes)
+        self.cache = None
+        if cache:
+            self.cache = ResultCache(max_entries=cache_size, ttl=cache_ttl)
+            subscribe(self._on_data_changed)
+
+    def _on_data_changed(self, db_path, table, operation):
+        # change hook - called by the repositories after every write
+        if self.cache is not None and os.path.abspath(db_path) == os.path.abspath(self.db_path):
+            self.cache.invalidate(table)
+
+    def clear_cache(self):
+        if self.cache is not None:
+            self.cache.invalidate()
+
+    def cache_stats(self):
+        # hit/miss counters so the hit rate can be checked in production
+        if self.cache is None:
+            return None
+        return self.cache.stats()
 
-    def get_patient_demographics(self):
+    def get_connection(self):
+        # get a pooled database connection - use it as `with self.get_connection() as conn:`
+        # analytics only reads, so it's a read-only connection: with WAL it
+        # never waits for the repositories' writes and can't make any itself
+        return get_pool(self.db_path, read_only=True).connection()
+
+    # every get_* method takes the same filters (see services/analytics_filters.py):
+    #   start_date, end_date  inclusive, 'YYYY-MM-DD' or a date
+    #   doctor_ids, status, category  one value or a list
+    # filters that a rollup table has columns for are applied to the rollup,
+    # the others make the query read appointments/payments through their indexes
+
+    @cached_result('patients', 'appointments')
+    def get_patient_demographics(self, start_date=None, end_date=None, doctor_ids=None, status=None,
+                                 category=None):
         # get patient stats - age groups and gender distribution
-        conn = self.get_connection()
-        cursor = conn.cursor()
-
-        cursor.execute("SELECT patient_birthdate, gender FROM patients")
-        patients = cursor.fetchall()
-        conn.close()
-
-        if not patients:
+        # with filters: only patients who had a matching appointment
+        filters = AnalyticsFilter(start_date, end_date, doctor_ids, status, category)
+        with self.get_connection() as conn:
+            return self._patient_demographics(conn.cursor(), filters)
+
+    def _patient_demographics(self, cursor, filters):
+        # age only depends on the birth year here, so group by year and gender
+        # and do the bucketing on the (few) groups
+        patient_filter, params = "", []
+        if not filters.is_empty():
+            where, params = filters.where(APPOINTMENT_COLUMNS)
+            patient_filter = f" WHERE patient_id IN (SELECT patient_id FROM appointments{where})"
+
+        if self.backend == 'numpy':
+            groups = numpy_backend.demographic_groups(cursor, patient_filter, params)
+        else:
+            cursor.execute(f"""
+                SELECT CASE WHEN date(patient_birthdate) = patient_birthdate
+                            THEN substr(patient_birthdate, 1, 4) END AS birth_year,
+                       gender, COUNT(*)
+                FROM patients{patient_filter}
+                GROUP BY birth_year, gender
+            """, params)
+            groups = cursor.fetchall()
+
+        if not groups:
             return None
 
         # count age groups manually - easier to understand than fancy libraries
         age_groups = {'0-17': 0, '18-29': 0, '30-44': 0, '45-59': 0, '60+': 0}
         gender_count = {'M': 0, 'F': 0}
+        total_patients = 0
+        current_year = datetime.now().year
+
+        for birth_year, gender, count in groups:
+            total_patients += count
+
+            # skip if date is weird (not a real YYYY-MM-DD date)
+            if birth_year is None:
+                continue
+
+            # put in right age group
+            age = current_year - int(birth_year)
+            if age < 18:
+                age_groups['0-17'] += count
+            elif age < 30:
+                age_groups['18-29'] += count
+            elif age < 45:
+                age_groups['30-44'] += count
+            elif age < 60:
+                age_groups['45-59'] += count
+            else:
+                age_groups['60+'] += count
 
-        for patient in patients:
-            birthdate = patient[0]
-            gender = patient[1]
-
-            # calculate age
-            try:
-                birth = datetime.strptime(birthdate, '%Y-%m-%d')
-                age = datetime.now().year - birth.year
-
-                # put in right age group
-                if age < 18:
-                    age_groups['0-17'] += 1
-                elif age < 30:
-                    age_groups['18-29'] += 1
-                elif age < 45:
-                    age_groups['30-44'] += 1
-                elif age < 60:
-                    age_groups['45-59'] += 1
-                else:
-                    age_groups['60+'] += 1
-
-                # count gender
-                if gender in gender_count:
-                    gender_count[gender] += 1
-            except:
-                # skip if date is weird
-                pass
+            # count gender
+            if gender in gender_count:
+                gender_count[gender] += count
 
         return {
-            'total_patients': len(patients),
+            'total_patients': total_patients,
             'age_groups': age_groups,
             'gender': gender_count
         }
 
-    def get_appointment_trends(self):
+    @cached_result('appointments')
+    def get_appointment_trends(self, start_date=None, end_date=None, doctor_ids=None, status=None,
+                               category=None):
         # get appointment trends - monthly breakdown and status
-        conn = self.get_connection()
-        cursor = conn.cursor()
-
-        cursor.execute("SELECT date, status, procedure_category FROM appointments ORDER BY date")
-        appointments = cursor.fetchall()
-        conn.close()
-
-        if not appointments:
+        filters = AnalyticsFilter(start_date, end_date, doctor_ids, status, category)
+        with self.get_connection() as conn:
+            return self._appointment_trends(conn.cursor(), filters)
+
+    def _appointment_trends(self, cursor, filters):
+        # read from the daily rollup (one row per day, status and category)
+        # instead of every appointment - see database/rollups.py
+        # the rollup has no doctor column, so a doctor filter reads appointments
+        # either way the GROUP BY is on the integer codes, the names are
+        # joined to the (few) groups afterwards
+        if self.backend == 'numpy':
+            groups = numpy_backend.appointment_trend_groups(cursor, *filters.where(APPOINTMENT_COLUMNS))
+        else:
+            if filters.only('date', 'status', 'category'):
+                where, params = filters.where({'date': 'day', 'status': 'status_id', 'category': 'category_id'})
+                counts_sql = f"""
+                    SELECT NULLIF(substr(day, 1, 7), '') AS month, status_id, category_id,
+                           SUM(appointment_count) AS appointment_count
+                    FROM rollup_appointments_daily{where}
+                    GROUP BY month, status_id, category_id"""
+            else:
+                where, params = filters.where(APPOINTMENT_COLUMNS)
+                counts_sql = f"""
+                    SELECT NULLIF(substr(date, 1, 7), '') AS month, status_id, category_id,
+                           COUNT(*) AS appointment_count
+                    FROM appointments{where}
+                    GROUP BY month, status_id, category_id"""
+            cursor.execute(f"""
+                SELECT g.month, NULLIF(s.name, '') AS status, c.name AS category, g.appointment_count
+                FROM ({counts_sql}) g
+                LEFT JOIN appointment_statuses s ON s.id = g.status_id
+                LEFT JOIN procedure_categories c ON c.id = g.category_id
+                ORDER BY g.month, status, category
+            """, params)
+            groups = cursor.fetchall()
+
+        if not groups:
             return None
 
         # track monthly appointments
+        total_appointments = 0
         monthly_data = {}
         status_count = {}
         category_count = {}
 
-        for appt in appointments:
-            date = appt[0]
-            status = appt[1]
-            category = appt[2]
-
-            # get month/year from date
-            month_year = datetime.strptime(date, '%Y-%m-%d').strftime('%Y-%m')
+        for month_year, status, category, count in groups:
+            total_appointments += count
 
             # initialize month if not exists
             if month_year not in monthly_data:
                 monthly_data[month_year] = {'total': 0, 'completed': 0, 'cancelled': 0}
 
-            # count totals
-            monthly_data[month_year]['total'] += 1
+            monthly_data[month_year]['total'] += count
             if status == 'Completed':
-                monthly_data[month_year]['completed'] += 1
+                monthly_data[month_year]['completed'] += count
             elif status == 'Cancelled':
-                monthly_data[month_year]['cancelled'] += 1
+                monthly_data[month_year]['cancelled'] += count
 
-            # count status
-            if status not in status_count:
-                status_count[status] = 0
-            status_count[status] += 1
+            status_count[status] = status_count.get(status, 0) + count
 
-            # count categories
             if category:
-                if category not in category_count:
-                    category_count[category] = 0
-                category_count[category] += 1
+                category_count[category] = category_count.get(category, 0) + count
 
         return {
-            'total_appointments': len(appointments),
+            'total_appointments': total_appointments,
             'monthly_trends': monthly_data,
             'status_distribution': status_count,
             'category_distribution': category_count
         }
 
-    def get_peak_hours_analysis(self):
+    @cached_result('appointments')
+    def get_peak_hours_analysis(self, start_date=None, end_date=None, doctor_ids=None, status=None,
+                                category=None):
         # find out when clinic is busiest - hours and days
-        conn = self.get_connection()
-        cursor = conn.cursor()
-
-        cursor.execute("SELECT start_time, date FROM appointments WHERE status = 'Completed'")
-        appointments = cursor.fetchall()
-        conn.close()
-
-        if not appointments:
+        # counts completed appointments unless `status` says otherwise
+        filters = AnalyticsFilter(start_date, end_date, doctor_ids, status, category)
+        with self.get_connection() as conn:
+            return self._peak_hours_analysis(conn.cursor(), filters)
+
+    def _peak_hours_analysis(self, cursor, filters):
+        # completed appointments per day and hour come from the daily rollup,
+        # weekday from strftime('%w') on the day (0 = Sunday). other filters
+        # group appointments by their start_minute and epoch_day
+        if not filters.statuses:
+            filters = AnalyticsFilter(filters.start_date, filters.end_date, filters.doctor_ids,
+                                      'Completed', filters.categories)
+
+        if self.backend == 'numpy':
+            groups = numpy_backend.peak_hour_groups(
+                cursor, *filters.where(APPOINTMENT_COLUMNS, "start_minute IS NOT NULL"))
+        elif filters.only('date', 'status') and filters.statuses == ('Completed',):
+            where, params = filters.without('status').where({'date': 'day'})
+            cursor.execute(f"""
+                SELECT hour, CAST(strftime('%w', day) AS INTEGER) AS weekday,
+                       SUM(appointment_count)
+                FROM rollup_completed_hours_daily{where}
+                GROUP BY hour, weekday
+            """, params)
+            groups = cursor.fetchall()
+        else:
+            where, params = filters.where(APPOINTMENT_COLUMNS, "start_minute IS NOT NULL")
+            cursor.execute(f"""
+                SELECT start_minute / 60 AS hour, {WEEKDAY_SQL.format('epoch_day')} AS weekday, COUNT(*)
+                FROM appointments{where}
+                GROUP BY hour, weekday
+            """, params)
+            groups = cursor.fetchall()
+
+        if not groups:
             return None
 
         # count by hour and weekday
         hour_count = {}
-        weekday_count = {}
+        weekday_totals = [0] * 7
 
-        for appt in appointments:
-            start_time = appt[0]
-            date = appt[1]
+        for hour, weekday, count in groups:
+            hour_count[hour] = hour_count.get(hour, 0) + count
+            if weekday is not None:
+                weekday_totals[weekday] += count
 
-            # get hour from start time
-            hour = int(start_time.split(':')[0])
-            if hour not in hour_count:
-                hour_count[hour] = 0
-            hour_count[hour] += 1
+        # monday first, only days that had appointments
+        weekday_count = {}
+        for weekday in WEEKDAY_ORDER:
+            if weekday_totals[weekday]:
+                weekday_count[WEEKDAY_NAMES[weekday]] = weekday_totals[weekday]
 
-            # get weekday name
-            weekday = datetime.strptime(date, '%Y-%m-%d').strftime('%A')
-            if weekday not in weekday_count:
-                weekday_count[weekday] = 0
-            weekday_count[weekday] += 1
+        hourly_distribution = dict(sorted(hour_count.items()))
 
-        # find peak hour and busiest day
-        # not the cleanest code but works
+        # find peak hour and busiest day (earliest one wins a tie)
         peak_hour = None
-        max_hour_count = 0
-        for hour, count in hour_count.items():
-            if count > max_hour_count:
-                max_hour_count = count
-                peak_hour = (hour, count)
+        if hourly_distribution:
+            peak_hour = max(hourly_distribution.items(), key=lambda x: x[1])
 
         busiest_day = None
-        max_day_count = 0
-        for day, count in weekday_count.items():
-            if count > max_day_count:
-                max_day_count = count
-                busiest_day = (day, count)
+        if weekday_count:
+            busiest_day = max(weekday_count.items(), key=lambda x: x[1])
 
         return {
-            'hourly_distribution': dict(sorted(hour_count.items())),
+            'hourly_distribution': hourly_distribution,
             'weekday_distribution': weekday_count,
             'peak_hour': peak_hour,
             'busiest_day': busiest_day
         }
 
-    def get_revenue_analysis(self):
+    @cached_result('payments', 'appointments')
+    def get_revenue_analysis(self, start_date=None, end_date=None, doctor_ids=None, status=None,
+                             category=None):
         # calculate total revenue and breakdown by procedure
-        conn = self.get_connection()
-        cursor = conn.cursor()
-
-        # get payments with appointment info
-        cursor.execute("""
-            SELECT p.amount, p.method, a.procedure_name, a.date
-            FROM payments p
-            JOIN appointments a ON p.appointment_id = a.id
-        """)
-        payments = cursor.fetchall()
-        conn.close()
-
-        if not payments:
+        # filters apply to the appointment a payment belongs to
+        filters = AnalyticsFilter(start_date, end_date, doctor_ids, status, category)
+        with self.get_connection() as conn:
+            return self._revenue_analysis(conn.cursor(), filters)
+
+    def _revenue_analysis(self, cursor, filters):
+        # payments are rolled up per appointment day, method and procedure
+        # doctor/status/category aren't in that rollup - those read payments
+        # joined to the matching appointments. grouped by code like the trends
+        appointment_columns = {name: 'a.' + column for name, column in APPOINTMENT_COLUMNS.items()}
+        if self.backend == 'numpy':
+            groups = numpy_backend.revenue_groups(cursor, *filters.where(appointment_columns))
+        else:
+            if filters.only('date'):
+                where, params = filters.where({'date': 'day'})
+                sums_sql = f"""
+                    SELECT NULLIF(substr(day, 1, 7), '') AS month, method_id, procedure_id,
+                           SUM(amount) AS amount, SUM(payment_count) AS payment_count
+                    FROM rollup_revenue_daily{where}
+                    GROUP BY month, method_id, procedure_id"""
+            else:
+                where, params = filters.where(appointment_columns)
+                sums_sql = f"""
+                    SELECT NULLIF(substr(a.date, 1, 7), '') AS month, p.method_id, a.procedure_id,
+                           SUM(COALESCE(p.amount, 0)) AS amount, COUNT(*) AS payment_count
+                    FROM appointments a
+                    JOIN payments p ON p.appointment_id = a.id{where}
+                    GROUP BY month, p.method_id, a.procedure_id"""
+            cursor.execute(f"""
+                SELECT g.month, NULLIF(m.name, '') AS method, NULLIF(n.name, '') AS procedure_name,
+                       g.amount, g.payment_count
+                FROM ({sums_sql}) g
+                LEFT JOIN payment_methods m ON m.id = g.method_id
+                LEFT JOIN procedure_names n ON n.id = g.procedure_id
+                ORDER BY g.month, method, procedure_name
+            """, params)
+            groups = cursor.fetchall()
+
+        if not groups:
             return None
 
         total_revenue = 0
+        payment_count = 0
         monthly_revenue = {}
         payment_methods = {}
         procedure_revenue = {}
 
-        for payment in payments:
-            amount = payment[0]
-            method = payment[1]
-            procedure = payment[2]
-            date = payment[3]
-
-            # add to total
+        for month, method, procedure, amount, count in groups:
+            amount = amount or 0
             total_revenue += amount
+            payment_count += count
 
-            # track by month
-            month = datetime.strptime(date, '%Y-%m-%d').strftime('%Y-%m')
-            if month not in monthly_revenue:
-                monthly_revenue[month] = 0
-            monthly_revenue[month] += amount
-
-            # count payment methods
-            if method not in payment_methods:
-                payment_methods[method] = 0
-            payment_methods[method] += 1
-
-            # track revenue by procedure
-            if procedure not in procedure_revenue:
-                procedure_revenue[procedure] = 0
-            procedure_revenue[procedure] += amount
+            monthly_revenue[month] = monthly_revenue.get(month, 0) + amount
+            payment_methods[method] = payment_methods.get(method, 0) + count
+            procedure_revenue[procedure] = procedure_revenue.get(procedure, 0) + amount
 
         # get top 5 procedures by revenue
         # sort by revenue descending
         sorted_procedures = sorted(procedure_revenue.items(), key=lambda x: x[1], reverse=True)
         top_procedures = [(proc, round(rev, 2)) for proc, rev in sorted_procedures[:5]]
 
-        avg_payment = total_revenue / len(payments) if payments else 0
+        avg_payment = total_revenue / payment_count if payment_count else 0
 
         return {
             'total_revenue': round(total_revenue, 2),
@@ -234,69 +401,107 @@ class AnalyticsService:
             'top_procedures': top_procedures
         }
 
-    def get_doctor_performance(self):
-        # get stats for each doctor - appointments and completion rates
-        # doing this with simple queries - probably not optimal but easier to understand
-        conn = self.get_connection()
-        cursor = conn.cursor()
-
-        # get all active doctors
-        cursor.execute("SELECT doctor_id, doctor_name, speciality FROM doctors WHERE is_active = 1")
+    @cached_result('doctors', 'appointments', 'payments')
+    def get_doctor_performance(self, start_date=None, end_date=None, doctor_ids=None, status=None,
+                               category=None):
+        # get stats for each doctor - appointments, completion rates and revenue
+        filters = AnalyticsFilter(start_date, end_date, doctor_ids, status, category)
+        with self.get_connection() as conn:
+            return self._doctor_performance(conn.cursor(), filters)
+
+    def _doctor_performance(self, cursor, filters):
+        # one statement for all doctors instead of one query per doctor:
+        # appointment counts and payment totals come from the daily rollups,
+        # grouped by doctor separately and joined to the doctors list.
+        # the rollups have day and doctor, a status/category filter reads
+        # appointments (and their payments) instead
+        doctor_where, doctor_params = filters.without('date', 'status', 'category').where(
+            {'doctor_id': 'd.doctor_id'}, "d.is_active = 1")
+
+        if filters.only('date', 'doctor_id'):
+            rollup_columns = {'date': 'day', 'doctor_id': 'doctor_id'}
+            counts_where, counts_params = filters.where(rollup_columns)
+            revenue_where, revenue_params = filters.where(rollup_columns)
+            counts_sql = f"""
+                SELECT doctor_id, SUM(appointment_count) AS total,
+                       SUM(CASE WHEN status_id = {COMPLETED} THEN appointment_count ELSE 0 END) AS completed,
+                       SUM(CASE WHEN status_id = {CANCELLED} THEN appointment_count ELSE 0 END) AS cancelled
+                FROM rollup_doctor_daily{counts_where}
+                GROUP BY doctor_id"""
+            revenue_sql = f"""
+                SELECT doctor_id, SUM(amount) AS revenue, SUM(payment_count) AS payment_count
+                FROM rollup_doctor_revenue_daily{revenue_where}
+                GROUP BY doctor_id"""
+        else:
+            counts_where, counts_params = filters.where(APPOINTMENT_COLUMNS)
+            revenue_where, revenue_params = filters.where(
+                {name: 'a.' + column for name, column in APPOINTMENT_COLUMNS.items()})
+            counts_sql = f"""
+                SELECT doctor_id, COUNT(*) AS total,
+                       SUM(CASE WHEN status_id = {COMPLETED} THEN 1 ELSE 0 END) AS completed,
+                       SUM(CASE WHEN status_id = {CANCELLED} THEN 1 ELSE 0 END) AS cancelled
+                FROM appointments{counts_where}
+                GROUP BY doctor_id"""
+            revenue_sql = f"""
+                SELECT a.doctor_id, SUM(COALESCE(p.amount, 0)) AS revenue, COUNT(*) AS payment_count
+                FROM appointments a
+                JOIN payments p ON p.appointment_id = a.id{revenue_where}
+                GROUP BY a.doctor_id"""
+
+        cursor.execute(f"""
+            SELECT d.doctor_name, d.speciality,
+                   COALESCE(c.total, 0), COALESCE(c.completed, 0), COALESCE(c.cancelled, 0),
+                   COALESCE(r.revenue, 0), COALESCE(r.payment_count, 0)
+            FROM doctors d
+            LEFT JOIN ({counts_sql}) c ON c.doctor_id = d.doctor_id
+            LEFT JOIN ({revenue_sql}) r ON r.doctor_id = d.doctor_id{doctor_where}
+            ORDER BY d.doctor_id
+        """, counts_params + revenue_params + doctor_params)
         doctors = cursor.fetchall()
 
         performance = []
 
-        for doctor in doctors:
-            doctor_id = doctor[0]
-            doctor_name = doctor[1]
-            specialty = doctor[2]
-
-            # get all appointments for this doctor
-            cursor.execute("SELECT status FROM appointments WHERE doctor_id = ?", (doctor_id,))
-            appointments = cursor.fetchall()
-
-            # count completed vs total
-            total = len(appointments)
-            completed = 0
-            cancelled = 0
-
-            for appt in appointments:
-                if appt[0] == 'Completed':
-                    completed += 1
-                elif appt[0] == 'Cancelled':
-                    cancelled += 1
-
+        for doctor_name, specialty, total, completed, cancelled, revenue, payment_count in doctors:
             # calculate completion rate
             if total > 0:
                 completion_rate = (completed / total) * 100
             else:
                 completion_rate = 0
 
+            # average ticket = average payment taken for this doctor's work
+            if payment_count > 0:
+                average_ticket = revenue / payment_count
+            else:
+                average_ticket = 0
+
             performance.append({
                 'name': doctor_name,
                 'specialty': specialty,
                 'total_appointments': total,
                 'completed': completed,
                 'cancelled': cancelled,
-                'completion_rate': round(completion_rate, 1)
+                'completion_rate': round(completion_rate, 1),
+                'revenue': round(revenue, 2),
+                'average_ticket': round(average_ticket, 2)
             })
 
-        conn.close()
         return performance
 
-    def get_dashboard_summary(self):
+    @cached_result(*ALL_TABLES)
+    def get_dashboard_summary(self, start_date=None, end_date=None, doctor_ids=None, status=None,
+                              category=None):
         # get everything for the dashboard
-        # just calls all the other methods
-        demographics = self.get_patient_demographics()
-        appointments = self.get_appointment_trends()
-        peak_hours = self.get_peak_hours_analysis()
-        revenue = self.get_revenue_analysis()
-        doctors = self.get_doctor_performance()
-
-        return {
-            'demographics': demographics,
-            'appointments': appointments,
-            'peak_hours': peak_hours,
-            'revenue': revenue,
-            'doctor_performance': doctors
-        }
+        # all sections run on one connection inside one read transaction, so the
+        # numbers come from the same snapshot even if someone writes meanwhile
+        filters = AnalyticsFilter(start_date, end_date, doctor_ids, status, category)
+        with self.get_connection() as conn:
+            with read_snapshot(conn):
+                cursor = conn.cursor()
+
+                return {
+                    'demographics': self._patient_demographics(cursor, filters),
+                    'appointments': self._appointment_trends(cursor, filters),
+                    'peak_hours': self._peak_hours_analysis(cursor, filters),
+                    'revenue': self._revenue_analysis(cursor, filters),
+                    'doctor_performance': self._doctor_performance(cursor, filters)
+                }
@@ -0,0 +1,325 @@
+# streaming exports - any table, or an AnalyticsService report, to CSV or
+# JSON Lines (optionally gzipped) for the nightly accounting export.
+#
+# rows come from one cursor read chunk_size rows at a time with fetchmany()
+# and are written out chunk by chunk, so memory stays at one chunk however
+# big the table is. the whole export runs in one read transaction on the
+# read-only pool (read_snapshot), so payments and their appointments come
+# from the same moment even while the clinic keeps writing - with WAL the
+# writers don't wait for it.
+#
+# the file is written as <path>.part and renamed when it's complete, so a
+# failed export never leaves half a file where accounting picks it up
+#
+#   python -m services.export_service payments --from 2025-01-01 --to 2025-01-31 -o payments.csv.gz
+#   python -m services.export_service --report revenue --format jsonl -o -
+
+import argparse
+import csv
+import gzip
+import io
+import json
+import os
+import sys
+import time
+from datetime import timedelta
+
+from database.connection import DB_PATH, read_only_connection, read_snapshot
+from database.profiling import profile_methods
+from models.dates import parse_date, to_epoch_day
+from services.analytics_filters import as_date_text
+from services.analytics_service import AnalyticsService
+
+FORMATS = ('csv', 'jsonl')
+DEFAULT_CHUNK_SIZE = 5000
+
+# table name -> (what to read, key to order by, date column, date column kind)
+# appointments and payments are read through their views so the export has
+# names, not lookup codes. the date range is compared on the integer day
+# columns where there is one (they're indexed), first_visit_at is TEXT
+# ('YYYY-MM-DD', maybe with a time after it). doctors have no date to filter by
+EXPORT_TABLES = {
+    'patients': ('patients', 'patient_id', 'first_visit_at', 'text'),
+    'doctors': ('doctors', 'doctor_id', None, None),
+    'appointments': ('appointment_details', 'id', 'epoch_day', 'day'),
+    'payments': ('payment_details', 'id', 'paid_day', 'day'),
+}
+
+# report name -> AnalyticsService method (the dashboard summary is these combined)
+REPORTS = {
+    'demographics': 'get_patient_demographics',
+    'trends': 'get_appointment_trends',
+    'peak_hours': 'get_peak_hours_analysis',
+    'revenue': 'get_revenue_analysis',
+    'doctor_performance': 'get_doctor_performance',
+}
+
+
+def date_range_sql(column, kind, start_date=None, end_date=None):
+    # (conditions, params) for start_date <= column's day <= end_date
+    conditions = []
+    params = []
+    if kind == 'day':
+        if start_date:
+            conditions.append(f"{column} >= ?")
+            params.append(to_epoch_day(start_date))
+        if end_date:
+            conditions.append(f"{column} <= ?")
+            params.append(to_epoch_day(end_date))
+    else:
+        # text compares as text - '2025-01-31 18:00' is before '2025-02-01'
+        if start_date:
+            conditions.append(f"{column} >= ?")
+            params.append(start_date)
+        if end_date:
+            conditions.append(f"{column} < ?")
+            params.append((parse_date(end_date) + timedelta(days=1)).isoformat())
+    return conditions, params
+
+
+def table_query(table, start_date=None, end_date=None):
+    # (sql, params) for one table of EXPORT_TABLES
+    if table not in EXPORT_TABLES:
+        raise ValueError(f"can't export {table!r} (one of: {', '.join(EXPORT_TABLES)})")
+    source, key, column, kind = EXPORT_TABLES[table]
+    if (start_date or end_date) and column is None:
+        raise ValueError(f"{table} has no date to filter by")
+
+    conditions, params = date_range_sql(column, kind, start_date, end_date)
+    sql = f"SELECT * FROM {source}"
+    if conditions:
+        sql += " WHERE " + " AND ".join(conditions)
+    return sql + f" ORDER BY {key}", params
+
+
+def _is_pair(value):
+    # (name, value) like peak_hour (12, 29) - top_procedures is a list of them
+    return isinstance(value, tuple) and len(value) == 2 and not isinstance(value[0], (list, tuple, dict))
+
+
+def report_rows(result):
+    # an AnalyticsService result -> (columns, rows)
+    # a list of dicts (doctor performance) is one row per dict, a dict of
+    # sections becomes (section, key, value) rows - nested dicts join their
+    # keys with '.' ('2025-03.completed'), (name, value) pairs are a key and
+    # a value (peak_hour (12, 29) -> key 12, value 29). None (a dict report
+    # with nothing in the date range) has no rows
+    if result is None:
+        return ['section', 'key', 'value'], []
+    if isinstance(result, list):
+        columns = list(result[0]) if result else []
+        return columns, [tuple(item.get(column) for column in columns) for item in result]
+
+    rows = []
+
+    def add(section, key, value):
+        if isinstance(value, dict):
+            for name, item in value.items():
+                add(section, name if key is None else f"{key}.{name}", item)
+        elif _is_pair(value):
+            add(section, value[0] if key is None else f"{key}.{value[0]}", value[1])
+        elif isinstance(value, list) and value and all(_is_pair(item) for item in value):
+            for pair in value:
+                add(section, key, pair)
+        else:
+            rows.append((section, key, value))
+
+    for section, value in result.items():
+        add(section, None, value)
+    return ['section', 'key', 'value'], rows
+
+
+class RowWriter:
+    # writes (columns, chunk of rows) to an open text file as CSV or JSON Lines
+    def __init__(self, file, fmt):
+        if fmt not in FORMATS:
+            raise ValueError(f"unknown export format {fmt!r}, expected one of {FORMATS}")
+        self.file = file
+        self.fmt = fmt
+        self.columns = None
+        self.csv = csv.writer(file) if fmt == 'csv' else None
+        self.dumps = json.JSONEncoder(ensure_ascii=False, default=str).encode
+
+    def header(self, columns):
+        # no columns (an empty list report) - no header line either
+        self.columns = columns
+        if self.csv is not None and columns:
+            self.csv.writerow(columns)
+
+    def write(self, rows):
+        if self.csv is not None:
+            self.csv.writerows(rows)
+            return
+        columns, dumps = self.columns, self.dumps
+        self.file.write(''.join(dumps(dict(zip(columns, row))) + '\n' for row in rows))
+
+
+def open_output(path, compress):
+    # (text file, final path) - '-' is stdout. the file is <path>.part until
+    # finish_output() renames it
+    if path == '-':
+        stream = sys.stdout.buffer
+        if compress:
+            stream = gzip.GzipFile(fileobj=stream, mode='wb')
+        return io.TextIOWrapper(stream, encoding='utf-8', newline='', write_through=False), None
+
+    part = path + '.part'
+    if compress:
+        return gzip.open(part, 'wt', encoding='utf-8', newline='', compresslevel=6), part
+    return open(part, 'w', encoding='utf-8', newline=''), part
+
+
+def finish_output(file, part, path, ok):
+    if part is None:
+        # stdout: flush everything (and the gzip trailer) but leave it open
+        file.flush()
+        stream = file.detach()
+        if isinstance(stream, gzip.GzipFile):
+            stream.close()  # doesn't close stdout
+        sys.stdout.buffer.flush()
+        return
+    file.close()
+    if ok:
+        os.replace(part, path)
+    elif os.path.exists(part):
+        os.remove(part)
+
+
+@profile_methods
+class ExportService:
+    def __init__(self, db_path=None, chunk_size=DEFAULT_CHUNK_SIZE):
+        if chunk_size < 1:
+            raise ValueError("chunk_size must be at least 1")
+        self.db_path = db_path or DB_PATH
+        self.chunk_size = chunk_size
+
+    def iter_table(self, table, start_date=None, end_date=None):
+        # yields the column names, then one chunk (list of tuples) at a time
+        # the read transaction stays open until the generator is finished or closed
+        sql, params = table_query(table, as_date_text(start_date), as_date_text(end_date))
+        with read_only_connection(self.db_path) as conn, read_snapshot(conn):
+            cursor = conn.execute(sql, params)
+            cursor.arraysize = self.chunk_size
+            yield [column[0] for column in cursor.description]
+            while True:
+                rows = cursor.fetchmany()
+                if not rows:
+                    return
+                yield rows
+
+    def export_table(self, table, path, fmt='csv', start_date=None, end_date=None, compress=None,
+                     progress=None):
+        # streams `table` to `path` ('-' for stdout). compress defaults to
+        # True for paths ending in .gz. progress(rows, seconds) is called
+        # after every chunk. returns the stats (see _write)
+        chunks = self.iter_table(table, start_date, end_date)
+        return self._write(chunks, path, fmt, compress, progress)
+
+    def export_report(self, report, path, fmt='csv', start_date=None, end_date=None, compress=None,
+                      progress=None, analytics=None, **filters):
+        # one AnalyticsService report (see REPORTS) to `path`. filters are
+        # passed on as they are (doctor_ids, status, category). `analytics`
+        # is an AnalyticsService to reuse - by default a new one, uncached
+        if report not in REPORTS:
+            raise ValueError(f"unknown report {report!r} (one of: {', '.join(REPORTS)})")
+        if analytics is None:
+            analytics = AnalyticsService(self.db_path, cache=False)
+
+        result = getattr(analytics, REPORTS[report])(start_date=start_date, end_date=end_date, **filters)
+        columns, rows = report_rows(result)
+
+        def chunks():
+            yield columns
+            for start in range(0, len(rows), self.chunk_size):
+                yield rows[start:start + self.chunk_size]
+
+        return self._write(chunks(), path, fmt, compress, progress)
+
+    def _write(self, chunks, path, fmt, compress, progress):
+        # chunks: the column names, then lists of rows
+        # returns {'rows', 'seconds', 'rows_per_second', 'bytes', 'path'}
+        if fmt not in FORMATS:
+            raise ValueError(f"unknown export format {fmt!r}, expected one of {FORMATS}")
+        if compress is None:
+            compress = path.endswith('.gz')
+
+        start = time.perf_counter()
+        file, part = open_output(path, compress)
+        count = 0
+        ok = False
+        try:
+            writer = RowWriter(file, fmt)
+            writer.header(next(chunks))
+            for rows in chunks:
+                writer.write(rows)
+                count += len(rows)
+                if progress is not None:
+                    progress(count, time.perf_counter() - start)
+            ok = True
+        finally:
+            chunks.close()
+            finish_output(file, part, path, ok)
+
+        seconds = time.perf_counter() - start
+        return {
+            'rows': count,
+            'seconds': seconds,
+            'rows_per_second': count / seconds if seconds else 0.0,
+            'bytes': os.path.getsize(path) if path != '-' else None,
+            'path': path,
+        }
+
+
+def print_progress(rows, seconds):
+    # progress callback for the command line - one updating line on stderr
+    rate = rows / seconds if seconds else 0
+    print(f"\r  {rows:,} rows  {rate:,.0f} rows/s", end='', file=sys.stderr, flush=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export a table or an analytics report as CSV or JSON Lines")
+    parser.add_argument("table", nargs="?", choices=list(EXPORT_TABLES), help="table to export")
+    parser.add_argument("--report", choices=list(REPORTS), help="export an analytics report instead")
+    parser.add_argument("-o", "--output", help="output file, '-' for stdout (default: <name>.<format>)")
+    parser.add_argument("--format", choices=FORMATS, help="default: from the output name, else csv")
+    parser.add_argument("--gzip", action="store_true", help="compress (default for names ending in .gz)")
+    parser.add_argument("--from", dest="start_date", metavar="YYYY-MM-DD", help="first day to export")
+    parser.add_argument("--to", dest="end_date", metavar="YYYY-MM-DD", help="last day to export")
+    parser.add_argument("--db", default=DB_PATH, help="database file (default: %(default)s)")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE,
+                        help="rows read and written at a time (default: %(default)s)")
+    parser.add_argument("--quiet", action="store_true", help="no progress output")
+    args = parser.parse_args()
+
+    if (args.table is None) == (args.report is None):
+        parser.error("give a table or --report, not both")
+
+    name = args.table or args.report
+    fmt = args.format
+    if fmt is None:
+        fmt = 'jsonl' if args.output and '.jsonl' in args.output else 'csv'
+    output = args.output or f"{name}.{fmt}" + (".gz" if args.gzip else "")
+    compress = True if args.gzip else None
+    progress = None if args.quiet or output == '-' else print_progress
+
+    service = ExportService(args.db, chunk_size=args.chunk_size)
+    try:
+        if args.table:
+            stats = service.export_table(args.table, output, fmt, args.start_date, args.end_date,
+                                         compress=compress, progress=progress)
+        else:
+            stats = service.export_report(args.report, output, fmt, args.start_date, args.end_date,
+                                          compress=compress, progress=progress)
+    except ValueError as e:
+        print(f"Export failed: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    if progress is not None:
+        print(file=sys.stderr)
+    if output != '-' and not args.quiet:
+        print(f"Exported {stats['rows']:,} rows to {output} in {stats['seconds']:.2f}s "
+              f"({stats['rows_per_second']:,.0f} rows/s, {stats['bytes'] / 2 ** 20:.1f} MB)", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
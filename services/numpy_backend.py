@@ -0,0 +1,170 @@
+# columnar analytics backend - AnalyticsService(backend='numpy')
+# loads the columns an analysis needs from the base tables into NumPy arrays
+# (days as datetime64 straight from the integer epoch_day column, status /
+# method / procedure as their lookup codes, amounts as float64)
+# and counts them with bincount. every function returns the same grouped
+# rows as the matching SQL query in analytics_service, sorted the same way,
+# so the result dicts are built by the same code for both backends.
+# filters come in as a ready WHERE clause + params (services/analytics_filters.py)
+#
+# this is not the fast path: loading the rows into arrays costs more than the
+# sqlite backend's GROUP BY over the rollups (bench_analytics_backends). it
+# never reads the rollups, which makes it a cross-check for them
+#
+# numpy is optional and not in requirements.txt: pip install numpy
+# dates that aren't valid YYYY-MM-DD count as missing (NaT)
+
+from operator import itemgetter
+
+from database.lookups import load_names
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+NAT = -2 ** 63  # NaT as int64
+
+# epoch_day with NULL as NaT, so the column loads as int64 without a None check
+EPOCH_DAY = f"COALESCE({{0}}, {NAT})"
+
+
+def require_numpy():
+    if np is None:
+        raise ImportError("the numpy analytics backend needs numpy (pip install numpy)")
+
+
+def fetch_columns(cursor, sql, params, count):
+    # runs sql and returns its result as `count` column lists
+    # (itemgetter per column - zip(*rows) is ~8x slower on big results)
+    rows = cursor.execute(sql, params).fetchall()
+    return [list(map(itemgetter(i), rows)) for i in range(count)]
+
+
+def to_days(values):
+    # 'YYYY-MM-DD' strings (or None) -> datetime64[D]
+    return np.array(values, dtype='datetime64[D]')
+
+
+def epoch_days(values):
+    # day numbers (NaT for missing, see EPOCH_DAY) -> datetime64[D], no parsing
+    return np.array(values, dtype=np.int64).view('datetime64[D]')
+
+
+def text_categories(values):
+    # text column -> (codes, labels), '' becomes None like the NULLIF on the
+    # rollup keys. labels are sorted, '' first - the order SQLite groups in
+    labels = sorted(set(values))
+    index = {label: i for i, label in enumerate(labels)}
+    codes = np.fromiter(map(index.__getitem__, values), dtype=np.int64, count=len(values))
+    return codes, [label if label != '' else None for label in labels]
+
+
+def code_categories(codes, names):
+    # lookup codes (0 for NULL) + {code: name} -> (codes, labels) with the
+    # names as labels, sorted like text_categories. '' and a missing name both
+    # become None, like the NULLIF on the names in SQL
+    found, inverse = np.unique(np.array(codes, dtype=np.int64), return_inverse=True)
+    found_labels = [names.get(code) or None for code in found.tolist()]
+    labels = sorted(set(found_labels), key=lambda label: (label is not None, label or ''))
+    index = {label: i for i, label in enumerate(labels)}
+    remap = np.array([index[label] for label in found_labels], dtype=np.int64)
+    return remap[inverse.reshape(-1)], labels
+
+
+def int_categories(values, missing=None):
+    # integer array -> (codes, labels), `missing` becomes None (sorts first)
+    labels, codes = np.unique(values, return_inverse=True)
+    return codes.reshape(-1), [None if label == missing else label for label in labels.tolist()]
+
+
+def date_categories(days, unit):
+    # datetime64 column -> (codes, labels) per year ('Y') or month ('M'),
+    # labels are 'YYYY' / 'YYYY-MM' strings like substr() gives, NaT is None
+    periods = days.astype(f'datetime64[{unit}]')
+    labels, codes = np.unique(periods.view('int64'), return_inverse=True)
+    names = np.datetime_as_string(labels.view(f'datetime64[{unit}]')).tolist()
+    return codes.reshape(-1), [None if label == NAT else name for label, name in zip(labels.tolist(), names)]
+
+
+def grouped(keys, sums=(None,)):
+    # GROUP BY for category codes: keys is a list of (codes, labels), sums a
+    # list of weight arrays (None = count rows). returns one tuple
+    # (label, label, ..., sum, sum) per combination that has rows, sorted by key
+    shape = tuple(len(labels) for _, labels in keys)
+    if not all(shape):
+        return []
+
+    flat = np.ravel_multi_index([codes for codes, _ in keys], shape)
+    size = int(np.prod(shape))
+    counts = np.bincount(flat, minlength=size)
+    present = np.flatnonzero(counts)
+
+    columns = []
+    for weights in sums:
+        if weights is None:
+            columns.append(counts[present].tolist())
+        else:
+            columns.append(np.bincount(flat, weights=weights, minlength=size)[present].tolist())
+
+    positions = np.unravel_index(present, shape)
+    key_columns = [[labels[i] for i in position.tolist()] for position, (_, labels) in zip(positions, keys)]
+    return list(zip(*key_columns, *columns))
+
+
+def demographic_groups(cursor, where="", params=()):
+    # (birth_year, gender, count) - birth_year None for birthdates that aren't real dates
+    birthdates, genders = fetch_columns(cursor, f"""
+        SELECT CASE WHEN date(patient_birthdate) = patient_birthdate THEN patient_birthdate END,
+               COALESCE(gender, '')
+        FROM patients{where}
+    """, params, 2)
+    if not birthdates:
+        return []
+    return grouped([date_categories(to_days(birthdates), 'Y'), text_categories(genders)])
+
+
+def appointment_trend_groups(cursor, where="", params=()):
+    # (month, status, category, count)
+    days, statuses, categories = fetch_columns(cursor, f"""
+        SELECT {EPOCH_DAY.format('epoch_day')}, COALESCE(status_id, 0), COALESCE(category_id, 0)
+        FROM appointments{where}
+    """, params, 3)
+    if not days:
+        return []
+    return grouped([date_categories(epoch_days(days), 'M'),
+                    code_categories(statuses, load_names(cursor, 'appointment_statuses')),
+                    code_categories(categories, load_names(cursor, 'procedure_categories'))])
+
+
+def peak_hour_groups(cursor, where="", params=()):
+    # (hour, weekday, count), weekday 0 = Sunday - the caller's filter picks
+    # the appointments (completed ones with a start time for peak hours)
+    hours, days = fetch_columns(cursor, f"""
+        SELECT start_minute / 60, {EPOCH_DAY.format('epoch_day')}
+        FROM appointments{where}
+    """, params, 2)
+    if not hours:
+        return []
+
+    days = np.array(days, dtype=np.int64)
+    # 1970-01-01 was a Thursday (4)
+    weekdays = np.where(days == NAT, -1, (days + 4) % 7)
+    return grouped([int_categories(np.array(hours, dtype=np.int64)), int_categories(weekdays, missing=-1)])
+
+
+def revenue_groups(cursor, where="", params=()):
+    # (month, method, procedure_name, amount, payment_count) by appointment month
+    # `where` filters the appointments, as `a`
+    days, methods, procedures, amounts = fetch_columns(cursor, f"""
+        SELECT {EPOCH_DAY.format('a.epoch_day')}, COALESCE(p.method_id, 0), COALESCE(a.procedure_id, 0),
+               COALESCE(p.amount, 0)
+        FROM payments p
+        JOIN appointments a ON a.id = p.appointment_id{where}
+    """, params, 4)
+    if not days:
+        return []
+    return grouped([date_categories(epoch_days(days), 'M'),
+                    code_categories(methods, load_names(cursor, 'payment_methods')),
+                    code_categories(procedures, load_names(cursor, 'procedure_names'))],
+                   sums=[np.array(amounts, dtype=np.float64), None])
@@ -0,0 +1,181 @@
+# per-patient metrics - the patient details screens (main.py and the GUI)
+# one query returns the patient and everything about their visits and
+# payments. get_patients_metrics() does the same for a list of patients
+# in one query per 500 ids - lists should use it, it's about twice as
+# cheap per patient as calling get_patient_metrics() in a loop.
+#
+# a "visit" is a completed appointment. visit frequency is counted from the
+# first visit to today (at least one year, so a first visit last week isn't
+# 50 visits a year). lifetime value only counts completed payments,
+# total_spent is every payment like the old screens showed
+
+from datetime import date
+from functools import lru_cache
+
+from database.connection import read_only_connection
+from database.lookups import code_sql
+from database.profiling import profile_methods
+from models.dates import parse_date
+from models.patient import Patient
+
+# ids per query in get_patients_metrics (stays under SQLite's variable limit)
+BATCH_SIZE = 500
+
+PATIENT_COLUMNS = ('patient_id', 'patient_name', 'patient_birthdate', 'first_visit_at', 'gender',
+                   'city', 'address', 'phone', 'email', 'insurance')
+
+# {ids} is a list of ? placeholders, the first parameter is today
+# visits and spent read only the covering indexes from migration 7, the
+# procedure of the latest appointment is the one row lookup per patient
+# {completed} / {paid} are the codes of the 'Completed' appointment and payment status
+METRICS_SQL = """
+    WITH visits AS (
+        SELECT patient_id,
+               COUNT(*) AS total,
+               SUM(status_id = {completed}) AS completed,
+               MIN(CASE WHEN status_id = {completed} AND date <= ?1 THEN date END) AS first_visit,
+               MAX(CASE WHEN status_id = {completed} AND date <= ?1 THEN date END) AS last_visit,
+               MAX(date) AS latest
+        FROM appointments
+        WHERE patient_id IN ({ids})
+        GROUP BY patient_id
+    ),
+    spent AS (
+        SELECT a.patient_id,
+               SUM(p.amount) AS total,
+               SUM(CASE WHEN p.status_id = {paid} THEN p.amount ELSE 0 END) AS completed
+        FROM appointments a
+        JOIN payments p ON p.appointment_id = a.id
+        WHERE a.patient_id IN ({ids})
+        GROUP BY a.patient_id
+    )
+    SELECT {patient_columns},
+           COALESCE(visits.total, 0), COALESCE(visits.completed, 0),
+           visits.first_visit, visits.last_visit, visits.latest,
+           (SELECT name FROM procedure_names WHERE id = (
+                SELECT a.procedure_id FROM appointments a
+                WHERE a.patient_id = p.patient_id ORDER BY a.date DESC LIMIT 1)),
+           COALESCE(spent.total, 0), COALESCE(spent.completed, 0)
+    FROM patients p
+    LEFT JOIN visits ON visits.patient_id = p.patient_id
+    LEFT JOIN spent ON spent.patient_id = p.patient_id
+    WHERE p.patient_id IN ({ids})
+"""
+
+
+# one patient: every part seeks the patient's own index range, no CTEs to
+# build. the aggregates without GROUP BY always return their one row
+# ?1 is today, ?2 the patient id
+PATIENT_METRICS_SQL = """
+    SELECT {patient_columns},
+           visits.total, COALESCE(visits.completed, 0),
+           visits.first_visit, visits.last_visit, visits.latest,
+           (SELECT name FROM procedure_names WHERE id = (
+                SELECT a.procedure_id FROM appointments a
+                WHERE a.patient_id = ?2 ORDER BY a.date DESC LIMIT 1)),
+           COALESCE(spent.total, 0), COALESCE(spent.completed, 0)
+    FROM patients p,
+         (SELECT COUNT(*) AS total,
+                 SUM(status_id = {completed}) AS completed,
+                 MIN(CASE WHEN status_id = {completed} AND date <= ?1 THEN date END) AS first_visit,
+                 MAX(CASE WHEN status_id = {completed} AND date <= ?1 THEN date END) AS last_visit,
+                 MAX(date) AS latest
+          FROM appointments
+          WHERE patient_id = ?2) AS visits,
+         (SELECT SUM(pay.amount) AS total,
+                 SUM(CASE WHEN pay.status_id = {paid} THEN pay.amount ELSE 0 END) AS completed
+          FROM appointments a
+          JOIN payments pay ON pay.appointment_id = a.id
+          WHERE a.patient_id = ?2) AS spent
+    WHERE p.patient_id = ?2
+"""
+
+
+def _format(sql, **kwargs):
+    return sql.format(patient_columns=", ".join(f"p.{column}" for column in PATIENT_COLUMNS),
+                      completed=code_sql('appointment_statuses', 'Completed'),
+                      paid=code_sql('payment_statuses', 'Completed'), **kwargs)
+
+
+@lru_cache(maxsize=None)
+def patient_metrics_sql():
+    # the query for one patient id
+    return _format(PATIENT_METRICS_SQL)
+
+
+@lru_cache(maxsize=32)
+def metrics_sql(id_count):
+    # the query for `id_count` patient ids (numbered parameters ?2, ?3, ...)
+    ids = ", ".join(f"?{i}" for i in range(2, id_count + 2))
+    return _format(METRICS_SQL, ids=ids)
+
+
+def _day(text):
+    # appointment date -> date, None if missing or not a real date
+    try:
+        return parse_date(text)
+    except (TypeError, ValueError):
+        return None
+
+
+@profile_methods
+class PatientAnalyticsService:
+    def __init__(self, db_path=None):
+        # db_path=None means the default clinic database
+        self.db_path = db_path
+
+    def get_patient_metrics(self, patient_id, today=None):
+        # metrics dict for one patient (see _metrics), None if there's no such patient
+        today = today or date.today()
+        with read_only_connection(self.db_path) as conn:
+            row = conn.execute(patient_metrics_sql(), (today.isoformat(), patient_id)).fetchone()
+        return self._metrics(row, today) if row else None
+
+    def get_patients_metrics(self, patient_ids, today=None):
+        # {patient_id: metrics} for every id that exists
+        today = today or date.today()
+        ids = list(dict.fromkeys(patient_ids))
+        results = {}
+
+        with read_only_connection(self.db_path) as conn:
+            for start in range(0, len(ids), BATCH_SIZE):
+                chunk = ids[start:start + BATCH_SIZE]
+                rows = conn.execute(metrics_sql(len(chunk)), [today.isoformat()] + chunk).fetchall()
+                for row in rows:
+                    metrics = self._metrics(row, today)
+                    results[metrics['patient'].patient_id] = metrics
+
+        return results
+
+    def _metrics(self, row, today):
+        split = len(PATIENT_COLUMNS)
+        patient = Patient(*row[:split])
+        (total, completed, first_visit, last_visit, latest_date, latest_procedure,
+         total_spent, lifetime_value) = row[split:]
+
+        first_day, last_day = _day(first_visit), _day(last_visit)
+
+        visits_per_year = None
+        average_days_between_visits = None
+        if first_day is not None:
+            years = max((today - first_day).days, 365) / 365.25
+            visits_per_year = completed / years
+            if completed > 1:
+                average_days_between_visits = (last_day - first_day).days / (completed - 1)
+
+        return {
+            'patient': patient,
+            'total_appointments': total,
+            'completed': completed,
+            'cancelled_other': total - completed,
+            # most recent appointment of any status, (date, procedure) - the "Last visit" line
+            'last_appointment': (latest_date, latest_procedure) if latest_date is not None else None,
+            'first_visit': first_visit,
+            'last_visit': last_visit,
+            'days_since_last_visit': (today - last_day).days if last_day is not None else None,
+            'visits_per_year': visits_per_year,
+            'average_days_between_visits': average_days_between_visits,
+            'total_spent': total_spent,
+            'lifetime_value': lifetime_value,
+            'average_per_visit': total_spent / completed if completed else None,
+        }
@@ -0,0 +1,312 @@
+# appointment scheduling - free slots, next available slot for a speciality
+# and double-booking checks.
+#
+# every doctor's day is kept in memory as a DayIndex (services/slot_index.py),
+# loaded from the database the first time it's needed (warm() loads a whole
+# date range in one query), so the lookups are a bisect instead of a query.
+# days are keyed by day number and times are minutes, read straight from the
+# epoch_day / start_minute / end_minute columns. bookings made through this service
+# update the index right away; writes anywhere else in the app arrive as a
+# change event and drop the loaded days, and days are reloaded after
+# refresh_after seconds anyway (covers other processes).
+#
+# book() and reschedule() check the database again inside the write
+# transaction - the index can't know what another process just booked, the
+# BEGIN IMMEDIATE lock makes check + insert one step
+
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import date, datetime
+
+from database.change_events import subscribe
+from database.connection import DB_PATH, pooled_connection
+from database.profiling import profile_methods
+from database.unit_of_work import UnitOfWork
+from models.dates import from_epoch_day, parse_date, parse_minutes, to_epoch_day
+from repositories.appointment_repository import FREE_STATUSES, AppointmentRepository
+from services.analytics_filters import as_date_text
+from services.slot_index import DayIndex, format_minutes
+
+# clinic hours - the data generator books 08:00-19:00
+OPENING = "08:00"
+CLOSING = "20:00"
+DEFAULT_DURATION = 30
+# next_available() starts looking at now rounded up to this many minutes
+SLOT_STEP = 15
+# how far next_available() looks ahead, in days
+SEARCH_DAYS = 60
+# loaded days older than this are read again (seconds)
+REFRESH_AFTER = 300
+
+
+class SlotUnavailableError(Exception):
+    # the doctor already has something at that time - conflicts are the appointment ids
+    def __init__(self, doctor_id, day, start_time, end_time, conflicts):
+        super().__init__(f"doctor {doctor_id} is already booked on {day} between "
+                         f"{start_time} and {end_time} (appointments {conflicts})")
+        self.conflicts = conflicts
+
+
+def _day_text(value):
+    # date, 'YYYY-MM-DD' or '2025-1-5' -> 'YYYY-MM-DD'
+    return parse_date(as_date_text(value)).isoformat()
+
+
+def _day_number(value):
+    # date or 'YYYY-MM-DD' -> day number, the key of the loaded days
+    return to_epoch_day(parse_date(as_date_text(value)))
+
+
+def _day_key(doctor_id, day):
+    # key into the loaded days, None for a date that can't be in them
+    try:
+        return doctor_id, _day_number(day)
+    except (TypeError, ValueError):
+        return None
+
+
+def _time_text(value):
+    # '9:00' / '09:00' -> '09:00', the way the table stores it
+    return format_minutes(parse_minutes(value))
+
+
+@profile_methods
+class SchedulingService:
+    def __init__(self, db_path=None, opening=OPENING, closing=CLOSING, refresh_after=REFRESH_AFTER):
+        # db_path=None means the default clinic database
+        self.db_path = db_path
+        self.repo = AppointmentRepository(db_path)
+        self.opening = parse_minutes(opening)
+        self.closing = parse_minutes(closing)
+        self.refresh_after = refresh_after
+
+        self._days = {}         # (doctor_id, day number) -> (loaded at, DayIndex)
+        self._doctors = None    # speciality -> [doctor_id], active doctors only
+        self._lock = threading.RLock()
+        self._local = threading.local()
+        subscribe(self._on_data_changed)
+
+    # loading
+
+    def _on_data_changed(self, db_path, table, operation):
+        # change hook - our own bookings are already in the index
+        if getattr(self._local, 'writing', False):
+            return
+        if os.path.abspath(db_path) != os.path.abspath(self.db_path or DB_PATH):
+            return
+        if table == 'appointments':
+            with self._lock:
+                self._days.clear()
+        elif table == 'doctors':
+            with self._lock:
+                self._doctors = None
+
+    def _doctor_ids(self, speciality=None):
+        with self._lock:
+            if self._doctors is None:
+                with pooled_connection(self.db_path) as conn:
+                    rows = conn.execute("SELECT doctor_id, speciality FROM doctors WHERE is_active = 1 "
+                                        "ORDER BY doctor_id").fetchall()
+                doctors = {}
+                for doctor_id, doctor_speciality in rows:
+                    doctors.setdefault(doctor_speciality, []).append(doctor_id)
+                self._doctors = doctors
+
+            if speciality is None:
+                return sorted(doctor_id for ids in self._doctors.values() for doctor_id in ids)
+            return list(self._doctors.get(speciality, []))
+
+    def warm(self, start_date=None, end_date=None, doctor_ids=None):
+        # loads every doctor's days in the range with one query
+        # (default: today and the next SEARCH_DAYS days)
+        first = _day_number(start_date) if start_date else to_epoch_day(date.today())
+        last = _day_number(end_date) if end_date else first + SEARCH_DAYS
+        doctor_ids = list(doctor_ids) if doctor_ids is not None else self._doctor_ids()
+        self._load(doctor_ids, first, last)
+
+    def _load(self, doctor_ids, first, last):
+        # {(doctor_id, day): DayIndex} for days first..last (day numbers),
+        # also stored in self._days
+        if not doctor_ids or last < first:
+            return {}
+
+        # bad dates and times are NULL in the integer columns and never come
+        # back, end before start is left out too
+        rows = self.repo.booked_slots(doctor_ids, first, last)
+        loaded = {(doctor_id, day): DayIndex() for doctor_id in doctor_ids for day in range(first, last + 1)}
+        for appointment_id, doctor_id, day, start, end in rows:
+            loaded[(doctor_id, day)].add(appointment_id, start, end)
+
+        now = time.monotonic()
+        with self._lock:
+            for key, index in loaded.items():
+                self._days[key] = (now, index)
+        return loaded
+
+    def _day(self, doctor_id, day):
+        # the DayIndex for a doctor's day, loaded if it isn't (or is too old)
+        key = (doctor_id, day)
+        with self._lock:
+            entry = self._days.get(key)
+            if entry is not None and time.monotonic() - entry[0] <= self.refresh_after:
+                return entry[1]
+        return self._load([doctor_id], day, day)[key]
+
+    def _missing(self, doctor_ids, days):
+        now = time.monotonic()
+        with self._lock:
+            for doctor_id in doctor_ids:
+                for day in days:
+                    entry = self._days.get((doctor_id, day))
+                    if entry is None or now - entry[0] > self.refresh_after:
+                        return True
+        return False
+
+    # lookups
+
+    def free_slots(self, doctor_id, day, duration=DEFAULT_DURATION):
+        # free ('HH:MM', 'HH:MM') windows in opening hours at least `duration` minutes long
+        index = self._day(doctor_id, _day_number(day))
+        with self._lock:
+            gaps = list(index.gaps(self.opening, self.closing, duration))
+        return [(format_minutes(start), format_minutes(end)) for start, end in gaps]
+
+    def conflicts(self, doctor_id, day, start_time, end_time, ignore_id=None):
+        # ids of the doctor's appointments overlapping start-end (ignore_id:
+        # the appointment being moved), empty if the time is free
+        index = self._day(doctor_id, _day_number(day))
+        with self._lock:
+            return index.conflicts(parse_minutes(start_time), parse_minutes(end_time), ignore_id)
+
+    def is_free(self, doctor_id, day, start_time, end_time):
+        index = self._day(doctor_id, _day_number(day))
+        with self._lock:
+            return index.is_free(parse_minutes(start_time), parse_minutes(end_time))
+
+    def next_available(self, speciality, duration=DEFAULT_DURATION, after=None, days=SEARCH_DAYS):
+        # earliest free slot with any active doctor of the speciality, from
+        # `after` (datetime, default now) over the next `days` days
+        # {'doctor_id', 'date', 'start_time', 'end_time'} or None if all booked
+        doctor_ids = self._doctor_ids(speciality)
+        if not doctor_ids:
+            raise ValueError(f"no active doctors with speciality {speciality!r}")
+
+        after = after or datetime.now()
+        first = to_epoch_day(after.date())
+        window = range(first, first + days)
+        if self._missing(doctor_ids, window):
+            self._load(doctor_ids, window[0], window[-1])
+
+        not_before = -(-(after.hour * 60 + after.minute) // SLOT_STEP) * SLOT_STEP
+        for day in window:
+            best = None
+            for doctor_id in doctor_ids:
+                index = self._day(doctor_id, day)
+                with self._lock:
+                    slot = index.first_gap(self.opening, self.closing, duration, not_before)
+                if slot is not None and (best is None or slot[0] < best[1][0]):
+                    best = (doctor_id, slot)
+            if best is not None:
+                doctor_id, (start, end) = best
+                return {'doctor_id': doctor_id, 'date': from_epoch_day(day).isoformat(),
+                        'start_time': format_minutes(start), 'end_time': format_minutes(end)}
+            not_before = None
+        return None
+
+    # writes - go through AppointmentRepository and keep the index in step
+
+    @contextmanager
+    def _writing(self):
+        self._local.writing = True
+        try:
+            yield
+        finally:
+            self._local.writing = False
+
+    def _check_free(self, doctor_id, day, start_time, end_time, ignore_id=None):
+        # runs inside the caller's unit of work, on its connection
+        start, end = parse_minutes(start_time), parse_minutes(end_time)
+        if end <= start:
+            raise ValueError(f"end_time {end_time} isn't after start_time {start_time}")
+        conflicts = self.repo.overlapping(doctor_id, day, start, end, ignore_id)
+        if conflicts:
+            raise SlotUnavailableError(doctor_id, day, start_time, end_time, conflicts)
+
+    def book(self, data):
+        # AppointmentRepository.create() that refuses to double-book the doctor
+        # raises SlotUnavailableError, returns the new appointment id
+        data = dict(data, date=_day_text(data['date']), start_time=_time_text(data['start_time']),
+                    end_time=_time_text(data['end_time']))
+        status = data.get('status', 'Confirmed')
+
+        with self._writing(), UnitOfWork(self.db_path) as uow:
+            if status not in FREE_STATUSES:
+                self._check_free(data['doctor_id'], data['date'], data['start_time'], data['end_time'])
+            appointment_id = self.repo.create(data)
+            nested = uow.savepoint is not None
+
+        self._after_write(nested, appointment_id, None, (data['doctor_id'], data['date'],
+                                                         data['start_time'], data['end_time'], status))
+        return appointment_id
+
+    def reschedule(self, appointment_id, data):
+        # AppointmentRepository.update() with the same check as book() when
+        # the doctor, date or times change. False if there's no such appointment
+        data = dict(data)
+        if 'date' in data:
+            data['date'] = _day_text(data['date'])
+        for name in ('start_time', 'end_time'):
+            if name in data:
+                data[name] = _time_text(data[name])
+
+        with self._writing(), UnitOfWork(self.db_path) as uow:
+            old = self.repo.read(appointment_id)
+            if old is None:
+                return False
+            new = (data.get('doctor_id', old.doctor_id), data.get('date', old.date),
+                   data.get('start_time', old.start_time), data.get('end_time', old.end_time),
+                   data.get('status', old.status))
+            if new[4] not in FREE_STATUSES:
+                self._check_free(*new[:4], ignore_id=appointment_id)
+            self.repo.update(appointment_id, data)
+            nested = uow.savepoint is not None
+
+        self._after_write(nested, appointment_id, old, new)
+        return True
+
+    def cancel(self, appointment_id):
+        # frees the slot, the appointment stays as 'Cancelled'
+        return self.reschedule(appointment_id, {'status': 'Cancelled'})
+
+    def delete(self, appointment_id):
+        with self._writing(), UnitOfWork(self.db_path) as uow:
+            old = self.repo.read(appointment_id)
+            if old is None:
+                return False
+            self.repo.delete(appointment_id)
+            nested = uow.savepoint is not None
+
+        self._after_write(nested, appointment_id, old, None)
+        return True
+
+    def _after_write(self, nested, appointment_id, old, new):
+        # old: the Appointment before (None for a booking), new: (doctor_id,
+        # date, start, end, status) after (None for a delete). inside somebody
+        # else's unit of work the write isn't committed yet and may still be
+        # rolled back - those days are read again instead
+        with self._lock:
+            if old is not None:
+                key = _day_key(old.doctor_id, old.date)
+                if nested:
+                    self._days.pop(key, None)
+                elif key in self._days:
+                    self._days[key][1].remove(appointment_id)
+            if new is not None:
+                doctor_id, day, start_time, end_time, status = new
+                key = _day_key(doctor_id, day)
+                if nested:
+                    self._days.pop(key, None)
+                elif key in self._days and status not in FREE_STATUSES:
+                    self._days[key][1].add(appointment_id, parse_minutes(start_time), parse_minutes(end_time))
@@ -0,0 +1,107 @@
+# sorted interval index for one doctor's day - what SchedulingService keeps
+# in memory. times are minutes since midnight and intervals are half-open,
+# [start, end), so 09:00-09:30 and 09:30-10:00 don't clash.
+#
+# bookings are kept sorted by start. old data can have overlapping
+# appointments, so besides the ends there is max_end[i], the latest end among
+# the first i+1 bookings - with it one bisect tells whether anything overlaps
+# a new interval, without looking at the bookings before it
+
+from bisect import bisect_left, bisect_right
+
+
+def format_minutes(minutes):
+    # minutes since midnight -> 'HH:MM'
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+
+class DayIndex:
+    __slots__ = ('starts', 'ends', 'ids', 'max_end', '_by_id')
+
+    def __init__(self):
+        self.starts = []
+        self.ends = []
+        self.ids = []
+        self.max_end = []
+        self._by_id = {}    # appointment id -> start, to find it again
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __contains__(self, appointment_id):
+        return appointment_id in self._by_id
+
+    def add(self, appointment_id, start, end):
+        if appointment_id in self._by_id:
+            self.remove(appointment_id)
+        i = bisect_right(self.starts, start)
+        self.starts.insert(i, start)
+        self.ends.insert(i, end)
+        self.ids.insert(i, appointment_id)
+        self.max_end.insert(i, end)
+        self._by_id[appointment_id] = start
+        self._update_max_end(i)
+
+    def remove(self, appointment_id):
+        # False if it wasn't in the index
+        start = self._by_id.pop(appointment_id, None)
+        if start is None:
+            return False
+        i = bisect_left(self.starts, start)
+        while self.ids[i] != appointment_id:
+            i += 1
+        for column in (self.starts, self.ends, self.ids, self.max_end):
+            del column[i]
+        self._update_max_end(i)
+        return True
+
+    def _update_max_end(self, i):
+        running = self.max_end[i - 1] if i else -1
+        for j in range(i, len(self.ends)):
+            running = max(running, self.ends[j])
+            self.max_end[j] = running
+
+    def is_free(self, start, end):
+        # True if nothing overlaps [start, end) - one bisect
+        i = bisect_left(self.starts, end)
+        return i == 0 or self.max_end[i - 1] <= start
+
+    def conflicts(self, start, end, ignore_id=None):
+        # ids of the bookings overlapping [start, end), by start time
+        # walks back from the bisect only while something can still overlap
+        found = []
+        j = bisect_left(self.starts, end) - 1
+        while j >= 0 and self.max_end[j] > start:
+            if self.ends[j] > start and self.ids[j] != ignore_id:
+                found.append(self.ids[j])
+            j -= 1
+        found.reverse()
+        return found
+
+    def gaps(self, opening, closing, min_length=1, after=None):
+        # free (start, end) windows between opening and closing, in order,
+        # at least min_length long and not starting before `after`
+        cursor = opening if after is None else max(opening, after)
+        i = bisect_right(self.starts, cursor)
+        if i:
+            cursor = max(cursor, self.max_end[i - 1])
+
+        count = len(self.starts)
+        while cursor < closing:
+            if i < count and self.ends[i] <= max(cursor, self.starts[i]):
+                i += 1  # already over, or empty
+                continue
+            if i < count and self.starts[i] <= cursor:
+                cursor = self.ends[i]
+                i += 1
+                continue
+            gap_end = min(self.starts[i] if i < count else closing, closing)
+            if gap_end - cursor >= min_length:
+                yield cursor, gap_end
+            cursor = gap_end
+
+    def first_gap(self, opening, closing, length, after=None):
+        # earliest (start, start + length) that fits, None if the day is full
+        for start, end in self.gaps(opening, closing, length, after):
+            return start, start + length
+        return None
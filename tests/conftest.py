@@ -0,0 +1,93 @@
+# shared fixtures - every test gets its own database file in tmp_path, so
+# nothing here touches database/dentalclinic.db
+# run from the project root: python -m pytest
+
+import os
+import shutil
+import sqlite3
+
+import pytest
+
+from database.connection import close_all_pools
+from database.migrations import migrate
+from repositories import AppointmentRepository, DoctorRepository, PatientRepository, PaymentRepository
+
+BASELINE_DB = os.path.join(os.path.dirname(__file__), '..', 'database', 'dentalclinic.db')
+
+DOCTORS = [
+    {'doctor_id': 1, 'name': 'Dr. Ana Pop', 'speciality': 'Orthodontics', 'room': '101', 'is_active': 1},
+    {'doctor_id': 2, 'name': 'Dr. Ion Rusu', 'speciality': 'Endodontics', 'room': '102', 'is_active': 1},
+]
+
+PATIENTS = [
+    {'name': 'Maria Ionescu', 'birthdate': '1980-04-02', 'first_visit': '2025-01-05', 'gender': 'F',
+     'city': 'Cluj'},
+    {'name': 'Ștefan Popescu', 'birthdate': '1995-11-20', 'first_visit': '2025-02-10', 'gender': 'M',
+     'city': 'Iasi'},
+    {'name': 'Elena Pop', 'birthdate': '2010-06-15', 'first_visit': '2025-03-01', 'gender': 'F',
+     'city': 'Cluj'},
+]
+
+# (patient, doctor, date, start, end, status, procedure, category)
+APPOINTMENTS = [
+    (1, 1, '2025-03-03', '09:00', '10:00', 'Completed', 'Braces', 'Orthodontics'),
+    (2, 1, '2025-03-03', '10:00', '10:30', 'Cancelled', 'Consultation', 'Diagnostic'),
+    (2, 2, '2025-03-04', '11:00', '12:00', 'Completed', 'Root Canal', 'Endodontics'),
+    (3, 2, '2025-04-10', '09:30', '10:00', 'Confirmed', 'Cleaning', 'Hygiene'),
+]
+
+# (appointment, amount, method)
+PAYMENTS = [
+    (1, 1500.0, 'Card'),
+    (3, 800.0, 'Cash'),
+    (3, 200.0, 'Card'),
+]
+
+
+def seed(db_path):
+    # the small clinic above, written through the repositories
+    DoctorRepository(db_path).create_many(DOCTORS)
+    PatientRepository(db_path).create_many(PATIENTS)
+    AppointmentRepository(db_path).create_many(
+        {'patient_id': patient, 'doctor_id': doctor, 'date': day, 'start_time': start, 'end_time': end,
+         'status': status, 'procedure_name': procedure, 'procedure_category': category}
+        for patient, doctor, day, start, end, status, procedure, category in APPOINTMENTS)
+    PaymentRepository(db_path).create_many(
+        {'appointment_id': appointment, 'amount': amount, 'method': method}
+        for appointment, amount, method in PAYMENTS)
+
+
+@pytest.fixture(autouse=True)
+def close_pools():
+    # pools are per database file and outlive a test - close them with it
+    yield
+    close_all_pools()
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    # an empty database at the latest schema version
+    path = str(tmp_path / "clinic.db")
+    conn = sqlite3.connect(path)
+    migrate(conn)
+    conn.close()
+    return path
+
+
+@pytest.fixture
+def clinic_db(db_path):
+    seed(db_path)
+    return db_path
+
+
+@pytest.fixture
+def baseline_db(tmp_path):
+    # a copy of the database the repository ships, before any migration
+    path = str(tmp_path / "baseline.db")
+    shutil.copyfile(BASELINE_DB, path)
+    conn = sqlite3.connect(path)
+    migrated = conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'schema_version'").fetchone()
+    conn.close()
+    if migrated:
+        pytest.skip("database/dentalclinic.db has been migrated already")
+    return path
@@ -0,0 +1,29 @@
+import pytest
+
+from services.analytics_service import AnalyticsService
+
+np = pytest.importorskip('numpy')
+
+ANALYSES = ['get_patient_demographics', 'get_appointment_trends', 'get_peak_hours_analysis',
+            'get_revenue_analysis']
+
+FILTERS = [
+    {},
+    {'start_date': '2025-03-01', 'end_date': '2025-03-31'},
+    {'doctor_ids': [2]},
+    {'status': 'Cancelled'},
+]
+
+
+@pytest.mark.parametrize('filters', FILTERS)
+@pytest.mark.parametrize('name', ANALYSES)
+def test_numpy_backend_matches_sqlite(clinic_db, name, filters):
+    sqlite = getattr(AnalyticsService(clinic_db, cache=False), name)(**filters)
+    numpy = getattr(AnalyticsService(clinic_db, cache=False, backend='numpy'), name)(**filters)
+    # repr compares the key order too
+    assert repr(numpy) == repr(sqlite)
+
+
+def test_unknown_backend(clinic_db):
+    with pytest.raises(ValueError):
+        AnalyticsService(clinic_db, backend='pandas')
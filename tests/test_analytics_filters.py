@@ -0,0 +1,87 @@
+from datetime import date
+
+import pytest
+
+from services.analytics_filters import APPOINTMENT_COLUMNS, AnalyticsFilter, last_days, this_quarter
+from services.analytics_service import AnalyticsService
+
+
+def test_doctor_filter(clinic_db):
+    analytics = AnalyticsService(clinic_db, cache=False)
+    trends = analytics.get_appointment_trends(doctor_ids=[2])
+    assert trends['total_appointments'] == 2
+    assert trends['status_distribution'] == {'Completed': 1, 'Confirmed': 1}
+    revenue = analytics.get_revenue_analysis(doctor_ids=2)
+    assert (revenue['total_revenue'], revenue['top_procedures']) == (1000.0, [('Root Canal', 1000.0)])
+
+
+def test_category_and_status_filters(clinic_db):
+    analytics = AnalyticsService(clinic_db, cache=False)
+    assert analytics.get_appointment_trends(category='Endodontics')['total_appointments'] == 1
+    # peak hours count completed appointments unless a status is given
+    peak = analytics.get_peak_hours_analysis(status=['Completed', 'Cancelled'])
+    assert peak['hourly_distribution'] == {9: 1, 10: 1, 11: 1}
+    assert peak['busiest_day'] == ('Monday', 2)
+
+
+def test_date_window(clinic_db):
+    analytics = AnalyticsService(clinic_db, cache=False)
+    trends = analytics.get_appointment_trends(start_date=date(2025, 4, 1))
+    assert list(trends['monthly_trends']) == ['2025-04']
+    # the only appointment in April isn't completed or paid
+    assert analytics.get_peak_hours_analysis(start_date='2025-04-01') is None
+    assert analytics.get_revenue_analysis(start_date='2025-04-01') is None
+    march = analytics.get_revenue_analysis(start_date='2025-03-04', end_date='2025-03-04')
+    assert march['total_revenue'] == 1000.0
+
+
+def test_filtered_demographics_count_patients_with_matching_appointments(clinic_db):
+    demographics = AnalyticsService(clinic_db, cache=False).get_patient_demographics(doctor_ids=[2])
+    assert demographics['total_patients'] == 2
+    assert demographics['gender'] == {'M': 1, 'F': 1}
+
+
+@pytest.mark.parametrize('name', ['get_appointment_trends', 'get_peak_hours_analysis', 'get_revenue_analysis'])
+def test_rollups_and_appointments_agree(clinic_db, name):
+    # a date window alone is served from the rollups, adding every doctor
+    # makes the same question go to the appointments table
+    analytics = AnalyticsService(clinic_db, cache=False)
+    window = {'start_date': '2025-03-01', 'end_date': '2025-03-31'}
+    assert getattr(analytics, name)(**window) == getattr(analytics, name)(doctor_ids=[1, 2], **window)
+
+
+@pytest.mark.parametrize('name', ['get_appointment_trends', 'get_peak_hours_analysis', 'get_revenue_analysis'])
+def test_dates_without_zero_padding(clinic_db, name):
+    # the rollups compare the day as text, appointments as a day number -
+    # both have to see '2025-3-3' as 2025-03-03
+    report = getattr(AnalyticsService(clinic_db, cache=False), name)
+    expected = report(start_date='2025-03-03', end_date='2025-03-31')
+    assert expected is not None
+    assert report(start_date='2025-3-3', end_date='2025-3-31') == expected
+    assert report(start_date='2025-3-3', end_date='2025-3-31', doctor_ids=[1, 2]) == expected
+
+
+@pytest.mark.parametrize('bad', ['2025-13-01', 'last week', 20250303])
+def test_bad_dates_raise(clinic_db, bad):
+    analytics = AnalyticsService(clinic_db, cache=False)
+    with pytest.raises(ValueError):
+        analytics.get_appointment_trends(start_date=bad)
+    with pytest.raises(ValueError):
+        analytics.get_revenue_analysis(end_date=bad, doctor_ids=[1])
+
+
+def test_filter_sql():
+    filters = AnalyticsFilter(date(2025, 3, 1), None, [2, 1, 2])
+    assert (filters.start_date, filters.doctor_ids, filters.active()) == ('2025-03-01', (1, 2), ['date', 'doctor_id'])
+    assert filters.where({'date': 'date', 'doctor_id': 'doctor_id'}) == \
+        (" WHERE date >= ? AND doctor_id IN (?, ?)", ['2025-03-01', 1, 2])
+    assert filters.where(APPOINTMENT_COLUMNS)[1] == [20148, 1, 2]
+    assert AnalyticsFilter().where({}) == ("", [])
+    with pytest.raises(ValueError):
+        filters.where({'date': 'day'})
+
+
+def test_windows():
+    assert last_days(7, date(2025, 3, 3)) == ('2025-02-25', '2025-03-03')
+    assert this_quarter(date(2025, 5, 20)) == ('2025-04-01', '2025-06-30')
+    assert this_quarter(date(2024, 11, 1)) == ('2024-10-01', '2024-12-31')
@@ -0,0 +1,92 @@
+from repositories import DoctorRepository
+from services.analytics_service import AnalyticsService
+
+
+def test_appointment_trends(clinic_db):
+    trends = AnalyticsService(clinic_db, cache=False).get_appointment_trends()
+    assert trends['total_appointments'] == 4
+    assert trends['monthly_trends'] == {'2025-03': {'total': 3, 'completed': 2, 'cancelled': 1},
+                                        '2025-04': {'total': 1, 'completed': 0, 'cancelled': 0}}
+    assert trends['status_distribution'] == {'Cancelled': 1, 'Completed': 2, 'Confirmed': 1}
+
+
+def test_peak_hours_count_completed_appointments(clinic_db):
+    peak = AnalyticsService(clinic_db, cache=False).get_peak_hours_analysis()
+    assert peak['hourly_distribution'] == {9: 1, 11: 1}
+    assert peak['weekday_distribution'] == {'Monday': 1, 'Tuesday': 1}
+    assert peak['peak_hour'] == (9, 1)
+
+
+def test_revenue(clinic_db):
+    revenue = AnalyticsService(clinic_db, cache=False).get_revenue_analysis()
+    assert revenue['total_revenue'] == 2500.0
+    assert revenue['average_payment'] == 833.33
+    assert revenue['payment_methods'] == {'Card': 2, 'Cash': 1}
+    assert revenue['top_procedures'] == [('Braces', 1500.0), ('Root Canal', 1000.0)]
+
+
+def test_demographics(clinic_db):
+    demographics = AnalyticsService(clinic_db, cache=False).get_patient_demographics()
+    assert demographics['total_patients'] == 3
+    assert demographics['gender'] == {'F': 2, 'M': 1}
+    assert sum(demographics['age_groups'].values()) == 3
+
+
+def test_empty_database(db_path):
+    analytics = AnalyticsService(db_path, cache=False)
+    assert analytics.get_appointment_trends() is None
+    assert analytics.get_revenue_analysis() is None
+    assert analytics.get_doctor_performance() == []
+
+
+def test_doctor_performance(clinic_db):
+    performance = AnalyticsService(clinic_db, cache=False).get_doctor_performance()
+    assert [(d['name'], d['total_appointments'], d['completed'], d['cancelled'], d['completion_rate'],
+             d['revenue'], d['average_ticket']) for d in performance] == [
+        ('Dr. Ana Pop', 2, 1, 1, 50.0, 1500.0, 1500.0),
+        ('Dr. Ion Rusu', 2, 1, 0, 50.0, 1000.0, 500.0),
+    ]
+
+
+def test_doctor_performance_is_one_query(clinic_db):
+    analytics = AnalyticsService(clinic_db, cache=False)
+    statements = []
+    with analytics.get_connection() as conn:
+        conn.set_trace_callback(statements.append)
+        try:
+            analytics.get_doctor_performance()
+        finally:
+            conn.set_trace_callback(None)
+    assert len([sql for sql in statements if sql.lstrip().upper().startswith('SELECT')]) == 1
+
+
+def test_inactive_doctors_are_left_out(clinic_db):
+    DoctorRepository(clinic_db).update(2, {'is_active': 0})
+    performance = AnalyticsService(clinic_db, cache=False).get_doctor_performance()
+    assert [d['name'] for d in performance] == ['Dr. Ana Pop']
+
+
+def test_dashboard_summary_matches_the_single_reports(clinic_db):
+    analytics = AnalyticsService(clinic_db, cache=False)
+    for filters in ({}, {'start_date': '2025-03-01', 'end_date': '2025-03-31', 'doctor_ids': [1]}):
+        summary = analytics.get_dashboard_summary(**filters)
+        assert summary == {
+            'demographics': analytics.get_patient_demographics(**filters),
+            'appointments': analytics.get_appointment_trends(**filters),
+            'peak_hours': analytics.get_peak_hours_analysis(**filters),
+            'revenue': analytics.get_revenue_analysis(**filters),
+            'doctor_performance': analytics.get_doctor_performance(**filters),
+        }
+
+
+def test_dashboard_summary_reads_one_snapshot(clinic_db):
+    analytics = AnalyticsService(clinic_db, cache=False)
+    statements = []
+    with analytics.get_connection() as conn:
+        conn.set_trace_callback(statements.append)
+        try:
+            analytics.get_dashboard_summary()
+        finally:
+            conn.set_trace_callback(None)
+    # one read transaction around all five reports
+    assert [sql.split()[0].upper() for sql in statements] == ['BEGIN'] + ['SELECT'] * 5 + ['ROLLBACK']
@@ -0,0 +1,66 @@
+import sqlite3
+
+import pytest
+
+from repositories import AppointmentRepository, DoctorRepository, PatientRepository, PaymentRepository
+from repositories.batching import chunked
+
+PATIENT = {'birthdate': '1980-01-01', 'first_visit': '2025-01-01', 'gender': 'F', 'city': 'Cluj'}
+
+
+def test_create_many_returns_the_new_ids_in_order(db_path):
+    repo = PatientRepository(db_path)
+    first = repo.create(dict(PATIENT, name='Ana Pop'))
+    # chunks of 3 - the ids have to line up across executemany calls
+    ids = repo.create_many((dict(PATIENT, name=f"Patient {i}") for i in range(10)), chunk_size=3)
+    assert ids == list(range(first + 1, first + 11))
+    assert [repo.read(patient_id).patient_name for patient_id in ids] == [f"Patient {i}" for i in range(10)]
+
+
+def test_create_many_of_nothing(db_path):
+    assert PatientRepository(db_path).create_many([]) == []
+
+
+def test_a_bad_row_rolls_back_the_whole_batch(clinic_db):
+    repo = AppointmentRepository(clinic_db)
+    before = repo.count()
+    rows = [{'patient_id': 1, 'doctor_id': 1, 'date': '2025-05-01', 'start_time': '09:00', 'end_time': '09:30',
+             'procedure_name': 'Cleaning', 'procedure_category': 'Hygiene'}] * 3
+    rows.append(dict(rows[0], patient_id=999))  # no such patient
+    with pytest.raises(sqlite3.IntegrityError):
+        repo.create_many(rows, chunk_size=2)
+    assert repo.count() == before
+
+
+def test_upsert_many_updates_and_inserts(clinic_db):
+    repo = PatientRepository(clinic_db)
+    ids = repo.upsert_many([dict(PATIENT, patient_id=1, name='Maria Georgescu'),
+                            dict(PATIENT, patient_id=10, name='Dan Vlad')])
+    assert ids == [1, 10]
+    assert repo.read(1).patient_name == 'Maria Georgescu'
+    assert repo.read(10).patient_name == 'Dan Vlad'
+    assert repo.count() == 4
+
+
+def test_upsert_many_keeps_created_at(clinic_db):
+    repo = AppointmentRepository(clinic_db)
+    created = repo.read(1).created_at
+    repo.upsert_many([{'id': 1, 'patient_id': 1, 'doctor_id': 1, 'date': '2025-03-05', 'start_time': '09:00',
+                       'end_time': '10:00', 'status': 'Completed', 'procedure_name': 'Braces',
+                       'procedure_category': 'Orthodontics'}])
+    appointment = repo.read(1)
+    assert (appointment.date, appointment.created_at) == ('2025-03-05', created)
+
+
+def test_doctors_and_payments(clinic_db):
+    assert DoctorRepository(clinic_db).upsert_many(
+        [{'doctor_id': 2, 'name': 'Dr. Ion Rusu', 'speciality': 'Endodontics', 'room': '201', 'is_active': 1}]) == [2]
+    assert DoctorRepository(clinic_db).read(2).room == '201'
+    ids = PaymentRepository(clinic_db).create_many([{'appointment_id': 4, 'amount': 10.0, 'method': 'Cash'}] * 2)
+    assert [PaymentRepository(clinic_db).read(payment_id).amount for payment_id in ids] == [10.0, 10.0]
+
+
+def test_chunked():
+    assert list(chunked(iter(range(5)), 2)) == [[0, 1], [2, 3], [4]]
+    with pytest.raises(ValueError):
+        list(chunked([1], 0))
@@ -0,0 +1,113 @@
+import os
+import sqlite3
+import threading
+
+import pytest
+
+from database.connection import (ConnectionPool, PoolExhaustedError, checkpoint, close_all_pools, configure_pool,
+                                 get_pool, pooled_connection, read_only_connection)
+from services.analytics_service import AnalyticsService
+
+
+def test_nested_checkout_on_one_thread_shares_the_connection(db_path):
+    with pooled_connection(db_path) as outer:
+        with pooled_connection(db_path) as inner:
+            assert inner is outer
+    assert get_pool(db_path).stats()['in_use'] == 0
+
+
+def test_connections_are_reused(db_path):
+    with pooled_connection(db_path) as first:
+        pass
+    with pooled_connection(db_path) as second:
+        assert second is first
+    assert get_pool(db_path).stats()['open'] == 1
+
+
+def test_threads_get_their_own_connection(db_path):
+    seen = []
+    barrier = threading.Barrier(2)
+
+    def work():
+        with pooled_connection(db_path) as conn:
+            seen.append(conn)
+            barrier.wait()
+
+    threads = [threading.Thread(target=work) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert seen[0] is not seen[1]
+
+
+def test_exhausted_pool_times_out(db_path):
+    pool = ConnectionPool(db_path, max_size=1, timeout=0.05)
+    held = pool.acquire()
+    with pytest.raises(PoolExhaustedError):
+        pool.acquire()
+    pool.release(held)
+    pool.close()
+
+
+def test_released_connection_loses_its_open_transaction(db_path):
+    pool = configure_pool(db_path, max_size=1)
+    with pool.connection() as conn:
+        conn.execute("BEGIN")
+        conn.execute("INSERT INTO doctors (doctor_id, doctor_name, speciality, room, is_active) "
+                     "VALUES (9, 'Dr. Test', 'Hygiene', '1', 1)")
+    with pool.connection() as conn:
+        assert not conn.in_transaction
+        assert conn.execute("SELECT COUNT(*) FROM doctors").fetchone() == (0,)
+
+
+def test_closed_pool_refuses_checkouts(db_path):
+    pool = get_pool(db_path)
+    close_all_pools()
+    with pytest.raises(PoolExhaustedError):
+        pool.acquire()
+
+
+def test_new_database_is_migrated_on_first_connect(tmp_path):
+    path = str(tmp_path / "new.db")
+    with pooled_connection(path) as conn:
+        assert conn.execute("SELECT MAX(version) FROM schema_version").fetchone()[0] > 0
+        with pytest.raises(sqlite3.IntegrityError):
+            # foreign keys are on
+            conn.execute("INSERT INTO payments (appointment_id, amount) VALUES (999, 10)")
+
+
+def test_wal_and_the_pragmas_are_set(db_path):
+    with pooled_connection(db_path) as conn:
+        assert conn.execute("PRAGMA journal_mode").fetchone() == ('wal',)
+        assert conn.execute("PRAGMA busy_timeout").fetchone() == (5000,)
+        assert conn.execute("PRAGMA synchronous").fetchone() == (1,)  # NORMAL
+
+
+def test_read_only_pool_can_not_write(clinic_db):
+    for connection in (read_only_connection(clinic_db), AnalyticsService(clinic_db).get_connection()):
+        with connection as conn:
+            with pytest.raises(sqlite3.OperationalError, match="readonly"):
+                conn.execute("DELETE FROM payments")
+
+
+def test_readers_do_not_wait_for_the_writer(clinic_db):
+    with pooled_connection(clinic_db) as writer:
+        writer.execute("BEGIN IMMEDIATE")
+        writer.execute("DELETE FROM payments")
+        # the reader sees the last commit straight away, no busy_timeout
+        with read_only_connection(clinic_db) as reader:
+            assert reader.execute("SELECT COUNT(*) FROM payments").fetchone() == (3,)
+        writer.rollback()
+
+
+def test_closing_the_pools_empties_the_wal(clinic_db):
+    with pooled_connection(clinic_db) as conn:
+        conn.execute("UPDATE patients SET city = 'Iasi'")
+        conn.commit()
+    assert checkpoint(clinic_db)[0] == 0
+    with pytest.raises(ValueError):
+        checkpoint(clinic_db, "EVERYTHING")
+    close_all_pools()
+    wal = clinic_db + "-wal"
+    assert not os.path.exists(wal) or os.path.getsize(wal) == 0
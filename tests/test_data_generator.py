@@ -0,0 +1,49 @@
+import sqlite3
+from datetime import date
+
+import pytest
+
+pytest.importorskip('faker')
+
+from database.data_generator import BucharestDentalClinicGenerator
+from database.day_columns import check_day_columns
+from database.rollups import check_rollups
+
+TABLES = ['patients', 'doctors', 'procedures', 'appointments', 'payments']
+TODAY = date(2025, 6, 1)
+
+
+def generate(path, seed=7, chunk_size=50):
+    generator = BucharestDentalClinicGenerator(str(path), seed=seed, today=TODAY, chunk_size=chunk_size)
+    try:
+        generator.generate_all_data(patients=30, appointments=120)
+    finally:
+        generator.close()
+    conn = sqlite3.connect(str(path))
+    return conn
+
+
+def dump(conn):
+    return {table: conn.execute(f"SELECT * FROM {table} ORDER BY 1").fetchall() for table in TABLES}
+
+
+def test_counts_and_derived_data(tmp_path):
+    conn = generate(tmp_path / "clinic.db")
+    assert conn.execute("SELECT COUNT(*) FROM patients").fetchone()[0] == 30
+    assert conn.execute("SELECT COUNT(*) FROM appointments").fetchone()[0] == 120
+    # the rollups and day columns are rebuilt after the load, not kept by triggers
+    assert check_rollups(conn) == []
+    assert check_day_columns(conn) == []
+    assert conn.execute("PRAGMA foreign_key_check").fetchall() == []
+    conn.close()
+
+
+def test_same_seed_same_database(tmp_path):
+    first = generate(tmp_path / "first.db")
+    # the chunk size only changes how the rows are sent to sqlite
+    second = generate(tmp_path / "second.db", chunk_size=7)
+    other = generate(tmp_path / "other.db", seed=8)
+    assert dump(first) == dump(second)
+    assert dump(first) != dump(other)
+    for conn in (first, second, other):
+        conn.close()
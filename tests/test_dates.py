@@ -0,0 +1,60 @@
+from datetime import date
+
+import pytest
+
+from models.appointment import Appointment
+from models.dates import age_on, from_epoch_day, parse_date, parse_minutes, to_epoch_day
+from models.patient import Patient, patient_ages
+
+
+def patient(birthdate):
+    return Patient(1, 'Maria Ionescu', birthdate, '2025-01-05', 'F', 'Cluj')
+
+
+def appointment(day, start='09:00', end='10:00'):
+    return Appointment(1, 1, 1, day, start, end, 'Confirmed', 'Braces')
+
+
+def test_parsing():
+    assert parse_date('2025-03-03') == date(2025, 3, 3)
+    # not zero-padded, as strptime used to accept
+    assert parse_date('1985-4-7') == date(1985, 4, 7)
+    assert parse_minutes('09:30') == parse_minutes('9:30') == 570
+    with pytest.raises(ValueError):
+        parse_date('2025-02-30')
+    assert to_epoch_day('2025-03-03') == to_epoch_day(date(2025, 3, 3)) == 20150
+    assert from_epoch_day(20150) == date(2025, 3, 3)
+
+
+@pytest.mark.parametrize('today, age', [(date(2025, 4, 1), 44), (date(2025, 4, 2), 45), (date(2025, 12, 31), 45)])
+def test_age_around_the_birthday(today, age):
+    assert age_on(date(1980, 4, 2), today) == age
+    assert patient('1980-04-02').get_age(today) == age
+
+
+def test_leap_day_birthday():
+    assert age_on(date(2000, 2, 29), date(2025, 2, 28)) == 24
+    assert age_on(date(2000, 2, 29), date(2025, 3, 1)) == 25
+
+
+def test_patient_ages_match_get_age():
+    today = date(2025, 6, 1)
+    patients = [patient(text) for text in ('1980-04-02', '1995-11-20', '1980-04-02', '2019-6-1')]
+    assert patient_ages(patients, today) == [p.get_age(today) for p in patients] == [45, 29, 45, 6]
+
+
+def test_cached_values_follow_changes():
+    p = patient('1980-04-02')
+    assert p.birthdate == date(1980, 4, 2)
+    p.patient_birthdate = '1990-01-01'
+    assert p.birthdate == date(1990, 1, 1)
+
+    a = appointment('2025-03-03')
+    assert (a.day, a.get_duration_minutes()) == (date(2025, 3, 3), 60)
+    a.date, a.end_time = '2025-03-04', '09:45'
+    assert (a.day, a.get_duration_minutes()) == (date(2025, 3, 4), 45)
+    assert a.is_future(date(2025, 3, 3)) and not a.is_future(date(2025, 3, 4))
+
+
+def test_duration_past_midnight_wraps():
+    assert appointment('2025-03-03', '23:30', '00:15').get_duration_minutes() == 45
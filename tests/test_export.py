@@ -0,0 +1,73 @@
+import csv
+import gzip
+import json
+import os
+
+import pytest
+
+from services.export_service import REPORTS, ExportService
+
+
+def read_csv(path):
+    with open(path, newline='', encoding='utf-8') as file:
+        return list(csv.reader(file))
+
+
+@pytest.mark.parametrize('report', [report for report in REPORTS if report != 'doctor_performance'])
+def test_report_for_an_empty_range_is_just_the_header(clinic_db, tmp_path, report):
+    path = str(tmp_path / f"{report}.csv")
+    stats = ExportService(clinic_db).export_report(report, path, start_date='2030-01-01', end_date='2030-01-31')
+    assert stats['rows'] == 0
+    assert read_csv(path) == [['section', 'key', 'value']]
+
+
+def test_list_report_without_rows_is_an_empty_file(db_path, tmp_path):
+    # no active doctors, no doctor performance rows
+    path = str(tmp_path / "doctors.csv")
+    assert ExportService(db_path).export_report('doctor_performance', path)['rows'] == 0
+    assert read_csv(path) == []
+
+
+def test_report_rows(clinic_db, tmp_path):
+    path = str(tmp_path / "revenue.csv")
+    ExportService(clinic_db).export_report('revenue', path)
+    rows = read_csv(path)
+    assert ['total_revenue', '', '2500.0'] in rows
+    assert ['top_procedures', 'Braces', '1500.0'] in rows
+
+
+def test_table_with_a_date_range(clinic_db, tmp_path):
+    path = str(tmp_path / "appointments.csv")
+    stats = ExportService(clinic_db, chunk_size=1).export_table('appointments', path, start_date='2025-03-04',
+                                                                end_date='2025-04-10')
+    rows = read_csv(path)
+    assert stats['rows'] == 2
+    header = rows[0]
+    # names, not lookup codes
+    assert [dict(zip(header, row))['status'] for row in rows[1:]] == ['Completed', 'Confirmed']
+
+
+def test_gzipped_json_lines(clinic_db, tmp_path):
+    path = str(tmp_path / "payments.jsonl.gz")
+    ExportService(clinic_db).export_table('payments', path, fmt='jsonl')
+    with gzip.open(path, 'rt', encoding='utf-8') as file:
+        payments = [json.loads(line) for line in file]
+    assert [(p['amount'], p['method']) for p in payments] == [(1500.0, 'Card'), (800.0, 'Cash'), (200.0, 'Card')]
+
+
+def test_table_without_a_date_refuses_a_range(clinic_db, tmp_path):
+    path = str(tmp_path / "doctors.csv")
+    with pytest.raises(ValueError):
+        ExportService(clinic_db).export_table('doctors', path, start_date='2025-01-01')
+    assert not os.path.exists(path) and not os.path.exists(path + '.part')
+
+
+def test_failed_export_leaves_no_file(clinic_db, tmp_path):
+    def fail(rows, seconds):
+        raise RuntimeError("disk full")
+
+    path = str(tmp_path / "patients.csv")
+    with pytest.raises(RuntimeError):
+        ExportService(clinic_db, chunk_size=1).export_table('patients', path, progress=fail)
+    assert not os.path.exists(path)
+    assert not os.path.exists(path + '.part')
@@ -0,0 +1,36 @@
+import pytest
+
+pytest.importorskip('tkinter')
+
+from gui_table import ListSource, RepositorySource
+from repositories import AppointmentRepository, PatientRepository
+
+
+def names(patients):
+    return [(patient.patient_name,) for patient in patients]
+
+
+def test_repository_source_sorts_in_the_database(clinic_db):
+    source = RepositorySource(PatientRepository(clinic_db), names)
+    assert source.count() == 3
+    assert source.rows('patient_name', False, 1, 10) == [('Maria Ionescu',), ('Ștefan Popescu',)]
+    # '-' flips the direction: youngest first is the oldest birthdate last
+    assert source.rows('-patient_birthdate', False, 0, 3) == \
+        source.rows('patient_birthdate', True, 0, 3)
+
+
+def test_repository_source_filters(clinic_db):
+    source = RepositorySource(AppointmentRepository(clinic_db),
+                              lambda rows: [row.appointment_id for row in rows], patient_id=2)
+    assert source.count() == 2
+    assert source.rows('date', True, 0, 10) == [3, 2]
+
+
+def test_list_source():
+    rows = [('b', 2), ('a', None), ('c', 1)]
+    source = ListSource(rows, ['name', 'visits'])
+    assert source.count() == 3
+    assert source.rows(None, False, 0, 10) == rows
+    # missing values sort first, like NULL in sqlite
+    assert source.rows('visits', False, 0, 10) == [('a', None), ('c', 1), ('b', 2)]
+    assert source.rows('name', True, 1, 1) == [('b', 2)]
@@ -0,0 +1,97 @@
+import threading
+import time
+
+from gui_tasks import TaskRunner
+
+
+class FakeRoot:
+    # stands in for the Tk root - after() callbacks run when drain() asks
+    def __init__(self):
+        self.callbacks = []
+        self.errors = []
+
+    def after(self, ms, callback):
+        self.callbacks.append(callback)
+
+    def report_callback_exception(self, kind, value, traceback):
+        self.errors.append(value)
+
+
+def drain(root, runner, timeout=5):
+    # the Tk loop: poll until every task has come back
+    deadline = time.monotonic() + timeout
+    while runner._pending and time.monotonic() < deadline:
+        time.sleep(0.005)
+        callbacks, root.callbacks = root.callbacks, []
+        for callback in callbacks:
+            callback()
+    assert not runner._pending
+
+
+def test_results_reach_the_main_thread():
+    root = FakeRoot()
+    busy = []
+    runner = TaskRunner(root, on_busy=busy.append)
+    done, progress = [], []
+
+    def work(task):
+        task.report("halfway")
+        return threading.current_thread()
+
+    runner.submit('patients', work, lambda thread: done.append((thread, threading.current_thread())),
+                  on_progress=progress.append)
+    drain(root, runner)
+    (worker, caller), = done
+    assert worker is not threading.main_thread() and caller is threading.main_thread()
+    assert progress == ["halfway"]
+    assert busy[0] == 1 and busy[-1] == 0
+    runner.shutdown()
+
+
+def test_a_newer_task_drops_the_older_result():
+    root = FakeRoot()
+    runner = TaskRunner(root, max_workers=1)
+    started, release = threading.Event(), threading.Event()
+    done = []
+
+    def slow(task):
+        started.set()
+        release.wait(5)
+        return 'old'
+
+    def waiting(task):
+        return 'never'
+
+    runner.submit('patients', slow, done.append)
+    started.wait(5)
+    # queued behind the slow one on the only worker, cancelled before it runs
+    queued = runner.submit('payments', waiting, done.append)
+    runner.cancel(queued)
+    runner.submit('patients', lambda task: 'new', done.append)
+    release.set()
+    drain(root, runner)
+    assert done == ['new']
+    runner.shutdown()
+
+
+def test_errors_and_cancelling_from_the_worker():
+    root = FakeRoot()
+    runner = TaskRunner(root)
+    errors = []
+
+    def fail(task):
+        raise LookupError("no such patient")
+
+    def stop(task):
+        task.cancel()
+        task.check()
+
+    runner.submit('a', fail, None, on_error=errors.append)
+    runner.submit('b', fail, None)
+    runner.submit('c', stop, errors.append)
+    drain(root, runner)
+    assert [type(e) for e in errors] == [LookupError]
+    assert [type(e) for e in root.errors] == [LookupError]
+    assert runner.busy() == 0
+    runner.shutdown()
+    assert runner.submit('a', fail, None) is None
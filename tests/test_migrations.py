@@ -0,0 +1,157 @@
+import sqlite3
+
+import pytest
+
+from database import migrations, rollups
+from database.day_columns import backfill_day_columns, check_day_columns
+from database.migrations import get_schema_version, migrate
+from database.query_plan import SHIPPED_QUERIES, collect_plans, full_scans
+from database.rollups import check_rollups
+
+
+def columns(conn, table):
+    return [row[1] for row in conn.execute(f"PRAGMA table_info({table})")]
+
+
+@pytest.fixture
+def version_7(tmp_path):
+    # a database from before the day columns, with rows written the old way
+    conn = sqlite3.connect(str(tmp_path / "v7.db"))
+    migrate(conn, target=7)
+    conn.execute("INSERT INTO patients (patient_name, patient_birthdate, first_visit_at, gender, city) "
+                 "VALUES ('Maria Ionescu', '1980-04-02', '2025-01-05', 'F', 'Cluj')")
+    conn.execute("INSERT INTO doctors (doctor_id, doctor_name, speciality, room, is_active) "
+                 "VALUES (1, 'Dr. Ana Pop', 'Orthodontics', '101', 1)")
+    conn.executemany("INSERT INTO appointments (patient_id, doctor_id, date, start_time, end_time, status, "
+                     "source, procedure_name, procedure_category, created_at) "
+                     "VALUES (1, 1, ?, ?, ?, 'Completed', 'Online', 'Braces', 'Orthodontics', ?)",
+                     [('2025-03-03', '09:00', '10:00', '2025-02-01 10:00:00'),
+                      ('2025-03-10', '9:30', '10:15', '2025-02-02 11:00:00'),
+                      ('not a date', None, '11:00', None)])
+    conn.execute("INSERT INTO payments (appointment_id, amount, method, paid_at) "
+                 "VALUES (1, 1500.0, 'Card', '2025-03-03 10:05:00')")
+    conn.commit()
+    yield conn
+    conn.close()
+
+
+def test_day_columns_are_backfilled(version_7):
+    assert migrate(version_7, target=8) == [8]
+    assert check_day_columns(version_7) == []
+    rows = version_7.execute("SELECT epoch_day, start_minute, end_minute FROM appointments ORDER BY id")
+    assert rows.fetchall() == [(20150, 540, 600), (20157, 570, 615), (None, None, 660)]
+
+
+def test_failed_day_column_migration_changes_nothing(version_7, monkeypatch):
+    def fail(conn):
+        raise RuntimeError("boom")
+
+    # one row per batch, so a backfill that commits per batch would show
+    steps = [(lambda conn: backfill_day_columns(conn, batch_size=1)) if step is backfill_day_columns else step
+             for step in migrations.DAY_COLUMN_MIGRATION]
+    monkeypatch.setattr(migrations, 'MIGRATIONS',
+                        [(8, "integer day and minute columns", steps + [fail])])
+    with pytest.raises(RuntimeError):
+        migrate(version_7, target=8)
+
+    assert get_schema_version(version_7) == 7
+    assert 'epoch_day' not in columns(version_7, 'appointments')
+    assert 'paid_day' not in columns(version_7, 'payments')
+
+
+def test_backfill_with_commits_can_run_again(version_7):
+    migrate(version_7, target=8)
+    version_7.execute("UPDATE appointments SET epoch_day = NULL")
+    version_7.commit()
+    assert check_day_columns(version_7) == [('appointments', 'epoch_day', 2)]
+
+    version_7.execute("BEGIN IMMEDIATE")
+    assert backfill_day_columns(version_7, batch_size=1, commit=True) == 4
+    version_7.commit()
+    assert check_day_columns(version_7) == []
+
+
+# the columns the shipped database already has (migration 1 adds notes and
+# the payment status to it)
+APPOINTMENT_NAMES = ("SELECT id, date, start_time, end_time, status, source, procedure_name, procedure_category, "
+                     "created_at FROM {0} ORDER BY id")
+PAYMENT_NAMES = "SELECT id, appointment_id, amount, method, paid_at FROM {0} ORDER BY id"
+
+
+def test_baseline_database_upgrades_to_the_latest_version(baseline_db):
+    conn = sqlite3.connect(baseline_db)
+    appointments = conn.execute(APPOINTMENT_NAMES.format('appointments')).fetchall()
+    payments = conn.execute(PAYMENT_NAMES.format('payments')).fetchall()
+
+    assert migrate(conn) == list(range(1, migrations.LATEST_VERSION + 1))
+    assert migrate(conn) == []
+
+    # the names come back through the views, the tables only have codes
+    assert conn.execute(APPOINTMENT_NAMES.format('appointment_details')).fetchall() == appointments
+    assert conn.execute(PAYMENT_NAMES.format('payment_details')).fetchall() == payments
+    assert conn.execute("SELECT DISTINCT status FROM payment_details").fetchall() == [('Completed',)]
+    assert 'status' not in columns(conn, 'appointments')
+    assert 'method' not in columns(conn, 'payments')
+
+    assert check_rollups(conn) == []
+    assert check_day_columns(conn) == []
+    assert conn.execute("PRAGMA foreign_key_check").fetchall() == []
+    assert conn.execute("PRAGMA integrity_check").fetchone() == ('ok',)
+    conn.close()
+
+
+def test_rollups_are_rekeyed_by_migration_9(tmp_path):
+    conn = sqlite3.connect(str(tmp_path / "clinic.db"))
+    migrate(conn, target=3)
+    # migration 3 still builds the text-keyed rollups and their triggers
+    assert 'status' in columns(conn, 'rollup_appointments_daily')
+    triggers = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'trigger'")}
+    assert set(rollups.ROLLUP_TRIGGERS) <= triggers
+
+    migrate(conn)
+    assert 'status_id' in columns(conn, 'rollup_appointments_daily')
+    assert 'status' not in columns(conn, 'rollup_appointments_daily')
+    sql = conn.execute("SELECT sql FROM sqlite_master WHERE name = 'trg_rollup_appointments_insert'").fetchone()[0]
+    assert 'status_id' in sql
+    conn.close()
+
+
+def test_every_version_is_recorded_once(tmp_path):
+    conn = sqlite3.connect(str(tmp_path / "clinic.db"))
+    assert migrate(conn, target=2) == [1, 2]
+    assert migrate(conn) == list(range(3, migrations.LATEST_VERSION + 1))
+    assert migrate(conn) == []
+    versions = [row[0] for row in conn.execute("SELECT version FROM schema_version ORDER BY version")]
+    assert versions == list(range(1, migrations.LATEST_VERSION + 1))
+    conn.close()
+
+
+@pytest.mark.parametrize('database', ['db_path', 'clinic_db'])
+def test_shipped_queries_use_indexes(database, request):
+    conn = sqlite3.connect(request.getfixturevalue(database))
+    plans = collect_plans(conn)
+    conn.close()
+    scans = {name: full_scans(plan) for name, plan in plans.items()
+             if not SHIPPED_QUERIES[name][2] and full_scans(plan)}
+    assert scans == {}
+
+
+def test_migration_10_recounts_malformed_start_hours(tmp_path):
+    conn = sqlite3.connect(str(tmp_path / "clinic.db"))
+    migrate(conn, target=9)
+    conn.execute("INSERT INTO patients (patient_name, patient_birthdate, first_visit_at, gender, city) "
+                 "VALUES ('Maria Ionescu', '1980-04-02', '2025-01-05', 'F', 'Cluj')")
+    conn.execute("INSERT INTO doctors (doctor_id, doctor_name, speciality, room, is_active) "
+                 "VALUES (1, 'Dr. Ana Pop', 'Orthodontics', '101', 1)")
+    conn.execute("INSERT INTO appointment_statuses (name) SELECT 'Completed' "
+                 "WHERE NOT EXISTS (SELECT 1 FROM appointment_statuses WHERE name = 'Completed')")
+    conn.execute("INSERT INTO appointments (patient_id, doctor_id, date, start_time, end_time, status_id) "
+                 "SELECT 1, 1, '2025-03-03', '9h30', '10:00', id FROM appointment_statuses WHERE name = 'Completed'")
+    # what the version 9 triggers counted for it
+    conn.execute("INSERT OR REPLACE INTO rollup_completed_hours_daily VALUES ('2025-03-03', 0, 1)")
+    conn.commit()
+
+    assert migrate(conn) == [10]
+    assert conn.execute("SELECT * FROM rollup_completed_hours_daily").fetchall() == []
+    assert check_rollups(conn) == []
+    conn.close()
@@ -0,0 +1,69 @@
+import pytest
+
+from repositories import AppointmentRepository, PatientRepository
+
+PATIENT = {'birthdate': '1980-01-01', 'first_visit': '2025-01-01', 'gender': 'F', 'city': 'Cluj'}
+
+
+@pytest.fixture
+def patients(db_path):
+    repo = PatientRepository(db_path)
+    repo.create_many(dict(PATIENT, name=f"Patient {i:02}") for i in range(25))
+    return repo
+
+
+def ids(items):
+    return [item.patient_id for item in items]
+
+
+def test_pages_walk_the_table_once(patients):
+    everything = ids(patients.get_all())
+    walked, after_id = [], None
+    while True:
+        page = patients.page(after_id, 10)
+        if not page:
+            break
+        walked += ids(page)
+        after_id = page[-1].patient_id
+    assert walked == everything
+    assert len(everything) == patients.count() == 25
+
+
+@pytest.mark.parametrize('batch_size', [1, 5, 7, 25, 100])
+def test_iter_all_matches_get_all(patients, batch_size):
+    assert ids(patients.iter_all(batch_size)) == ids(patients.get_all())
+
+
+def test_iter_all_gives_up_the_connection_between_pages(patients):
+    rows = patients.iter_all(10)
+    first = [next(rows) for _ in range(10)]
+    # a write between pages doesn't wait on the iterator
+    patients.update(first[0].patient_id, {'city': 'Iasi'})
+    assert len(first + list(rows)) == 25
+
+
+def test_sorted_page(patients):
+    names = [p.patient_name for p in patients.sorted_page('patient_name', descending=True, offset=3, limit=4)]
+    assert names == ['Patient 21', 'Patient 20', 'Patient 19', 'Patient 18']
+    # ties are broken by id, so offsets never skip or repeat a row
+    cities = patients.sorted_page('city', limit=10) + patients.sorted_page('city', offset=10, limit=100)
+    assert ids(cities) == ids(patients.get_all())
+
+
+def test_bad_arguments(patients):
+    with pytest.raises(ValueError):
+        patients.sorted_page('patient_name; DROP TABLE patients')
+    with pytest.raises(ValueError):
+        patients.page(None, 0)
+    with pytest.raises(ValueError):
+        patients.sorted_page(offset=-1)
+    with pytest.raises(ValueError):
+        next(patients.iter_all(0))
+
+
+def test_one_patients_appointments(clinic_db):
+    repo = AppointmentRepository(clinic_db)
+    assert [a.appointment_id for a in repo.iter_all(1, patient_id=2)] == [2, 3]
+    assert [a.appointment_id for a in repo.page(2, patient_id=2)] == [3]
+    assert [a.appointment_id for a in repo.sorted_page('date', descending=True, patient_id=2)] == [3, 2]
+    assert (repo.count(patient_id=2), repo.count()) == (2, 4)
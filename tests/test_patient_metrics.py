@@ -0,0 +1,40 @@
+from datetime import date
+
+from services.patient_analytics_service import PatientAnalyticsService
+
+TODAY = date(2025, 6, 30)
+
+
+def test_metrics_for_one_patient(clinic_db):
+    metrics = PatientAnalyticsService(clinic_db).get_patient_metrics(2, TODAY)
+    assert metrics['patient'].patient_name == 'Ștefan Popescu'
+    assert (metrics['total_appointments'], metrics['completed'], metrics['cancelled_other']) == (2, 1, 1)
+    assert metrics['last_appointment'] == ('2025-03-04', 'Root Canal')
+    assert (metrics['first_visit'], metrics['last_visit']) == ('2025-03-04', '2025-03-04')
+    assert metrics['days_since_last_visit'] == 118
+    assert (metrics['total_spent'], metrics['lifetime_value'], metrics['average_per_visit']) == \
+        (1000.0, 1000.0, 1000.0)
+
+
+def test_patient_without_visits_or_payments(clinic_db):
+    metrics = PatientAnalyticsService(clinic_db).get_patient_metrics(3, TODAY)
+    assert (metrics['total_appointments'], metrics['completed']) == (1, 0)
+    assert metrics['last_appointment'] == ('2025-04-10', 'Cleaning')
+    assert metrics['first_visit'] is None and metrics['visits_per_year'] is None
+    assert (metrics['total_spent'], metrics['lifetime_value'], metrics['average_per_visit']) == (0, 0, None)
+
+
+def test_unknown_patient(clinic_db):
+    service = PatientAnalyticsService(clinic_db)
+    assert service.get_patient_metrics(99, TODAY) is None
+    assert service.get_patients_metrics([99], TODAY) == {}
+
+
+def test_batch_matches_one_by_one(clinic_db):
+    service = PatientAnalyticsService(clinic_db)
+    batch = service.get_patients_metrics([3, 1, 2, 99, 1], TODAY)
+    assert sorted(batch) == [1, 2, 3]
+    for patient_id, metrics in batch.items():
+        single = service.get_patient_metrics(patient_id, TODAY)
+        assert single.pop('patient').patient_id == metrics.pop('patient').patient_id
+        assert single == metrics
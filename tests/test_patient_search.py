@@ -0,0 +1,46 @@
+from repositories import PatientRepository
+
+PATIENT = {'birthdate': '1980-01-01', 'first_visit': '2025-01-01', 'gender': 'F', 'city': 'Cluj'}
+
+
+def add_patients(db_path, names):
+    PatientRepository(db_path).create_many(dict(PATIENT, name=name) for name in names)
+
+
+def test_search_returns_every_match_by_default(db_path):
+    add_patients(db_path, [f"Ana Pop {i:03d}" for i in range(250)] + ["Ion Rusu"])
+    repo = PatientRepository(db_path)
+    assert len(repo.search_by_name("pop")) == 250
+    assert len(repo.search("pop")) == 250
+
+
+def test_search_limit(db_path):
+    add_patients(db_path, [f"Ana Pop {i:03d}" for i in range(250)])
+    repo = PatientRepository(db_path)
+    assert len(repo.search("pop", limit=100)) == 100
+    assert len(repo.search_by_name("pop", limit=10)) == 10
+
+
+def test_search_ignores_diacritics_and_matches_word_starts(clinic_db):
+    repo = PatientRepository(clinic_db)
+    assert [p.patient_name for p in repo.search_by_name("stef pop")] == ['Ștefan Popescu']
+    assert repo.search_by_name("tefan") == []
+
+
+def test_name_matches_come_before_city_matches(db_path):
+    add_patients(db_path, ["Zoe Cluj"])
+    PatientRepository(db_path).create(dict(PATIENT, name="Ana Marin", city="Cluj"))
+    found = [p.patient_name for p in PatientRepository(db_path).search("cluj")]
+    assert found == ["Zoe Cluj", "Ana Marin"]
+
+
+def test_index_follows_updates_and_deletes(db_path):
+    add_patients(db_path, ["Maria Ionescu"])
+    repo = PatientRepository(db_path)
+    patient = repo.search_by_name("maria")[0]
+    repo.update(patient.patient_id, {'patient_name': 'Maria Georgescu'})
+    assert [p.patient_name for p in repo.search_by_name("georgescu")] == ['Maria Georgescu']
+    assert repo.search_by_name("ionescu") == []
+
+    repo.delete(patient.patient_id)
+    assert repo.search_by_name("maria") == []
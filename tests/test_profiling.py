@@ -0,0 +1,81 @@
+import io
+import json
+
+import pytest
+
+from database.connection import close_all_pools, pooled_connection
+from database.profiling import DEFAULT_CAPACITY, DEFAULT_SLOW_MS, PROFILER, params_shape
+from repositories import PatientRepository
+
+
+@pytest.fixture
+def profiler(clinic_db):
+    # the seeding opened plain connections - profiled ones are opened after enable()
+    close_all_pools()
+    PROFILER.enable(slow_ms=1e9, slow_log=io.StringIO())
+    # the pragmas run when the connection opens, start counting after them
+    with pooled_connection(clinic_db):
+        pass
+    PROFILER.clear()
+    yield PROFILER
+    PROFILER.disable()
+    PROFILER.clear()
+    PROFILER.enable(DEFAULT_CAPACITY, DEFAULT_SLOW_MS)
+    PROFILER.disable()
+
+
+def test_calls_and_their_queries(profiler, clinic_db):
+    PatientRepository(clinic_db).read(2)
+    call, = [r for r in profiler.records() if r['kind'] == 'call']
+    query, = [r for r in profiler.records() if r['kind'] == 'query' and r['stack']]
+    assert (call['name'], call['queries']) == ('PatientRepository.read', 1)
+    assert (query['stack'], query['params'], query['rows']) == (['PatientRepository.read'], '(int)', 1)
+    assert call['wall_ms'] >= call['sql_ms'] >= 0
+    assert any(line.startswith('PatientRepository.read;SQL SELECT') for line in profiler.folded_stacks())
+
+
+def test_a_generator_is_timed_while_it_is_consumed(profiler, clinic_db):
+    rows = PatientRepository(clinic_db).iter_all(batch_size=2)
+    assert [r['name'] for r in profiler.records()] == ['PatientRepository.iter_all']
+    assert len(list(rows)) == 3
+    # a full page of 2, then a short one - each page() is a child of iter_all
+    pages = [r for r in profiler.records() if r.get('name') == 'PatientRepository.page']
+    assert [page['stack'] for page in pages] == [['PatientRepository.iter_all']] * 2
+    iter_all = profiler.records()[0]
+    assert iter_all['wall_ms'] >= sum(page['wall_ms'] for page in pages)
+
+
+def test_slow_queries_are_logged(profiler, clinic_db):
+    profiler.slow_ms = 0
+    PatientRepository(clinic_db).read(1)
+    assert profiler.slow_log.getvalue().startswith('[slow query')
+
+
+def test_nothing_is_recorded_when_disabled(profiler, clinic_db):
+    profiler.disable()
+    # connections opened while it was enabled stay profiled until they close
+    close_all_pools()
+    profiler.clear()
+    PatientRepository(clinic_db).read(1)
+    assert profiler.records() == []
+
+
+def test_ring_buffer_and_exports(profiler, clinic_db, tmp_path):
+    profiler.enable(capacity=3, slow_ms=1e9)
+    repo = PatientRepository(clinic_db)
+    for patient_id in (1, 2, 3):
+        repo.read(patient_id)
+    assert len(profiler.records()) == 3 and profiler.recorded == 6
+
+    profiler.export_json(tmp_path / "profile.json")
+    with open(tmp_path / "profile.json") as f:
+        assert json.load(f)['recorded'] == 6
+    queries, calls = profiler.summary()
+    assert calls[0][0] == 'PatientRepository.read'
+
+
+def test_params_shape():
+    # types only, never the values
+    assert params_shape((1, 2, 'Maria', 3.5, None)) == '(int*2, str, float, NoneType)'
+    assert params_shape({'name': 'Maria'}) == '{name: str}'
+    assert params_shape(None) == '()'
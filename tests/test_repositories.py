@@ -0,0 +1,34 @@
+from repositories import AppointmentRepository, DoctorRepository, PatientRepository, PaymentRepository
+
+
+def test_models_get_every_column_in_the_right_field(clinic_db):
+    patient = PatientRepository(clinic_db).read(2)
+    assert (patient.patient_name, patient.patient_birthdate, patient.first_visit_at, patient.gender,
+            patient.city) == ('Ștefan Popescu', '1995-11-20', '2025-02-10', 'M', 'Iasi')
+
+    doctor = DoctorRepository(clinic_db).read(2)
+    assert (doctor.doctor_name, doctor.speciality, doctor.room, doctor.is_active) == \
+        ('Dr. Ion Rusu', 'Endodontics', '102', 1)
+
+    appointment = AppointmentRepository(clinic_db).read(3)
+    assert (appointment.patient_id, appointment.doctor_id, appointment.date, appointment.start_time,
+            appointment.end_time, appointment.status, appointment.procedure_name, appointment.source,
+            appointment.procedure_category) == \
+        (2, 2, '2025-03-04', '11:00', '12:00', 'Completed', 'Root Canal', 'Online', 'Endodontics')
+    assert appointment.get_duration_minutes() == 60
+
+    payment = PaymentRepository(clinic_db).read(2)
+    assert (payment.appointment_id, payment.amount, payment.method, payment.status) == \
+        (3, 800.0, 'Cash', 'Completed')
+
+
+def test_pages_build_the_same_models_as_read(clinic_db):
+    repo = AppointmentRepository(clinic_db)
+    for appointment in repo.page(None, 10) + repo.sorted_page('date', descending=True):
+        expected = repo.read(appointment.appointment_id)
+        assert (appointment.status, appointment.procedure_name, appointment.source) == \
+            (expected.status, expected.procedure_name, expected.source)
+
+    payments = PaymentRepository(clinic_db)
+    assert [p.method for p in payments.page()] == ['Card', 'Cash', 'Card']
+    assert [p.amount for p in payments.sorted_page('amount')] == [200.0, 800.0, 1500.0]
@@ -0,0 +1,70 @@
+import time
+
+from repositories import PatientRepository, PaymentRepository
+from services.analytics_service import AnalyticsService
+from services.result_cache import ResultCache
+
+
+def test_second_call_is_a_hit(clinic_db):
+    analytics = AnalyticsService(clinic_db)
+    first = analytics.get_revenue_analysis()
+    assert analytics.get_revenue_analysis() == first
+    # the same doctors in another order are the same entry
+    analytics.get_doctor_performance(doctor_ids=[2, 1])
+    analytics.get_doctor_performance(doctor_ids=[1, 2])
+    assert analytics.cache_stats()['hits'] == 2
+
+
+def test_callers_get_their_own_copy(clinic_db):
+    analytics = AnalyticsService(clinic_db)
+    analytics.get_revenue_analysis()['payment_methods']['Card'] = 99
+    assert analytics.get_revenue_analysis()['payment_methods']['Card'] == 2
+
+
+def test_a_write_drops_the_results_that_read_the_table(clinic_db):
+    analytics = AnalyticsService(clinic_db)
+    analytics.get_revenue_analysis()
+    analytics.get_patient_demographics()
+
+    PaymentRepository(clinic_db).create({'appointment_id': 4, 'amount': 100.0, 'method': 'Cash'})
+    assert analytics.get_revenue_analysis()['total_revenue'] == 2600.0
+    # demographics don't read payments, they stay cached
+    analytics.get_patient_demographics()
+    assert analytics.cache_stats()['hits'] == 1
+
+
+def test_writes_to_another_database_are_ignored(clinic_db, tmp_path):
+    analytics = AnalyticsService(clinic_db)
+    analytics.get_patient_demographics()
+    other = str(tmp_path / "other.db")
+    PatientRepository(other).create({'name': 'Ana Marin', 'birthdate': '1990-01-01', 'first_visit': '2025-01-01',
+                                     'gender': 'F', 'city': 'Cluj'})
+    analytics.get_patient_demographics()
+    assert analytics.cache_stats()['hits'] == 1
+
+
+def test_entries_expire_after_the_ttl():
+    cache = ResultCache(ttl=0.01)
+    cache.put('key', 1, ['patients'])
+    assert cache.get('key') == (True, 1)
+    time.sleep(0.02)
+    assert cache.get('key') == (False, None)
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = ResultCache(max_entries=2)
+    cache.put('a', 1, [])
+    cache.put('b', 2, [])
+    cache.get('a')
+    cache.put('c', 3, [])
+    assert cache.get('b') == (False, None)
+    assert cache.get('a') == (True, 1)
+    assert cache.stats()['evictions'] == 1
+
+
+def test_value_computed_across_a_write_is_not_stored():
+    cache = ResultCache()
+    generation = cache.generation
+    cache.invalidate('payments')
+    cache.put('key', 1, ['payments'], generation)
+    assert cache.get('key') == (False, None)
@@ -0,0 +1,81 @@
+from database.connection import pooled_connection
+from database.rollups import check_rollups, rebuild_rollups
+from repositories import AppointmentRepository, PaymentRepository
+from services.analytics_service import AnalyticsService
+
+
+def assert_rollups_match(db_path):
+    with pooled_connection(db_path) as conn:
+        assert check_rollups(conn) == []
+
+
+def test_seeded_rollups_match(clinic_db):
+    assert_rollups_match(clinic_db)
+
+
+def test_appointment_updates_move_the_counts_and_their_payments(clinic_db):
+    appointments = AppointmentRepository(clinic_db)
+    # the root canal moves to April with another doctor, its two payments follow it
+    appointments.update(3, {'date': '2025-04-02', 'doctor_id': 1, 'procedure_name': 'Crown'})
+    appointments.update(4, {'status': 'Completed', 'start_time': '15:00'})
+    appointments.update(2, {'status': None, 'date': None})
+    assert_rollups_match(clinic_db)
+
+    revenue = AnalyticsService(clinic_db, cache=False).get_revenue_analysis()
+    assert revenue['monthly_revenue'] == {'2025-03': 1500.0, '2025-04': 1000.0}
+    assert dict(revenue['top_procedures']) == {'Braces': 1500.0, 'Crown': 1000.0}
+
+
+def test_payment_writes(clinic_db):
+    payments = PaymentRepository(clinic_db)
+    new_id = payments.create({'appointment_id': 4, 'amount': 50.0, 'method': 'Transfer'})
+    payments.update(2, {'amount': 750.0, 'method': 'Card'})
+    payments.update(3, {'appointment_id': 1})
+    payments.delete(new_id)
+    assert_rollups_match(clinic_db)
+
+
+def test_deletes_take_rows_back_out(clinic_db):
+    payments = PaymentRepository(clinic_db)
+    payments.delete(1)
+    AppointmentRepository(clinic_db).delete(1)
+    assert_rollups_match(clinic_db)
+    with pooled_connection(clinic_db) as conn:
+        # no rows left behind with a zero count
+        assert conn.execute("SELECT COUNT(*) FROM rollup_appointments_daily WHERE appointment_count <= 0"
+                            ).fetchone() == (0,)
+        assert conn.execute("SELECT COUNT(*) FROM rollup_revenue_daily WHERE payment_count <= 0").fetchone() == (0,)
+
+
+def test_rebuild_fixes_a_damaged_rollup(clinic_db):
+    with pooled_connection(clinic_db) as conn:
+        conn.execute("DELETE FROM rollup_doctor_daily")
+        conn.commit()
+        assert check_rollups(conn) == ['rollup_doctor_daily']
+        rebuild_rollups(conn)
+        conn.commit()
+    assert_rollups_match(clinic_db)
+
+
+def test_malformed_start_times_are_left_out_of_peak_hours(clinic_db):
+    appointments = AppointmentRepository(clinic_db)
+    appointments.update(3, {'start_time': '9h30'})
+    appointments.create({'patient_id': 3, 'doctor_id': 2, 'date': '2025-03-05', 'start_time': '25:70',
+                         'end_time': '26:00', 'status': 'Completed', 'procedure_name': 'Cleaning',
+                         'procedure_category': 'Hygiene'})
+    assert_rollups_match(clinic_db)
+
+    # the rollup (no filter) and appointments (every doctor) agree, no hour 0
+    analytics = AnalyticsService(clinic_db, cache=False)
+    peak = analytics.get_peak_hours_analysis()
+    assert peak == analytics.get_peak_hours_analysis(doctor_ids=[1, 2])
+    assert peak['hourly_distribution'] == {9: 1}
+
+    # and a time that gets fixed is counted again
+    appointments.update(3, {'start_time': '11:00'})
+    assert_rollups_match(clinic_db)
+    assert analytics.get_peak_hours_analysis()['hourly_distribution'] == {9: 1, 11: 1}
+    with pooled_connection(clinic_db) as conn:
+        rebuild_rollups(conn)
+        conn.commit()
+    assert analytics.get_peak_hours_analysis()['hourly_distribution'] == {9: 1, 11: 1}
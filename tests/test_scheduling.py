@@ -0,0 +1,61 @@
+from datetime import datetime
+
+import pytest
+
+from repositories import AppointmentRepository
+from services.scheduling_service import SchedulingService, SlotUnavailableError
+
+DAY = '2025-03-03'
+
+
+def booking(start, end, doctor_id=1, day=DAY, **extra):
+    return dict({'patient_id': 3, 'doctor_id': doctor_id, 'date': day, 'start_time': start, 'end_time': end,
+                 'procedure_name': 'Consultation', 'procedure_category': 'Diagnostic'}, **extra)
+
+
+def test_free_slots_skip_bookings_but_not_cancellations(clinic_db):
+    # doctor 1 has 09:00-10:00 completed and 10:00-10:30 cancelled that day
+    assert SchedulingService(clinic_db).free_slots(1, DAY) == [('08:00', '09:00'), ('10:00', '20:00')]
+
+
+def test_book_refuses_an_overlap(clinic_db):
+    service = SchedulingService(clinic_db)
+    assert service.conflicts(1, DAY, '09:30', '10:15') == [1]
+    with pytest.raises(SlotUnavailableError) as error:
+        service.book(booking('09:30', '10:15'))
+    assert error.value.conflicts == [1]
+    # touching the end of a booking is fine, so is the cancelled slot
+    assert service.book(booking('10:00', '10:30'))
+    assert not service.is_free(1, DAY, '10:00', '10:30')
+
+
+def test_cancel_frees_the_slot(clinic_db):
+    service = SchedulingService(clinic_db)
+    service.cancel(1)
+    assert service.is_free(1, DAY, '09:00', '10:00')
+    assert service.book(booking('09:00', '10:00'))
+
+
+def test_reschedule_checks_the_new_time(clinic_db):
+    service = SchedulingService(clinic_db)
+    appointment_id = service.book(booking('11:00', '11:30'))
+    with pytest.raises(SlotUnavailableError):
+        service.reschedule(appointment_id, {'start_time': '09:45', 'end_time': '10:15'})
+    # moving within its own slot doesn't conflict with itself
+    assert service.reschedule(appointment_id, {'start_time': '11:15', 'end_time': '11:45'})
+    assert AppointmentRepository(clinic_db).read(appointment_id).start_time == '11:15'
+
+
+def test_an_appointment_without_status_keeps_its_slot(clinic_db):
+    AppointmentRepository(clinic_db).create(booking('14:00', '15:00', status=None))
+    service = SchedulingService(clinic_db)
+    assert not service.is_free(1, DAY, '14:30', '15:30')
+    with pytest.raises(SlotUnavailableError):
+        service.book(booking('14:30', '15:30'))
+
+
+def test_next_available_takes_the_earliest_doctor(clinic_db):
+    service = SchedulingService(clinic_db)
+    # doctor 1 is the only orthodontist and is busy 09:00-10:00
+    slot = service.next_available('Orthodontics', duration=60, after=datetime(2025, 3, 3, 8, 30))
+    assert slot == {'doctor_id': 1, 'date': DAY, 'start_time': '10:00', 'end_time': '11:00'}
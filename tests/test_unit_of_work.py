@@ -0,0 +1,73 @@
+import pytest
+
+from database.connection import pooled_connection
+from database.unit_of_work import UnitOfWork
+from repositories import PatientRepository
+
+PATIENT = {'name': 'Radu Stan', 'birthdate': '1970-01-01', 'first_visit': '2025-05-01', 'gender': 'M',
+           'city': 'Brasov'}
+
+
+def names(db_path):
+    with pooled_connection(db_path) as conn:
+        return [row[0] for row in conn.execute("SELECT patient_name FROM patients ORDER BY patient_id")]
+
+
+def test_commits_all_writes_together(db_path):
+    repo = PatientRepository(db_path)
+    with UnitOfWork(db_path):
+        repo.create(PATIENT)
+        repo.create(dict(PATIENT, name='Dana Stan'))
+    assert names(db_path) == ['Radu Stan', 'Dana Stan']
+
+
+def test_rolls_back_everything_on_error(db_path):
+    repo = PatientRepository(db_path)
+    with pytest.raises(RuntimeError):
+        with UnitOfWork(db_path):
+            repo.create(PATIENT)
+            raise RuntimeError("boom")
+    assert names(db_path) == []
+
+
+def test_nested_unit_only_undoes_its_own_writes(db_path):
+    repo = PatientRepository(db_path)
+    with UnitOfWork(db_path) as outer:
+        repo.create(PATIENT)
+        with pytest.raises(RuntimeError):
+            with UnitOfWork(db_path) as inner:
+                assert inner.savepoint is not None
+                repo.create(dict(PATIENT, name='Dana Stan'))
+                raise RuntimeError("boom")
+        assert outer.owns_transaction
+    assert names(db_path) == ['Radu Stan']
+
+
+def test_leaves_a_callers_transaction_to_the_caller(db_path):
+    repo = PatientRepository(db_path)
+    with pooled_connection(db_path) as conn:
+        conn.execute("BEGIN")
+        conn.execute("INSERT INTO patients (patient_name, patient_birthdate, first_visit_at, gender, city) "
+                     "VALUES ('Caller', '1990-01-01', '2025-01-01', 'F', 'Cluj')")
+        with UnitOfWork(db_path) as uow:
+            assert not uow.owns_transaction
+            repo.create(PATIENT)
+        # the unit didn't commit the caller's transaction
+        assert conn.in_transaction
+        conn.rollback()
+    assert names(db_path) == []
+
+
+def test_failing_unit_keeps_the_callers_writes(db_path):
+    repo = PatientRepository(db_path)
+    with pooled_connection(db_path) as conn:
+        conn.execute("BEGIN")
+        conn.execute("INSERT INTO patients (patient_name, patient_birthdate, first_visit_at, gender, city) "
+                     "VALUES ('Caller', '1990-01-01', '2025-01-01', 'F', 'Cluj')")
+        with pytest.raises(RuntimeError):
+            with UnitOfWork(db_path):
+                repo.create(PATIENT)
+                raise RuntimeError("boom")
+        assert conn.in_transaction
+        conn.commit()
+    assert names(db_path) == ['Caller']